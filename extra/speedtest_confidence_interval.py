@@ -0,0 +1,62 @@
+"""Speedtest of the confidence interval across repeats, comparing the sorting loop, the partition and the row sort.
+
+Run from the root of the repository with ``python extra/speedtest_confidence_interval.py``, the package is imported
+from ``src`` if it is not installed.
+"""
+
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+try:
+    from autotuning_methodology.curves import StochasticOptimizationAlgorithm, get_confidence_interval_ranks
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+    from autotuning_methodology.curves import StochasticOptimizationAlgorithm, get_confidence_interval_ranks
+
+
+def sort_loop(values: np.ndarray, confidence_level: float):
+    """The original implementation, sorting fully and looking up the ranks per row."""
+    lower_rank, upper_rank = get_confidence_interval_ranks(values.shape[1], confidence_level)
+    lower = np.full(values.shape[0], np.nan)
+    upper = np.full(values.shape[0], np.nan)
+    for index, row_sorted in enumerate(np.sort(values, axis=1)):
+        lower[index] = row_sorted[lower_rank]
+        upper[index] = row_sorted[upper_rank]
+    return lower, upper
+
+
+def partition(values: np.ndarray, confidence_level: float):
+    """Partitioning at the ranks instead of sorting, without NaN repeats."""
+    ranks = list(get_confidence_interval_ranks(values.shape[1], confidence_level))
+    return np.partition(values, ranks, axis=1)[:, ranks].transpose()
+
+
+def row_sort(values: np.ndarray, confidence_level: float):
+    """The current implementation, does not use the attributes of the curve."""
+    return StochasticOptimizationAlgorithm.get_confidence_interval(None, values, confidence_level)
+
+
+def performance(name, function, values, repeats=5):
+    timings = list()
+    for _ in range(repeats):
+        start = perf_counter()
+        result = function(values, 0.95)
+        timings.append(perf_counter() - start)
+    print(f"{name}: {round(min(timings), 5)} seconds")
+    return result
+
+
+for resolution, num_repeats in [(int(1e4), 1000), (int(1e5), 50)]:
+    values = np.random.default_rng(0).random((resolution, num_repeats))
+    print(f"{resolution} x {num_repeats} values")
+    expected = performance("sort loop", sort_loop, values)
+    for name, function in [("partition", partition), ("row sort", row_sort)]:
+        result = performance(name, function, values)
+        assert all(np.array_equal(a, b) for a, b in zip(expected, result))
+
+    # with NaN repeats, which are left out per row by looking up the ranks of its number of valid repeats
+    values[: resolution // 2, num_repeats // 2 :] = np.nan
+    performance("row sort with NaN", row_sort, values)
@@ -2,10 +2,19 @@
 
 from __future__ import annotations  # for referring to class within own method
 
+import hashlib
+import json
+import os
+import re
+import shutil
+import zipfile
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 
+from autotuning_methodology.instrumentation import span
+
 
 class Results:
     """Object containing the results for an optimization algorithm on a search space."""
@@ -39,7 +48,7 @@ class ResultsDescription:
         objective_time_keys: list[str],
         objective_performance_keys: list[str],
         minimization: bool,
-        visualization_caches_path: Path,
+        visualization_caches_path: Optional[Path],
     ) -> None:
         """Initialization method for the ResultsDescription object.
 
@@ -54,6 +63,7 @@ class ResultsDescription:
             objective_performance_keys: the objective performance keys used.
             minimization: whether the optimization algorithm performed minimization (attempted to find the minimum).
             visualization_caches_path: path to visualization caches relative to the experiments file, creation allowed.
+                None to keep the results in memory only.
         """
         # all attributes must be hashable for symetric difference checking
         self._version = "1.3.0"
@@ -77,6 +87,24 @@ class ResultsDescription:
             "objective_time_results_per_key",
             "objective_performance_results_per_key",
         ]  # the order must not be changed here! see 'numpy_arrays' in runner.py
+        # the results kept in memory when not cached, never pickled with the ResultsDescription
+        self.__arrays: Optional[dict[str, np.ndarray]] = None
+        self.__provenance: Optional[dict] = None
+
+    def __getstate__(self) -> dict:
+        """Get the state to pickle, without the results kept in memory."""
+        state = dict(vars(self))
+        for in_memory_key in ["_ResultsDescription__arrays", "_ResultsDescription__provenance"]:
+            state.pop(in_memory_key, None)
+        return state
+
+    def __setstate__(self, state: dict):
+        """Set the state from a pickle, without results in memory."""
+        self.__dict__.update(state)
+        self.__arrays = None
+        self.__provenance = None
+        if self.visualization_caches_path is None:
+            self.__stored = False
 
     def __get_as_dict(self) -> dict:
         """Get the ResultsDescription as a dictionary.
@@ -84,8 +112,13 @@ class ResultsDescription:
         Returns:
             a dictionary, similar to self.__dict__ but with some keys removed.
         """
-        dictionary = vars(self)
-        not_saved_keys = ["strategy_display_name", "visualization_caches_path"]
+        dictionary = dict(vars(self))
+        not_saved_keys = [
+            "strategy_display_name",
+            "visualization_caches_path",
+            "_ResultsDescription__arrays",
+            "_ResultsDescription__provenance",
+        ]
         for not_saved_key in not_saved_keys:
             if not_saved_key in dictionary.keys():
                 del dictionary[not_saved_key]
@@ -124,7 +157,8 @@ class ResultsDescription:
 
         # check if same value for each key
         for attribute_key, attribute_value in self.__get_as_dict().items():
-            if attribute_key == "strategy_display_name" or attribute_key == "visualization_caches_path":
+            # whether the results are stored depends on when the description was written, e.g. with a chunk
+            if attribute_key in ["strategy_display_name", "visualization_caches_path", "_ResultsDescription__stored"]:
                 continue
             else:
                 assert (
@@ -144,35 +178,108 @@ class ResultsDescription:
         """Get the filepath for this file, including the filename and extension."""
         return self.__get_cache_filepath() / self.__get_cache_filename()
 
+    def get_results_hash(self) -> Optional[str]:
+        """Get the hash of the cached results file, None if the results are kept in memory or not cached."""
+        if self.visualization_caches_path is None or not self.__check_for_file():
+            return None
+        results_hash = hashlib.blake2b()
+        with self.__get_cache_full_filepath().open("rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                results_hash.update(block)
+        return results_hash.hexdigest()
+
+    def get_curves_cache_filepath(self) -> Optional[Path]:
+        """Get the filepath to cache the curves of the results in, None if the results are kept in memory."""
+        if self.visualization_caches_path is None:
+            return None
+        return self.__get_cache_filepath() / f"{self.device_name}_{self.strategy_name}.curves.pkl"
+
+    def __get_memmap_path(self) -> Path:
+        """Get the path to the folder of the uncompressed results arrays that are memory-mapped."""
+        return self.__get_cache_filepath() / f"{self.device_name}_{self.strategy_name}.mmap"
+
+    def __get_not_stored_message(self) -> str:
+        """Get the message for when there are no results."""
+        if self.visualization_caches_path is None:
+            return f"No results of {self.strategy_name} on {self.kernel_name} in memory"
+        return f"File {self.__get_cache_full_filepath()} does not exist"
+
     def __check_for_file(self) -> bool:
         """Check whether the file exists."""
+        if self.visualization_caches_path is None:
+            return self.__stored
         full_filepath = self.__get_cache_full_filepath()
         self.__stored = full_filepath.exists() and np.DataSource().exists(full_filepath)
         return self.__stored
 
-    def __write_to_file(self, arrays: dict):
+    def __write_to_file(self, arrays: dict, provenance: Optional[dict] = None, overwrite=False):
         """Write this ResultsDescription instance and the accompanying numpy arrays to file."""
-        if self.__stored is True:
+        if self.__stored is True and not overwrite:
             raise ValueError("Do not overwrite a ResultsDescription")
+        if self.visualization_caches_path is None:
+            self.__arrays = dict((key, arrays[key]) for key in self.numpy_arrays_keys)
+            self.__provenance = json.loads(json.dumps(provenance)) if provenance is not None else None
+            self.__stored = True
+            return
         filepath = self.__get_cache_filepath()
         if not filepath.exists():
             filepath.mkdir(parents=True, exist_ok=False)
+        if provenance is not None:
+            arrays = dict(arrays, provenance=np.array(json.dumps(provenance, sort_keys=True)))
         self.__stored = True
-        np.savez_compressed(self.__get_cache_full_filepath(), resultsdescription=self, **arrays)
+        # written to a temporary file first so that an overwritten cache is never left incomplete
+        full_filepath = self.__get_cache_full_filepath()
+        temporary_filepath = full_filepath.with_suffix(".tmp.npz")
+        with span("caching.savez_compressed", kernel=self.kernel_name, strategy=self.strategy_name):
+            np.savez_compressed(temporary_filepath, resultsdescription=self, **arrays)
+        temporary_filepath.replace(full_filepath)
 
-    def set_results(self, arrays: dict):
-        """Set and cache the results."""
-        return self.__write_to_file(arrays)
+    def set_results(self, arrays: dict, provenance: Optional[dict] = None, overwrite=False):
+        """Set and cache the results, or keep them in memory if there is no ``visualization_caches_path``.
 
-    def __read_from_file(self) -> list[np.ndarray]:
+        Args:
+            arrays: the dictionary of results arrays, see ``numpy_arrays_keys``.
+            provenance: the configuration that produced the results, see ``incremental.get_provenance``.
+                Defaults to None.
+            overwrite: whether to overwrite cached results. Defaults to False.
+        """
+        return self.__write_to_file(arrays, provenance, overwrite)
+
+    def get_results_arrays(self, mmap=False) -> dict[str, np.ndarray]:
+        """Get the cached results as a dictionary of arrays, see ``numpy_arrays_keys``.
+
+        Args:
+            mmap: whether to memory-map the arrays read-only instead of loading them, see ``get_results``.
+                Defaults to False.
+        """
+        return dict(zip(self.numpy_arrays_keys, self.__read_from_file(mmap)))
+
+    def get_provenance(self) -> Optional[dict]:
+        """Get the configuration that produced the cached results, None if it was not recorded."""
+        self.__check_for_file()
+        if self.__stored is False:
+            raise ValueError(self.__get_not_stored_message())
+        if self.__arrays is not None:
+            return json.loads(json.dumps(self.__provenance))
+        with np.load(self.__get_cache_full_filepath(), allow_pickle=True) as data:
+            if "provenance" not in data.files:
+                return None
+            return json.loads(str(data["provenance"]))
+
+    def __read_from_file(self, mmap=False) -> list[np.ndarray]:
         """Read and verify the accompanying numpy arrays from file."""
+        if self.__arrays is not None:
+            return list(self.__arrays[key] for key in self.numpy_arrays_keys)
         self.__check_for_file()
-        full_filepath = self.__get_cache_full_filepath()
         if self.__stored is False:
-            raise ValueError(f"File {full_filepath} does not exist")
+            raise ValueError(self.__get_not_stored_message())
+        full_filepath = self.__get_cache_full_filepath()
+        if mmap:
+            return self.__read_memmapped()
 
         # load the data and verify the resultsdescription object is the same
-        data = np.load(full_filepath, allow_pickle=True)
+        with span("caching.load", kernel=self.kernel_name, strategy=self.strategy_name):
+            data = np.load(full_filepath, allow_pickle=True)
         data_results_description = data["resultsdescription"].item()
         assert self.is_same_as(data_results_description), "The results description of the results is not the same"
 
@@ -182,11 +289,170 @@ class ResultsDescription:
             numpy_arrays.append(data[numpy_array_key])
         return numpy_arrays
 
-    def get_results(self) -> Results:
-        """Get the Results object."""
-        args = self.__read_from_file()
+    def __read_memmapped(self) -> list[np.ndarray]:
+        """Read the numpy arrays memory-mapped from an uncompressed copy of the cached results, made once per results.
+
+        The arrays are streamed out of the compressed file, so neither copying nor reading loads a whole array.
+        """
+        full_filepath = self.__get_cache_full_filepath()
+        memmap_path = self.__get_memmap_path()
+        results_hash = self.get_results_hash()
+        hash_filepath = memmap_path / "results_hash"
+        if not hash_filepath.exists() or hash_filepath.read_text() != results_hash:
+            with span("caching.extract", kernel=self.kernel_name, strategy=self.strategy_name):
+                with np.load(full_filepath, allow_pickle=True) as data:
+                    data_results_description = data["resultsdescription"].item()
+                assert self.is_same_as(data_results_description), "The results description of the results differs"
+                memmap_path.mkdir(exist_ok=True)
+                with zipfile.ZipFile(full_filepath) as archive:
+                    for key in self.numpy_arrays_keys:
+                        # written to a temporary file of this process first, so that concurrent extractions do not
+                        #   interfere and a reader never maps an incomplete array
+                        temporary_filepath = memmap_path / f"{key}.npy.{os.getpid()}.tmp"
+                        with archive.open(f"{key}.npy") as source, temporary_filepath.open("wb") as destination:
+                            shutil.copyfileobj(source, destination, 1 << 20)
+                        temporary_filepath.replace(memmap_path / f"{key}.npy")
+                hash_filepath.write_text(results_hash)
+        return list(np.load(memmap_path / f"{key}.npy", mmap_mode="r") for key in self.numpy_arrays_keys)
+
+    def get_results(self, mmap=False) -> Results:
+        """Get the Results object.
+
+        Args:
+            mmap: whether to memory-map the arrays read-only instead of loading them, for results too large for memory.
+                The cached results are then copied uncompressed next to the cache once. Results kept in memory are
+                not memory-mapped. Defaults to False.
+        """
+        args = self.__read_from_file(mmap)
         return Results(args)
 
     def has_results(self) -> bool:
         """Checks whether there are results or the file exists."""
         return self.__stored or self.__check_for_file()
+
+    def __get_chunk_filepath(self, repeats: range) -> Path:
+        """Get the filepath for the results of a range of repeats, including the filename and extension."""
+        filename = f"{self.device_name}_{self.strategy_name}_{repeats.start}-{repeats.stop}.npz"
+        return self.__get_cache_filepath() / "chunks" / filename
+
+    def set_results_chunk(self, arrays: dict, repeats: range, provenance: Optional[dict] = None):
+        """Cache the results of a range of repeats, to be merged into the results with ``merge_results_chunks``."""
+        assert self.visualization_caches_path is not None, "Chunks of results must be cached"
+        filepath = self.__get_chunk_filepath(repeats)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        if provenance is not None:
+            arrays = dict(arrays, provenance=np.array(json.dumps(provenance, sort_keys=True)))
+        # written to a temporary file first so that an interrupted write does not leave an incomplete chunk
+        temporary_filepath = filepath.with_suffix(".tmp.npz")
+        np.savez_compressed(temporary_filepath, resultsdescription=self, **arrays)
+        temporary_filepath.replace(filepath)
+
+    def has_results_chunk(self, repeats: range) -> bool:
+        """Checks whether the results of a range of repeats are cached."""
+        return self.__get_chunk_filepath(repeats).exists()
+
+    def get_results_chunks(self) -> dict[range, Path]:
+        """Get the cached ranges of repeats and their filepaths, ordered by the first repeat."""
+        chunks_path = self.__get_cache_filepath() / "chunks"
+        if not chunks_path.exists():
+            return dict()
+        pattern = re.compile(re.escape(f"{self.device_name}_{self.strategy_name}_") + r"(\d+)-(\d+)\.npz")
+        chunks = dict()
+        for filepath in chunks_path.iterdir():
+            match = pattern.fullmatch(filepath.name)
+            if match is not None:
+                chunks[range(int(match.group(1)), int(match.group(2)))] = filepath
+        return dict(sorted(chunks.items(), key=lambda chunk: chunk[0].start))
+
+    def get_missing_repeats(self, repeats: range) -> list[range]:
+        """Get the ranges of repeats that are not covered by the cached chunks.
+
+        Args:
+            repeats: the range of repeats to cover, chunks outside of it are ignored.
+
+        Raises:
+            ValueError: if the cached chunks overlap.
+
+        Returns:
+            The list of ranges of missing repeats.
+        """
+        missing = list()
+        next_repeat = repeats.start
+        for chunk in self.get_results_chunks():
+            if chunk.stop <= repeats.start or chunk.start >= repeats.stop:
+                continue
+            if chunk.start < next_repeat:
+                raise ValueError(f"Chunk of repeats {chunk} overlaps with the previous chunks of {self.strategy_name}")
+            if chunk.start > next_repeat:
+                missing.append(range(next_repeat, chunk.start))
+            next_repeat = chunk.stop
+        if next_repeat < repeats.stop:
+            missing.append(range(next_repeat, repeats.stop))
+        return missing
+
+    def merge_results_chunks(self, repeats: range, provenance: Optional[dict] = None, arrays: Optional[dict] = None):
+        """Merge the cached chunks of a range of repeats into the results and remove the chunks.
+
+        Args:
+            repeats: the range of repeats to merge.
+            provenance: the configuration that produced the results, see ``incremental.get_provenance``. Defaults to
+                None, using the provenance recorded with the chunks.
+            arrays: the results arrays of the repeats before the range, to append the chunks to. Defaults to None.
+
+        Raises:
+            ValueError: if the chunks do not cover exactly the range of repeats.
+        """
+        missing = self.get_missing_repeats(repeats)
+        chunks = dict(
+            (chunk, filepath)
+            for chunk, filepath in self.get_results_chunks().items()
+            if chunk.start >= repeats.start and chunk.stop <= repeats.stop
+        )
+        if len(missing) > 0 or sum(len(chunk) for chunk in chunks) != len(repeats):
+            raise ValueError(f"Chunks of {self.strategy_name} do not cover repeats {repeats}, missing {missing}")
+        chunk_arrays = list() if arrays is None else [arrays]
+        for filepath in chunks.values():
+            with span("caching.load", kernel=self.kernel_name, strategy=self.strategy_name):
+                data = np.load(filepath, allow_pickle=True)
+            assert self.is_same_as(data["resultsdescription"].item()), f"Chunk {filepath} is of other results"
+            chunk_arrays.append(dict((key, data[key]) for key in self.numpy_arrays_keys))
+            if provenance is None and "provenance" in data.files:
+                provenance = json.loads(str(data["provenance"]))
+        self.set_results(concatenate_results_arrays(chunk_arrays), provenance, overwrite=True)
+        for filepath in chunks.values():
+            filepath.unlink()
+
+
+def concatenate_results_arrays(chunk_arrays: list[dict]) -> dict:
+    """Concatenate the results arrays of chunks of repeats, as if the repeats were written at once.
+
+    Args:
+        chunk_arrays: the dictionaries of results arrays of each chunk, in the order of the repeats.
+
+    Returns:
+        The dictionary of the concatenated results arrays.
+    """
+    arrays = dict()
+    for key in chunk_arrays[0].keys():
+        # the number of function evaluations may differ per chunk, missing evaluations are NaN
+        max_num_evals = max(chunk[key].shape[-2] for chunk in chunk_arrays)
+        padded = list()
+        for chunk in chunk_arrays:
+            padding = [(0, 0)] * chunk[key].ndim
+            padding[-2] = (0, max_num_evals - chunk[key].shape[-2])
+            padded.append(np.pad(chunk[key], padding, constant_values=np.nan))
+        arrays[key] = np.concatenate(padded, axis=-1)
+    return arrays
+
+
+def truncate_results_arrays(arrays: dict, repeats: int) -> dict:
+    """Keep the results arrays of the first repeats, as if only those repeats were written.
+
+    Args:
+        arrays: the dictionary of results arrays.
+        repeats: the number of repeats to keep.
+
+    Returns:
+        The dictionary of the truncated results arrays.
+    """
+    return dict((key, array[..., :repeats]) for key, array in arrays.items())
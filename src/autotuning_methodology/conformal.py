@@ -0,0 +1,201 @@
+"""Split and jackknife+ conformal prediction intervals around the isotonic curve, calibrated once for all levels."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+from math import ceil, floor
+from typing import Optional, Union
+
+import numpy as np
+
+from autotuning_methodology.isotonic import batched_isotonic_regression
+
+
+def get_conformal_ranks(num_calibration: int, confidence_levels: np.ndarray, two_sided: bool) -> np.ndarray:
+    """Get the finite-sample ranks of the lower and upper bound of the conformal intervals.
+
+    Args:
+        num_calibration: the number of calibration scores.
+        confidence_levels: the confidence levels, one-dimensional.
+        two_sided: whether each bound takes half of the significance (signed scores), or each the full significance
+            (the jackknife+ with absolute scores).
+
+    Returns:
+        An integer array of shape (2, confidence_levels) of the zero-based lower and upper rank of each level, clipped
+        to the calibration scores so that the intervals are finite.
+    """
+    significances = 1 - confidence_levels
+    if two_sided:
+        significances = significances / 2
+    ranks = np.empty((2, confidence_levels.shape[0]), dtype=int)
+    for index, significance in enumerate(significances):
+        # round off the floating-point error of the significance, which would otherwise shift exact ranks by one
+        ranks[0, index] = floor(round(significance * (num_calibration + 1), 9)) - 1
+        ranks[1, index] = ceil(round((1 - significance) * (num_calibration + 1), 9)) - 1
+    return np.clip(ranks, 0, num_calibration - 1)
+
+
+def select_order_statistics(shifts: np.ndarray, offsets: list[np.ndarray], ranks: np.ndarray) -> np.ndarray:
+    """Select the order statistics of the union of sorted offsets shifted per group, for each column of the shifts.
+
+    The union has ``shifts[k, t] + offsets[k]`` for each group ``k``. Instead of sorting the union for each column, the
+    smallest value of each group that has at least rank + 1 values of the union at or below it is binary searched,
+    counting with a binary search in the offsets of each group. The order statistic is the smallest of these.
+
+    Args:
+        shifts: the shift of each group (row) for each column, of shape (groups, columns).
+        offsets: the ascending offsets of each group.
+        ranks: the zero-based ranks to select, one-dimensional.
+
+    Returns:
+        An array of shape (ranks, columns) of the order statistics.
+    """
+    assert shifts.ndim == 2 and shifts.shape[0] == len(offsets), "There must be a row of shifts per group of offsets"
+    groups = list((shift, offset) for shift, offset in zip(shifts, offsets) if offset.shape[0] > 0)
+    shape = (ranks.shape[0], shifts.shape[1])
+    targets = np.broadcast_to(ranks[:, np.newaxis] + 1, shape)
+
+    def count_at_most(group: int, indices: np.ndarray) -> np.ndarray:
+        # the values of a group at most its value at the indices are counted exactly, the others by binary search
+        values = groups[group][0] + groups[group][1][indices]
+        others = list((shift, offset) for other, (shift, offset) in enumerate(groups) if other != group)
+        return indices + 1 + sum(np.searchsorted(offset, values - shift, side="right") for shift, offset in others)
+
+    selected = np.full(shape, np.inf)
+    for group, (shift, offset) in enumerate(groups):
+        lower, upper = np.zeros(shape, dtype=int), np.full(shape, offset.shape[0] - 1)
+        while np.any(lower < upper):
+            middle = (lower + upper) // 2
+            enough = count_at_most(group, middle) >= targets
+            upper = np.where(enough, middle, upper)
+            lower = np.where(enough, lower, np.minimum(middle + 1, upper))
+        candidates = shift + offset[lower]
+        selected = np.where(count_at_most(group, lower) >= targets, np.minimum(selected, candidates), selected)
+    return selected
+
+
+class ConformalIsotonicRegression:
+    """Conformal prediction intervals around isotonic regression, calibrated once for any confidence level.
+
+    The "split" (inductive) method fits the isotonic regression to a training part of the data and calibrates the
+    signed residuals of the remaining data. The "jackknife+" method fits the isotonic regression to the data without
+    each of ``n_folds`` folds at once with ``batched_isotonic_regression``, and calibrates the absolute residuals of
+    each datum to the fit without its fold, which is the CV+ variant of the jackknife+ with fewer folds than data.
+    """
+
+    methods = ("split", "jackknife+")
+
+    def __init__(
+        self,
+        method="split",
+        train_fraction=0.75,
+        n_folds=10,
+        increasing=True,
+        y_min: Optional[float] = None,
+        y_max: Optional[float] = None,
+        seed: Optional[int] = None,
+        n_jobs=1,
+    ) -> None:
+        """Initialization method for the ConformalIsotonicRegression class.
+
+        Args:
+            method: the conformal method, "split" or "jackknife+". Defaults to "split".
+            train_fraction: the fraction of the data to fit to with the "split" method. Defaults to 0.75.
+            n_folds: the number of folds of the "jackknife+" method, or a fold per datum if there are fewer data.
+                Defaults to 10.
+            increasing: whether the fit is increasing or decreasing. Defaults to True.
+            y_min: lower bound on the lowest predicted value. Defaults to None.
+            y_max: upper bound on the highest predicted value. Defaults to None.
+            seed: the seed of the random number generator of the split and folds. Defaults to None, unseeded.
+            n_jobs: the number of threads to fit the folds on. Defaults to 1.
+
+        Raises:
+            ValueError: on an invalid ``method``.
+        """
+        if method not in self.methods:
+            raise ValueError(f"method must be one of {self.methods}, is {method}")
+        assert 0 < train_fraction < 1, f"train_fraction must be between 0 and 1, is {train_fraction}"
+        assert n_folds >= 2, f"n_folds must be at least 2, is {n_folds}"
+        self.method = method
+        self.train_fraction = train_fraction
+        self.n_folds = n_folds
+        self.increasing = increasing
+        self.y_min = y_min
+        self.y_max = y_max
+        self.seed = seed
+        self.n_jobs = n_jobs
+
+    def _fit_predict(self, x: np.ndarray, y: np.ndarray, x_new: np.ndarray) -> np.ndarray:
+        """Fit an isotonic regression to each column of the padded data and predict each on ``x_new``."""
+        return batched_isotonic_regression(
+            x, y, x_new, increasing=self.increasing, y_min=self.y_min, y_max=self.y_max, n_jobs=self.n_jobs
+        )
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> ConformalIsotonicRegression:
+        """Fit the isotonic regression and calibrate the residuals.
+
+        The fits are kept as their predictions on the unique x-values of the data, which the fits interpolate between.
+
+        Args:
+            x: the one-dimensional x-values of the data.
+            y: the one-dimensional y-values of the data.
+
+        Returns:
+            The fitted ConformalIsotonicRegression.
+        """
+        assert x.ndim == y.ndim == 1, "The data must be one-dimensional"
+        assert x.shape == y.shape, f"Shapes do not match: {x.shape} != {y.shape}"
+        num_data = x.shape[0]
+        rng = np.random.default_rng(self.seed)
+        self._x_knots = np.unique(x)
+        if self.method == "split":
+            permutation = rng.permutation(num_data)
+            num_train = min(max(round(num_data * self.train_fraction), 1), num_data - 1)
+            train, calibrate = permutation[:num_train], permutation[num_train:]
+            self._knots = self._fit_predict(x[train, np.newaxis], y[train, np.newaxis], self._x_knots)
+            residuals = y[calibrate] - np.interp(x[calibrate], self._x_knots, self._knots[0])
+            self._residuals = [np.sort(residuals)]
+        else:
+            n_folds = min(self.n_folds, num_data)
+            folds = rng.permutation(np.arange(num_data) % n_folds)
+            in_fold = folds[:, np.newaxis] == np.arange(n_folds)
+            self._knots = self._fit_predict(
+                np.where(in_fold, np.nan, x[:, np.newaxis]), np.where(in_fold, np.nan, y[:, np.newaxis]), self._x_knots
+            )
+            residuals = np.abs(y - self._interp_folds(x)[folds, np.arange(num_data)])
+            self._residuals = list(np.sort(residuals[folds == fold]) for fold in range(n_folds))
+        return self
+
+    def _interp_folds(self, x_new: np.ndarray) -> np.ndarray:
+        """Predict the fit of each fold on ``x_new``, of shape (folds, x_new)."""
+        return np.stack(list(np.interp(x_new, self._x_knots, knots) for knots in self._knots))
+
+    def predict(self, x_new: np.ndarray) -> np.ndarray:
+        """Predict the isotonic regression on ``x_new``, the median of the fits of the folds for the jackknife+."""
+        return np.median(self._interp_folds(np.asarray(x_new, dtype=float)), axis=0)
+
+    def predict_interval(self, x_new: np.ndarray, confidence_level: Union[float, np.ndarray]) -> np.ndarray:
+        """Predict the conformal prediction interval on ``x_new``, for one or more confidence levels of the same fit.
+
+        Args:
+            x_new: the one-dimensional x-values to predict.
+            confidence_level: the confidence level, or a one-dimensional array of confidence levels.
+
+        Returns:
+            An array of shape (x_new, 2) of the lower and upper bound, or (confidence_levels, x_new, 2) for an array.
+        """
+        confidence_levels = np.atleast_1d(np.asarray(confidence_level, dtype=float))
+        assert np.all((0 < confidence_levels) & (confidence_levels < 1)), "Confidence levels must be in (0, 1)"
+        predictions = self._interp_folds(np.asarray(x_new, dtype=float))
+        num_calibration = sum(residuals.shape[0] for residuals in self._residuals)
+        ranks = get_conformal_ranks(num_calibration, confidence_levels, two_sided=self.method == "split")
+        if self.method == "split":
+            # the residuals are signed, so the interval is asymmetric around the prediction
+            lower = predictions + self._residuals[0][ranks[0], np.newaxis]
+            upper = predictions + self._residuals[0][ranks[1], np.newaxis]
+        else:
+            # the bounds are order statistics of the fits without the fold of each datum, minus or plus its residual
+            negated_residuals = list(-residuals[::-1] for residuals in self._residuals)
+            lower = select_order_statistics(predictions, negated_residuals, ranks[0])
+            upper = select_order_statistics(predictions, self._residuals, ranks[1])
+        intervals = np.stack([lower, upper], axis=2)
+        return intervals if np.ndim(confidence_level) > 0 else intervals[0]
@@ -2,16 +2,37 @@
 
 from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
 
+import inspect
+import pickle
 from abc import ABC, abstractmethod
+from functools import wraps
+from hashlib import blake2b
 from math import ceil, floor, sqrt
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
 from warnings import warn
 
 import numpy as np
-from sklearn.ensemble import BaggingRegressor
-from sklearn.isotonic import IsotonicRegression
 
 from autotuning_methodology.caching import ResultsDescription
+from autotuning_methodology.conformal import ConformalIsotonicRegression
+from autotuning_methodology.instrumentation import instrumented
+from autotuning_methodology.isotonic import (
+    batched_isotonic_regression,
+    binned_bootstrap_isotonic_regression,
+    bootstrap_isotonic_regression,
+)
 from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
+from autotuning_methodology.validators import set_validation_level, validates
+
+if TYPE_CHECKING:
+    from sklearn.isotonic import IsotonicRegression
+
+# the version of the memoized curves, to be increased when the computation of the curves changes
+curve_memo_version = 5
+
+# the number of time bins per time of the time range, in which the values are pooled over time with ``block_rows``
+time_bins_per_time = 16
 
 
 def get_indices_in_distribution(
@@ -29,13 +50,15 @@ def get_indices_in_distribution(
         skip_draws_check: skips checking that each value in `draws` is in the `dist`. Defaults to False.
         skip_dist_check: skips checking that the distribution is correctly ordered. Defaults to False.
 
+    Both checks are only done at the "strict" validation level, see ``validators.validates``.
+
     Returns:
         A NumPy array of type float of the same shape as `draws`, with NaN where not found in `dist`.
     """
     assert dist.ndim == 1, f"distribution can not have more than one dimension, has {dist.ndim}"
 
     # check whether the distribution is correctly ordered
-    if not skip_dist_check:
+    if not skip_dist_check and validates("strict"):
         strictly_ascending_sort = dist[:-1] <= dist[1:]
         assert np.all(
             strictly_ascending_sort
@@ -43,7 +66,7 @@ def get_indices_in_distribution(
             {np.count_nonzero(~strictly_ascending_sort)} violations in {len(dist)} values: {dist}"""
 
     # check whether each value of draws (excluding NaN) is in dist
-    if not skip_draws_check:
+    if not skip_draws_check and validates("strict"):
         assert np.all(
             np.in1d(draws[~np.isnan(draws)], dist)
         ), f"""
@@ -93,6 +116,99 @@ def get_indices_in_array(values: np.ndarray, array: np.ndarray) -> np.ndarray:
     return indices_found_unsorted
 
 
+def get_confidence_interval_ranks(n: int, confidence_level: float) -> tuple[int, int]:
+    """Get the ranks of the bounds of the non-parametric confidence interval of the median of n IID values.
+
+    Args:
+        n: the number of values.
+        confidence_level: the confidence level for the confidence interval.
+
+    Returns:
+        A tuple of the lower and upper rank in the ascendingly sorted values.
+    """
+    # confidence interval using normal distribution assumption
+    from statistics import NormalDist
+
+    z = NormalDist().inv_cdf((1 + confidence_level) / 2.0)
+    q = 0.5
+    nq = n * q
+    base = z * sqrt(nq * (1 - q))
+    lower_rank = max(floor(nq - base), 0)
+    upper_rank = min(ceil(nq + base) + 1, n - 1)
+    return lower_rank, upper_rank
+
+
+def get_array_fingerprint(array: Optional[np.ndarray]) -> Optional[str]:
+    """Get a fingerprint of the contents, shape and type of an array, None if the array is None."""
+    if array is None:
+        return None
+    array = np.ascontiguousarray(array)
+    fingerprint = blake2b(array.tobytes(), digest_size=16)
+    fingerprint.update(f"{array.shape}{array.dtype.str}".encode())
+    return fingerprint.hexdigest()
+
+
+def memoized_curve(x_type: str, uses_bootstraps=False) -> Callable:
+    """Decorator to memoize the curves a method of a ``Curve`` computes over a range.
+
+    The curves are keyed by the ``x_type``, the method and its other arguments, the settings of the curve (see
+    ``Curve.get_memo_settings``), the confidence level and the fingerprints of the range and distribution. Copies are
+    returned, so that the memoized curves can not be altered. Persisted curves are written at once by
+    ``Curve.write_memo``, not on each computed curve.
+
+    Args:
+        x_type: the type of the range, "fevals" or "time".
+        uses_bootstraps: whether the method draws bootstraps, which is only memoized if the ``bootstrap_seed`` is set.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        signature = inspect.signature(method)
+
+        def get_memo_key(self: Curve, *args, **kwargs) -> Optional[tuple]:
+            """Get the key of the memoized curves of a call, None if the call is not memoized."""
+            seed = self.bootstrap_seed if uses_bootstraps else None
+            if uses_bootstraps and seed is None:
+                return None
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments["self"]
+            x_range = arguments.pop(f"{x_type}_range")
+            dist = arguments.pop("dist")
+            confidence_level = arguments.pop("confidence_level")
+            return (
+                x_type,
+                method.__name__,
+                tuple(sorted(arguments.items())),
+                seed,
+                self.get_memo_settings(),
+                confidence_level,
+                get_array_fingerprint(x_range),
+                get_array_fingerprint(dist),
+            )
+
+        @wraps(method)
+        def wrapper(self: Curve, *args, **kwargs):
+            key = get_memo_key(self, *args, **kwargs)
+            if key is None:
+                return method(self, *args, **kwargs)
+            if key not in self._memo:
+                self._memo[key] = method(self, *args, **kwargs)
+                self._memo_unwritten = True
+            curves = self._memo[key]
+            if isinstance(curves, tuple):
+                return tuple(np.copy(curve) if isinstance(curve, np.ndarray) else curve for curve in curves)
+            return np.copy(curves)
+
+        wrapper.get_memo_key = get_memo_key
+        return wrapper
+
+    return decorator
+
+
 def moving_average(y: np.ndarray, window_size=3) -> np.ndarray:
     """Function to calculate the moving average over an array.
 
@@ -223,13 +339,20 @@ class CurveBasis(ABC):
 class Curve(CurveBasis):
     """The Curve object can produce NumPy arrays directly suitable for plotting from a ResultsDescription."""
 
-    def __init__(self, results_description: ResultsDescription) -> None:
+    def __init__(self, results_description: ResultsDescription, block_rows: Optional[int] = None) -> None:
         """Initialize using a ResultsDescription.
 
         Args:
             results_description: the ResultsDescription object containing the data for the Curve.
+            block_rows: the number of function evaluations (rows of the results) to compute the curves over at a time,
+                with the cached results memory-mapped instead of loaded, for results too large for memory. The isotonic
+                curves over time are then fitted to the values pooled in time bins, so that the memory is bounded by
+                the block and the time range, approximating the curves on the results in memory. Defaults to None,
+                loading the results and computing the curves at once.
         """
         # inputs
+        assert block_rows is None or block_rows >= 1, f"block_rows must be at least 1, is {block_rows}"
+        self.block_rows = block_rows
         self.name = results_description.strategy_name
         self.display_name = results_description.strategy_display_name
         self.device_name = results_description.device_name
@@ -238,7 +361,7 @@ class Curve(CurveBasis):
         self.minimization = results_description.minimization
 
         # result data
-        results = results_description.get_results()
+        results = results_description.get_results(mmap=block_rows is not None)
         self._x_fevals = (
             results.fevals_results
         )  # the time per objective value in fevals since start (1d if deterministic, 2d if stochastic)
@@ -255,10 +378,128 @@ class Curve(CurveBasis):
             results.objective_performance_results_per_key
         )  # the performance per objective time key (2d if deterministic, 3d if stochastic)
 
+        # the memoized curves, see ``memoized_curve``, optionally persisted with ``persist_memo``
+        self._memo: dict[tuple, tuple] = dict()
+        self._memo_filepath: Optional[Path] = None
+        self._memo_results_hash: Optional[str] = None
+        self._memo_unwritten = False
+
         # complete initialisation
         self.check_attributes()
+        self._fevals_counts = self._get_regular_fevals_counts()
         super().__init__()
 
+    def _get_row_blocks(self, start=0, stop: Optional[int] = None) -> list[slice]:
+        """Get the blocks of rows of the results to compute over, a single block unless ``block_rows`` is set.
+
+        Args:
+            start: the first row. Defaults to 0.
+            stop: the row to stop before. Defaults to None, the number of rows.
+
+        Returns:
+            The slices of the rows of each block.
+        """
+        stop = self._x_fevals.shape[0] if stop is None else stop
+        if self.block_rows is None:
+            return [slice(start, stop)]
+        return list(slice(row, min(row + self.block_rows, stop)) for row in range(start, stop, self.block_rows))
+
+    def _get_regular_fevals_counts(self) -> Optional[np.ndarray]:
+        """Get the number of fevals per repeat if the fevals of each repeat are ``1..n`` followed by NaN.
+
+        Returns:
+            The number of fevals per repeat (column), or None if the fevals are not regular or not per repeat.
+        """
+        if self._x_fevals.ndim != 2:
+            return None
+        counts = np.zeros(self._x_fevals.shape[1], dtype=int)
+        for block in self._get_row_blocks():
+            nan_mask = np.isnan(self._x_fevals[block])
+            block_counts = block.stop - block.start - np.count_nonzero(nan_mask, axis=0)
+            # repeats with fevals in this block must not have ended in an earlier block
+            if np.any(counts[block_counts > 0] != block.start):
+                return None
+            counts += block_counts
+            rows = np.arange(block.start, block.stop)[:, np.newaxis]
+            if not np.array_equal(nan_mask, rows >= counts):
+                return None
+            fevals = self._x_fevals[block][~nan_mask]
+            if not np.array_equal(fevals, np.broadcast_to(rows + 1, nan_mask.shape)[~nan_mask]):
+                return None
+        return counts
+
+    def persist_memo(self, results_description: ResultsDescription):
+        """Persist the memoized curves next to the cached results, to compute the curves once per results.
+
+        Memoized curves are only loaded if the results file is the same as when they were written. The curves
+        computed since are written by ``write_memo``.
+
+        Args:
+            results_description: the ResultsDescription object containing the data for the Curve.
+        """
+        filepath = results_description.get_curves_cache_filepath()
+        if filepath is None:
+            return
+        self._memo_filepath = filepath
+        self._memo_results_hash = results_description.get_results_hash()
+        if filepath.exists():
+            with filepath.open("rb") as file:
+                version, results_hash, memo = pickle.load(file)
+            if version == curve_memo_version and results_hash == self._memo_results_hash:
+                self._memo.update(memo)
+
+    def get_memo_key(
+        self, range: np.ndarray, x_type: str, dist: np.ndarray = None, confidence_level: float = None
+    ) -> Optional[tuple]:
+        """Get the key of the memoized curves of ``get_curve`` with these arguments.
+
+        Args:
+            range: the range of time or function evaluations.
+            x_type: the type of the x-axis range (either time or function evaluations).
+            dist: the distribution, used for looking up indices. Defaults to None.
+            confidence_level: confidence level for the confidence interval. Defaults to None.
+
+        Raises:
+            ValueError: on invalid ``x_type`` argument.
+
+        Returns:
+            The key, or None if these curves are not memoized.
+        """
+        if x_type == "fevals":
+            method = self.get_curve_over_fevals
+        elif x_type == "time":
+            method = self.get_curve_over_time
+        else:
+            raise ValueError(f"x_type must be 'fevals' or 'time', is {x_type}")
+        get_memo_key = getattr(method, "get_memo_key", None)
+        return None if get_memo_key is None else get_memo_key(self, range, dist, confidence_level)
+
+    def get_memo_settings(self) -> tuple:
+        """Get the settings of the curve that the memoized curves depend on, besides the arguments of the method."""
+        return (self.block_rows,)
+
+    def update_memo(self, memo: dict[tuple, tuple]):
+        """Add memoized curves, such as those computed in another process by ``compute_memoized_curves``.
+
+        Args:
+            memo: the memoized curves by key.
+        """
+        if len(memo) == 0:
+            return
+        self._memo.update(memo)
+        self._memo_unwritten = True
+
+    def write_memo(self):
+        """Write the memoized curves if they are persisted and curves were added since they were last written."""
+        if self._memo_filepath is None or not self._memo_unwritten:
+            return
+        # written to a temporary file first so that an interrupted write does not leave an incomplete memo
+        temporary_filepath = self._memo_filepath.with_suffix(".tmp")
+        with temporary_filepath.open("wb") as file:
+            pickle.dump((curve_memo_version, self._memo_results_hash, self._memo), file)
+        temporary_filepath.replace(self._memo_filepath)
+        self._memo_unwritten = False
+
     def check_attributes(self) -> None:
         """Asserts the types and values of attributes upon initialisation."""
         # assert types
@@ -357,6 +598,8 @@ class Curve(CurveBasis):
         Returns:
             _description_
         """
+        from sklearn.isotonic import IsotonicRegression
+
         return IsotonicRegression(
             increasing=not self.minimization, y_min=y_min, y_max=y_max, out_of_bounds=out_of_bounds
         )
@@ -396,6 +639,54 @@ class Curve(CurveBasis):
 class StochasticOptimizationAlgorithm(Curve):
     """Class for producing a curve for stochastic optimization algorithms."""
 
+    # the seed of the bootstraps of the prediction interval, None to draw other bootstraps each time
+    bootstrap_seed: Optional[int] = 0
+    # the number of threads to fit the bootstraps of the prediction interval on
+    bootstrap_n_jobs = 1
+    # the method of the curves over time, see ``time_curve_methods``
+    time_curve_method = "isotonic"
+    # isotonic regression over the values of all repeats, or the exact step functions of the repeats
+    time_curve_methods = ("isotonic", "step")
+    # the method of the prediction interval of the isotonic curves over time, see ``time_interval_methods``
+    time_interval_method = "bagging"
+    # the bagging prediction interval, or a split or jackknife+ conformal prediction interval around the isotonic curve
+    time_interval_methods = ("bagging", "inductive_conformal", "jackknife+")
+    # the last conformal fit as (key, fit), to predict the intervals of other confidence levels on the same data
+    _conformal_fit: Optional[tuple[tuple, ConformalIsotonicRegression]] = None
+
+    def get_memo_settings(self) -> tuple:  # noqa: D102
+        return super().get_memo_settings() + (self.time_curve_method, self.time_interval_method)
+
+    @classmethod
+    def check_time_methods(
+        cls, time_curve_method: str, time_interval_method: str, block_rows: Optional[int] = None, use_bagging=True
+    ) -> None:
+        """Check that the methods of the curves over time are valid and can be combined.
+
+        Args:
+            time_curve_method: the method of the curves over time, see ``time_curve_methods``.
+            time_interval_method: the method of the prediction interval, see ``time_interval_methods``.
+            block_rows: the ``block_rows`` of the curve. Defaults to None.
+            use_bagging: whether the isotonic curves fit the values of all repeats at once. Defaults to True.
+
+        Raises:
+            ValueError: on an invalid method, or if the isotonic curves are computed in blocks of rows without bagging,
+                which is the only prediction interval that is computed on the values pooled in time bins.
+        """
+        if time_curve_method not in cls.time_curve_methods:
+            raise ValueError(f"method must be one of {cls.time_curve_methods}, is {time_curve_method}")
+        if time_interval_method not in cls.time_interval_methods:
+            raise ValueError(
+                f"time_interval_method must be one of {cls.time_interval_methods}, is {time_interval_method}"
+            )
+        if block_rows is not None and time_curve_method == "isotonic":
+            if not use_bagging or time_interval_method != "bagging":
+                raise ValueError(
+                    "The isotonic curves over time can only be computed in blocks of rows with the 'bagging' "
+                    + f"time_interval_method, is '{time_interval_method}'"
+                    + ("" if use_bagging else " without bagging")
+                )
+
     def _get_curve_split_real_fictional_parts(
         self,
         real_stopping_point_index: int,
@@ -542,15 +833,39 @@ class StochasticOptimizationAlgorithm(Curve):
         """Get a mask of where the fevals range matches with the data."""
         assert fevals_range.ndim == 1
         assert np.all(np.isfinite(fevals_range))
-        matching_indices_mask = np.array(
-            [np.isin(x_column, fevals_range, assume_unique=True) for x_column in self._x_fevals.T]
-        ).transpose()  # get the indices of the matching feval range per repeat (column)
+        # get the indices of the matching feval range per repeat (column)
+        matching_indices_mask = np.isin(self._x_fevals, fevals_range)
         if np.all(~matching_indices_mask):
             raise ValueError(f"No overlap in data and given {fevals_range=}")
         return matching_indices_mask
 
+    def _get_regular_fevals_rows_in_range(self, fevals_range: np.ndarray) -> Optional[tuple[int, int]]:
+        """Get the first and last feval in the range that every repeat has, if this can be found by index arithmetic.
+
+        This is the case if the fevals are regular (see ``_get_regular_fevals_counts``), the range is consecutive
+        integers and no repeat ends before the range does, otherwise None is returned.
+        """
+        if self._fevals_counts is None or fevals_range.ndim != 1 or fevals_range.shape[0] == 0:
+            return None
+        first = fevals_range[0]
+        if not float(first).is_integer():
+            return None
+        if not np.array_equal(fevals_range, np.arange(first, first + fevals_range.shape[0])):
+            return None
+        start = max(int(first), 1)
+        stop = min(int(fevals_range[-1]), int(self._fevals_counts.max()))
+        if start > stop or self._fevals_counts.min() < stop:
+            return None
+        return start, stop
+
     def _get_curve_over_fevals_values_in_range(self, fevals_range: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
         """Get the valid fevals and values that are in the given range."""
+        # with regular fevals, the rows in the range are a slice of the values, taken as a view
+        rows_in_range = self._get_regular_fevals_rows_in_range(fevals_range)
+        if rows_in_range is not None:
+            start, stop = rows_in_range
+            return np.arange(start, stop + 1, dtype=float), self._remove_all_nan_rows(self._y[start - 1 : stop])
+
         target_index: int = fevals_range[-1] - 1
 
         # filter to only get data in the fevals range
@@ -609,17 +924,22 @@ class StochasticOptimizationAlgorithm(Curve):
         masked_values = masked_values[nan_mask].reshape(-1, num_repeats)
         return fevals, masked_values
 
-    def get_curve_over_fevals(  # noqa: D102
-        self, fevals_range: np.ndarray, dist: np.ndarray = None, confidence_level: float = None
-    ):
-        fevals, masked_values = self._get_curve_over_fevals_values_in_range(fevals_range)
+    @staticmethod
+    def _remove_all_nan_rows(values: np.ndarray) -> np.ndarray:
+        """Remove the fevals (rows) where every repeat has NaN, returning the values as is if there are none."""
+        all_nan_mask = np.isnan(values).all(axis=1)
+        return values[~all_nan_mask] if np.any(all_nan_mask) else values
 
+    def _get_statistics_over_repeats(
+        self, values: np.ndarray, dist: np.ndarray = None, confidence_level: float = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the curve and its lower and upper error from the values of the repeats (columns) per row."""
         # if a distribution is included
         curve: np.ndarray
         if dist is not None:
             assert dist.ndim == 1, "The distribution must one-dimensional"
             # for each value, get the index in the distribution
-            indices = get_indices_in_distribution(masked_values, dist)
+            indices = get_indices_in_distribution(values, dist)
             # get the mean index per feval
             indices_mean = np.array(np.round(np.nanmedian(indices, axis=1)), dtype=int)
             if confidence_level is None:
@@ -637,15 +957,80 @@ class StochasticOptimizationAlgorithm(Curve):
             curve_upper_err = dist[indices_upper_err]
         else:
             # obtain the curves
-            curve = np.nanmedian(masked_values, axis=1)  # get the curve by taking the mean
+            curve = np.nanmedian(values, axis=1)  # get the curve by taking the mean
             if confidence_level is None:
                 # get the standard error
-                curve_std: np.ndarray = np.nanstd(masked_values, axis=1)
+                curve_std: np.ndarray = np.nanstd(values, axis=1)
                 curve_lower_err = curve - curve_std
                 curve_upper_err = curve + curve_std
             else:
                 # get the confidence interval
-                curve_lower_err, curve_upper_err = self.get_confidence_interval(masked_values, confidence_level)
+                curve_lower_err, curve_upper_err = self.get_confidence_interval(values, confidence_level)
+        return curve, curve_lower_err, curve_upper_err
+
+    def _get_fevals_rows_and_repeats_in_range(self, fevals_range: np.ndarray) -> tuple[int, int, np.ndarray]:
+        """Get the first and last feval in the range and the mask of the repeats to use, by index arithmetic.
+
+        As in ``_get_curve_over_fevals_values_in_range``, repeats that end before most repeats do are left out and
+        the range is cut off where most repeats end.
+
+        Raises:
+            ValueError: if the fevals are not regular (see ``_get_regular_fevals_counts``), the range is not
+                consecutive integers or there is no overlap.
+        """
+        first = fevals_range[0] if fevals_range.ndim == 1 and fevals_range.shape[0] > 0 else np.nan
+        if (
+            self._fevals_counts is None
+            or not float(first).is_integer()
+            or not np.array_equal(fevals_range, np.arange(first, first + fevals_range.shape[0]))
+        ):
+            raise ValueError("Curves over blocks require fevals 1..n per repeat and a range of consecutive fevals")
+        start, target = max(int(first), 1), int(fevals_range[-1])
+        last_fevals = np.minimum(self._fevals_counts, target)  # the last feval in range of each repeat
+        if np.any(last_fevals < start):
+            raise ValueError(f"No overlap in data and given {fevals_range=}")
+        stop = min(floor(np.median(last_fevals)), target)
+        if np.any(last_fevals != last_fevals[0]) and np.any(last_fevals < target):
+            warn(
+                f"""For optimization algorithm {self.display_name},
+                {np.count_nonzero(last_fevals < target)} of the {last_fevals.shape[0]} runs ended before
+                 the end of fevals_range ({target}).
+                 Only data up to {stop} fevals will be used.
+                 Perhaps increase the allotted auto-tuning time for this optimization algorithm?"""
+            )
+        return start, stop, last_fevals >= stop
+
+    def _get_curve_over_fevals_in_blocks(
+        self, fevals_range: np.ndarray, dist: np.ndarray = None, confidence_level: float = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Get the fevals and the curves in the range, computed over blocks of rows of the memory-mapped values.
+
+        As the statistics are per feval over the repeats, the curves are the same as when computed at once.
+        """
+        start, stop, repeats_mask = self._get_fevals_rows_and_repeats_in_range(fevals_range)
+        blocks_curves = list(
+            self._get_statistics_over_repeats(
+                self._remove_all_nan_rows(self._y[block][:, repeats_mask]), dist, confidence_level
+            )
+            for block in self._get_row_blocks(start - 1, stop)
+        )
+        curve, curve_lower_err, curve_upper_err = (np.concatenate(curves) for curves in zip(*blocks_curves))
+        return np.arange(start, stop + 1, dtype=float), curve, curve_lower_err, curve_upper_err
+
+    @memoized_curve("fevals")
+    @instrumented("curves.get_curve_over_fevals")
+    def get_curve_over_fevals(  # noqa: D102
+        self, fevals_range: np.ndarray, dist: np.ndarray = None, confidence_level: float = None
+    ):
+        if self.block_rows is None:
+            fevals, masked_values = self._get_curve_over_fevals_values_in_range(fevals_range)
+            curve, curve_lower_err, curve_upper_err = self._get_statistics_over_repeats(
+                masked_values, dist, confidence_level
+            )
+        else:
+            fevals, curve, curve_lower_err, curve_upper_err = self._get_curve_over_fevals_in_blocks(
+                fevals_range, dist, confidence_level
+            )
 
         # # remove remaining NaN, yielding an array which <= fevals.shape
         # curve = curve[~np.isnan(curve)]
@@ -748,9 +1133,37 @@ class StochasticOptimizationAlgorithm(Curve):
         else:
             return times, values, real_stopping_point_time, num_fevals, num_repeats
 
-    def get_curve_over_time(  # noqa: D102
-        self, time_range: np.ndarray, dist: np.ndarray = None, confidence_level: float = None, use_bagging=True
+    @memoized_curve("time", uses_bootstraps=True)
+    @instrumented("curves.get_curve_over_time")
+    def get_curve_over_time(
+        self,
+        time_range: np.ndarray,
+        dist: np.ndarray = None,
+        confidence_level: float = None,
+        use_bagging=True,
+        method: Optional[str] = None,
     ):
+        """Get the curve over time, see ``CurveBasis.get_curve_over_time``.
+
+        Args:
+            time_range: the range of time.
+            dist: the distribution, used for looking up indices.
+            confidence_level: confidence level for the prediction interval.
+            use_bagging: whether to fit the values of all repeats at once with the prediction interval of
+                ``time_interval_method``, or fit the repeats separately, for the "isotonic" method. Defaults to True.
+            method: the method, "isotonic" to fit isotonic regression to the values of the repeats, or "step" to
+                evaluate the best-found value of each repeat exactly at each time and take the median and confidence
+                interval across the repeats, as over fevals. Defaults to None, using ``time_curve_method``.
+
+        Raises:
+            ValueError: on an invalid ``method`` or ``time_interval_method``, see ``check_time_methods``.
+
+        Returns:
+            The real_stopping_point_index and the real, fictional curve, errors over the specified ``time_range``.
+        """
+        method = self.time_curve_method if method is None else method
+        self.check_time_methods(method, self.time_interval_method, self.block_rows, use_bagging)
+
         # check the distribution
         if dist is None:
             raise NotImplementedError()
@@ -758,8 +1171,16 @@ class StochasticOptimizationAlgorithm(Curve):
         dist_size = dist.shape[0]
         assert confidence_level is not None, "confidence_level must not be None"
 
-        # use a bagging prediction / interval method or the seperated prediction / interval method
-        if use_bagging:
+        # use the step functions, a bagging prediction / interval method or the seperated prediction / interval method
+        if method == "step":
+            prediction_interval, real_stopping_point_time = self._get_prediction_interval_step(
+                time_range, dist, confidence_level
+            )
+        elif self.block_rows is not None:
+            prediction_interval, real_stopping_point_time = self._get_prediction_interval_in_blocks(
+                time_range, dist, confidence_level
+            )
+        elif use_bagging:
             # get the curve within the time range
             (
                 times_1D,
@@ -784,12 +1205,14 @@ class StochasticOptimizationAlgorithm(Curve):
             assert x.shape == y.shape, f"Shapes do not match: {x.shape} != {y.shape}"
 
             # get the lower and upper error curves
-            # prediction_interval = self._get_prediction_interval_conformal(
-            #     x, y, time_range, confidence_level=confidence_level, method="conformal"
-            # )
-            prediction_interval = self._get_prediction_interval_bagging(
-                x, y, time_range, confidence_level=confidence_level, num_repeats=num_repeats
-            )
+            if self.time_interval_method == "bagging":
+                prediction_interval = self._get_prediction_interval_bagging(
+                    x, y, time_range, confidence_level=confidence_level, num_repeats=num_repeats
+                )
+            else:
+                prediction_interval = self._get_prediction_interval_conformal(
+                    x, y, time_range, confidence_level=confidence_level, method=self.time_interval_method
+                )
         else:
             times, values, real_stopping_point_time, _, _ = self._get_curve_over_time_values_in_range(
                 time_range, return_1d=False
@@ -900,7 +1323,9 @@ class StochasticOptimizationAlgorithm(Curve):
     def get_confidence_interval(self, values: np.ndarray, confidence_level: float) -> tuple[np.ndarray, np.ndarray]:
         """Calculates the non-parametric confidence interval at each function evaluation across repeats.
 
-        Observations are assumed to be IID.
+        Observations are assumed to be IID. Repeats that are NaN at a function evaluation are left out there, so the
+        ranks are those of the number of non-NaN repeats. The original implementation took the ranks of all repeats
+        with the NaN repeats sorted last, which gave NaN or shifted bounds for function evaluations with NaN repeats.
 
         Args:
             values: the two-dimensional values to calculate the confidence interval on.
@@ -914,66 +1339,79 @@ class StochasticOptimizationAlgorithm(Curve):
         """
         assert values.ndim == 2, "The values need to be two-dimensional (iterations, repeats)"
 
-        # confidence interval using normal distribution assumption
-        from statistics import NormalDist
-
-        distribution = NormalDist()
-        z = distribution.inv_cdf((1 + confidence_level) / 2.0)
-        n = values.shape[1]
-        q = 0.5
-        nq = n * q
-        base = z * sqrt(nq * (1 - q))
-        lower_rank = max(floor(nq - base), 0)
-        upper_rank = min(ceil(nq + base) + 1, n - 1)
-        confidence_interval_lower = np.full(values.shape[0], np.nan)
-        confidence_interval_upper = np.full(values.shape[0], np.nan)
-
         # # confidence interval according to Hoefler 2015 (student-t)
         # alpha = 1 - confidence_level
         # mean = values.mean()
         # t = t(n - 1, alpha / 2)
 
-        # for each function evaluation, look up the confidence interval
-        fevals_repeats_sorted = np.sort(values, axis=1)
-        for feval_index, feval_repeats_sorted in enumerate(fevals_repeats_sorted):
-            confidence_interval_lower[feval_index] = feval_repeats_sorted[lower_rank]
-            confidence_interval_upper[feval_index] = feval_repeats_sorted[upper_rank]
+        # the ranks per number of non-NaN repeats, looked up for each function evaluation
+        num_repeats = values.shape[1]
+        num_valid_repeats = num_repeats - np.count_nonzero(np.isnan(values), axis=1)
+        ranks_per_num_valid = np.array(
+            [(0, 0)] + list(get_confidence_interval_ranks(n, confidence_level) for n in range(1, num_repeats + 1))
+        )
+        # sorted per row at once with NaN last, so the ranks of the non-NaN repeats are at the start of each row
+        values_sorted = np.sort(values, axis=1)
+        bounds = np.take_along_axis(values_sorted, ranks_per_num_valid[num_valid_repeats], axis=1)
+        confidence_interval_lower, confidence_interval_upper = bounds.transpose()
 
         return confidence_interval_lower, confidence_interval_upper
 
     def _get_prediction_interval_separated(
-        self, times: np.ndarray, values: np.ndarray, time_range: np.ndarray, confidence_level: float
+        self,
+        times: np.ndarray,
+        values: np.ndarray,
+        time_range: np.ndarray,
+        confidence_level: float,
+        batched=True,
     ) -> np.ndarray:
-        """Calculates the prediction interval and isotonic regression mean by separating the runs."""
+        """Calculates the prediction interval and isotonic regression mean by separating the runs.
+
+        By default, the isotonic curves of all runs are fitted at once with ``batched_isotonic_regression``, otherwise
+        an ``IsotonicRegression`` is fitted per run.
+        """
         assert times.shape == values.shape
         assert values.ndim == 2
         num_fevals = values.shape[0]
         num_repeats = values.shape[1]
 
         # predict an isotonic curve for the time range for each run
-        predictions = np.full((num_repeats, time_range.shape[0]), fill_value=np.NaN)
-        for run in range(num_repeats):
-            # get the data of this run
-            _x = times[:, run]
-            _y = values[:, run]
-            assert _x.shape[0] == _y.shape[0] == num_fevals
-
-            # filter NaN
-            no_nan_mask = ~np.isnan(_x) & ~np.isnan(_y)  # only keep indices where both the times and values are not NaN
-            _x = _x[no_nan_mask]
-            _y = _y[no_nan_mask]
-            assert _x.ndim == _y.ndim == 1
-            assert np.all(~np.isnan(_x))
-            assert np.all(~np.isnan(_y))
-            fraction_valid = _y.shape[0] / num_fevals
-            if fraction_valid < 0.05:
+        if batched:
+            num_valid = np.count_nonzero(~np.isnan(times) & ~np.isnan(values), axis=0)
+            for run_num_valid in num_valid[num_valid / num_fevals < 0.05]:
                 warn(
-                    f"{round(fraction_valid * 100, 1)}% data left after removing NaN ({_y.shape[0]} / {num_fevals})",
+                    f"{round(run_num_valid / num_fevals * 100, 1)}% data left after removing NaN "
+                    f"({run_num_valid} / {num_fevals})",
                     category=UserWarning,
                 )
-
-            # get the prediction
-            predictions[run] = self.get_isotonic_curve(_x, _y, time_range)
+            predictions = batched_isotonic_regression(
+                times, values, time_range, increasing=not self.minimization, n_jobs=self.bootstrap_n_jobs
+            )
+        else:
+            predictions = np.full((num_repeats, time_range.shape[0]), fill_value=np.NaN)
+            for run in range(num_repeats):
+                # get the data of this run
+                _x = times[:, run]
+                _y = values[:, run]
+                assert _x.shape[0] == _y.shape[0] == num_fevals
+
+                # filter NaN, only keep indices where both the times and values are not NaN
+                no_nan_mask = ~np.isnan(_x) & ~np.isnan(_y)
+                _x = _x[no_nan_mask]
+                _y = _y[no_nan_mask]
+                assert _x.ndim == _y.ndim == 1
+                assert np.all(~np.isnan(_x))
+                assert np.all(~np.isnan(_y))
+                fraction_valid = _y.shape[0] / num_fevals
+                if fraction_valid < 0.05:
+                    warn(
+                        f"{round(fraction_valid * 100, 1)}% data left after removing NaN "
+                        f"({_y.shape[0]} / {num_fevals})",
+                        category=UserWarning,
+                    )
+
+                # get the prediction
+                predictions[run] = self.get_isotonic_curve(_x, _y, time_range)
 
         # extract the mean and prediction intervals
         assert np.all(~np.isnan(predictions))
@@ -992,12 +1430,26 @@ class StochasticOptimizationAlgorithm(Curve):
         self, x_1d: np.ndarray, y_1d: np.ndarray, x_test_1d: np.ndarray, confidence_level: float, num_repeats: int
     ) -> np.ndarray:
         """Calculates the prediction interval and isotonic regression mean using a bootstrap bagging method."""
-        # prepare the data
-        x = x_1d.reshape(-1, 1)
-        x_test = x_test_1d.reshape(-1, 1)
-        y = y_1d
+        n_estimators, max_samples = self._get_bagging_parameters(num_repeats)
+
+        # do the bootstrap bagging, yields array with shape (run, x_test)
+        br_collection = bootstrap_isotonic_regression(
+            x_1d,
+            y_1d,
+            x_test_1d,
+            n_bootstraps=n_estimators,
+            max_samples=max_samples,
+            increasing=not self.minimization,
+            y_min=y_1d.min(),
+            y_max=y_1d.max(),
+            seed=self.bootstrap_seed,
+            n_jobs=self.bootstrap_n_jobs,
+        )
+        return self._get_prediction_interval_of_bootstraps(br_collection, confidence_level)
 
-        # set the parameters
+    @staticmethod
+    def _get_bagging_parameters(num_repeats: int) -> tuple[int, float]:
+        """Get the number of estimators and the fraction of samples of the bootstrap bagging."""
         # based on the number of repeats,
         #   where the number of estimators is equal to the number of repeats and the fraction of samples is
         #   inversely proportional to the square root of the number of estimators.
@@ -1008,26 +1460,171 @@ class StochasticOptimizationAlgorithm(Curve):
         # n_estimators = max(round(np.sqrt(num_repeats)), 3)
         # n_estimators = max(round(np.log2(num_repeats**2)), 3)
         # max_samples = 1 / n_estimators
+        return n_estimators, max_samples
 
-        # do the bootstrap bagging
-        regression_model = self.get_isotonic_regressor(y_min=y.min(), y_max=y.max())
-        bagging_regressor = BaggingRegressor(
-            regression_model, n_estimators=n_estimators, max_samples=max_samples, bootstrap=True
-        )
-        br = bagging_regressor.fit(x, y)  # fit the data to the estimators
-        br_prediction = br.predict(x_test)
-        br_collection = np.array(
-            [est.predict(x_test) for est in br.estimators_]
-        )  # predict for each estimator; yields array with shape (run, x_test)
+    def _get_prediction_interval_of_bootstraps(self, br_collection: np.ndarray, confidence_level: float) -> np.ndarray:
+        """Get the prediction interval and mean of the bootstrap predictions of shape (run, x_test)."""
+        br_prediction = np.mean(br_collection, axis=0)
 
         # get the prediction interval in the correct shape
         y_lower_err, y_upper_err = self.get_confidence_interval(
             br_collection.transpose(), confidence_level=confidence_level
         )
         prediction_interval = np.concatenate([y_lower_err, y_upper_err, br_prediction]).reshape((3, -1)).transpose()
-        assert prediction_interval.shape == (x_test.shape[0], 3), f"{prediction_interval.shape}"
+        assert prediction_interval.shape == (br_collection.shape[1], 3), f"{prediction_interval.shape}"
         return prediction_interval
 
+    def _get_prediction_interval_step(
+        self, time_range: np.ndarray, dist: np.ndarray, confidence_level: float
+    ) -> tuple[np.ndarray, float]:
+        """Calculates the median and confidence interval of the indices of the step functions of the repeats over time.
+
+        The best-found value of a repeat at a time is the value of the last valid function evaluation at or before that
+        time, looked up for all repeats at once on the time range, over blocks of rows if ``block_rows`` is set. Times
+        before the first valid function evaluation of a repeat take its first value.
+
+        Args:
+            time_range: the ascending time range to evaluate.
+            dist: the distribution to get the indices in.
+            confidence_level: the confidence level of the confidence interval.
+
+        Raises:
+            ValueError: if no repeat found a value within the time range.
+
+        Returns:
+            The interval of shape (time_range, 3) of the lower and upper index and the median index, and the real
+            stopping point in time.
+        """
+        assert time_range.ndim == 1
+        assert np.all(np.isfinite(time_range))
+        assert np.all(np.diff(time_range) >= 0), "The time range must be ascending"
+        num_times, num_repeats = time_range.shape[0], self._y.shape[1]
+        repeats = np.arange(num_repeats)
+        values_at_time = np.full((num_times, num_repeats), np.nan)
+        first_value_per_repeat = np.full(num_repeats, np.nan)
+        highest_time_per_repeat = np.full(num_repeats, -np.inf)
+        for block in self._get_row_blocks():
+            times, values = np.asarray(self._x_time[block]), np.asarray(self._y[block])
+            if validates("strict"):
+                assert not np.any(np.diff(times, axis=0) < 0), "The times of each repeat must be ascending"
+            valid_mask = ~np.isnan(times) & ~np.isnan(values)
+            highest_time_per_repeat = np.maximum(
+                highest_time_per_repeat, np.max(np.where(valid_mask, times, -np.inf), axis=0)
+            )
+
+            # the valid rows from the first time at or after their time, the last of which holds at each time
+            time_index = np.where(valid_mask, np.searchsorted(time_range, times, side="left"), num_times)
+            row_at_time = np.full((num_times + 1, num_repeats), -1)
+            np.maximum.at(row_at_time, (time_index, repeats), np.arange(times.shape[0])[:, np.newaxis])
+            row_at_time = np.maximum.accumulate(row_at_time[:num_times], axis=0)
+            found_mask = row_at_time >= 0
+            values_at_time[found_mask] = values[row_at_time[found_mask], np.nonzero(found_mask)[1]]
+
+            # the first valid value of the repeats without a valid value in the previous blocks
+            first_mask = np.isnan(first_value_per_repeat) & valid_mask.any(axis=0)
+            first_rows = np.argmax(valid_mask, axis=0)
+            first_value_per_repeat[first_mask] = values[first_rows[first_mask], repeats[first_mask]]
+        highest_time_per_repeat[np.isinf(highest_time_per_repeat)] = np.nan
+        real_stopping_point_time: float = np.nanmedian(highest_time_per_repeat)
+
+        # before the first value of a repeat is found, take its first found value
+        if np.all(np.isnan(values_at_time)):
+            raise ValueError(f"No overlap in data and given {time_range=}")
+        values_at_time = np.where(np.isnan(values_at_time), first_value_per_repeat, values_at_time)
+
+        # get the median and the confidence interval of the indices, as over fevals
+        indices = get_indices_in_distribution(values_at_time, dist)
+        indices_lower_err, indices_upper_err = self.get_confidence_interval(indices, confidence_level)
+        prediction_interval = np.stack([indices_lower_err, indices_upper_err, np.nanmedian(indices, axis=1)], axis=1)
+        return prediction_interval, real_stopping_point_time
+
+    def _get_prediction_interval_in_blocks(
+        self, time_range: np.ndarray, dist: np.ndarray, confidence_level: float
+    ) -> tuple[np.ndarray, float]:
+        """Calculates the prediction interval and bagging mean over time, reading the values over blocks of rows.
+
+        The valid indices in the distribution within the time range, with the same margin as
+        ``_get_curve_over_time_values_in_range``, are pooled in ``time_bins_per_time`` bins per time of the time range.
+        Only the count, mean time, mean index and variance of the indices of each bin are kept, merged over the blocks,
+        so the memory is bounded by the block and the time range. The bagging is fitted on the bins with
+        ``binned_bootstrap_isotonic_regression``, which approximates ``_get_prediction_interval_bagging`` on the
+        results in memory.
+
+        Args:
+            time_range: the time range to predict.
+            dist: the distribution to get the indices in.
+            confidence_level: the confidence level of the prediction interval.
+
+        Returns:
+            The prediction interval of shape (time_range, 3) as in ``_get_prediction_interval_bagging``, and the real
+            stopping point in time.
+        """
+        assert time_range.ndim == 1
+        assert np.all(np.isfinite(time_range))
+        time_range_margin = 0.1
+        time_lower, time_upper = time_range[0] * (1 - time_range_margin), time_range[-1] * (1 + time_range_margin)
+        num_bins = time_bins_per_time * time_range.shape[0]
+        bin_edges = np.linspace(time_lower, time_upper, num_bins + 1)
+        num_repeats = self._y.shape[1]
+        highest_time_per_repeat = np.full(num_repeats, -np.inf)
+        num_times_in_range = np.zeros(num_repeats, dtype=int)
+        counts, time_sums = np.zeros(num_bins), np.zeros(num_bins)
+        index_means, index_squared_deviations = np.zeros(num_bins), np.zeros(num_bins)
+        index_min, index_max = np.inf, -np.inf
+        for block in self._get_row_blocks():
+            times, values = np.asarray(self._x_time[block]), np.asarray(self._y[block])
+            valid_mask = ~np.isnan(times) & ~np.isnan(values)
+            highest_time_per_repeat = np.maximum(
+                highest_time_per_repeat, np.max(np.where(valid_mask, times, -np.inf), axis=0)
+            )
+            in_range_mask = valid_mask & (time_lower <= times) & (times <= time_upper)
+            num_times_in_range += np.count_nonzero(in_range_mask, axis=0)
+            block_times, block_indices = times[in_range_mask], get_indices_in_distribution(values[in_range_mask], dist)
+            no_nan_mask = ~np.isnan(block_indices)
+            block_times, block_indices = block_times[no_nan_mask], block_indices[no_nan_mask]
+            if block_indices.shape[0] == 0:
+                continue
+            index_min, index_max = min(index_min, np.min(block_indices)), max(index_max, np.max(block_indices))
+
+            # pool the block in the bins, then merge the means and squared deviations with those of earlier blocks
+            bins = np.clip(np.searchsorted(bin_edges, block_times, side="right") - 1, 0, num_bins - 1)
+            block_counts = np.bincount(bins, minlength=num_bins).astype(float)
+            time_sums += np.bincount(bins, weights=block_times, minlength=num_bins)
+            block_means = np.bincount(bins, weights=block_indices, minlength=num_bins) / np.maximum(block_counts, 1)
+            block_squared_deviations = np.bincount(
+                bins, weights=(block_indices - block_means[bins]) ** 2, minlength=num_bins
+            )
+            merged_counts = counts + block_counts
+            merged_fraction = block_counts / np.maximum(merged_counts, 1)
+            deltas = block_means - index_means
+            index_means += deltas * merged_fraction
+            index_squared_deviations += block_squared_deviations + deltas**2 * counts * merged_fraction
+            counts = merged_counts
+        assert np.all(num_times_in_range > 1), "Not enough overlap in time range and time values"
+        highest_time_per_repeat[np.isinf(highest_time_per_repeat)] = np.nan
+        real_stopping_point_time: float = np.nanmedian(highest_time_per_repeat)
+
+        # fit the bagging on the bins, with the bootstrap parameters of the results in memory
+        nonempty_mask = counts > 0
+        counts = counts[nonempty_mask]
+        n_estimators, max_samples = self._get_bagging_parameters(num_repeats)
+        br_collection = binned_bootstrap_isotonic_regression(
+            time_sums[nonempty_mask] / counts,
+            counts,
+            index_means[nonempty_mask],
+            index_squared_deviations[nonempty_mask] / counts,
+            time_range,
+            n_bootstraps=n_estimators,
+            max_samples=max_samples,
+            increasing=not self.minimization,
+            y_min=index_min,
+            y_max=index_max,
+            seed=self.bootstrap_seed,
+            n_jobs=self.bootstrap_n_jobs,
+        )
+        prediction_interval = self._get_prediction_interval_of_bootstraps(br_collection, confidence_level)
+        return prediction_interval, real_stopping_point_time
+
     def _get_prediction_interval_conformal(
         self,
         x_1d: np.ndarray,
@@ -1037,50 +1634,79 @@ class StochasticOptimizationAlgorithm(Curve):
         method="inductive_conformal",
         train_fraction: float = 0.75,
     ) -> np.ndarray:
-        """Calculates the prediction interval using various conformal methods."""
-        methods = ["inductive_conformal"]
-        assert method in methods
-        assert 0 < train_fraction < 1
-
-        # divide data into training and calibration set (75%-25%)
-        N = x_1d.shape[0]
-        calibration_cutoff = round(N * train_fraction)
-        random_indices = np.random.permutation(N)
-        indices_train, indices_calibrate = random_indices[:calibration_cutoff], random_indices[calibration_cutoff:]
-        assert len(indices_train) + len(indices_calibrate) == N
-
-        # set the correct shape of the data
-        y = y_1d
-        y_train = y[indices_train]
-        y_cal = y[indices_calibrate]
-        to_2d = True
-        if to_2d:
-            x = x_1d.reshape(-1, 1)
-            x_test = x_test_1d.reshape(-1, 1)
-            x_train = x[indices_train, :]
-            x_cal = x[indices_calibrate, :]
-        else:
-            x = x_1d
-            x_test = x_test_1d
-            x_train = x[indices_train]
-            x_cal = x[indices_calibrate]
+        """Calculates the conformal prediction interval around the isotonic regression, see ``conformal``.
 
-        # create the regression model
-        regression_model = self.get_isotonic_regressor(y_min=y.min(), y_max=y.max())
+        The fit is kept for the next call on the same data, which only has to look up the calibrated residuals at the
+        ranks of another confidence level.
 
-        # Inductive Conformal Point Prediction (based on https://arxiv.org/pdf/2107.00363.pdf, page 16 & 17)
-        from nonconformist.cp import IcpRegressor
-        from nonconformist.nc import NcFactory, SignErrorErrFunc
+        Args:
+            x_1d: the one-dimensional x-values of the data.
+            y_1d: the one-dimensional y-values of the data.
+            x_test_1d: the one-dimensional x-values to predict.
+            confidence_level: the confidence level of the prediction interval.
+            method: "inductive_conformal" for the split conformal method, or "jackknife+". Defaults to
+                "inductive_conformal".
+            train_fraction: the fraction of the data to fit to with the split conformal method. Defaults to 0.75.
 
-        # create the nonconformity function and inductive conformal regressor
-        nonconformity_function = NcFactory.create_nc(regression_model, err_func=SignErrorErrFunc())
-        inductive_conformal_regressor = IcpRegressor(nonconformity_function)
+        Returns:
+            An array of shape (x_test_1d, 2) of the lower and upper bound of the prediction interval.
+        """
+        methods = {"inductive_conformal": "split", "jackknife+": "jackknife+"}
+        assert method in methods, f"method must be one of {tuple(methods)}, is {method}"
+        key = (
+            method,
+            train_fraction,
+            self.bootstrap_seed,
+            get_array_fingerprint(x_1d),
+            get_array_fingerprint(y_1d),
+            self.minimization,
+        )
+        if self._conformal_fit is None or self._conformal_fit[0] != key:
+            regressor = ConformalIsotonicRegression(
+                methods[method],
+                train_fraction=train_fraction,
+                increasing=not self.minimization,
+                y_min=y_1d.min(),
+                y_max=y_1d.max(),
+                seed=self.bootstrap_seed,
+                n_jobs=self.bootstrap_n_jobs,
+            )
+            self._conformal_fit = (key, regressor.fit(x_1d, y_1d))
+        prediction_interval = self._conformal_fit[1].predict_interval(x_test_1d, confidence_level)
+        return prediction_interval
 
-        # fit and calibrate the ICP
-        inductive_conformal_regressor.fit(x_train, y_train)
-        inductive_conformal_regressor.calibrate(x_cal, y_cal)
 
-        # get the interval on the prediction
-        prediction_interval = inductive_conformal_regressor.predict(x_test, significance=1 - confidence_level)
+def compute_memoized_curves(
+    results_description: ResultsDescription,
+    jobs: list[tuple[np.ndarray, str, np.ndarray, float]],
+    bootstrap_seed: Optional[int],
+    validation_level: str,
+    block_rows: Optional[int] = None,
+    time_curve_method: str = StochasticOptimizationAlgorithm.time_curve_method,
+    time_interval_method: str = StochasticOptimizationAlgorithm.time_interval_method,
+    bootstrap_n_jobs: int = StochasticOptimizationAlgorithm.bootstrap_n_jobs,
+) -> dict[tuple, tuple]:
+    """Compute curves of a strategy, as a job in another process that returns the curves to merge with ``update_memo``.
 
-        return prediction_interval
+    Args:
+        results_description: the ResultsDescription object of the strategy, with the results cached to file.
+        jobs: the arguments of ``get_curve`` per curve to compute, the range, x-type, distribution and confidence level.
+        bootstrap_seed: the ``bootstrap_seed`` of the curve, which is part of the key of curves that use bootstraps.
+        validation_level: the validation level to compute the curves at.
+        block_rows: the ``block_rows`` of the curve. Defaults to None, computing in memory.
+        time_curve_method: the ``time_curve_method`` of the curve. Defaults to "isotonic".
+        time_interval_method: the ``time_interval_method`` of the curve. Defaults to "bagging".
+        bootstrap_n_jobs: the ``bootstrap_n_jobs`` of the curve. Defaults to 1.
+
+    Returns:
+        The memoized curves by key.
+    """
+    set_validation_level(validation_level)
+    curve = StochasticOptimizationAlgorithm(results_description, block_rows=block_rows)
+    curve.bootstrap_seed = bootstrap_seed
+    curve.time_curve_method = time_curve_method
+    curve.time_interval_method = time_interval_method
+    curve.bootstrap_n_jobs = bootstrap_n_jobs
+    for range, x_type, dist, confidence_level in jobs:
+        curve.get_curve(range, x_type, dist=dist, confidence_level=confidence_level)
+    return curve._memo
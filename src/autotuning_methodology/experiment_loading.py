@@ -0,0 +1,200 @@
+"""Loading of the experiments file, and of the searchspaces and results descriptions of its strategies."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import json
+from importlib.resources import files
+from os import getcwd
+from pathlib import Path
+
+from autotuning_methodology.caching import ResultsDescription
+from autotuning_methodology.instrumentation import span
+from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
+from autotuning_methodology.sweeps import expand_sweep
+
+
+def get_experiment_schema_filepath():
+    """Obtains and checks the filepath to the JSON schema.
+
+    Returns:
+        the filepath to the schema in Traversable format.
+    """
+    schemafile = files("autotuning_methodology").joinpath("schema.json")
+    assert schemafile.is_file(), f"Path to schema.json does not exist, attempted path: {schemafile}"
+    return schemafile
+
+
+def get_experiment(filename: str) -> dict:
+    """Validates and gets the experiment from the experiments .json file.
+
+    Args:
+        filename: path to the experiments .json file.
+
+    Returns:
+        Experiment dictionary object.
+    """
+    # get the path to the experiment file
+    # folder_name = "experiment_files"
+    extension = ".json"
+    if not filename.endswith(extension):
+        filename = filename + extension
+    path = Path(filename)
+    # if not filename.startswith(folder_name + "/"):
+    #     path = folder / filename
+    # else:
+    #     path = Path(filename)
+    assert path.exists(), f"Path to experiment file does not exist, attempted path: {path}, CWD: {getcwd()}"
+
+    # open the experiment file and validate using the schema file
+    with open(path) as file:
+        experiment: dict = json.load(file)
+    validate_experiment(experiment)
+    return experiment
+
+
+def validate_experiment(experiment: dict):
+    """Validates an experiment dictionary against the JSON schema.
+
+    Args:
+        experiment: the experiment dictionary object.
+
+    Raises:
+        jsonschema.ValidationError: if the experiment is not valid.
+    """
+    from jsonschema import validate
+
+    with open(get_experiment_schema_filepath()) as schemafile:
+        schema = json.load(schemafile)
+    validate(instance=experiment, schema=schema)
+
+
+def get_strategies(experiment: dict) -> dict:
+    """Gets the strategies from an experiments file by augmenting it with the defaults and expanding the sweeps.
+
+    Args:
+        experiment: the experiment dictionary object.
+
+    Returns:
+        The strategies in the experiment dictionary object, augmented where necessery.
+    """
+    strategy_defaults = experiment["strategy_defaults"]
+    strategies = experiment["strategies"]
+    # # get a baseline index if it exists
+    # baseline_index = list(
+    #     strategy_index for strategy_index, strategy in enumerate(strategies) if "is_baseline" in strategy
+    # )
+    # if len(baseline_index) != 1:
+    #     raise ValueError(f"There must be exactly one baseline, found {len(baseline_index)} baselines")
+    # if strategies[baseline_index[0]]["is_baseline"] is not True:
+    #     raise ValueError(f"is_baseline must be true, yet is set to {strategies[0]['is_baseline']}!")
+    # # if the baseline index is not 0, put the baseline strategy first
+    # if baseline_index[0] != 0:
+    #     raise ValueError("The baseline strategy must be the first strategy in the experiments file!")
+    #     # strategies.insert(0, strategies.pop(baseline_index[0]))
+
+    # augment the strategies with the defaults
+    for strategy in strategies:
+        for default in strategy_defaults:
+            if default not in strategy:
+                strategy[default] = strategy_defaults[default]
+
+    # expand the sweeps into a strategy per variant
+    strategies = list(variant for strategy in strategies for variant in expand_sweep(strategy))
+    names = list(strategy["name"] for strategy in strategies)
+    assert len(names) == len(set(names)), f"Strategy names must be unique, are {names}"
+    experiment["strategies"] = strategies
+    return strategies
+
+
+def get_searchspace_statistics(experiment: dict, experiment_folderpath: Path, gpu_name: str, kernel_name: str):
+    """Load the statistics of the bruteforced searchspace of a kernel on a GPU.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        gpu_name: the name of the GPU.
+        kernel_name: the name of the kernel.
+
+    Returns:
+        The ``SearchspaceStatistics`` object.
+    """
+    with span("experiment.load_searchspace", gpu=gpu_name, kernel=kernel_name):
+        return SearchspaceStatistics(
+            kernel_name=kernel_name,
+            device_name=gpu_name,
+            minimization=experiment.get("minimization", True),
+            objective_time_keys=experiment["objective_time_keys"],
+            objective_performance_keys=experiment["objective_performance_keys"],
+            bruteforced_caches_path=experiment_folderpath / experiment["bruteforced_caches_path"],
+        )
+
+
+def get_cutoff(experiment: dict, searchspace_stats: SearchspaceStatistics) -> tuple[int, float, int]:
+    """Get the cutoff point of a searchspace.
+
+    Args:
+        experiment: the experiment dictionary.
+        searchspace_stats: the ``SearchspaceStatistics`` object of the searchspace.
+
+    Returns:
+        A tuple of the cutoff point in function evaluations, the cutoff point in time, and the searchspace size.
+    """
+    cutoff_percentile: float = experiment.get("cutoff_percentile", 1)
+    _, cutoff_point_fevals, cutoff_point_time = searchspace_stats.cutoff_point_fevals_time(cutoff_percentile)
+    return cutoff_point_fevals, cutoff_point_time, searchspace_stats.size
+
+
+def get_results_description(
+    experiment: dict, experiment_folderpath: Path, gpu_name: str, kernel_name: str, strategy: dict, cache=True
+) -> ResultsDescription:
+    """Get the ``ResultsDescription`` of a strategy on a kernel and GPU.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        gpu_name: the name of the GPU.
+        kernel_name: the name of the kernel.
+        strategy: the strategy.
+        cache: whether the results are cached in the visualization caches, or kept in memory only. Defaults to True.
+
+    Returns:
+        The ``ResultsDescription`` object.
+    """
+    return ResultsDescription(
+        experiment["folder_id"],
+        kernel_name,
+        gpu_name,
+        strategy["name"],
+        strategy["display_name"],
+        strategy["stochastic"],
+        objective_time_keys=experiment["objective_time_keys"],
+        objective_performance_keys=experiment["objective_performance_keys"],
+        minimization=experiment.get("minimization", True),
+        visualization_caches_path=experiment_folderpath / experiment["visualization_caches_path"] if cache else None,
+    )
+
+
+def get_searchspace(
+    experiment: dict,
+    experiment_folderpath: Path,
+    gpu_name: str,
+    kernel_name: str,
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]],
+) -> tuple[SearchspaceStatistics, tuple[int, float, int]]:
+    """Get the searchspace statistics and cutoff of a kernel on a GPU, loading the searchspace only once.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        gpu_name: the name of the GPU.
+        kernel_name: the name of the kernel.
+        searchspaces: the searchspace statistics and cutoff per GPU and kernel, the searchspace is loaded and added
+            if it is not in there yet.
+
+    Returns:
+        A tuple of the ``SearchspaceStatistics`` object and the cutoff, see ``get_cutoff``.
+    """
+    if (gpu_name, kernel_name) not in searchspaces:
+        searchspace_stats = get_searchspace_statistics(experiment, experiment_folderpath, gpu_name, kernel_name)
+        searchspaces[(gpu_name, kernel_name)] = (searchspace_stats, get_cutoff(experiment, searchspace_stats))
+    return searchspaces[(gpu_name, kernel_name)]
@@ -2,23 +2,59 @@
 
 from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
 
-import json
+import re
 import sys
-from argparse import ArgumentParser
+import time
+from argparse import ArgumentParser, Namespace
+from copy import deepcopy
+from functools import partial
 from importlib import import_module
-from importlib.resources import files
 from math import ceil
 from os import getcwd
 from pathlib import Path
+from typing import Callable, Optional
 
-from jsonschema import validate
+from autotuning_methodology.caching import (
+    ResultsDescription,
+    concatenate_results_arrays,
+    truncate_results_arrays,
+)
+from autotuning_methodology.experiment_loading import (  # noqa: F401 (the loaders are re-exported)
+    get_cutoff,
+    get_experiment,
+    get_experiment_schema_filepath,
+    get_results_description,
+    get_searchspace,
+    get_searchspace_statistics,
+    get_strategies,
+    validate_experiment,
+)
+from autotuning_methodology.incremental import (
+    get_budget,
+    get_incremental_work,
+    get_num_evaluations,
+    get_provenance,
+)
+from autotuning_methodology.instrumentation import add_instrumentation_arguments, recording_from_args, span
+from autotuning_methodology.profiling import Profiler, clock_types
+from autotuning_methodology.runner import get_results_arrays, run_strategy
+from autotuning_methodology.scheduler import Task, TaskScheduler
+from autotuning_methodology.searchspace_statistics import (
+    SearchspaceStatistics,
+    get_valid_bruteforced_cache_filepath,
+)
+from autotuning_methodology.sharding import parse_shard, partition, split_repeats
+from autotuning_methodology.validators import add_validation_arguments, set_validation_level_from_args
+from autotuning_methodology.workers import (
+    TuningWorkerPool,
+    import_isolated_kernel,
+    memoized_kernel_tuner_setup,
+    run_strategy_in_worker,
+)
+from autotuning_methodology.workqueue import WorkQueue
 
-from autotuning_methodology.caching import ResultsDescription
-from autotuning_methodology.runner import collect_results
-from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
 
-
-def get_args_from_cli(args=None) -> str:
+def get_experiment_args_from_cli(args=None) -> Namespace:
     """Set the Command Line Interface arguments definitions, get and return the argument values.
 
     Args:
@@ -28,204 +64,1279 @@ def get_args_from_cli(args=None) -> str:
         ValueError: on invalid argument.
 
     Returns:
-        The filepath to the experiments file.
+        The parsed arguments, see ``get_execute_experiment_kwargs`` for the keyword arguments of the execution.
     """
     CLI = ArgumentParser()
     CLI.add_argument("experiment", type=str, help="The experiment.json to execute, see experiments/template.json")
+    CLI.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a profile of the runs per GPU, kernel and strategy (as pstat, callgrind and folded stacks)",
+    )
+    CLI.add_argument(
+        "--profile-dir",
+        type=Path,
+        default=None,
+        help="The directory to write the profiles to, defaults to 'profilings' next to the experiments file",
+    )
+    CLI.add_argument("--profile-clock", choices=clock_types, default="cpu", help="Profile CPU time or wall time")
+    CLI.add_argument(
+        "--persistent-workers",
+        action="store_true",
+        help="Tune in a long-lived worker process per kernel and GPU that keeps the Kernel Tuner setup resident",
+    )
+    CLI.add_argument(
+        "--parallel-workers",
+        type=int,
+        default=1,
+        help="The number of worker processes to execute independent GPU, kernel, strategy and repeats combinations on",
+    )
+    CLI.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only estimate the evaluations and tuning time of the uncached strategies, without running them",
+    )
+    CLI.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Only execute shard 'i/N' (0 <= i < N) of the uncached work, e.g. the index of a cluster array job",
+    )
+    CLI.add_argument(
+        "--merge",
+        action="store_true",
+        help="Merge the results of the shards into the cache, after all shards have been executed",
+    )
+    CLI.add_argument(
+        "--work-queue",
+        type=Path,
+        default=None,
+        help="Publish the work to a work queue in this directory on a shared filesystem, and work on it",
+    )
+    CLI.add_argument(
+        "--worker",
+        action="store_true",
+        help="Work on the tasks published to the --work-queue by another process, until all are done",
+    )
+    add_instrumentation_arguments(CLI)
+    add_validation_arguments(CLI)
     args = CLI.parse_args(args)
+    if args.worker and args.work_queue is None:
+        CLI.error("--worker requires --work-queue")
+    if args.worker and args.parallel_workers > 1:
+        CLI.error("--worker can not be combined with --parallel-workers, start a worker per process instead")
+    if args.shard is not None and (args.parallel_workers > 1 or args.work_queue is not None):
+        CLI.error("--shard can not be combined with --parallel-workers or --work-queue")
     filepath: str = args.experiment
     if filepath is None or filepath == "":
         raise ValueError(
             "Invalid '-experiment' option. Run 'visualize_experiments.py -h' to read more about the options."
         )
-    return filepath
+    return args
+
+
+def get_execute_experiment_kwargs(args: Namespace) -> dict:
+    """Get the keyword arguments for ``execute_experiment`` from the parsed Command Line Interface arguments.
+
+    Args:
+        args: the arguments parsed by ``get_experiment_args_from_cli``.
+
+    Returns:
+        A dictionary of keyword arguments.
+    """
+    return dict(
+        profiling=args.profile,
+        profile_dir=args.profile_dir,
+        profile_clock=args.profile_clock,
+        persistent_workers=args.persistent_workers,
+        parallel_workers=args.parallel_workers,
+        work_queue=args.work_queue,
+    )
+
+
+def get_args_from_cli(args=None) -> str:
+    """Set the Command Line Interface arguments definitions, get and return the argument values.
+
+    Args:
+        args: optional list of arguments for testing without CLI interaction. Defaults to None.
+
+    Returns:
+        The filepath to the experiments file.
+    """
+    return get_experiment_args_from_cli(args).experiment
+
+
+def get_strategy_cutoff(strategy: dict, cutoff_type: str, cutoff: tuple[int, float, int]) -> tuple[str, float]:
+    """Get when the strategy must stop, in function evaluations or time depending on the ``cutoff_type``.
+
+    Args:
+        strategy: the strategy.
+        cutoff_type: whether to base the cutoff on function evaluations ("fevals") or time ("time").
+        cutoff: the tuple returned by ``get_cutoff``.
+
+    Returns:
+        A tuple of the name of the option ("max_fevals" or "time_limit") and its value.
+    """
+    cutoff_point_fevals, cutoff_point_time, searchspace_size = cutoff
+    cutoff_margin = strategy.get(
+        "cutoff_margin", 1.1
+    )  # +10% margin, to make sure cutoff_point is reached by compensating for potential non-valid evaluations
+    if cutoff_type == "time":
+        return "time_limit", cutoff_point_time * cutoff_margin
+    return "max_fevals", min(int(ceil(cutoff_point_fevals * cutoff_margin)), searchspace_size)
+
+
+def set_strategy_cutoff(strategy: dict, cutoff_type: str, cutoff: tuple[int, float, int]):
+    """Set when the strategy must stop, in function evaluations or time depending on the ``cutoff_type``.
+
+    Args:
+        strategy: the strategy to set the options of.
+        cutoff_type: whether to base the cutoff on function evaluations ("fevals") or time ("time").
+        cutoff: the tuple returned by ``get_cutoff``.
+    """
+    option, value = get_strategy_cutoff(strategy, cutoff_type, cutoff)
+    if "options" not in strategy:
+        strategy["options"] = dict()
+    strategy["options"][option] = value
+
+
+def set_strategy_budget(strategy: dict, budget: dict):
+    """Set when the strategy must stop from a recorded budget, see ``incremental.get_budget``."""
+    if "options" not in strategy:
+        strategy["options"] = dict()
+    strategy["options"].update(budget)
+
+
+def estimate_strategy_cost(strategy: dict, cutoff_type: str, cutoff: tuple[int, float, int]) -> tuple[int, float]:
+    """Estimate the number of simulated evaluations and the tuning time of all repeats of a strategy.
 
+    The time per evaluation is the median total time of the searchspace, as used for the cutoff point in time.
 
-def get_experiment_schema_filepath():
-    """Obtains and checks the filepath to the JSON schema.
+    Args:
+        strategy: the strategy.
+        cutoff_type: whether to base the cutoff on function evaluations ("fevals") or time ("time").
+        cutoff: the tuple returned by ``get_cutoff``.
 
     Returns:
-        the filepath to the schema in Traversable format.
+        A tuple of the number of evaluations and the time in seconds, summed over the repeats.
     """
-    schemafile = files("autotuning_methodology").joinpath("schema.json")
-    assert schemafile.is_file(), f"Path to schema.json does not exist, attempted path: {schemafile}"
-    return schemafile
+    cutoff_point_fevals, cutoff_point_time, searchspace_size = cutoff
+    time_per_feval = cutoff_point_time / cutoff_point_fevals if cutoff_point_fevals > 0 else 0.0
+    option, value = get_strategy_cutoff(strategy, cutoff_type, cutoff)
+    if option == "max_fevals":
+        fevals = value
+    else:
+        fevals = min(int(ceil(value / time_per_feval)), searchspace_size) if time_per_feval > 0 else searchspace_size
+    repeats: int = strategy["repeats"]
+    return repeats * fevals, repeats * fevals * time_per_feval
+
+
+def is_cached(strategy: dict, results_description: ResultsDescription) -> bool:
+    """Whether the results of a strategy can be retrieved from the cache."""
+    return "ignore_cache" not in strategy and results_description.has_results()
 
 
-def get_experiment(filename: str) -> dict:
-    """Validates and gets the experiment from the experiments .json file.
+def get_strategy_work(
+    experiment: dict,
+    experiment_folderpath: Path,
+    gpu_name: str,
+    kernel_name: str,
+    strategy: dict,
+    results_description: ResultsDescription,
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]],
+) -> tuple[str, range, Optional[dict]]:
+    """Get the work to bring the cached results of a strategy up to date, see ``incremental.get_incremental_work``.
 
     Args:
-        filename: path to the experiments .json file.
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        gpu_name: the name of the GPU.
+        kernel_name: the name of the kernel.
+        strategy: the strategy.
+        results_description: the ``ResultsDescription`` object of the strategy.
+        searchspaces: the searchspace statistics and cutoff per GPU and kernel, see ``get_searchspace``. The
+            searchspace is only loaded if the budget of the strategy must be determined.
 
     Returns:
-        Experiment dictionary object.
+        A tuple of the action, the range of repeats to run, and the provenance to record with the results.
     """
-    # get the path to the experiment file
-    # folder_name = "experiment_files"
-    extension = ".json"
-    if not filename.endswith(extension):
-        filename = filename + extension
-    path = Path(filename)
-    # if not filename.startswith(folder_name + "/"):
-    #     path = folder / filename
-    # else:
-    #     path = Path(filename)
-    assert path.exists(), f"Path to experiment file does not exist, attempted path: {path}, CWD: {getcwd()}"
+    cutoff_type: str = experiment.get("cutoff_type", "fevals")
 
-    # get the path to the schema
-    schemafile = get_experiment_schema_filepath()
+    def determine_budget() -> dict:
+        _, cutoff = get_searchspace(experiment, experiment_folderpath, gpu_name, kernel_name, searchspaces)
+        return get_budget(*get_strategy_cutoff(strategy, cutoff_type, cutoff))
 
-    # open the experiment file and validate using the schema file
-    with open(path) as file, open(schemafile) as schemafile:
-        schema = json.load(schemafile)
-        experiment: dict = json.load(file)
-        validate(instance=experiment, schema=schema)
-        return experiment
+    provenance = get_provenance(experiment, strategy)
+    if not is_cached(strategy, results_description):
+        return "run", range(strategy["repeats"]), dict(provenance, budget=determine_budget())
+    return get_incremental_work(
+        results_description.get_provenance(),
+        provenance,
+        determine_budget,
+        lambda: get_num_evaluations(results_description.get_results_arrays()["fevals_results"]),
+    )
 
 
-def get_strategies(experiment: dict) -> dict:
-    """Gets the strategies from an experiments file by augmenting it with the defaults.
+def execute_strategy_work(
+    action: str,
+    repeats: range,
+    provenance: dict,
+    kernel,
+    strategy: dict,
+    results_description: ResultsDescription,
+    searchspace_stats: Optional[SearchspaceStatistics],
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
+):
+    """Executes the work of ``get_strategy_work`` and writes the results with their provenance.
 
     Args:
-        experiment: the experiment dictionary object.
+        action: the action, see ``incremental.incremental_actions``. Must not be "reuse".
+        repeats: the range of repeats to run.
+        provenance: the provenance to record with the results.
+        kernel: the program (kernel) to tune, only used if there are repeats to run.
+        strategy: the strategy.
+        results_description: the ``ResultsDescription`` object to write the results to.
+        searchspace_stats: the ``SearchspaceStatistics`` object, only used for conversion of imported runs.
+        profiler: the ``Profiler`` to write a profile of this strategy with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process.
+    """
+    assert action != "reuse", "Reused results do not have to be written"
+    repeated_results = list()
+    if len(repeats) > 0:
+        # set when to stop from the provenance, so that the recorded budget is the one the repeats ran with
+        set_strategy_budget(strategy, provenance["budget"])
+        repeated_results = run_strategy(
+            kernel, strategy, results_description, searchspace_stats, profiler, workers, repeats=repeats
+        )
+    write_strategy_work(action, provenance, repeated_results, results_description)
+
+
+def write_strategy_work(action: str, provenance: dict, repeated_results: list, results_description: ResultsDescription):
+    """Writes the results of the repeats run for the work of ``get_strategy_work`` with their provenance.
+
+    Args:
+        action: the action, see ``incremental.incremental_actions``. Must not be "reuse".
+        provenance: the provenance to record with the results.
+        repeated_results: the results of the repeats that were run, in order, empty if there were none to run.
+        results_description: the ``ResultsDescription`` object to write the results to.
+    """
+    assert action != "reuse", "Reused results do not have to be written"
+    arrays = results_description.get_results_arrays() if action != "run" else None
+    if len(repeated_results) > 0:
+        new_arrays = get_results_arrays(repeated_results, results_description)
+        arrays = new_arrays if arrays is None else concatenate_results_arrays([arrays, new_arrays])
+    arrays = truncate_results_arrays(arrays, provenance["repeats"])
+    results_description.set_results(arrays, provenance, overwrite=True)
+
+
+def execute_strategies(
+    experiment: dict,
+    experiment_folderpath: Path,
+    strategies: list[dict],
+    import_kernel: Callable,
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]],
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
+    cache=True,
+) -> dict[str, dict[str, dict[str, ResultsDescription]]]:
+    """Executes each strategy per GPU and kernel in this process, retrieving what it can from the cache.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        strategies: the strategies, see ``get_strategies``.
+        import_kernel: the function to import a kernel by name with, only called once a strategy on it must run.
+        searchspaces: the searchspace statistics and cutoff per GPU and kernel, see ``get_searchspace``.
+        profiler: the ``Profiler`` to write a profile of each strategy with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process.
+        cache: whether to cache the results, or keep them in memory only. Defaults to True.
 
     Returns:
-        The strategies in the experiment dictionary object, augmented where necessery.
+        The ``ResultsDescription`` per strategy name per kernel per GPU.
     """
-    strategy_defaults = experiment["strategy_defaults"]
-    strategies = experiment["strategies"]
-    # # get a baseline index if it exists
-    # baseline_index = list(
-    #     strategy_index for strategy_index, strategy in enumerate(strategies) if "is_baseline" in strategy
-    # )
-    # if len(baseline_index) != 1:
-    #     raise ValueError(f"There must be exactly one baseline, found {len(baseline_index)} baselines")
-    # if strategies[baseline_index[0]]["is_baseline"] is not True:
-    #     raise ValueError(f"is_baseline must be true, yet is set to {strategies[0]['is_baseline']}!")
-    # # if the baseline index is not 0, put the baseline strategy first
-    # if baseline_index[0] != 0:
-    #     raise ValueError("The baseline strategy must be the first strategy in the experiments file!")
-    #     # strategies.insert(0, strategies.pop(baseline_index[0]))
+    # execute each strategy in the experiment per GPU and kernel
+    results_descriptions: dict[str, dict[str, dict[str, ResultsDescription]]] = dict()
+    kernels = dict()
+    gpu_name: str
+    for gpu_name in experiment["GPUs"]:
+        print(f" | running on GPU '{gpu_name}'")
+        results_descriptions[gpu_name] = dict()
+        for kernel_name in experiment["kernels"]:
+            print(f" | - optimizing kernel '{kernel_name}'")
+            results_descriptions[gpu_name][kernel_name] = dict()
+            for strategy in strategies:
+                strategy_name: str = strategy["name"]
+                print(f" | - | using strategy '{strategy['display_name']}'")
+                results_description = get_results_description(
+                    experiment, experiment_folderpath, gpu_name, kernel_name, strategy, cache=cache
+                )
+
+                # compare the strategy with the configuration of the cached data to only run what has changed
+                action, repeats, provenance = get_strategy_work(
+                    experiment,
+                    experiment_folderpath,
+                    gpu_name,
+                    kernel_name,
+                    strategy,
+                    results_description,
+                    searchspaces,
+                )
+                if action == "reuse":
+                    print(" | - |-> retrieved from cache")
+                elif len(repeats) == 0:
+                    print(f" | - |-> retrieved from cache, {action}d to the current configuration")
+                    execute_strategy_work(action, repeats, provenance, None, strategy, results_description, None)
+                else:  # execute the repeats that are not in the cache
+                    if action == "append":
+                        print(f" | - |-> retrieved {repeats.start} repeats from cache, running the others")
+                    elif results_description.has_results() and "ignore_cache" not in strategy:
+                        print(" | - |-> configuration changed since cached, running again")
+                    # the searchspace is only loaded and the kernel only imported once a strategy must run
+                    searchspace_stats, _ = get_searchspace(
+                        experiment, experiment_folderpath, gpu_name, kernel_name, searchspaces
+                    )
+                    if kernel_name not in kernels:
+                        with span("experiment.import_kernels"):
+                            kernels[kernel_name] = import_kernel(kernel_name)
+                    with span("experiment.collect_results", gpu=gpu_name, kernel=kernel_name, strategy=strategy_name):
+                        execute_strategy_work(
+                            action,
+                            repeats,
+                            provenance,
+                            kernels[kernel_name],
+                            strategy,
+                            results_description,
+                            searchspace_stats,
+                            profiler=profiler,
+                            workers=workers,
+                        )
 
-    # augment the strategies with the defaults
-    for strategy in strategies:
-        for default in strategy_defaults:
-            if default not in strategy:
-                strategy[default] = strategy_defaults[default]
-    return strategies
+                # set the results
+                results_descriptions[gpu_name][kernel_name][strategy_name] = results_description
 
+    return results_descriptions
 
-def execute_experiment(filepath: str, profiling: bool = False) -> tuple[dict, dict, dict]:
+
+def execute_experiment(
+    filepath: str,
+    profiling: bool = False,
+    profile_dir: Path = None,
+    profile_clock="cpu",
+    persistent_workers=False,
+    parallel_workers=1,
+    work_queue: Optional[Path] = None,
+) -> tuple[dict, dict, dict]:
     """Executes the experiment by retrieving it from the cache or running it.
 
     Args:
         filepath: path to the experiments .json file.
         profiling: whether profiling is enabled. Defaults to False.
+        profile_dir: the directory to write the profiles to. Defaults to None, using 'profilings' next to the file.
+        profile_clock: whether to profile CPU time ("cpu") or wall time ("wall"). Defaults to "cpu".
+        persistent_workers: whether to tune in a long-lived worker process per kernel and device. Defaults to False.
+        parallel_workers: the number of worker processes to execute independent tasks on, see
+            ``execute_experiment_scheduled``. Defaults to 1, executing serially in this process.
+        work_queue: the directory of a work queue to publish the work to, see ``execute_experiment_queued``.
+            Defaults to None, not using a work queue.
 
     Raises:
+        ValueError: if ``parallel_workers`` is combined with ``persistent_workers`` or ``work_queue``.
         FileNotFoundError: if the path to the kernel specified in the experiments file is not found.
 
     Returns:
         A tuple of the experiment dictionary, the strategies executed, and the resulting list of ``ResultsDescription``.
     """
+    # the scheduled execution has its own (reused) worker processes and does not publish to a work queue
+    if parallel_workers > 1 and persistent_workers:
+        raise ValueError("parallel_workers can not be combined with persistent_workers, the workers are reused")
+    if parallel_workers > 1 and work_queue is not None:
+        raise ValueError("parallel_workers can not be combined with work_queue, start queue workers instead")
     experiment = get_experiment(filepath)
     experiment_folderpath = Path(filepath).parent
     print(f"Starting experiment '{experiment['name']}'")
-    experiment_folder_id: str = experiment["folder_id"]
-    minimization: bool = experiment.get("minimization", True)
-    cutoff_percentile: float = experiment.get("cutoff_percentile", 1)
     cutoff_type: str = experiment.get("cutoff_type", "fevals")
     assert cutoff_type == "fevals" or cutoff_type == "time", f"cutoff_type must be 'fevals' or 'time', is {cutoff_type}"
     curve_segment_factor: float = experiment.get("curve_segment_factor", 0.05)
     assert isinstance(curve_segment_factor, float), f"curve_segment_factor is not float, {type(curve_segment_factor)}"
     strategies: list[dict] = get_strategies(experiment)
+    if profiling and profile_dir is None:
+        profile_dir = experiment_folderpath / "profilings"
 
     # add the kernel directory to the path to import the module, relative to the experiment file
     kernels_path = experiment_folderpath / Path(experiment["kernels_path"])
     if not kernels_path.exists():
         raise FileNotFoundError(f"No such path {kernels_path.resolve()}, CWD: {getcwd()}")
+    if parallel_workers > 1:
+        results_descriptions = execute_experiment_scheduled(
+            experiment,
+            experiment_folderpath,
+            strategies,
+            kernels_path,
+            parallel_workers,
+            profile_dir=profile_dir if profiling else None,
+            profile_clock=profile_clock,
+        )
+        return experiment, strategies, results_descriptions
     sys.path.append(str(kernels_path))
-    kernel_names = experiment["kernels"]
-    kernels = list(import_module(kernel_name) for kernel_name in kernel_names)
+    workers = TuningWorkerPool(kernels_path) if persistent_workers else None
+    profiler = Profiler(profile_dir, profile_clock) if profiling else None
+    if work_queue is not None:
+        results_descriptions = execute_experiment_queued(
+            experiment, experiment_folderpath, strategies, WorkQueue(work_queue), profiler, workers
+        )
+        if workers is not None:
+            workers.shutdown()
+        return experiment, strategies, results_descriptions
 
-    # variables for comparison
-    objective_time_keys: list[str] = experiment["objective_time_keys"]
-    objective_performance_keys: list[str] = experiment["objective_performance_keys"]
+    results_descriptions = execute_strategies(
+        experiment, experiment_folderpath, strategies, import_module, dict(), profiler=profiler, workers=workers
+    )
+    if workers is not None:
+        workers.shutdown()
+    return experiment, strategies, results_descriptions
 
-    # execute each strategy in the experiment per GPU and kernel
-    results_descriptions: dict[str, dict[str, dict[str, ResultsDescription]]] = dict()
-    gpu_name: str
+
+def load_kernel(kernels_path: Path, kernel_name: str):
+    """Load a kernel module from its file, without adding its directory to ``sys.path``.
+
+    Args:
+        kernels_path: the path to the directory with the kernel modules.
+        kernel_name: the name of the kernel module.
+
+    Raises:
+        FileNotFoundError: if there is no such kernel module.
+
+    Returns:
+        The kernel module.
+    """
+    from importlib.util import module_from_spec, spec_from_file_location
+
+    kernel_filepath = Path(kernels_path) / f"{kernel_name}.py"
+    if not kernel_filepath.exists():
+        raise FileNotFoundError(f"No such kernel {kernel_filepath.resolve()}, CWD: {getcwd()}")
+    spec = spec_from_file_location(kernel_name, kernel_filepath)
+    kernel = module_from_spec(spec)
+    spec.loader.exec_module(kernel)
+    return kernel
+
+
+def run_experiment(
+    experiment: dict,
+    kernels: Optional[dict] = None,
+    searchspaces: Optional[dict[tuple[str, str], SearchspaceStatistics]] = None,
+    experiment_folderpath: Path = Path("."),
+    cache=False,
+    validate=True,
+    profiler: Optional[Profiler] = None,
+) -> tuple[dict, list[dict], dict[str, dict[str, dict[str, ResultsDescription]]]]:
+    """Executes an experiment dictionary in this process, for experiments generated in code instead of a file.
+
+    By default, the results are kept in memory in the returned ``ResultsDescription`` objects instead of cached.
+
+    Args:
+        experiment: the experiment dictionary, see experiments/template.json. Not modified.
+        kernels: the already imported kernel per kernel name. Other kernels are loaded from the ``kernels_path``
+            with ``load_kernel``. Defaults to None.
+        searchspaces: the already loaded ``SearchspaceStatistics`` per GPU and kernel name. Other searchspaces are
+            loaded from the ``bruteforced_caches_path``. Defaults to None.
+        experiment_folderpath: the path the paths in the experiment are relative to. Defaults to the CWD.
+        cache: whether to retrieve the results from and write them to the visualization caches. Defaults to False.
+        validate: whether to validate the experiment against the JSON schema. Defaults to True.
+        profiler: the ``Profiler`` to write a profile of each strategy with. Defaults to None, not profiling.
+
+    Returns:
+        A tuple of the experiment dictionary, the strategies executed, and the resulting ``ResultsDescription``
+        objects, as in ``execute_experiment``.
+    """
+    experiment = deepcopy(experiment)
+    if validate:
+        validate_experiment(experiment)
+    experiment_folderpath = Path(experiment_folderpath)
+    cutoff_type: str = experiment.get("cutoff_type", "fevals")
+    assert cutoff_type == "fevals" or cutoff_type == "time", f"cutoff_type must be 'fevals' or 'time', is {cutoff_type}"
+    strategies: list[dict] = get_strategies(experiment)
+    kernels = dict() if kernels is None else kernels
+
+    def import_kernel(kernel_name: str):
+        if kernel_name in kernels:
+            return kernels[kernel_name]
+        return load_kernel(experiment_folderpath / experiment["kernels_path"], kernel_name)
+
+    # the given searchspaces are used as if loaded by get_searchspace
+    searchspaces_with_cutoff = dict()
+    for key, searchspace_stats in (dict() if searchspaces is None else searchspaces).items():
+        searchspaces_with_cutoff[key] = (searchspace_stats, get_cutoff(experiment, searchspace_stats))
+    results_descriptions = execute_strategies(
+        experiment,
+        experiment_folderpath,
+        strategies,
+        import_kernel,
+        searchspaces_with_cutoff,
+        profiler=profiler,
+        cache=cache,
+    )
+    return experiment, strategies, results_descriptions
+
+
+def plan_experiment(filepath: str) -> list[dict]:
+    """Estimates the cost of executing the experiment without running it, and reports the results that are cached.
+
+    Args:
+        filepath: path to the experiments .json file.
+
+    Returns:
+        A list with a dictionary per GPU, kernel and strategy, with the action (see ``get_strategy_work``), whether
+        it is cached and the estimated number of simulated evaluations and tuning time in seconds of the repeats to run.
+    """
+    experiment = get_experiment(filepath)
+    experiment_folderpath = Path(filepath).parent
+    cutoff_type: str = experiment.get("cutoff_type", "fevals")
+    strategies: list[dict] = get_strategies(experiment)
+    print(f"Plan of experiment '{experiment['name']}'")
+
+    plan: list[dict] = list()
+    searchspaces = dict()
     for gpu_name in experiment["GPUs"]:
-        print(f" | running on GPU '{gpu_name}'")
-        results_descriptions[gpu_name] = dict()
-        for index, kernel in enumerate(kernels):
-            kernel_name = kernel_names[index]
-            searchspace_stats = SearchspaceStatistics(
-                kernel_name=kernel_name,
-                device_name=gpu_name,
-                minimization=minimization,
-                objective_time_keys=objective_time_keys,
-                objective_performance_keys=objective_performance_keys,
-                bruteforced_caches_path=experiment_folderpath / experiment["bruteforced_caches_path"],
-            )
+        for kernel_name in experiment["kernels"]:
+            for strategy in strategies:
+                task = dict(gpu=gpu_name, kernel=kernel_name, strategy=strategy["name"], repeats=strategy["repeats"])
+                results_description = get_results_description(
+                    experiment, experiment_folderpath, gpu_name, kernel_name, strategy
+                )
+                task["action"], repeats, _ = get_strategy_work(
+                    experiment,
+                    experiment_folderpath,
+                    gpu_name,
+                    kernel_name,
+                    strategy,
+                    results_description,
+                    searchspaces,
+                )
+                task["cached"] = len(repeats) == 0
+                if task["cached"]:
+                    task["evaluations"], task["time"] = 0, 0.0
+                else:
+                    # the searchspace is only loaded if there is a strategy to run on it
+                    _, cutoff = get_searchspace(experiment, experiment_folderpath, gpu_name, kernel_name, searchspaces)
+                    evaluations, time = estimate_strategy_cost(strategy, cutoff_type, cutoff)
+                    task["evaluations"] = evaluations * len(repeats) // strategy["repeats"]
+                    task["time"] = time * len(repeats) / strategy["repeats"]
+                plan.append(task)
+                status = "cached" if task["cached"] else f"{task['evaluations']} evaluations, {task['time']:.1f}s"
+                if task["action"] != "reuse":
+                    status += (
+                        f" ({task['action']} {len(repeats)} repeats)" if len(repeats) > 0 else f" ({task['action']})"
+                    )
+                print(f" | {gpu_name} | {kernel_name} | {strategy['display_name']}: {status}")
 
-            # set cutoff point
-            _, cutoff_point_fevals, cutoff_point_time = searchspace_stats.cutoff_point_fevals_time(cutoff_percentile)
+    num_cached = sum(task["cached"] for task in plan)
+    total_evaluations = sum(task["evaluations"] for task in plan)
+    total_time = sum(task["time"] for task in plan)
+    print(f" | {num_cached} of {len(plan)} cached, {len(plan) - num_cached} to run")
+    print(f" | estimated {total_evaluations} simulated evaluations, {total_time:.1f}s of tuning time")
+    return plan
 
-            print(f" | - optimizing kernel '{kernel_name}'")
+
+def get_work_units(
+    experiment: dict, experiment_folderpath: Path, strategies: list[dict], num_chunks: int
+) -> list[dict]:
+    """Split the repeats the strategies must run into work units of ranges of repeats, with their estimated cost.
+
+    The repeats to run are those of ``get_strategy_work``. Cached results that only have to be updated or truncated
+    do not run any repeats, they are written by ``merge_results_chunks``.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        strategies: the strategies of the experiment.
+        num_chunks: the maximum number of ranges of repeats to split each strategy into.
+
+    Returns:
+        A list with a dictionary per work unit, in the order of execution of ``execute_experiment``.
+    """
+    units: list[dict] = list()
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]] = dict()
+    for gpu_name in experiment["GPUs"]:
+        for kernel_name in experiment["kernels"]:
+            for strategy in strategies:
+                results_description = get_results_description(
+                    experiment, experiment_folderpath, gpu_name, kernel_name, strategy
+                )
+                _, repeats, provenance = get_strategy_work(
+                    experiment,
+                    experiment_folderpath,
+                    gpu_name,
+                    kernel_name,
+                    strategy,
+                    results_description,
+                    searchspaces,
+                )
+                for chunk in split_repeats(len(repeats), num_chunks) if len(repeats) > 0 else list():
+                    units.append(
+                        get_work_unit(
+                            experiment,
+                            experiment_folderpath,
+                            gpu_name,
+                            kernel_name,
+                            strategy,
+                            range(repeats.start + chunk.start, repeats.start + chunk.stop),
+                            provenance,
+                            searchspaces,
+                        )
+                    )
+    return units
+
+
+def get_work_unit(
+    experiment: dict,
+    experiment_folderpath: Path,
+    gpu_name: str,
+    kernel_name: str,
+    strategy: dict,
+    repeats: range,
+    provenance: dict,
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]],
+    cost: Optional[float] = None,
+) -> dict:
+    """Get the work unit of a range of repeats of a strategy on a kernel and GPU.
+
+    The searchspace is only loaded to estimate the cost if it is not given, and to convert the runs of strategies that
+    import them.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        gpu_name: the name of the GPU.
+        kernel_name: the name of the kernel.
+        strategy: the strategy.
+        repeats: the range of repeats.
+        provenance: the provenance to record with the results, its budget is the one the repeats run with, see
+            ``get_strategy_work``.
+        searchspaces: the searchspace statistics and cutoff per GPU and kernel, the searchspace is loaded and added
+            if it is not in there yet.
+        cost: the estimated cost of the repeats, as published in the task of the work unit. Defaults to None,
+            estimating it with ``estimate_strategy_cost``.
+
+    Returns:
+        The work unit as a dictionary.
+    """
+    imports_runs = str(strategy["name"]).lower().startswith("ktt_")
+    searchspace_stats = None
+    if cost is None or imports_runs:
+        searchspace_stats, cutoff = get_searchspace(
+            experiment, experiment_folderpath, gpu_name, kernel_name, searchspaces
+        )
+    if cost is None:
+        _, time = estimate_strategy_cost(strategy, experiment.get("cutoff_type", "fevals"), cutoff)
+        cost = time * len(repeats) / strategy["repeats"]
+    return dict(
+        gpu=gpu_name,
+        kernel=kernel_name,
+        strategy=strategy,
+        repeats=repeats,
+        cost=cost,
+        searchspace_stats=searchspace_stats if imports_runs else None,
+        results_description=get_results_description(experiment, experiment_folderpath, gpu_name, kernel_name, strategy),
+        provenance=provenance,
+    )
+
+
+def execute_work_unit(
+    unit: dict,
+    kernels: dict,
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
+    import_kernel: Callable = import_module,
+) -> bool:
+    """Executes the repeats of a work unit and writes their results as a chunk, unless the chunk is already written.
+
+    Args:
+        unit: the work unit, see ``get_work_unit``.
+        kernels: the imported kernel modules by name, the kernel is imported and added if it is not in there yet.
+        profiler: the ``Profiler`` to write a profile of the work unit with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process.
+        import_kernel: the function to import a kernel module by name with. Defaults to ``import_module``.
+
+    Returns:
+        Whether the work unit was executed, False if the chunk was already written.
+    """
+    gpu_name, kernel_name, repeats = unit["gpu"], unit["kernel"], unit["repeats"]
+    strategy: dict = deepcopy(unit["strategy"])
+    results_description: ResultsDescription = unit["results_description"]
+    print(f" | {gpu_name} | {kernel_name} | {strategy['display_name']}, repeats {repeats.start}-{repeats.stop}")
+    if results_description.has_results_chunk(repeats):
+        print(" | - |-> retrieved from cache")
+        return False
+    if kernel_name not in kernels:
+        with span("experiment.import_kernels"):
+            kernels[kernel_name] = import_kernel(kernel_name)
+    set_strategy_budget(strategy, unit["provenance"]["budget"])
+    with span("experiment.collect_results", gpu=gpu_name, kernel=kernel_name, strategy=strategy["name"]):
+        repeated_results = run_strategy(
+            kernels[kernel_name],
+            strategy,
+            results_description,
+            unit["searchspace_stats"],
+            profiler=profiler,
+            workers=workers,
+            repeats=repeats,
+        )
+        results_description.set_results_chunk(
+            get_results_arrays(repeated_results, results_description), repeats, unit["provenance"]
+        )
+    return True
+
+
+def execute_experiment_shard(
+    filepath: str,
+    shard: tuple[int, int],
+    profiling: bool = False,
+    profile_dir: Path = None,
+    profile_clock="cpu",
+    persistent_workers=False,
+) -> list[dict]:
+    """Executes a shard of the work of the experiment that is not cached, writing the results per range of repeats.
+
+    The repeats the strategies must run (see ``get_strategy_work``) are split into ranges, which are partitioned over
+    the shards by their estimated cost. Each shard computes the same partition as long as the cache does not change in
+    the meantime, so the shards can run independently, for example as the tasks of a cluster array job. Ranges of
+    repeats that are already written are skipped, so a failed shard can be restarted. Once all shards are done,
+    ``merge_experiment`` assembles the ranges of repeats into the results.
+
+    Args:
+        filepath: path to the experiments .json file.
+        shard: the index of the shard and the number of shards, see ``sharding.parse_shard``.
+        profiling: whether profiling is enabled. Defaults to False.
+        profile_dir: the directory to write the profiles to, in a folder per shard. Defaults to None, using
+            'profilings' next to the file.
+        profile_clock: whether to profile CPU time ("cpu") or wall time ("wall"). Defaults to "cpu".
+        persistent_workers: whether to tune in a long-lived worker process per kernel and device. Defaults to False.
+
+    Raises:
+        FileNotFoundError: if the path to the kernel specified in the experiments file is not found.
+
+    Returns:
+        The work units of this shard, see ``get_work_units``.
+    """
+    shard_index, num_shards = shard
+    experiment = get_experiment(filepath)
+    experiment_folderpath = Path(filepath).parent
+    strategies: list[dict] = get_strategies(experiment)
+    if profiling and profile_dir is None:
+        profile_dir = experiment_folderpath / "profilings"
+    kernels_path = experiment_folderpath / Path(experiment["kernels_path"])
+    if not kernels_path.exists():
+        raise FileNotFoundError(f"No such path {kernels_path.resolve()}, CWD: {getcwd()}")
+    sys.path.append(str(kernels_path))
+
+    # partition the work units over the shards by their estimated cost
+    units = get_work_units(experiment, experiment_folderpath, strategies, num_shards)
+    shard_units = list(
+        units[index] for index in partition(list(unit["cost"] for unit in units), num_shards)[shard_index]
+    )
+    print(f"Starting shard {shard_index}/{num_shards} of experiment '{experiment['name']}'", end=", ")
+    print(f"{len(shard_units)} of {len(units)} work units")
+    workers = TuningWorkerPool(kernels_path) if persistent_workers else None
+    profiler = (
+        Profiler(Path(profile_dir) / f"shard_{shard_index}_of_{num_shards}", profile_clock) if profiling else None
+    )
+
+    kernels = dict()
+    for unit in shard_units:
+        execute_work_unit(unit, kernels, profiler, workers)
+
+    if workers is not None:
+        workers.shutdown()
+    return shard_units
+
+
+def merge_experiment(filepath: str) -> tuple[dict, dict, dict]:
+    """Merges the ranges of repeats written by the shards of ``execute_experiment_shard`` into the results.
+
+    Args:
+        filepath: path to the experiments .json file.
+
+    Raises:
+        ValueError: if there are repeats that have not been executed by the shards, no results are merged.
+
+    Returns:
+        A tuple of the experiment dictionary, the strategies, and the resulting list of ``ResultsDescription``.
+    """
+    experiment = get_experiment(filepath)
+    strategies: list[dict] = get_strategies(experiment)
+    results_descriptions = merge_results_chunks(experiment, Path(filepath).parent, strategies)
+    return experiment, strategies, results_descriptions
+
+
+def merge_results_chunks(
+    experiment: dict, experiment_folderpath: Path, strategies: list[dict]
+) -> dict[str, dict[str, dict[str, ResultsDescription]]]:
+    """Merges the ranges of repeats of the work of ``get_strategy_work`` into the results of the strategies.
+
+    Appended repeats are merged after the cached repeats, cached results that only have to be updated or truncated
+    are written without chunks.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        strategies: the strategies of the experiment.
+
+    Raises:
+        ValueError: if there are repeats that have not been executed, no results are merged.
+
+    Returns:
+        The ``ResultsDescription`` per GPU, kernel and strategy.
+    """
+    # check that all repeats have been executed before merging any
+    results_descriptions: dict[str, dict[str, dict[str, ResultsDescription]]] = dict()
+    to_merge: list[tuple[dict, ResultsDescription, str, range, Optional[dict]]] = list()
+    missing: list[str] = list()
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]] = dict()
+    for gpu_name in experiment["GPUs"]:
+        results_descriptions[gpu_name] = dict()
+        for kernel_name in experiment["kernels"]:
             results_descriptions[gpu_name][kernel_name] = dict()
             for strategy in strategies:
-                strategy_name: str = strategy["name"]
-                strategy_display_name: str = strategy["display_name"]
-                stochastic = strategy["stochastic"]
-                cutoff_margin = strategy.get(
-                    "cutoff_margin", 1.1
-                )  # +10% margin, to make sure cutoff_point is reached by compensating for potential non-valid evaluations  # noqa: E501
-                print(f" | - | using strategy '{strategy['display_name']}'")
+                results_description = get_results_description(
+                    experiment, experiment_folderpath, gpu_name, kernel_name, strategy
+                )
+                results_descriptions[gpu_name][kernel_name][strategy["name"]] = results_description
+                if is_cached(strategy, results_description):
+                    action, repeats, provenance = get_strategy_work(
+                        experiment,
+                        experiment_folderpath,
+                        gpu_name,
+                        kernel_name,
+                        strategy,
+                        results_description,
+                        searchspaces,
+                    )
+                    if action == "reuse":
+                        continue
+                else:  # the provenance is recorded with the chunks, so the searchspace does not have to be loaded
+                    action, repeats, provenance = "run", range(strategy["repeats"]), None
+                to_merge.append((strategy, results_description, action, repeats, provenance))
+                for missing_repeats in results_description.get_missing_repeats(repeats):
+                    missing.append(
+                        f"{gpu_name}, {kernel_name}, {strategy['name']}: {missing_repeats.start}-{missing_repeats.stop}"
+                    )
+    if len(missing) > 0:
+        raise ValueError("Repeats have not been executed:\n" + "\n".join(missing))
 
-                # setup the results description
-                if "options" not in strategy:
-                    strategy["options"] = dict()
+    for strategy, results_description, action, repeats, provenance in to_merge:
+        print(f" | merging {results_description.device_name}, {results_description.kernel_name}, {strategy['name']}")
+        if len(repeats) == 0:
+            execute_strategy_work(action, repeats, provenance, None, strategy, results_description, None)
+        else:
+            arrays = results_description.get_results_arrays() if action == "append" else None
+            results_description.merge_results_chunks(repeats, provenance, arrays)
+    return results_descriptions
 
-                # set when to stop
-                if cutoff_type == "time":
-                    strategy["options"]["time_limit"] = cutoff_point_time * cutoff_margin
-                else:
-                    strategy["options"]["max_fevals"] = min(
-                        int(ceil(cutoff_point_fevals * cutoff_margin)), searchspace_stats.size
+
+def get_work_unit_task(unit: dict) -> dict:
+    """Get the task of a work unit to publish to a ``WorkQueue``."""
+    repeats: range = unit["repeats"]
+    task_id = f"{unit['gpu']}__{unit['kernel']}__{unit['strategy']['name']}__{repeats.start}-{repeats.stop}"
+    return dict(
+        id=re.sub(r"[^\w.\-]", "_", task_id),
+        gpu=unit["gpu"],
+        kernel=unit["kernel"],
+        strategy=unit["strategy"]["name"],
+        start=repeats.start,
+        stop=repeats.stop,
+        cost=unit["cost"],
+        provenance=unit["provenance"],
+    )
+
+
+def work_on_queue(
+    queue: WorkQueue,
+    experiment: dict,
+    experiment_folderpath: Path,
+    strategies: list[dict],
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
+    import_kernel: Callable = import_module,
+    poll_interval=1.0,
+) -> int:
+    """Claims and executes the tasks of an experiment from a work queue, until the queue is finished.
+
+    Args:
+        queue: the ``WorkQueue`` the tasks of the experiment are published to.
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        strategies: the strategies of the experiment.
+        profiler: the ``Profiler`` to write a profile of each task with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process.
+        import_kernel: the function to import a kernel module by name with. Defaults to ``import_module``.
+        poll_interval: the seconds to wait before polling the queue again if there are no pending tasks.
+
+    Returns:
+        The number of tasks executed.
+    """
+    strategies_by_name = dict((strategy["name"], strategy) for strategy in strategies)
+    kernels, searchspaces = dict(), dict()
+    num_executed = 0
+    while True:
+        queue.requeue_expired()
+        claimed = queue.claim()
+        if claimed is None:
+            if queue.is_finished():
+                return num_executed
+            time.sleep(poll_interval)
+            continue
+        task = claimed.task
+        try:
+            with queue.heartbeat(claimed):
+                unit = get_work_unit(
+                    experiment,
+                    experiment_folderpath,
+                    task["gpu"],
+                    task["kernel"],
+                    strategies_by_name[task["strategy"]],
+                    range(task["start"], task["stop"]),
+                    task["provenance"],
+                    searchspaces,
+                    task["cost"],
+                )
+                execute_work_unit(unit, kernels, profiler, workers, import_kernel)
+        except Exception as e:  # the task is retried, possibly by another worker
+            print(f" | - |-> task {task['id']} failed: {e!r}")
+            queue.fail(claimed, repr(e))
+            continue
+        queue.complete(claimed)
+        num_executed += 1
+
+
+def execute_experiment_queued(
+    experiment: dict,
+    experiment_folderpath: Path,
+    strategies: list[dict],
+    queue: WorkQueue,
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
+) -> dict[str, dict[str, dict[str, ResultsDescription]]]:
+    """Publishes the work of the experiment that is not cached to a work queue, works on it, and merges the results.
+
+    Each repeat is published as a separate task, longest first, for the best load balancing over the workers started
+    with ``run_queue_worker``. This process works on the queue as well, so the experiment also completes without them.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        strategies: the strategies of the experiment.
+        queue: the ``WorkQueue`` to publish the tasks to.
+        profiler: the ``Profiler`` to write a profile of each task with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process.
+
+    Raises:
+        RuntimeError: if tasks have failed on all their attempts.
+
+    Returns:
+        The ``ResultsDescription`` per GPU, kernel and strategy.
+    """
+    queue.set_published(False)
+    max_repeats = max(strategy["repeats"] for strategy in strategies)
+    units = sorted(
+        get_work_units(experiment, experiment_folderpath, strategies, max_repeats), key=lambda unit: -unit["cost"]
+    )
+    tasks = list(
+        get_work_unit_task(unit) for unit in units if not unit["results_description"].has_results_chunk(unit["repeats"])
+    )
+    published = queue.publish(tasks)
+    print(f" | published {len(published)} tasks to the work queue at {queue.queue_path}")
+    with span("experiment.work_on_queue", tasks=len(published)):
+        work_on_queue(queue, experiment, experiment_folderpath, strategies, profiler, workers)
+    failed = queue.get_failed()
+    if len(failed) > 0:
+        errors = "\n".join(f"{task['id']}: {task['error']}" for task in failed)
+        raise RuntimeError(f"{len(failed)} tasks failed on all attempts:\n{errors}")
+    return merge_results_chunks(experiment, experiment_folderpath, strategies)
+
+
+def run_queue_worker(
+    filepath: str,
+    work_queue: Path,
+    profiling: bool = False,
+    profile_dir: Path = None,
+    profile_clock="cpu",
+    persistent_workers=False,
+    poll_interval=1.0,
+) -> int:
+    """Works on the tasks of an experiment published to a work queue by ``execute_experiment``, until it is finished.
+
+    The worker may be started before the tasks are published. Kernels are imported with output files unique to the
+    process, so that multiple workers can run on the same node.
+
+    Args:
+        filepath: path to the experiments .json file.
+        work_queue: the directory of the work queue, shared with ``execute_experiment``.
+        profiling: whether profiling is enabled. Defaults to False.
+        profile_dir: the directory to write the profiles to, in a folder per worker. Defaults to None, using
+            'profilings' next to the file.
+        profile_clock: whether to profile CPU time ("cpu") or wall time ("wall"). Defaults to "cpu".
+        persistent_workers: whether to tune in a long-lived worker process per kernel and device. Defaults to False.
+        poll_interval: the seconds to wait before polling the queue again if there are no pending tasks.
+
+    Raises:
+        FileNotFoundError: if the path to the kernel specified in the experiments file is not found.
+
+    Returns:
+        The number of tasks executed by this worker.
+    """
+    experiment = get_experiment(filepath)
+    experiment_folderpath = Path(filepath).parent
+    strategies: list[dict] = get_strategies(experiment)
+    kernels_path = experiment_folderpath / Path(experiment["kernels_path"])
+    if not kernels_path.exists():
+        raise FileNotFoundError(f"No such path {kernels_path.resolve()}, CWD: {getcwd()}")
+    queue = WorkQueue(work_queue)
+    if profiling and profile_dir is None:
+        profile_dir = experiment_folderpath / "profilings"
+    profiler = Profiler(Path(profile_dir) / f"worker_{queue.worker_id}", profile_clock) if profiling else None
+    workers = TuningWorkerPool(kernels_path) if persistent_workers else None
+    print(f"Starting worker {queue.worker_id} of experiment '{experiment['name']}' on {queue.queue_path}")
+    with memoized_kernel_tuner_setup():
+        num_executed = work_on_queue(
+            queue,
+            experiment,
+            experiment_folderpath,
+            strategies,
+            profiler,
+            workers,
+            import_kernel=partial(import_isolated_kernel, str(kernels_path.resolve())),
+            poll_interval=poll_interval,
+        )
+    if workers is not None:
+        workers.shutdown()
+    return num_executed
+
+
+def _get_run_priority(strategy: dict, cutoff_type: str, cutoff: tuple[int, float, int], *_) -> float:
+    """The priority of a run task, its estimated tuning time, so that the longest runs are started first."""
+    return estimate_strategy_cost(strategy, cutoff_type, cutoff)[1]
+
+
+def _run_strategy_task(
+    kernels_path: str,
+    kernel_name: str,
+    strategy: dict,
+    results_description: ResultsDescription,
+    cutoff_type: str,
+    profile_dir: Optional[Path],
+    profile_clock: str,
+    repeats: range,
+    budget: Optional[dict],
+    cutoff: tuple[int, float, int],
+    searchspace_stats: Optional[SearchspaceStatistics] = None,
+) -> list[list[dict]]:
+    """Task executing a range of repeats of a strategy in a worker process, with its budget or the cutoff otherwise."""
+    if budget is None:
+        set_strategy_cutoff(strategy, cutoff_type, cutoff)
+    else:
+        set_strategy_budget(strategy, budget)
+    return run_strategy_in_worker(
+        kernels_path, kernel_name, strategy, results_description, searchspace_stats, profile_dir, profile_clock, repeats
+    )
+
+
+def _write_results_task(
+    results_description: ResultsDescription,
+    experiment: dict,
+    strategy: dict,
+    action: str,
+    provenance: Optional[dict],
+    cutoff: tuple[int, float, int],
+    *repeated_results_chunks: list[list[dict]],
+):
+    """Task writing the results of the ranges of repeats of a strategy to the cache, with their provenance."""
+    repeated_results = list(results for chunk in repeated_results_chunks for results in chunk)
+    if provenance is None:
+        budget = get_budget(*get_strategy_cutoff(strategy, experiment.get("cutoff_type", "fevals"), cutoff))
+        provenance = get_provenance(experiment, strategy, budget)
+    write_strategy_work(action, provenance, repeated_results, results_description)
+    assert results_description.has_results(), "No results in ResultsDescription after writing results."
+
+
+def estimate_searchspace_memory(experiment: dict, experiment_folderpath: Path, gpu_name: str, kernel_name: str):
+    """Estimate the memory in bytes to load a searchspace, based on the size of its bruteforced cachefile."""
+    bruteforced_caches_path = experiment_folderpath / experiment["bruteforced_caches_path"]
+    try:
+        filepath = get_valid_bruteforced_cache_filepath(bruteforced_caches_path, kernel_name, gpu_name)
+    except FileNotFoundError:
+        return 0
+    return filepath.stat().st_size * searchspace_memory_factor
+
+
+def estimate_results_memory(strategy: dict, max_fevals=1000) -> int:
+    """Estimate the memory in bytes of the results of the repeats of a strategy, before the cutoff is known."""
+    return strategy["repeats"] * strategy.get("options", {}).get("max_fevals", max_fevals) * result_memory_estimate
+
+
+# the peak memory of a loaded searchspace relative to the size of its JSON file, and of a single result of a run
+searchspace_memory_factor = 6
+result_memory_estimate = 2048
+
+
+def execute_experiment_scheduled(
+    experiment: dict,
+    experiment_folderpath: Path,
+    strategies: list[dict],
+    kernels_path: Path,
+    parallel_workers: int,
+    profile_dir: Optional[Path] = None,
+    profile_clock="cpu",
+) -> dict[str, dict[str, dict[str, ResultsDescription]]]:
+    """Executes the work of ``get_strategy_work`` of the strategies as a graph of tasks on a pool of worker processes.
+
+    Per GPU and kernel, the searchspace is loaded and the cutoff computed once, after which each strategy is run and
+    its results are written. If there are fewer strategies to run than workers, the repeats of each strategy are split
+    into ranges that run concurrently. Independent tasks execute concurrently, within the memory available. The runs
+    with the longest estimated tuning time are started first, and the largest searchspaces are loaded first. As the
+    workers are reused, each worker imports a kernel and parses its cachefile once, so that the many variants of a
+    sweep (see ``sweeps.expand_sweep``) only pay the setup of a searchspace once per worker.
+
+    Args:
+        experiment: the experiment dictionary.
+        experiment_folderpath: the path to the folder of the experiments file.
+        strategies: the strategies to execute.
+        kernels_path: the path to the directory with the kernel modules.
+        parallel_workers: the number of worker processes.
+        profile_dir: the directory to write the profiles to. Defaults to None, not profiling.
+        profile_clock: whether to profile CPU time ("cpu") or wall time ("wall"). Defaults to "cpu".
+
+    Returns:
+        The ``ResultsDescription`` per GPU, kernel and strategy, in the same order as ``execute_experiment``.
+    """
+    cutoff_type: str = experiment.get("cutoff_type", "fevals")
+    scheduler = TaskScheduler(max_workers=parallel_workers)
+    results_descriptions: dict[str, dict[str, dict[str, ResultsDescription]]] = dict()
+    to_run: list[tuple[str, str, dict, ResultsDescription, str, range, Optional[dict]]] = list()
+    searchspaces: dict[tuple[str, str], tuple[SearchspaceStatistics, tuple]] = dict()
+    for gpu_name in experiment["GPUs"]:
+        results_descriptions[gpu_name] = dict()
+        for kernel_name in experiment["kernels"]:
+            results_descriptions[gpu_name][kernel_name] = dict()
+            for strategy in strategies:
+                results_description = get_results_description(
+                    experiment, experiment_folderpath, gpu_name, kernel_name, strategy
+                )
+                results_descriptions[gpu_name][kernel_name][strategy["name"]] = results_description
+                if not is_cached(strategy, results_description):
+                    # the budget is determined from the cutoff once the searchspace is loaded by its task
+                    to_run.append(
+                        (gpu_name, kernel_name, strategy, results_description, "run", range(strategy["repeats"]), None)
                     )
-                results_description = ResultsDescription(
-                    experiment_folder_id,
-                    kernel_name,
+                    continue
+                action, repeats, provenance = get_strategy_work(
+                    experiment,
+                    experiment_folderpath,
                     gpu_name,
-                    strategy_name,
-                    strategy_display_name,
-                    stochastic,
-                    objective_time_keys=objective_time_keys,
-                    objective_performance_keys=objective_performance_keys,
-                    minimization=minimization,
-                    visualization_caches_path=experiment_folderpath / experiment["visualization_caches_path"],
+                    kernel_name,
+                    strategy,
+                    results_description,
+                    searchspaces,
                 )
+                if len(repeats) > 0:
+                    to_run.append((gpu_name, kernel_name, strategy, results_description, action, repeats, provenance))
+                elif action != "reuse":
+                    execute_strategy_work(action, repeats, provenance, None, strategy, results_description, None)
 
-                # if the strategy is in the cache, use cached data
-                if "ignore_cache" not in strategy and results_description.has_results():
-                    print(" | - |-> retrieved from cache")
-                else:  # execute each strategy that is not in the cache
-                    results_description = collect_results(
-                        kernel, strategy, results_description, searchspace_stats, profiling=profiling
-                    )
+    # split the repeats to keep the workers busy, except when profiling, as the profile is written per run task
+    num_chunks = 1 if profile_dir is not None or len(to_run) == 0 else ceil(parallel_workers / len(to_run))
+    cutoff_tasks: dict[tuple[str, str], tuple[Task, Task]] = dict()
+    for gpu_name, kernel_name, strategy, results_description, action, repeats, provenance in to_run:
+        # the searchspace is only loaded if there is a strategy to run on it
+        if (gpu_name, kernel_name) not in cutoff_tasks:
+            memory_estimate = estimate_searchspace_memory(experiment, experiment_folderpath, gpu_name, kernel_name)
+            searchspace_task = scheduler.add(
+                Task(
+                    f"searchspace:{gpu_name}:{kernel_name}",
+                    get_searchspace_statistics,
+                    (experiment, experiment_folderpath, gpu_name, kernel_name),
+                    memory_estimate=memory_estimate,
+                    priority=memory_estimate,
+                )
+            )
+            cutoff_task = scheduler.add(
+                Task(
+                    f"cutoff:{gpu_name}:{kernel_name}",
+                    get_cutoff,
+                    (experiment,),
+                    dependencies=[searchspace_task],
+                    local=True,
+                )
+            )
+            cutoff_tasks[(gpu_name, kernel_name)] = (searchspace_task, cutoff_task)
+        searchspace_task, cutoff_task = cutoff_tasks[(gpu_name, kernel_name)]
 
-                # set the results
-                results_descriptions[gpu_name][kernel_name][strategy_name] = results_description
+        # run the strategy, only passing the searchspace along if it is needed to convert imported runs
+        task_name = f"{gpu_name}:{kernel_name}:{strategy['name']}"
+        dependencies = [cutoff_task]
+        if str(strategy["name"]).lower().startswith("ktt_"):
+            dependencies.append(searchspace_task)
+        run_tasks = list()
+        for chunk in split_repeats(len(repeats), num_chunks):
+            chunk_repeats = range(repeats.start + chunk.start, repeats.start + chunk.stop)
+            chunk_strategy = dict(strategy, repeats=len(chunk_repeats))
+            run_tasks.append(
+                scheduler.add(
+                    Task(
+                        f"run:{task_name}:{chunk_repeats.start}-{chunk_repeats.stop}",
+                        _run_strategy_task,
+                        (
+                            str(Path(kernels_path).resolve()),
+                            kernel_name,
+                            deepcopy(strategy),
+                            results_description,
+                            cutoff_type,
+                            profile_dir,
+                            profile_clock,
+                            chunk_repeats,
+                            provenance["budget"] if provenance is not None else None,
+                        ),
+                        dependencies=dependencies,
+                        memory_estimate=searchspace_task.memory_estimate + estimate_results_memory(chunk_strategy),
+                        priority=partial(_get_run_priority, chunk_strategy, cutoff_type),
+                    )
+                )
+            )
+        scheduler.add(
+            Task(
+                f"write:{task_name}",
+                _write_results_task,
+                (results_description, experiment, strategy, action, provenance),
+                dependencies=[cutoff_task] + run_tasks,
+                local=True,
+            )
+        )
 
-    return experiment, strategies, results_descriptions
+    with span("experiment.execute_scheduled", tasks=len(scheduler.tasks)):
+        scheduler.run()
+    return results_descriptions
 
 
 def entry_point():  #  pragma: no cover
     """Entry point function for Experiments."""
-    experiment_filepath = get_args_from_cli()
-    execute_experiment(experiment_filepath, profiling=False)
+    args = get_experiment_args_from_cli()
+    set_validation_level_from_args(args)
+    if args.plan:
+        plan_experiment(args.experiment)
+        return
+    if args.merge:
+        merge_experiment(args.experiment)
+        return
+    with recording_from_args(args):
+        kwargs = get_execute_experiment_kwargs(args)
+        if args.worker:
+            del kwargs["parallel_workers"], kwargs["work_queue"]
+            run_queue_worker(args.experiment, args.work_queue, **kwargs)
+        elif args.shard is not None:
+            del kwargs["parallel_workers"], kwargs["work_queue"]
+            execute_experiment_shard(args.experiment, args.shard, **kwargs)
+        else:
+            execute_experiment(args.experiment, **kwargs)
 
 
 if __name__ == "__main__":
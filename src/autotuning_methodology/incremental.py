@@ -0,0 +1,124 @@
+"""Incremental re-execution of experiments, by comparing a strategy with the configuration that produced its cache."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import json
+from typing import Callable, Optional
+
+import numpy as np
+
+provenance_version = 1
+
+# the options set from the cutoff, recorded as the budget instead of as part of the strategy
+budget_options = ["max_fevals", "time_limit"]
+
+# the keys of a strategy that do not change the results of a repeat
+non_behavioural_keys = ["display_name", "repeats", "ignore_cache", "cutoff_margin"]
+
+# the actions on a cache entry, from least to most work
+incremental_actions = ["reuse", "update", "truncate", "append", "run"]
+
+
+def get_provenance(experiment: dict, strategy: dict, budget: Optional[dict] = None) -> dict:
+    """Get the configuration that determines the results of a strategy, to record with its cached results.
+
+    Args:
+        experiment: the experiment dictionary.
+        strategy: the strategy.
+        budget: the options set from the cutoff, e.g. ``{"max_fevals": 100}``. Defaults to None, not known yet.
+
+    Returns:
+        The provenance as a dictionary that can be written as JSON.
+    """
+    options = dict((key, value) for key, value in strategy.get("options", dict()).items() if key not in budget_options)
+    configuration = dict((key, value) for key, value in strategy.items() if key not in non_behavioural_keys)
+    configuration["options"] = options
+    provenance = {
+        "version": provenance_version,
+        "strategy": configuration,
+        "cutoff": {
+            "cutoff_type": experiment.get("cutoff_type", "fevals"),
+            "cutoff_percentile": experiment.get("cutoff_percentile", 1),
+            "cutoff_margin": strategy.get("cutoff_margin", 1.1),
+        },
+        "budget": budget,
+        "repeats": strategy["repeats"],
+    }
+    # normalized as if read from JSON, so that it compares equal to a recorded provenance
+    return json.loads(json.dumps(provenance, sort_keys=True))
+
+
+def get_budget(option: str, value: float) -> dict:
+    """Get the budget of a strategy from the option and value returned by ``experiments.get_strategy_cutoff``."""
+    return {option: int(value) if option == "max_fevals" else float(value)}
+
+
+def get_num_evaluations(fevals_results: np.ndarray) -> np.ndarray:
+    """Get the number of function evaluations of each repeat from the ``fevals_results`` array."""
+    return np.sum(~np.isnan(fevals_results), axis=0)
+
+
+def is_budget_extension(cached_budget: dict, budget: dict, num_evaluations: Callable[[], np.ndarray]) -> bool:
+    """Whether the cached repeats are also valid for a larger budget.
+
+    This is the case if each cached repeat stopped before it reached its budget, for example because it exhausted the
+    searchspace, as it would then stop at the same point with the larger budget. A budget in time is never extended,
+    as it can not be determined from the results whether a repeat stopped because of its time limit.
+
+    Args:
+        cached_budget: the budget of the cached repeats.
+        budget: the new budget.
+        num_evaluations: function returning the number of function evaluations of each cached repeat.
+
+    Returns:
+        Whether the cached repeats are valid for the new budget.
+    """
+    if set(cached_budget.keys()) != {"max_fevals"} or set(budget.keys()) != {"max_fevals"}:
+        return False
+    if budget["max_fevals"] < cached_budget["max_fevals"]:
+        return False
+    return bool(np.all(num_evaluations() < cached_budget["max_fevals"]))
+
+
+def get_incremental_work(
+    cached: Optional[dict],
+    current: dict,
+    determine_budget: Callable[[], dict],
+    num_evaluations: Callable[[], np.ndarray],
+) -> tuple[str, range, Optional[dict]]:
+    """Get the minimal work to bring a cache entry from its recorded configuration to the current configuration.
+
+    The results are reused if only the number of repeats differs, in which case the additional repeats are appended or
+    the surplus repeats are dropped, or if only the cutoff differs in a way that results in the same or a validly
+    extended budget (see ``is_budget_extension``). Any other change to the strategy runs all repeats again. The budget
+    is only determined if the cutoff differs, as that requires the searchspace.
+
+    Args:
+        cached: the provenance recorded with the cache entry, None if it was not recorded, in which case the cache
+            entry is reused as is.
+        current: the provenance of the current configuration, see ``get_provenance``, without the budget.
+        determine_budget: function returning the budget of the current configuration.
+        num_evaluations: function returning the number of function evaluations of each cached repeat.
+
+    Returns:
+        A tuple of the action (see ``incremental_actions``), the range of repeats to run, and the provenance to record
+        with the cache entry, None if the action is "reuse".
+    """
+    repeats: int = current["repeats"]
+    if cached is None:
+        return "reuse", range(0), None
+    if cached["version"] != current["version"] or cached["strategy"] != current["strategy"]:
+        return "run", range(repeats), dict(current, budget=determine_budget())
+    budget: dict = cached["budget"]
+    if cached["cutoff"] != current["cutoff"]:
+        budget = determine_budget()
+        if budget != cached["budget"] and not is_budget_extension(cached["budget"], budget, num_evaluations):
+            return "run", range(repeats), dict(current, budget=budget)
+    provenance = dict(current, budget=budget)
+    if repeats > cached["repeats"]:
+        return "append", range(cached["repeats"], repeats), provenance
+    if repeats < cached["repeats"]:
+        return "truncate", range(0), provenance
+    if provenance != cached:
+        return "update", range(0), provenance
+    return "reuse", range(0), None
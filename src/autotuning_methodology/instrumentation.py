@@ -0,0 +1,222 @@
+"""Lightweight timing spans of the stages of the experiment pipeline, emitted as JSON-lines events."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import contextlib
+import functools
+import json
+import os
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Optional
+
+
+class SpanRecorder:
+    """Records the timing spans and optionally writes each as a JSON-lines event to file."""
+
+    def __init__(self, events_filepath: Optional[Path] = None) -> None:
+        """Initialization method for the SpanRecorder object.
+
+        Args:
+            events_filepath: the path to append the JSON-lines events to. Defaults to None, not writing events.
+        """
+        self.start_time = time.perf_counter()
+        self.depth = 0
+        self.totals: dict[str, list[float]] = dict()  # name: [count, total seconds, maximum seconds]
+        self.events_file = None
+        if events_filepath is not None:
+            Path(events_filepath).parent.mkdir(parents=True, exist_ok=True)
+            self.events_file = Path(events_filepath).open(mode="a", buffering=1)
+
+    def record(self, name: str, start: float, duration: float, depth: int, attributes: dict):
+        """Record a completed span.
+
+        Args:
+            name: the name of the stage.
+            start: the ``time.perf_counter()`` at the start of the span.
+            duration: the duration of the span in seconds.
+            depth: the number of spans this span is nested in.
+            attributes: additional attributes of the span, such as the kernel and strategy.
+        """
+        totals = self.totals.get(name)
+        if totals is None:
+            self.totals[name] = [1, duration, duration]
+        else:
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] = max(totals[2], duration)
+        if self.events_file is not None:
+            event = {
+                "name": name,
+                "start_s": round(start - self.start_time, 6),
+                "duration_ms": round(duration * 1000, 3),
+                "depth": depth,
+                "pid": os.getpid(),
+            }
+            event.update(attributes)
+            self.events_file.write(json.dumps(event, default=str) + "\n")
+
+    def get_summary(self) -> str:
+        """Get a summary table of the spans, ordered by total time.
+
+        Returns:
+            The summary table as a string.
+        """
+        lines = [f"{'stage':<40} {'count':>8} {'total (s)':>12} {'mean (ms)':>12} {'max (ms)':>12}"]
+        for name, (count, total, maximum) in sorted(self.totals.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(f"{name:<40} {count:>8} {total:>12.3f} {total / count * 1000:>12.3f} {maximum * 1000:>12.3f}")
+        return "\n".join(lines)
+
+    def close(self):
+        """Close the events file."""
+        if self.events_file is not None:
+            self.events_file.close()
+            self.events_file = None
+
+
+class _Span:
+    """Context manager timing a span with the active recorder."""
+
+    __slots__ = ("recorder", "name", "attributes", "start")
+
+    def __init__(self, recorder: SpanRecorder, name: str, attributes: dict) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.recorder.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.recorder.depth -= 1
+        self.recorder.record(self.name, self.start, duration, self.recorder.depth, self.attributes)
+        return False
+
+
+class _NoOpSpan:
+    """Context manager that does nothing, returned when instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_noop_span = _NoOpSpan()
+_recorder: Optional[SpanRecorder] = None
+
+
+def span(name: str, **attributes):
+    """Time a stage of the pipeline in a context. Does nothing when instrumentation is disabled.
+
+    Args:
+        name: the name of the stage, spans with the same name are aggregated in the summary.
+        attributes: additional attributes of the span to write to the event, such as the kernel and strategy.
+
+    Returns:
+        A context manager.
+    """
+    if _recorder is None:
+        return _noop_span
+    return _Span(_recorder, name, attributes)
+
+
+def instrumented(name: str):
+    """Decorator to time each call of a function as a span.
+
+    Args:
+        name: the name of the stage.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+            with _Span(_recorder, name, dict()):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def is_enabled() -> bool:
+    """Whether instrumentation is enabled."""
+    return _recorder is not None
+
+
+def enable(events_filepath: Optional[Path] = None) -> SpanRecorder:
+    """Enable instrumentation, replacing the active recorder if there is one.
+
+    Args:
+        events_filepath: the path to append the JSON-lines events to. Defaults to None, not writing events.
+
+    Returns:
+        The active ``SpanRecorder``.
+    """
+    global _recorder
+    disable()
+    _recorder = SpanRecorder(events_filepath)
+    return _recorder
+
+
+def disable() -> Optional[SpanRecorder]:
+    """Disable instrumentation.
+
+    Returns:
+        The previously active ``SpanRecorder``, if any.
+    """
+    global _recorder
+    recorder = _recorder
+    _recorder = None
+    if recorder is not None:
+        recorder.close()
+    return recorder
+
+
+@contextlib.contextmanager
+def recording(enabled: bool, events_filepath: Optional[Path] = None):
+    """Enable instrumentation in a context and print the summary table at the end.
+
+    Args:
+        enabled: whether to enable instrumentation, if not, this context does nothing.
+        events_filepath: the path to append the JSON-lines events to. Defaults to None, not writing events.
+    """
+    if not enabled and events_filepath is None:
+        yield
+        return
+    enable(events_filepath)
+    try:
+        yield
+    finally:
+        recorder = disable()
+        print("\nTime spent per stage:")
+        print(recorder.get_summary())
+
+
+def add_instrumentation_arguments(CLI: ArgumentParser):
+    """Add the instrumentation arguments to a Command Line Interface.
+
+    Args:
+        CLI: the ``ArgumentParser`` to add the arguments to.
+    """
+    CLI.add_argument("--instrument", action="store_true", help="Print the time spent per stage of the pipeline")
+    CLI.add_argument(
+        "--instrument-events",
+        type=Path,
+        default=None,
+        help="Append the timing of each stage as JSON-lines events to this file (implies --instrument)",
+    )
+
+
+def recording_from_args(args: Namespace):
+    """Get the ``recording`` context for the parsed instrumentation arguments of a Command Line Interface."""
+    return recording(args.instrument, args.instrument_events)
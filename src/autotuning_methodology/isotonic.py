@@ -0,0 +1,284 @@
+"""Bootstrapped and batched isotonic regression, fitting all bootstraps or runs over the data sorted once."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+
+def get_bootstrap_samples(
+    num_data: int, n_bootstraps: int, max_samples: float, seed: Optional[int] = None
+) -> np.ndarray:
+    """Draw the indices of the data in each bootstrap with replacement, as ``BaggingRegressor`` with ``bootstrap=True``.
+
+    Args:
+        num_data: the number of data.
+        n_bootstraps: the number of bootstraps.
+        max_samples: the fraction of the number of data to draw with replacement per bootstrap.
+        seed: the seed of the random number generator. Defaults to None, unseeded.
+
+    Returns:
+        An integer array of shape (n_bootstraps, samples) of the indices in each bootstrap, sorted per bootstrap.
+    """
+    num_samples = max(int(max_samples * num_data), 1)
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(0, num_data, size=(n_bootstraps, num_samples))
+    samples.sort(axis=1)
+    return samples
+
+
+def fit_predict_isotonic(
+    x: list[np.ndarray],
+    y: list[np.ndarray],
+    weights: list[np.ndarray],
+    x_new: np.ndarray,
+    increasing: bool,
+    y_min: Optional[float],
+    y_max: Optional[float],
+) -> np.ndarray:
+    """Fit a weighted isotonic regression per bootstrap and predict it on ``x_new``, as ``IsotonicRegression``.
+
+    Between the x-values of a bootstrap the fit is linearly interpolated, as ``IsotonicRegression.predict`` does, so
+    the predictions are not a step function of the fitted values.
+
+    Args:
+        x: the unique x-values per bootstrap, sorted ascendingly.
+        y: the mean y-value of each x-value per bootstrap.
+        weights: the weight of each x-value per bootstrap.
+        x_new: the x-values to predict, outside the x-values of a bootstrap the prediction is clipped.
+        increasing: whether the fit is increasing or decreasing.
+        y_min: lower bound on the lowest predicted value.
+        y_max: upper bound on the highest predicted value.
+
+    Returns:
+        An array of shape (bootstraps, x_new) of the predictions.
+    """
+    from sklearn.isotonic import isotonic_regression
+
+    predictions = np.empty((len(x), x_new.shape[0]))
+    for bootstrap, (bootstrap_x, bootstrap_y, bootstrap_weights) in enumerate(zip(x, y, weights)):
+        fit = isotonic_regression(
+            bootstrap_y, sample_weight=bootstrap_weights, y_min=y_min, y_max=y_max, increasing=increasing
+        )
+        predictions[bootstrap] = np.interp(np.clip(x_new, bootstrap_x[0], bootstrap_x[-1]), bootstrap_x, fit)
+    return predictions
+
+
+def bootstrap_isotonic_regression(
+    x: np.ndarray,
+    y: np.ndarray,
+    x_new: np.ndarray,
+    n_bootstraps: int,
+    max_samples: float,
+    increasing=True,
+    y_min: Optional[float] = None,
+    y_max: Optional[float] = None,
+    seed: Optional[int] = None,
+    n_jobs=1,
+) -> np.ndarray:
+    """Fit an isotonic regression to each bootstrap of the data and predict each on ``x_new``.
+
+    Equivalent to the predictions of the estimators of a ``BaggingRegressor`` of ``IsotonicRegression`` with
+    ``bootstrap=True`` and ``out_of_bounds="clip"``, but the data is sorted once and the samples of all bootstraps
+    are drawn and pooled at once, leaving only the pool-adjacent-violators fit and interpolation per bootstrap.
+
+    Args:
+        x: the one-dimensional x-values of the data.
+        y: the one-dimensional y-values of the data.
+        x_new: the one-dimensional x-values to predict.
+        n_bootstraps: the number of bootstraps.
+        max_samples: the fraction of the number of data to draw with replacement per bootstrap.
+        increasing: whether the fit is increasing or decreasing. Defaults to True.
+        y_min: lower bound on the lowest predicted value. Defaults to None.
+        y_max: upper bound on the highest predicted value. Defaults to None.
+        seed: the seed of the random number generator. Defaults to None, unseeded.
+        n_jobs: the number of threads to fit the bootstraps on. Defaults to 1.
+
+    Returns:
+        An array of shape (n_bootstraps, x_new) of the prediction of each bootstrap.
+    """
+    assert x.ndim == y.ndim == x_new.ndim == 1, "The data must be one-dimensional"
+    assert x.shape == y.shape, f"Shapes do not match: {x.shape} != {y.shape}"
+    assert n_jobs >= 1, f"n_jobs must be at least 1, is {n_jobs}"
+    samples = get_bootstrap_samples(x.shape[0], n_bootstraps, max_samples, seed)
+
+    # sort the data once, so that the sorted samples index the data in ascending order of x
+    order = np.argsort(x, kind="stable")
+    x_sorted, y_sorted = x[order], y[order]
+    x_unique, x_unique_index = np.unique(x_sorted, return_inverse=True)
+
+    # pool the samples of the same x per bootstrap, for all bootstraps at once as the keys are ascending
+    num_unique = x_unique.shape[0]
+    keys = (x_unique_index[samples] + np.arange(n_bootstraps)[:, np.newaxis] * num_unique).ravel()
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    weights = np.diff(np.append(starts, keys.shape[0]))
+    weighted_y = np.add.reduceat(y_sorted[samples].ravel(), starts)
+    bootstrap_of_pool, x_unique_of_pool = np.divmod(keys[starts], num_unique)
+    pools = np.split(np.arange(starts.shape[0]), np.searchsorted(bootstrap_of_pool, np.arange(1, n_bootstraps)))
+    x_pooled = list(x_unique[x_unique_of_pool[pool]] for pool in pools)
+    weights = list(weights[pool] for pool in pools)
+    y_pooled = list(weighted_y[pool] / weights_pool for pool, weights_pool in zip(pools, weights))
+
+    # fit and predict the bootstraps
+    return fit_predict_isotonic_threaded(x_pooled, y_pooled, weights, x_new, increasing, y_min, y_max, n_jobs)
+
+
+def binned_bootstrap_isotonic_regression(
+    x: np.ndarray,
+    counts: np.ndarray,
+    y_means: np.ndarray,
+    y_variances: np.ndarray,
+    x_new: np.ndarray,
+    n_bootstraps: int,
+    max_samples: float,
+    increasing=True,
+    y_min: Optional[float] = None,
+    y_max: Optional[float] = None,
+    seed: Optional[int] = None,
+    n_jobs=1,
+) -> np.ndarray:
+    """Fit an isotonic regression to each bootstrap of data pooled in bins and predict each on ``x_new``.
+
+    Approximates ``bootstrap_isotonic_regression`` in memory proportional to the number of bins instead of the number
+    of data. Per bootstrap, the number of samples in each bin is drawn from a multinomial distribution over the counts
+    of the bins, and the mean y-value of the samples in a bin is drawn from a normal distribution with the mean and
+    variance of the bin divided by the number of samples. If each bin holds the data of a single x-value and y-value,
+    this draws the same bootstraps as on the data.
+
+    Args:
+        x: the ascending x-value of each bin, such as the mean x-value of its data.
+        counts: the number of data in each bin.
+        y_means: the mean y-value of the data in each bin.
+        y_variances: the variance of the y-values of the data in each bin.
+        x_new: the one-dimensional x-values to predict.
+        n_bootstraps: the number of bootstraps.
+        max_samples: the fraction of the number of data to draw with replacement per bootstrap.
+        increasing: whether the fit is increasing or decreasing. Defaults to True.
+        y_min: lower bound on the lowest predicted value. Defaults to None.
+        y_max: upper bound on the highest predicted value. Defaults to None.
+        seed: the seed of the random number generator. Defaults to None, unseeded.
+        n_jobs: the number of threads to fit the bootstraps on. Defaults to 1.
+
+    Returns:
+        An array of shape (n_bootstraps, x_new) of the prediction of each bootstrap.
+    """
+    assert x.ndim == x_new.ndim == 1, "The data must be one-dimensional"
+    assert x.shape == counts.shape == y_means.shape == y_variances.shape, "The bins must have the same shapes"
+    assert n_jobs >= 1, f"n_jobs must be at least 1, is {n_jobs}"
+    nonempty_mask = counts > 0
+    x, counts = x[nonempty_mask], counts[nonempty_mask]
+    y_means, y_variances = y_means[nonempty_mask], y_variances[nonempty_mask]
+    num_data = np.sum(counts)
+    num_samples = max(int(max_samples * num_data), 1)
+
+    # draw the samples per bin and the mean of the samples in each bin per bootstrap
+    rng = np.random.default_rng(seed)
+    x_drawn, y_drawn, weights = list(), list(), list()
+    for _ in range(n_bootstraps):
+        bootstrap_counts = rng.multinomial(num_samples, counts / num_data)
+        drawn_mask = bootstrap_counts > 0
+        bootstrap_counts = bootstrap_counts[drawn_mask]
+        standard_errors = np.sqrt(y_variances[drawn_mask] / bootstrap_counts)
+        deviations = rng.standard_normal(bootstrap_counts.shape[0]) * standard_errors
+        x_drawn.append(x[drawn_mask])
+        y_drawn.append(y_means[drawn_mask] + deviations)
+        weights.append(bootstrap_counts.astype(float))
+
+    # fit and predict the bootstraps
+    return fit_predict_isotonic_threaded(x_drawn, y_drawn, weights, x_new, increasing, y_min, y_max, n_jobs)
+
+
+def batched_isotonic_regression(
+    x: np.ndarray,
+    y: np.ndarray,
+    x_new: np.ndarray,
+    increasing=True,
+    y_min: Optional[float] = None,
+    y_max: Optional[float] = None,
+    n_jobs=1,
+) -> np.ndarray:
+    """Fit an isotonic regression to each run of the data and predict each on ``x_new``.
+
+    Equivalent to an ``IsotonicRegression`` with ``out_of_bounds="clip"`` fitted to the non-NaN data of each run, but
+    the data of all runs is sorted and the ties are pooled at once, as in ``bootstrap_isotonic_regression``.
+
+    Args:
+        x: the x-values of shape (data, runs), padded with NaN where a run has no data.
+        y: the y-values of shape (data, runs), padded with NaN where a run has no data.
+        x_new: the one-dimensional x-values to predict.
+        increasing: whether the fit is increasing or decreasing. Defaults to True.
+        y_min: lower bound on the lowest predicted value. Defaults to None.
+        y_max: upper bound on the highest predicted value. Defaults to None.
+        n_jobs: the number of threads to fit the runs on. Defaults to 1.
+
+    Returns:
+        An array of shape (runs, x_new) of the prediction of each run.
+    """
+    assert x.shape == y.shape and x.ndim == 2, f"Shapes do not match: {x.shape} != {y.shape}"
+    assert n_jobs >= 1, f"n_jobs must be at least 1, is {n_jobs}"
+    num_runs = x.shape[1]
+    valid_mask = ~np.isnan(x) & ~np.isnan(y)
+    assert np.all(np.any(valid_mask, axis=0)), "Every run must have data that is not NaN"
+
+    # sort the data by run and x at once
+    runs, rows = np.nonzero(valid_mask.transpose())
+    x_valid, y_valid = x[rows, runs], y[rows, runs]
+    order = np.lexsort((x_valid, runs))
+    runs, x_sorted, y_sorted = runs[order], x_valid[order], y_valid[order]
+
+    # pool the data of the same x per run
+    new_pool = np.ones(runs.shape[0], dtype=bool)
+    new_pool[1:] = (runs[1:] != runs[:-1]) | (x_sorted[1:] != x_sorted[:-1])
+    starts = np.flatnonzero(new_pool)
+    weights = np.diff(np.append(starts, runs.shape[0])).astype(float)
+    y_pooled = np.add.reduceat(y_sorted, starts) / weights
+    pools = np.split(np.arange(starts.shape[0]), np.searchsorted(runs[starts], np.arange(1, num_runs)))
+    x_pooled = list(x_sorted[starts[pool]] for pool in pools)
+
+    # fit and predict the runs
+    return fit_predict_isotonic_threaded(
+        x_pooled,
+        list(y_pooled[pool] for pool in pools),
+        list(weights[pool] for pool in pools),
+        x_new,
+        increasing,
+        y_min,
+        y_max,
+        n_jobs,
+    )
+
+
+def fit_predict_isotonic_threaded(
+    x: list[np.ndarray],
+    y: list[np.ndarray],
+    weights: list[np.ndarray],
+    x_new: np.ndarray,
+    increasing: bool,
+    y_min: Optional[float],
+    y_max: Optional[float],
+    n_jobs: int,
+) -> np.ndarray:
+    """Apply ``fit_predict_isotonic`` to chunks of the bootstraps on ``n_jobs`` threads, see its arguments."""
+    # the isotonic regression releases the GIL, so the chunks are fitted in parallel
+    x_new = np.asarray(x_new, dtype=float)
+    if n_jobs == 1:
+        return fit_predict_isotonic(x, y, weights, x_new, increasing, y_min, y_max)
+    n_bootstraps = len(x)
+    chunks = np.array_split(np.arange(n_bootstraps), min(n_jobs, n_bootstraps))
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = list(
+            executor.submit(
+                fit_predict_isotonic,
+                list(x[b] for b in chunk),
+                list(y[b] for b in chunk),
+                list(weights[b] for b in chunk),
+                x_new,
+                increasing,
+                y_min,
+                y_max,
+            )
+            for chunk in chunks
+        )
+        return np.concatenate(list(future.result() for future in futures))
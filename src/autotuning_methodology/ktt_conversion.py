@@ -0,0 +1,521 @@
+"""Code for converting KTT output to the Kernel Tuner and T4 formats."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import json
+import os
+import re
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TextIO, Union
+
+import numpy as np
+
+# Imported runs must be remapped to have the same keys, values and order of parameters as the other runs.
+# This mapping provides both the order and mapping, so all keys must be present.
+# Default value is a tuple where the first element is the new parameter name and the second the mapped value.
+# Arrays of tuples allow mapping from one parameter to multiple.
+# 'None' values are skipped.
+ktt_param_mapping = {
+    "convolution": {
+        "BLOCK_SIZE_X": ("block_size_x", lambda x: x),
+        "BLOCK_SIZE_Y": ("block_size_y", lambda x: x),
+        "HFS": [("filter_height", 15), ("filter_width", 15)],
+        "READ_ONLY": ("read_only", lambda x: x),
+        "TILE_SIZE_X": ("tile_size_x", lambda x: x),
+        "TILE_SIZE_Y": ("tile_size_y", lambda x: x),
+        "PADDING": ("use_padding", lambda x: x),
+        "IMAGE_WIDTH": None,
+        "IMAGE_HEIGHT": None,
+    },
+    "pnpoly": {
+        "BETWEEN_METHOD": ("between_method", lambda x: x),
+        "BLOCK_SIZE_X": ("block_size_x", lambda x: x),
+        "TILE_SIZE": ("tile_size", lambda x: x),
+        "USE_METHOD": ("use_method", lambda x: x),
+        "VERTICES": None,
+    },
+}
+ktt_param_mapping["mocktest_kernel_convolution"] = ktt_param_mapping["convolution"]
+
+# map all KTT timeunits to miliseconds
+ktt_timeunit_mapping: dict[str, Callable] = {
+    "seconds": lambda x: x * 1000,
+    "miliseconds": lambda x: x,
+    "microseconds": lambda x: x / 1000,
+}
+
+# map the KTT status to the Kernel Tuner error values, None if there is no error
+ktt_status_to_kerneltuner_error_mapping = {
+    "ok": None,
+    "devicelimitsexceeded": "CompilationFailedConfig",
+    "computationfailed": "RuntimeFailedConfig",
+}
+
+# the whitespace allowed between JSON tokens
+_json_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+class JSONStreamReader:
+    """Reads a JSON document incrementally, a value at a time, optionally copying the text read to another file."""
+
+    def __init__(self, fp_in: TextIO, fp_out: Optional[TextIO] = None, chunk_size=2**20) -> None:
+        """Initialize the reader at the start of the document.
+
+        Args:
+            fp_in: the file to read from.
+            fp_out: the file to copy the text read to, except for replaced values. Defaults to None.
+            chunk_size: the minimum number of characters to read at once. Defaults to 2**20.
+        """
+        self.fp_in = fp_in
+        self.fp_out = fp_out
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0  # the position of the next character to read in the buffer
+        self.copied = 0  # the position up to which the buffer has been copied to the output
+        self.offset = 0  # the position of the start of the buffer in the file
+        self.end_of_file = False
+
+    def _error(self, message: str) -> ValueError:
+        name = getattr(self.fp_in, "name", "the input")
+        return ValueError(f"Invalid JSON in {name} at character {self.offset + self.position}: {message}")
+
+    def _read(self) -> bool:
+        """Read more text after dropping the text before the position, returns False at the end of the file."""
+        if self.end_of_file:
+            return False
+        self.copy()
+        self.offset += self.position
+        self.buffer = self.buffer[self.position :]
+        self.position = self.copied = 0
+        # read at least as much as is buffered, so that decoding a large value takes a linear number of reads
+        text = self.fp_in.read(max(self.chunk_size, len(self.buffer)))
+        if len(text) == 0:
+            self.end_of_file = True
+            return False
+        self.buffer += text
+        return True
+
+    def copy(self) -> None:
+        """Copy the text up to the position to the output."""
+        if self.fp_out is not None and self.copied < self.position:
+            self.fp_out.write(self.buffer[self.copied : self.position])
+        self.copied = self.position
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or an empty string at the end of the file."""
+        while True:
+            self.position = _json_whitespace.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                return ""
+
+    def expect(self, character: str) -> None:
+        """Read the next character, which must be ``character``."""
+        if self.peek() != character:
+            raise self._error(f"expected '{character}'")
+        self.position += 1
+
+    def decode(self):
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a number at the end of the buffer, or ending in a partial fraction or exponent, may continue
+                if self.end_of_file or (end < len(self.buffer) and self.buffer[end] not in "+-.0123456789Ee"):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.end_of_file:
+                    raise self._error(e.msg) from e
+            self._read()
+
+    def replace(self, replace: Callable[[object], str]) -> None:
+        """Decode the next value and copy the text returned by ``replace`` of the value to the output instead."""
+        self.peek()
+        self.copy()
+        value = self.decode()
+        self.copied = self.position
+        if self.fp_out is not None:
+            self.fp_out.write(replace(value))
+
+    def iter_members(self) -> Iterator[str]:
+        """Iterate over the keys of the next object, the value of each key must be read before the next key.
+
+        As in a Kernel Tuner cachefile that is still being written to, an object may end at the end of the file.
+        """
+        self.expect("{")
+        while True:
+            character = self.peek()
+            if character == "}":
+                self.position += 1
+                return
+            if character == "":
+                return
+            key = self.decode()
+            if not isinstance(key, str):
+                raise self._error("expected an object key")
+            self.expect(":")
+            yield key
+            character = self.peek()
+            if character == ",":
+                self.position += 1
+            elif character not in ("}", ""):
+                raise self._error("expected ',' or '}'")
+
+    def iter_items(self) -> Iterator[None]:
+        """Iterate over the items of the next array, each item must be read before the next iteration."""
+        self.expect("[")
+        while True:
+            character = self.peek()
+            if character == "]":
+                self.position += 1
+                return
+            if character == "":
+                raise self._error("expected ']'")
+            yield None
+            character = self.peek()
+            if character == ",":
+                self.position += 1
+            elif character != "]":
+                raise self._error("expected ',' or ']'")
+
+    def finish(self) -> None:
+        """Check that nothing but whitespace follows and copy the rest of the text to the output."""
+        if self.peek() != "":
+            raise self._error("expected the end of the file")
+        self.copy()
+
+
+class KTTParamMappingPlan:
+    """A parameter mapping from ``ktt_param_mapping``, compiled once for the parameters of a KTT output."""
+
+    def __init__(self, param_mapping: dict, ktt_param_names: list[str]) -> None:
+        """Compile the parameter mapping by resolving the order, dropped parameters, constants and callables once.
+
+        Args:
+            param_mapping: the mapping of a kernel, see ``ktt_param_mapping``.
+            ktt_param_names: the names of the parameters in the KTT output.
+
+        Raises:
+            ValueError: on a mapping of the wrong type.
+        """
+        assert len(param_mapping) == len(
+            ktt_param_names
+        ), f"Mapping provided for {len(param_mapping)} params, but configuration has {len(ktt_param_names)}"
+        missing_names = set(param_mapping.keys()) ^ set(ktt_param_names)
+        assert len(missing_names) == 0, f"Mapping and configuration differ in parameters {missing_names}"
+
+        # each step is a tuple of (new parameter name, KTT parameter name, constant or callable value)
+        self.steps: list[tuple[str, str, Union[Callable, object]]] = list()
+        for param_name, mapping in param_mapping.items():
+            # if the mapping is None, do not include the parameter
+            if mapping is None:
+                continue
+            # if the mapping is a tuple, the first argument is the new parameter name and the second the value
+            elif isinstance(mapping, tuple):
+                self.steps.append((mapping[0], param_name, mapping[1]))
+            # if it's a list of tuples, map to multiple parameters
+            elif isinstance(mapping, list):
+                for param_mapped_name, param_mapped_value in mapping:
+                    self.steps.append((param_mapped_name, param_name, param_mapped_value))
+            else:
+                raise ValueError(f"Can not apply parameter mapping of {type(mapping)} ({mapping})")
+        self.param_names = list(step[0] for step in self.steps)
+
+    def map_configuration(self, configuration_ktt: dict) -> dict:
+        """Map a single KTT configuration.
+
+        Args:
+            configuration_ktt: dictionary of KTT parameter names to values.
+
+        Returns:
+            The configuration as a dictionary of mapped parameter names to values, in the mapped order.
+        """
+        configuration = dict()
+        for param_mapped_name, param_name, param_mapped_value in self.steps:
+            if callable(param_mapped_value):
+                param_mapped_value = param_mapped_value(configuration_ktt[param_name])
+            configuration[param_mapped_name] = param_mapped_value
+        return configuration
+
+    def map_columns(self, columns: dict[str, np.ndarray]) -> list[np.ndarray]:
+        """Map whole columns of KTT parameter values at once.
+
+        Callables are only applied to the unique values in a column.
+
+        Args:
+            columns: dictionary of KTT parameter names to a column with the value of each configuration.
+
+        Returns:
+            A list of columns in the mapped order, with the Python objects of the mapped values.
+        """
+        num_configs = len(next(iter(columns.values()))) if len(columns) > 0 else 0
+        mapped_columns = list()
+        for _, param_name, param_mapped_value in self.steps:
+            if callable(param_mapped_value):
+                unique_values, inverse = np.unique(columns[param_name], return_inverse=True)
+                mapped_values = np.empty(len(unique_values), dtype=object)
+                mapped_values[:] = list(param_mapped_value(value) for value in unique_values.tolist())
+                mapped_columns.append(mapped_values[inverse])
+            else:
+                column = np.empty(num_configs, dtype=object)
+                column.fill(param_mapped_value)
+                mapped_columns.append(column)
+        return mapped_columns
+
+    def get_cache_keys(
+        self, columns: dict[str, np.ndarray], mapped_columns: Optional[list[np.ndarray]] = None
+    ) -> np.ndarray:
+        """Get the Kernel Tuner cache key (comma-separated values) of each configuration in the columns.
+
+        Args:
+            columns: dictionary of KTT parameter names to a column with the value of each configuration.
+            mapped_columns: the columns as mapped by ``map_columns``, if already mapped. Defaults to None.
+
+        Returns:
+            A NumPy object array of the cache key strings.
+        """
+        if mapped_columns is None:
+            mapped_columns = self.map_columns(columns)
+        keys = None
+        for mapped_column in mapped_columns:
+            # convert only the unique values to strings, then gather them per configuration
+            unique_values, inverse = np.unique(mapped_column.astype(str), return_inverse=True)
+            unique_strings = np.empty(len(unique_values), dtype=object)
+            unique_strings[:] = list(str(value) for value in unique_values.tolist())
+            strings = unique_strings[inverse]
+            keys = strings if keys is None else keys + "," + strings
+        return keys
+
+
+def get_param_mapping_plan(kernel_name: str, ktt_param_names: list[str]) -> Optional[KTTParamMappingPlan]:
+    """Get the compiled parameter mapping plan of a kernel, None if there is no mapping for this kernel.
+
+    Args:
+        kernel_name: the name of the kernel, used to look up the mapping in ``ktt_param_mapping``.
+        ktt_param_names: the names of the parameters in the KTT output.
+
+    Returns:
+        The compiled ``KTTParamMappingPlan`` or None.
+    """
+    if kernel_name not in ktt_param_mapping:
+        return None
+    return KTTParamMappingPlan(ktt_param_mapping[kernel_name], ktt_param_names)
+
+
+def get_ktt_columns(ktt_results: list[dict]) -> dict[str, np.ndarray]:
+    """Transpose the configurations in the results of a KTT output to a column per parameter.
+
+    Args:
+        ktt_results: the "Results" of a KTT output.
+
+    Returns:
+        A dictionary of KTT parameter names to a NumPy object array of the values, so that the values of a parameter
+        keep their own type instead of being cast to the type of the values of other parameters.
+    """
+    if len(ktt_results) < 1:
+        return dict()
+    param_names = list(param["Name"] for param in ktt_results[0]["Configuration"])
+    columns = dict()
+    for index, param_name in enumerate(param_names):
+        column = list(result["Configuration"][index]["Value"] for result in ktt_results)
+        columns[param_name] = np.array(column, dtype=object)
+    return columns
+
+
+def get_kerneltuner_objective_value(ktt_config: dict, timemapper: Callable, ktt_objective_name="Duration"):
+    """Get the objective value of a configuration in a KTT output as the Kernel Tuner cache value.
+
+    Args:
+        ktt_config: a configuration in the "Results" of a KTT output.
+        timemapper: the function from ``ktt_timeunit_mapping`` for the time unit of the KTT output.
+        ktt_objective_name: the name of the objective in the KTT output. Defaults to "Duration".
+
+    Returns:
+        The value in miliseconds, or the Kernel Tuner error string.
+    """
+    status = ktt_status_to_kerneltuner_error_mapping[str(ktt_config["Status"]).lower()]
+    if status is None:
+        return timemapper(ktt_config["ComputationResults"][0][ktt_objective_name])
+    return status
+
+
+def read_ktt_output(ktt_filepath: Path, ktt_objective_name="Duration") -> tuple[dict, str, dict, np.ndarray]:
+    """Read a KTT output incrementally, keeping only the parameter values and objective value of each configuration.
+
+    The results are decoded one at a time, so the profiling data and other details are never all in memory at once.
+    As written by KTT, the "Metadata" must come before the "Results".
+
+    Args:
+        ktt_filepath: path to the KTT output file.
+        ktt_objective_name: the name of the objective in the KTT output. Defaults to "Duration".
+
+    Raises:
+        ValueError: if the KTT output does not have this layout or has no results.
+
+    Returns:
+        A tuple of the metadata, the kernel name, the columns as in ``get_ktt_columns`` and an object array of the
+        values as in ``get_kerneltuner_objective_value``.
+    """
+    metadata = None
+    kernel_name = None
+    param_names: list[str] = list()
+    param_values: list[list] = list()
+    values = list()
+    with ktt_filepath.open(mode="r") as fp:
+        reader = JSONStreamReader(fp)
+        for key in reader.iter_members():
+            if key == "Metadata":
+                metadata = dict(reader.decode())
+            elif key == "Results":
+                if metadata is None:
+                    raise ValueError(f"KTT output {ktt_filepath.name} must have its Metadata before its Results")
+                timemapper = ktt_timeunit_mapping[str(metadata.get("TimeUnit", "microseconds")).lower()]
+                for _ in reader.iter_items():
+                    ktt_config = reader.decode()
+                    names = list(param["Name"] for param in ktt_config["Configuration"])
+                    if kernel_name is None:
+                        kernel_name = str(ktt_config["KernelName"])
+                        param_names = names
+                        param_values = list(list() for _ in param_names)
+                    elif names != param_names:
+                        raise ValueError(f"KTT output {ktt_filepath.name} has configurations with other parameters")
+                    for column, param in zip(param_values, ktt_config["Configuration"]):
+                        column.append(param["Value"])
+                    values.append(get_kerneltuner_objective_value(ktt_config, timemapper, ktt_objective_name))
+            else:
+                reader.decode()
+        reader.finish()
+    if kernel_name is None:
+        raise ValueError(f"KTT output {ktt_filepath.name} has no results")
+    columns = dict((name, np.array(column, dtype=object)) for name, column in zip(param_names, param_values))
+    objective_values = np.empty(len(values), dtype=object)
+    objective_values[:] = values
+    return metadata, kernel_name, columns, objective_values
+
+
+def convert_ktt_to_kerneltuner_cache(
+    ktt_filepath: Path,
+    kerneltuner_cachefiles_path: Path,
+    ktt_objective_name="Duration",
+    kt_objective_name="time",
+) -> Path:
+    """Overwrite the objective values of a Kernel Tuner cachefile with those of a KTT brute force output.
+
+    Requires a fully bruteforced KTT output and a fully bruteforced Kernel Tuner cachefile on the same search space.
+    The KTT output is read with ``read_ktt_output`` and converted column-wise with the compiled parameter mapping plan.
+    The Kernel Tuner cachefile is parsed incrementally and written to a temporary file that replaces it when complete,
+    so neither file is loaded fully into memory. Only the configurations in the cache are rewritten, the rest of the
+    text is copied as is. As Kernel Tuner allows, the cachefile may be left open after the last configuration.
+    Each Kernel Tuner configuration must have every mapped parameter with the value of the KTT configuration.
+
+    Args:
+        ktt_filepath: path to the KTT output file.
+        kerneltuner_cachefiles_path: path to the folder with a folder of Kernel Tuner cachefiles per kernel.
+        ktt_objective_name: the name of the objective in the KTT output. Defaults to "Duration".
+        kt_objective_name: the name of the objective in the Kernel Tuner cachefile. Defaults to "time".
+
+    Raises:
+        KeyError: if the configurations or their parameters in the KTT output and the Kernel Tuner cachefile do not
+            match.
+        ValueError: if either file is not valid JSON or does not have the expected layout.
+
+    Returns:
+        The path to the Kernel Tuner cachefile written to.
+    """
+    # find the associated Kernel Tuner cachefile to write to
+    metadata, kernel, columns, new_values = read_ktt_output(ktt_filepath, ktt_objective_name)
+    device = str(metadata["Device"])
+    device_filename = device.replace("NVIDIA GeForce ", "").replace(" ", "_")
+    kernel_filename = kernel.lower()
+    kerneltuner_cachefile = kerneltuner_cachefiles_path / kernel_filename / f"{device_filename}.json"
+    if not kerneltuner_cachefile.exists():
+        raise FileNotFoundError(f"Kernel Tuner cachefile {kerneltuner_cachefile} does not exist")
+    print(f"Importing objective values from KTT to KernelTuner file for '{kernel}' on {device}")
+
+    # map the configurations column-wise to the Kernel Tuner cache keys
+    plan = get_param_mapping_plan(kernel_filename, list(columns.keys()))
+    if plan is None:
+        raise KeyError(f"No parameter mapping for kernel '{kernel_filename}' in ktt_param_mapping")
+    mapped_columns = plan.map_columns(columns)
+    indices = dict((key, index) for index, key in enumerate(plan.get_cache_keys(columns, mapped_columns).tolist()))
+    replaced = np.zeros(len(indices), dtype=bool)
+    del columns
+
+    def replace_configuration(lookup_string: str, kt_config) -> str:
+        """Validate a Kernel Tuner configuration against the KTT one and return it with the new objective value."""
+        if lookup_string not in indices:
+            raise KeyError(f"Configuration {lookup_string} not in KTT output {ktt_filepath.name}")
+        if not isinstance(kt_config, dict) or kt_objective_name not in kt_config:
+            raise ValueError(f"Configuration {lookup_string} in the cache has no objective {kt_objective_name}")
+        index = indices[lookup_string]
+        for param_name, mapped_column in zip(plan.param_names, mapped_columns):
+            if param_name not in kt_config or kt_config[param_name] != mapped_column[index]:
+                raise KeyError(
+                    f"Parameter {param_name} of configuration {lookup_string} is not in the cachefile "
+                    + "or does not match the KTT output"
+                )
+        kt_config[kt_objective_name] = new_values[index]
+        replaced[index] = True
+        return json.dumps(kt_config)
+
+    # stream the cachefile, replacing the objective value of each configuration in the cache
+    temporary_cachefile = kerneltuner_cachefile.with_suffix(f".tmp{os.getpid()}")
+    try:
+        with kerneltuner_cachefile.open(mode="r") as fp_in, temporary_cachefile.open(mode="w") as fp_out:
+            reader = JSONStreamReader(fp_in, fp_out)
+            has_cache = False
+            for key in reader.iter_members():
+                if key != "cache":
+                    reader.decode()
+                    continue
+                if reader.peek() != "{":
+                    raise ValueError(f"The cache in Kernel Tuner cachefile {kerneltuner_cachefile} is not an object")
+                has_cache = True
+                for lookup_string in reader.iter_members():
+                    reader.replace(lambda kt_config: replace_configuration(lookup_string, kt_config))
+            reader.finish()
+        if not has_cache:
+            raise ValueError(f"Kernel Tuner cachefile {kerneltuner_cachefile} has no cache")
+        if not replaced.all():
+            raise KeyError(f"{np.count_nonzero(~replaced)} configurations of the KTT output are not in the cache")
+        temporary_cachefile.replace(kerneltuner_cachefile)
+    finally:
+        temporary_cachefile.unlink(missing_ok=True)
+    return kerneltuner_cachefile
+
+
+def get_args_from_cli(args=None) -> tuple[list[Path], Path]:
+    """Set the Command Line Interface arguments definitions, get and return the argument values.
+
+    Args:
+        args: optional list of arguments for testing without CLI interaction. Defaults to None.
+
+    Returns:
+        A tuple of the KTT output files to convert and the path to the Kernel Tuner cachefiles.
+    """
+    CLI = ArgumentParser(description="Overwrite Kernel Tuner cachefiles with the objective values of KTT outputs.")
+    CLI.add_argument("ktt_data", type=Path, help="A KTT output .json file or a folder of KTT output files")
+    CLI.add_argument("cachefiles", type=Path, help="The folder with a folder of Kernel Tuner cachefiles per kernel")
+    args = CLI.parse_args(args)
+    ktt_data_path: Path = args.ktt_data
+    if ktt_data_path.is_dir():
+        ktt_filepaths = sorted(f for f in ktt_data_path.iterdir() if f.is_file() and f.suffix == ".json")
+    else:
+        ktt_filepaths = [ktt_data_path]
+    return ktt_filepaths, args.cachefiles
+
+
+def entry_point():  #  pragma: no cover
+    """Entry point function for converting KTT outputs to Kernel Tuner cachefiles."""
+    ktt_filepaths, kerneltuner_cachefiles_path = get_args_from_cli()
+    for ktt_filepath in ktt_filepaths:
+        convert_ktt_to_kerneltuner_cache(ktt_filepath, kerneltuner_cachefiles_path)
+
+
+if __name__ == "__main__":
+    entry_point()
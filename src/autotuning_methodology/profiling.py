@@ -0,0 +1,157 @@
+"""Code for profiling the optimization algorithms per GPU, kernel and strategy."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import contextlib
+from pathlib import Path
+from typing import Optional
+
+clock_types = ["cpu", "wall"]
+profile_formats = {"pstat": ".prof", "callgrind": ".callgrind", "folded": ".folded"}
+
+
+class Profiler:
+    """Collects the profiles of the runs of a strategy and writes them per (GPU, kernel, strategy).
+
+    The profile of each repeat of a strategy is aggregated until it is written, after which the profiler is reset.
+    When the repeats of a strategy are executed in parts, such as in shards, queued tasks or scheduled ranges, each part
+    is written to its own file by its range of repeats.
+    """
+
+    def __init__(self, profile_dir: Path, clock_type="cpu", formats: list[str] = None) -> None:
+        """Initialization method for the Profiler object.
+
+        Args:
+            profile_dir: the directory to write the profiles to, in a folder per kernel.
+            clock_type: whether to measure CPU time ("cpu") or wall time ("wall"). Defaults to "cpu".
+            formats: the formats to write, see ``profile_formats``. Defaults to None, writing all formats.
+        """
+        assert clock_type in clock_types, f"clock_type must be one of {clock_types}, is {clock_type}"
+        self.profile_dir = Path(profile_dir)
+        self.clock_type = clock_type
+        self.formats = list(profile_formats.keys()) if formats is None else formats
+        for profile_format in self.formats:
+            assert profile_format in profile_formats, f"Unknown profile format {profile_format}"
+        self.num_runs = 0
+        self.reset()
+
+    def reset(self):
+        """Clear the collected statistics, so that the next strategy is profiled separately."""
+        import yappi
+
+        yappi.clear_stats()
+        yappi.set_clock_type(self.clock_type)
+        self.num_runs = 0
+
+    @contextlib.contextmanager
+    def profile(self):
+        """Profile a run of a strategy in a context, aggregated with the previous runs."""
+        import yappi
+
+        yappi.start()
+        try:
+            yield
+        finally:
+            yappi.stop()
+            self.num_runs += 1
+
+    def get_filepath(
+        self,
+        device_name: str,
+        kernel_name: str,
+        strategy_name: str,
+        profile_format: str,
+        repeats: Optional[range] = None,
+    ) -> Path:
+        """Get the path to the profile file of a strategy.
+
+        Args:
+            device_name: the name of the device (GPU).
+            kernel_name: the name of the kernel.
+            strategy_name: the name of the strategy.
+            profile_format: the format of the profile, see ``profile_formats``.
+            repeats: the range of repeats profiled, if only part of the repeats. Defaults to None, all repeats.
+
+        Returns:
+            The path to the profile file.
+        """
+        name = f"{device_name}_{strategy_name}"
+        if repeats is not None:
+            name += f"_repeats_{repeats.start}-{repeats.stop - 1}"
+        return self.profile_dir / kernel_name / f"{name}{profile_formats[profile_format]}"
+
+    def write(
+        self, device_name: str, kernel_name: str, strategy_name: str, repeats: Optional[range] = None
+    ) -> list[Path]:
+        """Write the aggregated profile of the runs of a strategy to file in each format and reset the profiler.
+
+        Args:
+            device_name: the name of the device (GPU).
+            kernel_name: the name of the kernel.
+            strategy_name: the name of the strategy.
+            repeats: the range of repeats profiled, if only part of the repeats, so that the profiles of the parts do
+                not overwrite each other. Defaults to None, all repeats.
+
+        Returns:
+            The paths to the written files, empty if nothing was profiled.
+        """
+        import yappi
+
+        stats = yappi.get_func_stats()
+        filepaths = list()
+        if stats.empty():
+            self.reset()
+            return filepaths
+        for profile_format in self.formats:
+            filepath = self.get_filepath(device_name, kernel_name, strategy_name, profile_format, repeats)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            if profile_format == "folded":
+                filepath.write_text("".join(f"{stack} {value}\n" for stack, value in get_folded_stacks(stats).items()))
+            else:
+                stats.save(str(filepath), type=profile_format)  # pylint: disable=no-member
+            filepaths.append(filepath)
+        print(f" | - |-> profile of {self.num_runs} runs ({self.clock_type} time) written to {filepaths[0].parent}")
+        self.reset()
+        return filepaths
+
+
+def get_folded_stacks(stats, max_depth=64) -> dict[str, int]:
+    """Convert the yappi function statistics to folded stacks, as used by flamegraph tools.
+
+    As the statistics only have the time per caller-callee pair, the time of a function is attributed to the
+    stacks it is called from in proportion to the time spent in the function from each caller.
+
+    Args:
+        stats: the yappi function statistics.
+        max_depth: the maximum depth of the stacks. Defaults to 64.
+
+    Returns:
+        A dictionary of stacks of ';'-separated function names to the time spent in microseconds.
+    """
+    funcs = dict((stat.full_name, stat) for stat in stats)
+    called = set(child.full_name for stat in stats for child in stat.children)
+    folded: dict[str, int] = dict()
+
+    def get_name(stat) -> str:
+        return f"{stat.name} ({Path(stat.module).name}:{stat.lineno})".replace(";", ",").replace(" ", "_")
+
+    def fold(stat, stack: str, fraction: float, visited: frozenset, depth: int):
+        value = round(stat.tsub * fraction * 1e6)
+        if value > 0:
+            folded[stack] = folded.get(stack, 0) + value
+        # stop at the maximum depth or when the remaining time is negligible, to bound the number of stacks
+        if depth >= max_depth or stat.ttot * fraction * 1e6 < 1:
+            return
+        for child in stat.children:
+            child_stat = funcs.get(child.full_name)
+            if child_stat is None or child.full_name in visited or child_stat.ttot <= 0:
+                continue
+            child_fraction = fraction * min(child.ttot / child_stat.ttot, 1.0)
+            child_stack = f"{stack};{get_name(child_stat)}"
+            fold(child_stat, child_stack, child_fraction, visited | {child.full_name}, depth + 1)
+
+    # start from the functions that are not called by any other profiled function
+    for stat in stats:
+        if stat.full_name not in called:
+            fold(stat, get_name(stat), 1.0, frozenset([stat.full_name]), 1)
+    return folded
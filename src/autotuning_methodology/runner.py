@@ -5,53 +5,39 @@ from __future__ import annotations  # for correct nested type hints e.g. list[st
 import contextlib
 import json
 import os
+import re
 import time as python_time
 import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
 from inspect import getfile
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
-import progressbar
-import yappi
 
 from autotuning_methodology.caching import ResultsDescription
+from autotuning_methodology.instrumentation import instrumented, span
+from autotuning_methodology.ktt_conversion import (  # noqa: F401 (ktt_param_mapping is re-exported)
+    get_param_mapping_plan,
+    ktt_param_mapping,
+    ktt_timeunit_mapping,
+)
+from autotuning_methodology.profiling import Profiler
 from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
 from autotuning_methodology.validators import (
     is_invalid_objective_performance,
     is_invalid_objective_time,
     is_valid_config_result,
 )
+from autotuning_methodology.workers import TuningWorkerPool
 
 folder = Path(__file__).parent.parent.parent
 import_runs_path = Path(folder, "cached_data_used/import_runs")
 
-
-# Imported runs must be remapped to have the same keys, values and order of parameters as the other runs.
-# This mapping provides both the order and mapping, so all keys must be present.
-# Default value is a tuple where the first element is the new parameter name and the second the mapped value.
-# Arrays of tuples allow mapping from one parameter to multiple.
-# 'None' values are skipped.
-ktt_param_mapping = {
-    "convolution": {
-        "BLOCK_SIZE_X": ("block_size_x", lambda x: x),
-        "BLOCK_SIZE_Y": ("block_size_y", lambda x: x),
-        "HFS": [("filter_height", 15), ("filter_width", 15)],
-        "READ_ONLY": ("read_only", lambda x: x),
-        "TILE_SIZE_X": ("tile_size_x", lambda x: x),
-        "TILE_SIZE_Y": ("tile_size_y", lambda x: x),
-        "PADDING": ("use_padding", lambda x: x),
-        "IMAGE_WIDTH": None,
-        "IMAGE_HEIGHT": None,
-    },
-    "pnpoly": {
-        "BETWEEN_METHOD": ("between_method", lambda x: x),
-        "BLOCK_SIZE_X": ("block_size_x", lambda x: x),
-        "TILE_SIZE": ("tile_size", lambda x: x),
-        "USE_METHOD": ("use_method", lambda x: x),
-        "VERTICES": None,
-    },
-}
-ktt_param_mapping["mocktest_kernel_convolution"] = ktt_param_mapping["convolution"]
+# the searchspace statistics of the runs imported in a worker process of ``import_runs_from_KTT``, set once per process
+_import_searchspace_stats: Optional[SearchspaceStatistics] = None
+# the runs imported at once by ``tune`` per kernel, device and strategy, until they are tuned
+_imported_runs: dict[tuple[str, str, str], dict[int, tuple[None, list[dict], int]]] = dict()
 
 
 @contextlib.contextmanager
@@ -86,6 +72,270 @@ def load_json(path: Path):
         return json.load(file_results)
 
 
+# KTT output files to import are named after the tool, device, kernel, strategy and run number
+import_run_filename_pattern = re.compile(
+    r"^t~'(?P<tool>.+?)'d~'(?P<device>.+?)'k~'(?P<kernel>.+?)'s~'(?P<strategy>.+?)'r~(?P<run>\d+)\.json$"
+)
+_import_runs_indices: dict[Path, tuple[int, dict]] = dict()
+
+
+def get_import_runs_index(path: Path = import_runs_path) -> dict[tuple[str, str, str, str], dict[int, list[Path]]]:
+    """Get an index of the runs to import, parsed once from the filenames in the directory.
+
+    The index is rebuilt only when the modification time of the directory changes.
+
+    Args:
+        path: the directory with files named ``t~'{tool}'d~'{device}'k~'{kernel}'s~'{strategy}'r~{run}.json``.
+
+    Returns:
+        A dictionary of (tool, device, kernel, strategy) to a dictionary of run number to matching filepaths.
+    """
+    assert path.exists() and path.is_dir(), f"Import runs path {path} does not exist or is not a directory"
+    mtime = path.stat().st_mtime_ns
+    if path in _import_runs_indices and _import_runs_indices[path][0] == mtime:
+        return _import_runs_indices[path][1]
+    index: dict[tuple[str, str, str, str], dict[int, list[Path]]] = dict()
+    for file in path.iterdir():
+        match = import_run_filename_pattern.match(file.name.lower())
+        if match is None:
+            continue
+        key = (match["tool"], match["device"], match["kernel"], match["strategy"])
+        index.setdefault(key, dict()).setdefault(int(match["run"]), list()).append(file)
+    _import_runs_indices[path] = (mtime, index)
+    return index
+
+
+def get_import_run_filepath(
+    tool: str, device_name: str, kernel_name: str, strategy_name: str, run_number: int, path: Path = import_runs_path
+) -> Path:
+    """Look up the file to import for a run in the index of the import runs directory.
+
+    Args:
+        tool: the tool that produced the file, e.g. "ktt".
+        device_name: the device (GPU) the run was on.
+        kernel_name: the name of the program tuned.
+        strategy_name: the name of the optimization algorithm in the tool.
+        run_number: the run number.
+        path: the directory to import from. Defaults to ``import_runs_path``.
+
+    Raises:
+        FileNotFoundError: if there is no file for this run.
+        FileExistsError: if there are multiple files for this run.
+
+    Returns:
+        The path to the file to import.
+    """
+    expected_filename = f"t~'{tool}'d~'{device_name}'k~'{kernel_name}'s~'{strategy_name}'r~{run_number}.json".lower()
+    key = (tool.lower(), device_name.lower(), kernel_name.lower(), strategy_name.lower())
+    matching_runs = get_import_runs_index(path).get(key, dict()).get(run_number, list())
+    if len(matching_runs) < 1:
+        raise FileNotFoundError(f"No files to import found with name '{expected_filename}'")
+    if len(matching_runs) > 1:
+        raise FileExistsError(
+            f"{len(matching_runs)} files exist with name '{expected_filename}', there can be only one"
+        )
+    return matching_runs[0]
+
+
+def convert_KTT_run(
+    filepath: Path, kernel_name: str, iterations: Optional[int], use_param_mapping=True
+) -> tuple[None, list[dict], int]:
+    """Load a KTT output file and convert it to the T4 format.
+
+    Module-level so that it can be executed in a separate process.
+    The objective value is the mean of the runtimes, see ``apply_bruteforce_objective`` to use the bruteforced value.
+
+    Args:
+        filepath: path to the KTT output file.
+        kernel_name: the name of the program tuned, used to look up the parameter mapping.
+        iterations: the number of iterations specified for the strategy.
+        use_param_mapping: whether to apply the ``ktt_param_mapping``. Defaults to True.
+
+    Returns:
+        A tuple of the metadata, the results, and the total runtime in miliseconds.
+    """
+    run = load_json(filepath)
+
+    ktt_status_mapping = {
+        "ok": "correct",
+        "devicelimitsexceeded": "compile",
+        "computationfailed": "runtime",
+    }
+
+    # convert to the T4 format
+    metadata = None  # TODO implement the metadata conversion when necessary
+    results = list()
+    run_metadata: dict = run["Metadata"]
+    run_results: list[dict] = run["Results"]
+    timemapper = ktt_timeunit_mapping[str(run_metadata["TimeUnit"]).lower()]
+    param_names = list(param["Name"] for param in run_results[0]["Configuration"]) if len(run_results) > 0 else []
+    param_map_plan = get_param_mapping_plan(kernel_name, param_names) if use_param_mapping else None
+    total_time_ms = 0
+    for config_attempt in run_results:
+
+        # convert the configuration to T4 style dictionary for fast lookups in the mapping
+        configuration_ktt = dict()
+        for param in config_attempt["Configuration"]:
+            configuration_ktt[param["Name"]] = param["Value"]
+
+        # convert the configuration data with the compiled mapping plan in the correct order
+        configuration = configuration_ktt
+        if param_map_plan is not None:
+            configuration = param_map_plan.map_configuration(configuration_ktt)
+
+        # add to total time
+        total_duration = timemapper(config_attempt["TotalDuration"])
+        total_overhead = timemapper(config_attempt["TotalOverhead"])
+        total_time_ms += total_duration + total_overhead
+
+        # convert the times data
+        times_runtimes = []
+        duration = ""
+        if len(config_attempt["ComputationResults"]) > 0:
+            for config_result in config_attempt["ComputationResults"]:
+                times_runtimes.append(timemapper(config_result["Duration"]))
+            duration = np.mean(times_runtimes)
+            assert (
+                iterations is not None
+            ), "For imported KTT runs, the number of iterations must be specified in the experiments file"
+            if iterations != len(times_runtimes):
+                warnings.warn(
+                    f"The specified number of iterations ({iterations}) did not equal "
+                    + f"the actual number of iterations ({len(times_runtimes)}). "
+                    + "The average has been used."
+                )
+                times_runtimes = [np.mean(times_runtimes)] * iterations
+        if (not isinstance(duration, (float, int, np.number))) or np.isnan(duration):
+            duration = ""
+        times_search_algorithm = timemapper(config_attempt.get("SearcherOverhead", 0))
+        times_validation = timemapper(config_attempt.get("ValidationOverhead", 0))
+        times_framework = timemapper(config_attempt.get("DataMovementOverhead", 0))
+        times_benchmark = total_duration
+        times_compilation = total_overhead - times_search_algorithm - times_validation - times_framework
+
+        # assemble the converted data
+        converted = {
+            "configuration": configuration,
+            "invalidity": ktt_status_mapping[str(config_attempt["Status"]).lower()],
+            "correctness": 1,
+            "measurements": [
+                {
+                    "name": "time",
+                    "value": duration,
+                    "unit": "ms",
+                }
+            ],
+            "objectives": ["time"],
+            "times": {
+                "compilation": times_compilation,
+                "benchmark": times_benchmark,
+                "framework": times_framework,
+                "search_algorithm": times_search_algorithm,
+                "validation": times_validation,
+                "runtimes": times_runtimes,
+            },
+        }
+        results.append(converted)
+
+    return metadata, results, round(total_time_ms)
+
+
+def apply_bruteforce_objective(results: list[dict], searchspace_stats: SearchspaceStatistics):
+    """Replace the objective value of converted results with the value in the bruteforced cache, in place.
+
+    Args:
+        results: the converted results, see ``convert_KTT_run``.
+        searchspace_stats: the ``SearchspaceStatistics`` object to look up the bruteforced values in.
+    """
+    for result in results:
+        if len(result["times"]["runtimes"]) < 1:
+            continue
+        config_string_key = ",".join(str(x) for x in result["configuration"].values())
+        duration = searchspace_stats.get_value_in_config(config_string_key, "time")
+        if (not isinstance(duration, (float, int, np.number))) or np.isnan(duration):
+            duration = ""
+        result["measurements"][0]["value"] = duration
+
+
+def _set_import_searchspace_stats(searchspace_stats: Optional[SearchspaceStatistics]):
+    """Set the searchspace statistics of the runs imported in this worker process."""
+    global _import_searchspace_stats
+    _import_searchspace_stats = searchspace_stats
+
+
+def _import_KTT_run(
+    filepath: Path,
+    kernel_name: str,
+    iterations: Optional[int],
+    use_param_mapping: bool,
+    searchspace_stats: Optional[SearchspaceStatistics] = None,
+) -> tuple[None, list[dict], int]:
+    """Convert a KTT output file with ``convert_KTT_run`` and apply the bruteforced objective if there are statistics.
+
+    Module-level so that it can be executed in a separate process, where the searchspace statistics default to the
+    ones set for the process with ``_set_import_searchspace_stats``.
+    """
+    if searchspace_stats is None:
+        searchspace_stats = _import_searchspace_stats
+    metadata, results, total_time_ms = convert_KTT_run(filepath, kernel_name, iterations, use_param_mapping)
+    if searchspace_stats is not None:
+        apply_bruteforce_objective(results, searchspace_stats)
+    return metadata, results, total_time_ms
+
+
+
+def import_runs_from_KTT(
+    kernel_name: str,
+    device_name: str,
+    strategy: dict,
+    searchspace_stats: SearchspaceStatistics,
+    run_numbers: list[int],
+    max_workers: Optional[int] = None,
+    use_param_mapping=True,
+    use_bruteforce_objective=True,
+    path: Path = import_runs_path,
+) -> list[tuple[None, list[dict], int]]:
+    """Import the KTT output files of multiple runs of a strategy, parsed and converted concurrently.
+
+    The bruteforced objective values are applied in the worker processes as well, which receive the searchspace
+    statistics once per process instead of once per run.
+
+    Args:
+        kernel_name: the name of the program tuned.
+        device_name: the device (GPU) the runs were on.
+        strategy: the optimization algorithm the runs were made with.
+        searchspace_stats: the ``SearchspaceStatistics`` object, used to look up the bruteforced objective values.
+        run_numbers: the run numbers to import.
+        max_workers: the maximum number of processes to use, defaults to the number of CPUs. Defaults to None.
+        use_param_mapping: whether to apply the ``ktt_param_mapping``. Defaults to True.
+        use_bruteforce_objective: whether to use the bruteforced objective value instead of the mean. Defaults to True.
+        path: the directory to import from. Defaults to ``import_runs_path``.
+
+    Returns:
+        A list of tuples of the metadata, the results, and the total runtime in miliseconds, in order of run number.
+    """
+    # look up all files first, so that a missing run is reported before any parsing is done
+    filepaths = list(
+        get_import_run_filepath("ktt", device_name, kernel_name, strategy["strategy"], run_number, path=path)
+        for run_number in run_numbers
+    )
+    args = (kernel_name, strategy.get("iterations"), use_param_mapping)
+    objective_searchspace_stats = searchspace_stats if use_bruteforce_objective else None
+    if use_bruteforce_objective:
+        assert searchspace_stats is not None, "The bruteforced objective requires the searchspace statistics"
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(filepaths))
+    if max_workers <= 1:
+        return list(_import_KTT_run(filepath, *args, objective_searchspace_stats) for filepath in filepaths)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_set_import_searchspace_stats,
+        initargs=(objective_searchspace_stats,),
+    ) as executor:
+        return list(executor.map(_import_KTT_run, filepaths, *([arg] * len(filepaths) for arg in args)))
+
+
 def get_results_and_metadata(
     filename_results: str = f"{folder}../last_run/_tune_configuration-results.json",
     filename_metadata: str = f"{folder}../last_run/_tune_configuration-metadata.json",
@@ -111,7 +361,7 @@ def tune(
     device_name: str,
     strategy: dict,
     tune_options: dict,
-    profiling: bool,
+    profiler: Optional[Profiler],
     searchspace_stats: SearchspaceStatistics,
 ) -> tuple[list, list, int]:
     """Tune a program using an optimization algorithm and collect the results.
@@ -125,7 +375,7 @@ def tune(
         device_name: the device (GPU) to tune on.
         strategy: the optimization algorithm to optimize with.
         tune_options: a special options dictionary passed along to the autotuning framework.
-        profiling: whether profiling statistics should be collected.
+        profiler: the ``Profiler`` to collect the profiling statistics with, None to disable profiling.
         searchspace_stats: a ``SearchspaceStatistics`` object passed to convert imported runs.
 
     Raises:
@@ -143,22 +393,19 @@ def tune(
 
         # change CWD to the directory of the kernel
         with temporary_working_directory_change(kernel_directory):
-            if profiling:
-                yappi.set_clock_type("cpu")
-                yappi.start()
-            with warnings.catch_warnings():
+            with profiler.profile() if profiler is not None else contextlib.nullcontext(), warnings.catch_warnings():
                 warnings.simplefilter("ignore")
-                res, env = kernel.tune(
-                    device_name=device_name,
-                    strategy=strategy["strategy"],
-                    strategy_options=strategy["options"],
-                    **tune_options,
+                with span("runner.kernel_tune", gpu=device_name, kernel=kernel_name, strategy=strategy["name"]):
+                    res, env = kernel.tune(
+                        device_name=device_name,
+                        strategy=strategy["strategy"],
+                        strategy_options=strategy["options"],
+                        **tune_options,
+                    )
+            with span("runner.read_T4_results"):
+                metadata, results = get_results_and_metadata(
+                    filename_results=kernel.file_path_results, filename_metadata=kernel.file_path_metadata
                 )
-            if profiling:
-                yappi.stop()
-            metadata, results = get_results_and_metadata(
-                filename_results=kernel.file_path_results, filename_metadata=kernel.file_path_metadata
-            )
             # check that the number of iterations is correct
             if "iterations" in strategy:
                 for result in results:
@@ -180,139 +427,18 @@ def tune(
         """Interface to tune with the BAT benchmarking suite."""
         # TODO integrate with BAT
 
-    def import_from_KTT(use_param_mapping=True, use_bruteforce_objective=True):
-        """Import a KTT output file."""
-        # import the file
-        assert import_runs_path.exists() and import_runs_path.is_dir()
-        expected_filename = (
-            f"t~'ktt'd~'{device_name}'k~'{kernel_name}'s~'{strategy['strategy']}'r~{run_number}.json".lower()
-        )
-        matching_runs: list[dict] = list()
-        for file in import_runs_path.iterdir():
-            if file.name == expected_filename:
-                matching_runs.append(load_json(file))
-        if len(matching_runs) < 1:
-            raise FileNotFoundError(f"No files to import found with name '{expected_filename}'")
-        if len(matching_runs) > 1:
-            raise FileExistsError(
-                f"{len(matching_runs)} files exist with name '{expected_filename}', there can be only one"
-            )
-        run = matching_runs[0]
-
-        # map all timeunits to miliseconds
-        ktt_timeunit_mapping = {
-            "seconds": lambda x: x * 1000,
-            "miliseconds": lambda x: x,
-            "microseconds": lambda x: x / 1000,
-        }
-        ktt_status_mapping = {
-            "ok": "correct",
-            "devicelimitsexceeded": "compile",
-            "computationfailed": "runtime",
-        }
-
-        # convert to the T4 format
-        metadata = None  # TODO implement the metadata conversion when necessary
-        results = list()
-        run_metadata: dict = run["Metadata"]
-        run_results: list[dict] = run["Results"]
-        timemapper = ktt_timeunit_mapping[str(run_metadata["TimeUnit"]).lower()]
-        total_time_ms = 0
-        for config_attempt in run_results:
-
-            # convert the configuration to T4 style dictionary for fast lookups in the mapping
-            configuration_ktt = dict()
-            for param in config_attempt["Configuration"]:
-                configuration_ktt[param["Name"]] = param["Value"]
-
-            # convert the configuration data with the mapping in the correct order
-            configuration = dict()
-            if use_param_mapping and kernel_name in ktt_param_mapping:
-                param_map = ktt_param_mapping[kernel_name]
-                assert len(param_map) == len(
-                    configuration_ktt
-                ), f"Mapping provided for {len(param_map)} params, but configuration has {len(configuration_ktt)}"
-                for param_name, mapping in param_map.items():
-                    param_value = configuration_ktt[param_name]
-                    # if the mapping is None, do not include the parameter
-                    if mapping is None:
-                        pass
-                    # if the mapping is a tuple, the first argument is the new parameter name and the second the value
-                    elif isinstance(mapping, tuple):
-                        param_mapped_name, param_mapped_value = mapping
-                        if callable(param_mapped_value):
-                            param_mapped_value = param_mapped_value(param_value)
-                        configuration[param_mapped_name] = param_mapped_value
-                    # if it's a list of tuples, map to multiple parameters
-                    elif isinstance(mapping, list):
-                        for param_mapped_name, param_mapped_value in mapping:
-                            if callable(param_mapped_value):
-                                param_mapped_value = param_mapped_value(param_value)
-                            configuration[param_mapped_name] = param_mapped_value
-                    else:
-                        raise ValueError(f"Can not apply parameter mapping of {type(mapping)} ({mapping})")
-            else:
-                configuration = configuration_ktt
-
-            # add to total time
-            total_duration = timemapper(config_attempt["TotalDuration"])
-            total_overhead = timemapper(config_attempt["TotalOverhead"])
-            total_time_ms += total_duration + total_overhead
-
-            # convert the times data
-            times_runtimes = []
-            duration = ""
-            if len(config_attempt["ComputationResults"]) > 0:
-                for config_result in config_attempt["ComputationResults"]:
-                    times_runtimes.append(timemapper(config_result["Duration"]))
-                if use_bruteforce_objective:
-                    config_string_key = ",".join(str(x) for x in configuration.values())
-                    duration = searchspace_stats.get_value_in_config(config_string_key, "time")
-                else:
-                    duration = np.mean(times_runtimes)
-                assert (
-                    "iterations" in strategy
-                ), "For imported KTT runs, the number of iterations must be specified in the experiments file"
-                if strategy["iterations"] != len(times_runtimes):
-                    times_runtimes = [np.mean(times_runtimes)] * strategy["iterations"]
-                    warnings.warn(
-                        f"The specified number of iterations ({strategy['iterations']}) did not equal"
-                        + f"the actual number of iterations ({len(times_runtimes)}). "
-                        + "The average has been used."
-                    )
-            if (not isinstance(duration, (float, int, np.number))) or np.isnan(duration):
-                duration = ""
-            times_search_algorithm = timemapper(config_attempt.get("SearcherOverhead", 0))
-            times_validation = timemapper(config_attempt.get("ValidationOverhead", 0))
-            times_framework = timemapper(config_attempt.get("DataMovementOverhead", 0))
-            times_benchmark = total_duration
-            times_compilation = total_overhead - times_search_algorithm - times_validation - times_framework
-
-            # assemble the converted data
-            converted = {
-                "configuration": configuration,
-                "invalidity": ktt_status_mapping[str(config_attempt["Status"]).lower()],
-                "correctness": 1,
-                "measurements": [
-                    {
-                        "name": "time",
-                        "value": duration,
-                        "unit": "ms",
-                    }
-                ],
-                "objectives": ["time"],
-                "times": {
-                    "compilation": times_compilation,
-                    "benchmark": times_benchmark,
-                    "framework": times_framework,
-                    "search_algorithm": times_search_algorithm,
-                    "validation": times_validation,
-                    "runtimes": times_runtimes,
-                },
-            }
-            results.append(converted)
-
-        return metadata, results, round(total_time_ms)
+    def import_from_KTT():
+        """Import a KTT output file, importing the runs of all repeats of the strategy at once on the first."""
+        key = (kernel_name, device_name, strategy["name"])
+        imported_runs = _imported_runs.setdefault(key, dict())
+        if run_number not in imported_runs:
+            run_numbers = sorted(set(range(strategy["repeats"])).union([run_number]).difference(imported_runs))
+            runs = import_runs_from_KTT(kernel_name, device_name, strategy, searchspace_stats, run_numbers)
+            imported_runs.update(zip(run_numbers, runs))
+        run = imported_runs.pop(run_number)
+        if len(imported_runs) == 0:
+            del _imported_runs[key]
+        return run
 
     strategy_name = str(strategy["name"]).lower()
     if strategy_name.startswith("ktt_"):
@@ -339,7 +465,8 @@ def collect_results(
     strategy: dict,
     results_description: ResultsDescription,
     searchspace_stats: SearchspaceStatistics,
-    profiling: bool,
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
 ) -> ResultsDescription:
     """Executes optimization algorithms on tuning problems to capture their behaviour.
 
@@ -348,11 +475,48 @@ def collect_results(
         strategy: the optimization algorithm to optimize with.
         searchspace_stats: the ``SearchspaceStatistics`` object, only used for conversion of imported runs.
         results_description: the ``ResultsDescription`` object to write the results to.
-        profiling: whether profiling statistics must be collected.
+        profiler: the ``Profiler`` to write a profile of this strategy with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process. Not used when profiling.
 
     Returns:
         The ``ResultsDescription`` object with the results.
     """
+    repeated_results = run_strategy(kernel, strategy, results_description, searchspace_stats, profiler, workers)
+
+    # combine the results to numpy arrays and write to a file
+    write_results(repeated_results, results_description)
+    assert results_description.has_results(), "No results in ResultsDescription after writing results."
+    return results_description
+
+
+def run_strategy(
+    kernel,
+    strategy: dict,
+    results_description: ResultsDescription,
+    searchspace_stats: Optional[SearchspaceStatistics],
+    profiler: Optional[Profiler] = None,
+    workers: Optional[TuningWorkerPool] = None,
+    repeats: Optional[range] = None,
+) -> list[list[dict]]:
+    """Executes the repeats of an optimization algorithm on a tuning problem, without writing the results.
+
+    Args:
+        kernel: the program (kernel) to tune.
+        strategy: the optimization algorithm to optimize with.
+        results_description: the ``ResultsDescription`` object describing the results.
+        searchspace_stats: the ``SearchspaceStatistics`` object, only used for conversion of imported runs.
+        profiler: the ``Profiler`` to write a profile of this strategy with, None to disable profiling.
+        workers: the ``TuningWorkerPool`` to execute the runs in, None to tune in this process. Not used when profiling.
+        repeats: the range of repeats to execute. Defaults to None, executing all repeats of the strategy.
+
+    Raises:
+        ValueError: if an imported run has fewer than the minimum number of evaluations or only invalid results.
+
+    Returns:
+        The list of the results of each repeat, see ``write_results``.
+    """
+    if repeats is None:
+        repeats = range(strategy["repeats"])
     min_num_evals: int = strategy["minimum_number_of_evaluations"]
     # TODO put the tune options in the .json in strategy_defaults? Make it Kernel Tuner independent
     tune_options = {"verbose": False, "quiet": True, "simulation_mode": True}
@@ -366,11 +530,42 @@ def collect_results(
         else:
             print(f"({rep+1}/{strategy_repeats}) Only invalid results found, trying once more...")
 
+    # imported runs are indexed, parsed and converted concurrently at once instead of once per repeat
+    imported_runs: Optional[dict[int, tuple[None, list[dict], int]]] = None
+    if str(strategy["name"]).lower().startswith("ktt_"):
+        with span("runner.import_KTT_runs", strategy=strategy["name"]):
+            runs = import_runs_from_KTT(
+                results_description.kernel_name,
+                results_description.device_name,
+                strategy,
+                searchspace_stats,
+                list(repeats),
+            )
+            imported_runs = dict(zip(repeats, runs))
+
+    def tune_attempt(rep: int, attempt: int) -> tuple[list, list, int]:
+        """Tune once, in the worker if there is one, where the first attempts of all repeats are already queued."""
+        if queued_runs is not None and attempt == 0:
+            return queued_runs.pop(rep).result()
+        if queued_runs is not None:
+            return workers.submit(rep, kernel_name, device_name, strategy, tune_options).result()
+        return tune(rep, kernel, kernel_name, device_name, strategy, tune_options, profiler, searchspace_stats)
+
+    # with a worker, queue the first attempt of each repeat at once so that the worker does not idle between runs
+    kernel_name, device_name = results_description.kernel_name, results_description.device_name
+    queued_runs: Optional[dict[int, Future]] = None
+    if workers is not None and profiler is None and imported_runs is None:
+        queued_runs = dict(
+            (rep, workers.submit(rep, kernel_name, device_name, strategy, tune_options)) for rep in repeats
+        )
+
     # repeat the strategy as specified
+    import progressbar
+
     repeated_results = list()
     total_time_results = np.array([])
     for rep in progressbar.progressbar(
-        range(strategy["repeats"]),
+        repeats,
         redirect_stdout=True,
         prefix=" | - |-> running: ",
         widgets=[
@@ -384,22 +579,24 @@ def collect_results(
             "]",
         ],
     ):
+        if imported_runs is not None:
+            # imported runs can not be attempted again, as importing again gives the same results, so reject them
+            metadata, results, total_time_ms = imported_runs[rep]
+            if len(results) < min_num_evals or not any(is_valid_config_result(config) for config in results):
+                raise ValueError(
+                    f"Imported run {rep} has {len(results)} results of the {min_num_evals} required or only invalid "
+                    + "results, and can not be attempted again"
+                )
+            repeated_results.append(results)
+            total_time_results = np.append(total_time_results, total_time_ms)
+            continue
         attempt = 0
         only_invalid = True
         len_res: int = -1
         while only_invalid or len_res < min_num_evals:
             if attempt > 0:
                 report_multiple_attempts(rep, len_res, strategy["repeats"])
-            metadata, results, total_time_ms = tune(
-                rep,
-                kernel,
-                results_description.kernel_name,
-                results_description.device_name,
-                strategy,
-                tune_options,
-                profiling,
-                searchspace_stats,
-            )
+            metadata, results, total_time_ms = tune_attempt(rep, attempt)
             len_res = len(results)
             # check if there are only invalid configs in the first min_num_evals, if so, try again
             temp_res_filtered = list(filter(lambda config: is_valid_config_result(config), results))
@@ -409,26 +606,38 @@ def collect_results(
         repeated_results.append(results)
         total_time_results = np.append(total_time_results, total_time_ms)
 
-    # gather profiling data and clear the profiler before the next round
-    if profiling:
-        stats = yappi.get_func_stats()
-        # stats.print_all()
-        path = "../old_experiments/profilings/random/profile-v2.prof"
-        stats.save(path, type="pstat")  # pylint: disable=no-member
-        yappi.clear_stats()
-
-    # combine the results to numpy arrays and write to a file
-    write_results(repeated_results, results_description)
-    assert results_description.has_results(), "No results in ResultsDescription after writing results."
-    return results_description
+    # write the profile aggregated over the repeats and reset the profiler before the next strategy
+    if profiler is not None:
+        profiler.write(
+            results_description.device_name,
+            results_description.kernel_name,
+            results_description.strategy_name,
+            repeats if repeats != range(strategy["repeats"]) else None,
+        )
+    return repeated_results
 
 
-def write_results(repeated_results: list, results_description: ResultsDescription):
+@instrumented("runner.write_results")
+def write_results(repeated_results: list, results_description: ResultsDescription, provenance: Optional[dict] = None):
     """Combine the results and write them to a NumPy file.
 
     Args:
         repeated_results: a list of tuning results, one per tuning session.
         results_description: the ``ResultsDescription`` object to write the results to.
+        provenance: the configuration that produced the results, see ``incremental.get_provenance``. Defaults to None.
+    """
+    results_description.set_results(get_results_arrays(repeated_results, results_description), provenance)
+
+
+def get_results_arrays(repeated_results: list, results_description: ResultsDescription) -> dict[str, np.ndarray]:
+    """Combine the results to NumPy arrays.
+
+    Args:
+        repeated_results: a list of tuning results, one per tuning session.
+        results_description: the ``ResultsDescription`` object describing the results.
+
+    Returns:
+        A dictionary of the NumPy arrays, with an entry per repeat on the last axis.
     """
     # get the objective value and time keys
     objective_time_keys = results_description.objective_time_keys
@@ -515,7 +724,6 @@ def write_results(repeated_results: list, results_description: ResultsDescriptio
             if not is_invalid_objective_performance(objective_performance_best):
                 objective_performance_best_results[evaluation_index, repeat_index] = objective_performance_best
 
-    # write to file
     numpy_arrays = {
         "fevals_results": fevals_results,
         "objective_time_results": objective_time_results,
@@ -525,4 +733,4 @@ def write_results(repeated_results: list, results_description: ResultsDescriptio
         "objective_time_results_per_key": objective_time_results_per_key,
         "objective_performance_results_per_key": objective_performance_results_per_key,
     }
-    results_description.set_results(numpy_arrays)
+    return numpy_arrays
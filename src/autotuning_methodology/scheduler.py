@@ -0,0 +1,158 @@
+"""Scheduler executing the tasks of an experiment as a graph of dependent tasks on a pool of worker processes."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Optional, Union
+
+
+class Task:
+    """A task in the graph, executed once all of its dependencies have completed."""
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable,
+        args: tuple = (),
+        dependencies: list[Task] = None,
+        local=False,
+        memory_estimate=0,
+        priority: Union[float, Callable] = 0,
+    ) -> None:
+        """Initialization method for the Task object.
+
+        Args:
+            name: the unique name of the task.
+            function: the function to execute, called with ``args`` followed by the result of each dependency.
+            args: the arguments to call the function with. Must be picklable if the task is not local.
+            dependencies: the tasks that must complete before this task. Defaults to None.
+            local: whether to execute in the scheduler process instead of a worker, for short tasks. Defaults to False.
+            memory_estimate: the estimated peak memory of the task in bytes. Defaults to 0.
+            priority: tasks with a higher priority are started first, such as the tasks that take the longest. Either
+                a number or a function called with the results of the dependencies. Defaults to 0.
+        """
+        self.name = name
+        self.function = function
+        self.args = args
+        self.dependencies = list() if dependencies is None else dependencies
+        self.local = local
+        self.memory_estimate = memory_estimate
+        self.priority = priority
+        self.done = False
+        self.result = None
+
+    def get_call_args(self) -> tuple:
+        """Get the arguments to call the function with, including the results of the dependencies."""
+        return tuple(self.args) + tuple(dependency.result for dependency in self.dependencies)
+
+    def get_priority(self) -> float:
+        """Get the priority of the task, only valid once its dependencies have completed."""
+        if callable(self.priority):
+            return self.priority(*(dependency.result for dependency in self.dependencies))
+        return self.priority
+
+
+def get_available_memory() -> Optional[int]:
+    """Get the available physical memory in bytes, None if it can not be determined."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError, AttributeError):  # pragma: no cover
+        return None
+
+
+class TaskScheduler:
+    """Executes a graph of tasks, running independent tasks concurrently on a number of worker processes.
+
+    A task is started as soon as its dependencies have completed, a worker is free, and its memory estimate fits in
+    the memory budget together with the running tasks. A task is always started if no other task is running.
+    Of the tasks that are ready, those with the highest priority are started first.
+    """
+
+    def __init__(self, max_workers: int = None, memory_budget: Optional[int] = -1) -> None:
+        """Initialization method for the TaskScheduler object.
+
+        Args:
+            max_workers: the number of worker processes. Defaults to None, using the number of CPUs.
+            memory_budget: the memory in bytes the running tasks may use together. None for unlimited.
+                Defaults to -1, using the available physical memory.
+        """
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        assert self.max_workers >= 1, f"There must be at least one worker, is {self.max_workers}"
+        self.memory_budget = get_available_memory() if memory_budget == -1 else memory_budget
+        self.tasks: dict[str, Task] = dict()
+
+    def add(self, task: Task) -> Task:
+        """Add a task to the graph, its dependencies must have been added before.
+
+        Args:
+            task: the task to add.
+
+        Returns:
+            The task.
+        """
+        assert task.name not in self.tasks, f"Task {task.name} is already in the graph"
+        for dependency in task.dependencies:
+            assert self.tasks.get(dependency.name) is dependency, f"Dependency {dependency.name} is not in the graph"
+        self.tasks[task.name] = task
+        return task
+
+    def get_ready_tasks(self, started: set[str]) -> list[Task]:
+        """Get the tasks that are not started yet and of which all dependencies have completed, by priority."""
+        ready = list(
+            task
+            for task in self.tasks.values()
+            if task.name not in started and all(dependency.done for dependency in task.dependencies)
+        )
+        return sorted(ready, key=lambda task: task.get_priority(), reverse=True)
+
+    def run(self) -> dict[str, Task]:
+        """Execute all tasks in the graph.
+
+        Raises:
+            Exception: the first exception raised by a task, after which the remaining tasks are cancelled.
+
+        Returns:
+            The dictionary of task names to the completed tasks, with their results.
+        """
+        started: set[str] = set()
+        running: dict[Future, Task] = dict()
+        running_memory = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(started) < len(self.tasks) or len(running) > 0:
+                # start the tasks that are ready, executing local tasks directly
+                for task in self.get_ready_tasks(started):
+                    if task.local:
+                        started.add(task.name)
+                        task.result = task.function(*task.get_call_args())
+                        task.done = True
+                        continue
+                    if len(running) >= self.max_workers:
+                        continue
+                    fits_in_memory = (
+                        self.memory_budget is None or running_memory + task.memory_estimate <= self.memory_budget
+                    )
+                    if len(running) > 0 and not fits_in_memory:
+                        continue
+                    started.add(task.name)
+                    running[executor.submit(task.function, *task.get_call_args())] = task
+                    running_memory += task.memory_estimate
+                if len(running) == 0:
+                    # completed local tasks may have made new tasks ready
+                    if len(self.get_ready_tasks(started)) == 0 and len(started) < len(self.tasks):
+                        raise ValueError("The task graph has unreachable tasks, are there circular dependencies?")
+                    continue
+
+                # wait for a running task to complete
+                completed, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in completed:
+                    task = running.pop(future)
+                    running_memory -= task.memory_estimate
+                    exception = future.exception()
+                    if exception is not None:
+                        for other_future in running:
+                            other_future.cancel()
+                        raise exception
+                    task.result = future.result()
+                    task.done = True
+        return self.tasks
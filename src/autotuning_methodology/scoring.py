@@ -0,0 +1,347 @@
+"""Headless scoring of the strategies of an experiment from the cached results, without plotting."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import csv
+import json
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from autotuning_methodology.baseline import Baseline, ExecutedStrategyBaseline, RandomSearchCalculatedBaseline
+from autotuning_methodology.curves import Curve, StochasticOptimizationAlgorithm
+from autotuning_methodology.experiment_loading import (
+    get_experiment,
+    get_results_description,
+    get_searchspace,
+    get_strategies,
+)
+from autotuning_methodology.instrumentation import add_instrumentation_arguments, recording_from_args, span
+from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
+from autotuning_methodology.validators import add_validation_arguments, set_validation_level_from_args
+
+score_keys = ["score", "score_lower", "score_upper"]
+
+
+def get_ranges(experiment: dict, searchspace_stats: SearchspaceStatistics) -> tuple[np.ndarray, np.ndarray]:
+    """Get the function evaluations and time ranges of a searchspace, from the start to the end cutoff percentile.
+
+    Args:
+        experiment: the experiment dictionary.
+        searchspace_stats: the ``SearchspaceStatistics`` object of the searchspace.
+
+    Returns:
+        A tuple of the function evaluations range and the time range.
+    """
+    cutoff_percentile: float = experiment["cutoff_percentile"]
+    cutoff_percentile_start: float = experiment.get("cutoff_percentile_start", 0.01)
+    time_resolution = int(experiment.get("resolution", 1e4))
+    _, cutoff_point_fevals, cutoff_point_time = searchspace_stats.cutoff_point_fevals_time(cutoff_percentile)
+    _, cutoff_point_fevals_start, cutoff_point_time_start = searchspace_stats.cutoff_point_fevals_time(
+        cutoff_percentile_start
+    )
+    fevals_range = np.arange(start=cutoff_point_fevals_start, stop=cutoff_point_fevals)
+    time_range = np.linspace(start=cutoff_point_time_start, stop=cutoff_point_time, num=time_resolution)
+    return fevals_range, time_range
+
+
+def get_strategies_performance(
+    aggregation_data: list[tuple[Baseline, list[Curve], SearchspaceStatistics, np.ndarray]],
+    confidence_level: float,
+) -> tuple[list[list[np.ndarray]], list[list[np.ndarray]], list[list[np.ndarray]], list[list[float]]]:
+    """Get the performance of each strategy relative to the baseline over the time range of each searchspace.
+
+    Args:
+        aggregation_data: a tuple of the baseline, the strategy curves, the searchspace statistics and the time range
+            per searchspace.
+        confidence_level: the confidence interval used for the confidence / prediction interval.
+
+    Returns:
+        The relative performance, its lower and upper error, and the fraction of the time range that is real (not
+        extrapolated), each a list per strategy of the values per searchspace.
+    """
+    num_strategies = len(aggregation_data[0][1])
+    performance = [list() for _ in range(num_strategies)]
+    lower_err = [list() for _ in range(num_strategies)]
+    upper_err = [list() for _ in range(num_strategies)]
+    real_stopping_point_fraction = [list() for _ in range(num_strategies)]
+    for random_baseline, strategies_curves, searchspace_stats, time_range in aggregation_data:
+        dist = searchspace_stats.objective_performances_total_sorted
+        for strategy_index, strategy_curve in enumerate(strategies_curves):
+            # get the real and fictional performance curves
+            (
+                real_stopping_point_index,
+                x_axis_range_real,
+                curve_real,
+                curve_lower_err_real,
+                curve_upper_err_real,
+                x_axis_range_fictional,
+                curve_fictional,
+                curve_lower_err_fictional,
+                curve_upper_err_fictional,
+            ) = strategy_curve.get_curve_over_time(time_range, dist=dist, confidence_level=confidence_level)
+            # combine the real and fictional parts to get the full curve
+            combine = x_axis_range_fictional.ndim > 0
+            x_axis_range = np.concatenate([x_axis_range_real, x_axis_range_fictional]) if combine else x_axis_range_real
+            assert np.array_equal(time_range, x_axis_range, equal_nan=True), "time_range != x_axis_range"
+            curve = np.concatenate([curve_real, curve_fictional]) if combine else curve_real
+            curve_lower_err = (
+                np.concatenate([curve_lower_err_real, curve_lower_err_fictional]) if combine else curve_lower_err_real
+            )
+            curve_upper_err = (
+                np.concatenate([curve_upper_err_real, curve_upper_err_fictional]) if combine else curve_upper_err_real
+            )
+            # get the standardised curves and write them to the collector
+            curve, curve_lower_err, curve_upper_err = random_baseline.get_standardised_curves(
+                time_range, [curve, curve_lower_err, curve_upper_err], x_type="time"
+            )
+            performance[strategy_index].append(curve)
+            lower_err[strategy_index].append(curve_lower_err)
+            upper_err[strategy_index].append(curve_upper_err)
+            real_stopping_point_fraction[strategy_index].append(real_stopping_point_index / x_axis_range.shape[0])
+    return performance, lower_err, upper_err, real_stopping_point_fraction
+
+
+def aggregate_strategies_performance(
+    performance: list[list[np.ndarray]],
+    lower_err: list[list[np.ndarray]],
+    upper_err: list[list[np.ndarray]],
+    real_stopping_point_fraction: list[list[float]],
+) -> tuple[list[np.ndarray], list[np.ndarray], list[np.ndarray], list[float]]:
+    """Combine the performances of ``get_strategies_performance`` across searchspaces.
+
+    Returns:
+        The mean relative performance and its mean lower and upper error per step in the time range, and the median
+        fraction of the time range that is real, each a list per strategy.
+    """
+    return (
+        list(np.mean(np.array(curves), axis=0) for curves in performance),
+        list(np.mean(np.array(curves), axis=0) for curves in lower_err),
+        list(np.mean(np.array(curves), axis=0) for curves in upper_err),
+        list(np.median(fractions) for fractions in real_stopping_point_fraction),
+    )
+
+
+def get_score(curve: np.ndarray, curve_lower_err: np.ndarray, curve_upper_err: np.ndarray) -> dict[str, float]:
+    """Get the score of a relative performance curve, the area under the curve normalized to the time range.
+
+    Args:
+        curve: the performance relative to the baseline over the time range.
+        curve_lower_err: the lower error of the curve.
+        curve_upper_err: the upper error of the curve.
+
+    Returns:
+        A dictionary of the score, the interval of the score, and the standard deviation over the time range.
+    """
+    # the errors of the objective value may swap when standardised, e.g. when minimizing
+    bounds = sorted([float(np.mean(curve_lower_err)), float(np.mean(curve_upper_err))])
+    return dict(
+        score=float(np.mean(curve)), score_lower=bounds[0], score_upper=bounds[1], score_std=float(np.std(curve))
+    )
+
+
+def score_experiment(
+    filepath: str,
+    confidence_level: Optional[float] = None,
+    strategy_names: Optional[list[str]] = None,
+    use_strategy_as_baseline: Optional[str] = None,
+    searchspaces: Optional[dict] = None,
+    block_rows: Optional[int] = None,
+) -> dict:
+    """Score the strategies of an experiment from the cached results, per searchspace and aggregated.
+
+    The score is the area under the curve of the best-found objective value relative to the baseline, over the time
+    range from the start to the end cutoff percentile, as in the aggregated plot of ``Visualize``. A score of 0 is as
+    good as the baseline, 1 is the absolute optimum from the start.
+
+    Args:
+        filepath: path to the experiments .json file, of which the results must be cached.
+        confidence_level: the confidence level of the intervals of the scores. Defaults to None, using the
+            ``confidence_level`` of the plot settings, or 0.95 if that is not set.
+        strategy_names: the names of the strategies to score. Defaults to None, scoring all strategies.
+        use_strategy_as_baseline: the name of an executed strategy to use as the baseline. Defaults to None, using
+            the calculated random search baseline.
+        searchspaces: the loaded searchspaces, see ``experiment_loading.get_searchspace``. Pass the same dictionary to
+            repeated calls, such as in an optimization loop, to load each searchspace once. Defaults to None.
+        block_rows: the number of function evaluations to compute the curves over at a time, from memory-mapped
+            results, see ``Curve``. Defaults to None, computing in memory.
+
+    Raises:
+        ValueError: if the results of a strategy are not cached, the baseline strategy is not in the experiment, or
+            the methods of the curves over time are invalid, see ``StochasticOptimizationAlgorithm.check_time_methods``.
+
+    Returns:
+        A dictionary with the confidence level and a dictionary per strategy with the aggregate scores and a list of
+        the scores per searchspace.
+    """
+    experiment = get_experiment(filepath)
+    experiment_folderpath = Path(filepath).parent
+    strategies = get_strategies(experiment)
+    if confidence_level is None:
+        confidence_level = experiment.get("plot", dict()).get("confidence_level") or 0.95
+    time_curve_method = experiment.get("plot", dict()).get("time_curve_method", "isotonic")
+    time_interval_method = experiment.get("plot", dict()).get("time_interval_method", "bagging")
+    StochasticOptimizationAlgorithm.check_time_methods(time_curve_method, time_interval_method, block_rows)
+    baseline_strategy = None
+    if use_strategy_as_baseline is not None:
+        baseline_strategy = next((s for s in strategies if s["name"] == use_strategy_as_baseline), None)
+        if baseline_strategy is None:
+            raise ValueError(f"Could not find '{use_strategy_as_baseline}' in the strategies of the experiment")
+    if strategy_names is not None:
+        strategies = list(strategy for strategy in strategies if strategy["name"] in strategy_names)
+        missing = set(strategy_names) - set(strategy["name"] for strategy in strategies)
+        assert len(missing) == 0, f"Strategies {missing} are not in the experiment"
+    if searchspaces is None:
+        searchspaces = dict()
+
+    # get the curves of the cached results per searchspace
+    aggregation_data: list[tuple[Baseline, list[Curve], SearchspaceStatistics, np.ndarray]] = list()
+    searchspace_names: list[tuple[str, str]] = list()
+    not_cached: list[str] = list()
+    for gpu_name in experiment["GPUs"]:
+        for kernel_name in experiment["kernels"]:
+            strategies_curves: list[Curve] = list()
+            for strategy in strategies:
+                results_description = get_results_description(
+                    experiment, experiment_folderpath, gpu_name, kernel_name, strategy
+                )
+                if not results_description.has_results():
+                    not_cached.append(f"{gpu_name}, {kernel_name}, {strategy['name']}")
+                    continue
+                curve = StochasticOptimizationAlgorithm(results_description, block_rows=block_rows)
+                curve.time_curve_method = time_curve_method
+                curve.time_interval_method = time_interval_method
+                strategies_curves.append(curve)
+            if len(not_cached) > 0:
+                continue
+            searchspace_stats, _ = get_searchspace(
+                experiment, experiment_folderpath, gpu_name, kernel_name, searchspaces
+            )
+            _, time_range = get_ranges(experiment, searchspace_stats)
+            with span("scoring.baseline", gpu=gpu_name, kernel=kernel_name):
+                if baseline_strategy is None:
+                    baseline = RandomSearchCalculatedBaseline(searchspace_stats)
+                else:
+                    baseline_results_description = get_results_description(
+                        experiment, experiment_folderpath, gpu_name, kernel_name, baseline_strategy
+                    )
+                    if not baseline_results_description.has_results():
+                        raise ValueError(f"Results of the baseline '{use_strategy_as_baseline}' are not cached")
+                    baseline_curve = StochasticOptimizationAlgorithm(
+                        baseline_results_description, block_rows=block_rows
+                    )
+                    baseline_curve.time_curve_method = time_curve_method
+                    baseline_curve.time_interval_method = time_interval_method
+                    baseline = ExecutedStrategyBaseline(
+                        searchspace_stats,
+                        strategy=baseline_curve,
+                        confidence_level=confidence_level,
+                    )
+            aggregation_data.append((baseline, strategies_curves, searchspace_stats, time_range))
+            searchspace_names.append((gpu_name, kernel_name))
+    if len(not_cached) > 0:
+        raise ValueError("Results are not cached, execute the experiment first:\n" + "\n".join(not_cached))
+
+    # score each strategy per searchspace and aggregated over the searchspaces
+    with span("scoring.performance"):
+        performances = get_strategies_performance(aggregation_data, confidence_level)
+    aggregated = aggregate_strategies_performance(*performances)
+    performance, lower_err, upper_err, real_stopping_point_fraction = performances
+    scores = list()
+    for index, strategy in enumerate(strategies):
+        strategy_scores = dict(name=strategy["name"], display_name=strategy["display_name"])
+        strategy_scores.update(get_score(aggregated[0][index], aggregated[1][index], aggregated[2][index]))
+        strategy_scores["real_stopping_point_fraction"] = float(aggregated[3][index])
+        strategy_scores["searchspaces"] = list(
+            dict(
+                gpu=gpu_name,
+                kernel=kernel_name,
+                **get_score(performance[index][ss], lower_err[index][ss], upper_err[index][ss]),
+                real_stopping_point_fraction=float(real_stopping_point_fraction[index][ss]),
+            )
+            for ss, (gpu_name, kernel_name) in enumerate(searchspace_names)
+        )
+        scores.append(strategy_scores)
+    return dict(experiment=experiment["name"], confidence_level=confidence_level, strategies=scores)
+
+
+def write_scores(scores: dict, filepath: Path):
+    """Write the scores of ``score_experiment`` to a JSON file, or a CSV file if the extension is '.csv'.
+
+    The CSV file has a row per strategy and searchspace, and a row per strategy with the aggregate scores, of which
+    the GPU and kernel are '*'.
+
+    Args:
+        scores: the scores.
+        filepath: the path to write to.
+    """
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    if filepath.suffix.lower() != ".csv":
+        filepath.write_text(json.dumps(scores, indent=2))
+        return
+    fieldnames = ["strategy", "gpu", "kernel", "score", "score_lower", "score_upper", "score_std"]
+    fieldnames.append("real_stopping_point_fraction")
+    with filepath.open("w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for strategy in scores["strategies"]:
+            writer.writerow(dict(strategy, strategy=strategy["name"], gpu="*", kernel="*"))
+            for searchspace in strategy["searchspaces"]:
+                writer.writerow(dict(searchspace, strategy=strategy["name"]))
+
+
+def get_scoring_args_from_cli(args=None) -> Namespace:
+    """Set the Command Line Interface arguments definitions, get and return the argument values.
+
+    Args:
+        args: optional list of arguments for testing without CLI interaction. Defaults to None.
+
+    Returns:
+        The parsed arguments.
+    """
+    CLI = ArgumentParser(description="Score the strategies of an executed experiment without plotting")
+    CLI.add_argument("experiment", type=str, help="The experiment.json to score, see experiments/template.json")
+    CLI.add_argument(
+        "--output",
+        type=Path,
+        nargs="+",
+        default=list(),
+        help="Write the scores to these files, as CSV if the extension is '.csv' and as JSON otherwise",
+    )
+    CLI.add_argument("--confidence-level", type=float, default=None, help="The confidence level of the intervals")
+    CLI.add_argument("--strategies", type=str, nargs="+", default=None, help="The names of the strategies to score")
+    CLI.add_argument("--baseline", type=str, default=None, help="The name of an executed strategy to use as baseline")
+    CLI.add_argument(
+        "--block-rows",
+        type=int,
+        default=None,
+        help="The number of function evaluations to compute over at a time, approximating isotonic curves over time",
+    )
+    add_instrumentation_arguments(CLI)
+    add_validation_arguments(CLI)
+    return CLI.parse_args(args)
+
+
+def print_scores(scores: dict):
+    """Print the aggregate scores of ``score_experiment`` as a table, ordered from best to worst."""
+    print(f"Scores of experiment '{scores['experiment']}' ({scores['confidence_level']} confidence interval):")
+    for strategy in sorted(scores["strategies"], key=lambda strategy: strategy["score"], reverse=True):
+        interval = f"[{strategy['score_lower']:.3f}, {strategy['score_upper']:.3f}]"
+        print(f" | {strategy['display_name']:<40} {strategy['score']:>8.3f} {interval:>18}")
+
+
+def entry_point():  #  pragma: no cover
+    """Entry point function for Scoring."""
+    args = get_scoring_args_from_cli()
+    set_validation_level_from_args(args)
+    with recording_from_args(args):
+        scores = score_experiment(
+            args.experiment, args.confidence_level, args.strategies, args.baseline, block_rows=args.block_rows
+        )
+    print_scores(scores)
+    for filepath in args.output:
+        write_scores(scores, filepath)
+        print(f"Scores written to {filepath}")
@@ -8,7 +8,11 @@ from pathlib import Path
 
 import numpy as np
 
-from autotuning_methodology.validators import is_invalid_objective_performance, is_invalid_objective_time
+from autotuning_methodology.validators import (
+    is_invalid_objective_performance,
+    is_invalid_objective_time,
+    validates,
+)
 
 
 def nansumwrapper(array: np.ndarray, **kwargs) -> np.ndarray:
@@ -27,6 +31,54 @@ def nansumwrapper(array: np.ndarray, **kwargs) -> np.ndarray:
     return summed_array
 
 
+def get_bruteforced_cache_filepath(
+    bruteforced_caches_path: Path, kernel_name: str, device_name: str, lowercase=True
+) -> Path:
+    """Returns the filepath to the bruteforced cache of a kernel on a device.
+
+    Args:
+        bruteforced_caches_path: the path to the directory with the bruteforced caches.
+        kernel_name: the name of the kernel.
+        device_name: the name of the device (GPU).
+        lowercase: whether the directory and filename are in lowercase. Defaults to True.
+
+    Returns:
+        The filepath, which may not exist.
+    """
+    kernel_directory = kernel_name
+    if lowercase:
+        kernel_directory = kernel_directory.lower()
+    filename = f"{device_name}.json"
+    if lowercase:
+        filename = filename.lower()
+    return Path(bruteforced_caches_path) / kernel_directory / filename
+
+
+def get_valid_bruteforced_cache_filepath(bruteforced_caches_path: Path, kernel_name: str, device_name: str) -> Path:
+    """Returns the filepath to the bruteforced cache of a kernel on a device if it exists, in lowercase or not.
+
+    Args:
+        bruteforced_caches_path: the path to the directory with the bruteforced caches.
+        kernel_name: the name of the kernel.
+        device_name: the name of the device (GPU).
+
+    Raises:
+        FileNotFoundError: if filepath does not exist.
+
+    Returns:
+        Filepath to the bruteforced cache .json file.
+    """
+    filepath = get_bruteforced_cache_filepath(bruteforced_caches_path, kernel_name, device_name)
+    if not filepath.exists():
+        filepath = get_bruteforced_cache_filepath(bruteforced_caches_path, kernel_name, device_name, lowercase=False)
+    if not filepath.exists():
+        # if the file is not found, raise an error
+        from os import getcwd
+
+        raise FileNotFoundError(f"{filepath.resolve()} does not exist relative to current working directory {getcwd()}")
+    return filepath
+
+
 class SearchspaceStatistics:
     """Object for obtaining information from a raw, brute-forced cache file."""
 
@@ -222,13 +274,9 @@ class SearchspaceStatistics:
 
     def _get_filepath(self, lowercase=True) -> Path:
         """Returns the filepath."""
-        kernel_directory = self.kernel_name
-        if lowercase:
-            kernel_directory = kernel_directory.lower()
-        filename = f"{self.device_name}.json"
-        if lowercase:
-            filename = filename.lower()
-        return self.bruteforced_caches_path / kernel_directory / filename
+        return get_bruteforced_cache_filepath(
+            self.bruteforced_caches_path, self.kernel_name, self.device_name, lowercase
+        )
 
     def get_valid_filepath(self) -> Path:
         """Returns the filepath to the Searchspace statistics .json file if it exists.
@@ -239,17 +287,7 @@ class SearchspaceStatistics:
         Returns:
             Filepath to the Searchspace statistics .json file.
         """
-        filepath = self._get_filepath()
-        if not filepath.exists():
-            filepath = self._get_filepath(lowercase=False)
-        if not filepath.exists():
-            # if the file is not found, raise an error
-            from os import getcwd
-
-            raise FileNotFoundError(
-                f"{filepath.resolve()} does not exist relative to current working directory {getcwd()}"
-            )
-        return filepath
+        return get_valid_bruteforced_cache_filepath(self.bruteforced_caches_path, self.kernel_name, self.device_name)
 
     def _is_not_invalid_value(self, value, performance: bool) -> bool:
         """Checks if a cache performance or time value is an array or is not invalid."""
@@ -277,7 +315,8 @@ class SearchspaceStatistics:
                     if len(list_to_sum) > 0 and self._is_not_invalid_value(sum(list_to_sum), performance)
                     else np.nan
                 )
-        assert all(isinstance(v, (int, float)) for v in values)
+        if validates("strict"):
+            assert all(isinstance(v, (int, float)) for v in values)
         return np.array(values)
 
     def _load(self) -> bool:
@@ -314,9 +353,10 @@ class SearchspaceStatistics:
                 assert self.objective_times[key].shape[0] == len(
                     cache_values
                 ), f"Should have the same size as cache_values ({self.size}), has {self.objective_times[key].shape[0]}"
-                assert not np.all(
-                    np.isnan(self.objective_times[key])
-                ), f"""All values for {key=} are NaN.
+                if validates("default"):
+                    assert not np.all(
+                        np.isnan(self.objective_times[key])
+                    ), f"""All values for {key=} are NaN.
                         Likely the experiment did not collect time values for objective_time_keys '{key}'."""
 
             # get the performance values per configuration
@@ -330,9 +370,10 @@ class SearchspaceStatistics:
                     cache_values
                 ), f"""Should have the same size as cache_values ({self.size}),
                         has {self.objective_performances[key].shape[0]}"""
-                assert not np.all(
-                    np.isnan(self.objective_performances[key])
-                ), f"""All values for {key=} are NaN.
+                if validates("default"):
+                    assert not np.all(
+                        np.isnan(self.objective_performances[key])
+                    ), f"""All values for {key=} are NaN.
                     Likely the experiment did not collect performance values for objective_performance_key '{key}'."""
 
             # get the number of repeats
@@ -353,16 +394,18 @@ class SearchspaceStatistics:
             self.objective_times_total = nansumwrapper(self.objective_times_array, axis=0)
             assert self.objective_times_total.shape == tuple([self.size])
             # more of a test than a necessary assert
-            assert (
-                np.nansum(self.objective_times_array[:, 0]) == self.objective_times_total[0]
-            ), f"""Sums of objective performances do not match:
+            if validates("strict"):
+                assert (
+                    np.nansum(self.objective_times_array[:, 0]) == self.objective_times_total[0]
+                ), f"""Sums of objective performances do not match:
                 {np.nansum(self.objective_times_array[:, 0])} vs. {self.objective_times_total[0]}"""
             self.objective_performances_total = nansumwrapper(self.objective_performances_array, axis=0)
             assert self.objective_performances_total.shape == tuple([self.size])
             # more of a test than a necessary assert
-            assert (
-                np.nansum(self.objective_performances_array[:, 0]) == self.objective_performances_total[0]
-            ), f"""Sums of objective performances do not match:
+            if validates("strict"):
+                assert (
+                    np.nansum(self.objective_performances_array[:, 0]) == self.objective_performances_total[0]
+                ), f"""Sums of objective performances do not match:
                 {np.nansum(self.objective_performances_array[:, 0])} vs. {self.objective_performances_total[0]}"""
 
             # sort
@@ -0,0 +1,69 @@
+"""Deterministic partitioning of the work of an experiment over the shards of a cluster array job."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+from argparse import ArgumentTypeError
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """Parse a shard of the form 'i/N', where 0 <= i < N.
+
+    Args:
+        shard: the shard as passed on the Command Line Interface, e.g. '0/4' for the first of four shards.
+
+    Raises:
+        ArgumentTypeError: if the shard is not of the form 'i/N' with 0 <= i < N.
+
+    Returns:
+        A tuple of the index of the shard and the number of shards.
+    """
+    try:
+        index, num_shards = (int(part) for part in shard.split("/"))
+    except ValueError as e:
+        raise ArgumentTypeError(f"Shard must be of the form 'i/N', is '{shard}'") from e
+    if num_shards < 1 or not 0 <= index < num_shards:
+        raise ArgumentTypeError(f"Shard index must be in [0, {num_shards}), is {index}")
+    return index, num_shards
+
+
+def split_repeats(repeats: int, num_chunks: int) -> list[range]:
+    """Split the repeats of a strategy into contiguous chunks that differ at most one repeat in size.
+
+    Args:
+        repeats: the number of repeats.
+        num_chunks: the maximum number of chunks, there are no more chunks than repeats.
+
+    Returns:
+        The list of ranges of repeats, in order.
+    """
+    num_chunks = max(min(num_chunks, repeats), 1)
+    chunk_size, remainder = divmod(repeats, num_chunks)
+    chunks = list()
+    start = 0
+    for chunk_index in range(num_chunks):
+        stop = start + chunk_size + (1 if chunk_index < remainder else 0)
+        chunks.append(range(start, stop))
+        start = stop
+    return chunks
+
+
+def partition(costs: list[float], num_shards: int) -> list[list[int]]:
+    """Partition work units over the shards by assigning the most costly unit first to the least loaded shard.
+
+    The partition only depends on the costs and their order, so each shard computes the same partition.
+
+    Args:
+        costs: the estimated cost of each work unit.
+        num_shards: the number of shards.
+
+    Returns:
+        A list with the indices of the work units per shard, in their original order.
+    """
+    shards: list[list[int]] = list(list() for _ in range(num_shards))
+    loads = [0.0] * num_shards
+    # ties are broken by the original order of the units and by the number of units on a shard
+    for unit_index in sorted(range(len(costs)), key=lambda index: -costs[index]):
+        shard_index = min(range(num_shards), key=lambda index: (loads[index], len(shards[index]), index))
+        shards[shard_index].append(unit_index)
+        loads[shard_index] += costs[unit_index]
+    return list(sorted(units) for units in shards)
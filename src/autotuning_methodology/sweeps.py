@@ -0,0 +1,81 @@
+"""Parameter sweeps that expand a strategy into a variant per combination of option values."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import re
+from copy import deepcopy
+from math import prod
+from random import Random
+
+sweep_types = ["cartesian", "random"]
+
+
+def get_sweep_combinations(sweep: dict) -> list[dict]:
+    """Get the combinations of option values of a sweep.
+
+    Args:
+        sweep: the sweep, with the values per option in "options", and optionally the "type" ("cartesian" or
+            "random"), the number of "samples" of a random sweep and the "seed" of its random sample.
+
+    Returns:
+        A list with a dictionary of option values per combination, in the order of the cartesian grid.
+    """
+    sweep_type: str = sweep.get("type", "cartesian")
+    assert sweep_type in sweep_types, f"Sweep type must be one of {sweep_types}, is {sweep_type}"
+    options: dict[str, list] = sweep["options"]
+    keys = list(options.keys())
+    num_values = list(len(options[key]) for key in keys)
+    num_combinations = prod(num_values)
+    indices = range(num_combinations)
+    if sweep_type == "random":
+        assert "samples" in sweep, "A random sweep must have the number of samples"
+        # the indices are sampled instead of the combinations, so that a large grid is never materialized
+        indices = sorted(Random(sweep.get("seed", 0)).sample(indices, min(sweep["samples"], num_combinations)))
+
+    combinations = list()
+    for index in indices:
+        # decode the index in the grid, with the last option varying fastest as in itertools.product
+        combination = dict()
+        for key, num in zip(reversed(keys), reversed(num_values)):
+            index, value_index = divmod(index, num)
+            combination[key] = options[key][value_index]
+        combinations.append(dict((key, combination[key]) for key in keys))
+    return combinations
+
+
+def set_option(options: dict, key: str, value):
+    """Set an option, where the keys of nested options are separated by dots, e.g. "methodparams.zeta"."""
+    *parents, name = key.split(".")
+    for parent in parents:
+        options = options.setdefault(parent, dict())
+    options[name] = value
+
+
+def expand_sweep(strategy: dict) -> list[dict]:
+    """Expand a strategy with a "sweep" into a strategy per combination of option values.
+
+    The name of each variant is the name of the strategy followed by the values of the combination, as in
+    "bayes_opt_ei_0.01_matern32", and the display name is followed by the options and their values.
+
+    Args:
+        strategy: the strategy, returned as is if it has no sweep.
+
+    Returns:
+        The list of variants of the strategy.
+    """
+    if "sweep" not in strategy:
+        return [strategy]
+    base = dict((key, value) for key, value in strategy.items() if key != "sweep")
+    variants = list()
+    for combination in get_sweep_combinations(strategy["sweep"]):
+        variant = deepcopy(base)
+        if "options" not in variant:
+            variant["options"] = dict()
+        for key, value in combination.items():
+            set_option(variant["options"], key, value)
+        suffix = "_".join(str(value) for value in combination.values())
+        variant["name"] = re.sub(r"[^\w.\-]", "_", f"{base['name']}_{suffix}")
+        description = ", ".join(f"{key.split('.')[-1]}={value}" for key, value in combination.items())
+        variant["display_name"] = f"{base.get('display_name', base['name'])} ({description})"
+        variants.append(variant)
+    return variants
@@ -1,5 +1,8 @@
 """Module containing various checks for validity."""
 
+import contextlib
+from argparse import ArgumentParser, Namespace
+
 import numpy as np
 
 error_types_strings = ["", "InvalidConfig", "CompilationFailedConfig", "RuntimeFailedConfig"]
@@ -50,3 +53,83 @@ def is_valid_config_result(config: dict) -> bool:
          True if the ``config`` is valid, False otherwise.
     """
     return "invalidity" in config and config["invalidity"] == "correct"
+
+
+# the validation levels from least to most checks:
+#   "fast" skips all optional checks,
+#   "default" runs the checks that are cheap relative to the computation they guard,
+#   "strict" also runs the expensive checks, such as sortedness and membership of whole arrays, as in the tests
+validation_levels = ("fast", "default", "strict")
+_level = "default"
+
+
+def get_validation_level() -> str:
+    """Get the active validation level."""
+    return _level
+
+
+def set_validation_level(level: str) -> str:
+    """Set the validation level of the package.
+
+    Args:
+        level: the validation level, one of ``validation_levels``.
+
+    Raises:
+        ValueError: if the validation level is unknown.
+
+    Returns:
+        The previous validation level.
+    """
+    global _level
+    if level not in validation_levels:
+        raise ValueError(f"Unknown validation level '{level}', must be one of {validation_levels}")
+    previous_level = _level
+    _level = level
+    return previous_level
+
+
+def validates(level: str) -> bool:
+    """Whether the checks of a validation level are run at the active validation level.
+
+    Args:
+        level: the validation level of the checks, "default" or "strict".
+
+    Returns:
+        True if the active validation level is at least ``level``.
+    """
+    return validation_levels.index(_level) >= validation_levels.index(level)
+
+
+@contextlib.contextmanager
+def validation_level(level: str):
+    """Set the validation level in a context, restoring the previous validation level at the end.
+
+    Args:
+        level: the validation level, one of ``validation_levels``.
+    """
+    previous_level = set_validation_level(level)
+    try:
+        yield
+    finally:
+        set_validation_level(previous_level)
+
+
+def add_validation_arguments(CLI: ArgumentParser):
+    """Add the validation level argument to a Command Line Interface.
+
+    Args:
+        CLI: the ``ArgumentParser`` to add the argument to.
+    """
+    CLI.add_argument(
+        "--validation",
+        choices=validation_levels,
+        default=None,
+        help="The level of the runtime checks: 'fast' skips them, 'strict' also runs the expensive checks "
+        "(default: 'default')",
+    )
+
+
+def set_validation_level_from_args(args: Namespace):
+    """Set the validation level from the parsed validation argument of a Command Line Interface, if given."""
+    if args.validation is not None:
+        set_validation_level(args.validation)
@@ -2,14 +2,15 @@
 
 from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
 
+import os
 import warnings
+from argparse import ArgumentParser, Namespace
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.cm import get_cmap
-from matplotlib.colors import rgb2hex
 
 from autotuning_methodology.baseline import (
     Baseline,
@@ -17,9 +18,25 @@ from autotuning_methodology.baseline import (
     RandomSearchCalculatedBaseline,
     RandomSearchSimulatedBaseline,
 )
-from autotuning_methodology.curves import Curve, CurveBasis, StochasticOptimizationAlgorithm
-from autotuning_methodology.experiments import execute_experiment, get_args_from_cli
+from autotuning_methodology.caching import ResultsDescription
+from autotuning_methodology.curves import Curve, CurveBasis, StochasticOptimizationAlgorithm, compute_memoized_curves
+from autotuning_methodology.experiments import execute_experiment
+from autotuning_methodology.instrumentation import (
+    add_instrumentation_arguments,
+    instrumented,
+    recording_from_args,
+    span,
+)
+from autotuning_methodology.scoring import aggregate_strategies_performance, get_ranges, get_strategies_performance
 from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
+from autotuning_methodology.validators import (
+    add_validation_arguments,
+    get_validation_level,
+    set_validation_level_from_args,
+)
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 # The kernel information per device and device information for visualization purposes
 marker_variatons = ["v", "s", "*", "1", "2", "d", "P", "X"]
@@ -30,6 +47,10 @@ objective_time_keys_values = ["compilation", "benchmark", "framework", "search_a
 
 def get_colors(strategies: list[dict], scale_margin_left=0.4, scale_margin_right=0.15):
     """Function to get the colors for each of the strategies."""
+    import matplotlib.pyplot as plt
+    from matplotlib.cm import get_cmap
+    from matplotlib.colors import rgb2hex
+
     default_colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
     main_colors = ["Blues", "Greens", "Reds", "Purples", "Greys"]
     main_color_counter = 0
@@ -132,6 +153,9 @@ class Visualize:
         continue_after_comparison=False,
         compare_extra_baselines=False,
         use_strategy_as_baseline=None,
+        persist_curves=True,
+        parallel_workers: Optional[int] = None,
+        block_rows: Optional[int] = None,
     ) -> None:
         """Initialization method for the Visualize class.
 
@@ -142,10 +166,18 @@ class Visualize:
             continue_after_comparison: whether to continue plotting after processing comparisons. Defaults to False.
             compare_extra_baselines: whether to include additional baselines for comparison. Defaults to False.
             use_strategy_as_baseline: whether to use an executed strategy as the baseline. WARNING: likely destroys comparability. Defaults to None.
+            persist_curves: whether to persist the computed curves next to the cached results, so that plotting the
+                same results again does not compute the curves again. Defaults to True.
+            parallel_workers: the number of processes to compute the curves on before plotting. Defaults to None, using
+                the number of CPUs.
+            block_rows: the number of function evaluations to compute the curves over at a time, from memory-mapped
+                results, for results too large to fit in memory, see ``Curve``. Defaults to None, computing in memory.
 
         Raises:
             ValueError: on various invalid inputs.
         """
+        import matplotlib.pyplot as plt
+
         # # silently execute the experiment
         # with warnings.catch_warnings():
         #     warnings.simplefilter("ignore")
@@ -166,8 +198,6 @@ class Visualize:
 
         # settings
         self.minimization: bool = self.experiment.get("minimization", True)
-        cutoff_percentile: float = self.experiment["cutoff_percentile"]
-        cutoff_percentile_start: float = self.experiment.get("cutoff_percentile_start", 0.01)
         cutoff_type: str = self.experiment.get("cutoff_type", "fevals")
         assert cutoff_type == "fevals" or cutoff_type == "time", f"cutoff_type != 'fevals' or 'time', is {cutoff_type}"
         time_resolution: float = self.experiment.get("resolution", 1e4)
@@ -184,6 +214,9 @@ class Visualize:
         compare_baselines: bool = plot_settings.get("compare_baselines", False)
         compare_split_times: bool = plot_settings.get("compare_split_times", False)
         confidence_level: float = plot_settings.get("confidence_level", 0.95)
+        time_curve_method: str = plot_settings.get("time_curve_method", "isotonic")
+        time_interval_method: str = plot_settings.get("time_interval_method", "bagging")
+        StochasticOptimizationAlgorithm.check_time_methods(time_curve_method, time_interval_method, block_rows)
         self.colors = get_colors(
             self.strategies,
             scale_margin_left=plot_settings.get("color_parent_scale_margin_left", 0.4),
@@ -193,23 +226,20 @@ class Visualize:
         if use_strategy_as_baseline is not None:
             self.plot_skip_strategies.append(use_strategy_as_baseline)
 
-        # visualize
-        aggregation_data: list[tuple[Baseline, list[Curve], SearchspaceStatistics, np.ndarray]] = list()
+        # load the searchspaces and the cached strategy results as curves
+        searchspaces: dict[tuple[str, str], tuple] = dict()
         for gpu_name in self.experiment["GPUs"]:
             for kernel_name in self.experiment["kernels"]:
-                print(f" | visualizing optimization of {kernel_name} for {gpu_name}")
-                title = f"{kernel_name} on {gpu_name}"
-                title = title.replace("_", " ")
-
                 # get the statistics
-                searchspace_stats = SearchspaceStatistics(
-                    kernel_name=kernel_name,
-                    device_name=gpu_name,
-                    minimization=self.minimization,
-                    objective_time_keys=objective_time_keys,
-                    objective_performance_keys=objective_performance_keys,
-                    bruteforced_caches_path=experiment_folderpath / self.experiment["bruteforced_caches_path"],
-                )
+                with span("visualize.load_searchspace", gpu=gpu_name, kernel=kernel_name):
+                    searchspace_stats = SearchspaceStatistics(
+                        kernel_name=kernel_name,
+                        device_name=gpu_name,
+                        minimization=self.minimization,
+                        objective_time_keys=objective_time_keys,
+                        objective_performance_keys=objective_performance_keys,
+                        bruteforced_caches_path=experiment_folderpath / self.experiment["bruteforced_caches_path"],
+                    )
 
                 # get the cached strategy results as curves
                 strategies_curves: list[Curve] = list()
@@ -221,7 +251,11 @@ class Visualize:
                             f"""Strategy {strategy['display_name']} not in results_description,
                                 make sure execute_experiment() has ran first"""
                         )
-                    curve = StochasticOptimizationAlgorithm(results_description)
+                    curve = StochasticOptimizationAlgorithm(results_description, block_rows=block_rows)
+                    curve.time_curve_method = time_curve_method
+                    curve.time_interval_method = time_interval_method
+                    if persist_curves:
+                        curve.persist_memo(results_description)
                     strategies_curves.append(curve)
                     if use_strategy_as_baseline is not None and strategy["name"] == use_strategy_as_baseline:
                         baseline_executed_strategy = curve
@@ -229,16 +263,43 @@ class Visualize:
                     raise ValueError(f"Could not find '{use_strategy_as_baseline}' in executed strategies")
 
                 # set the x-axis range
-                _, cutoff_point_fevals, cutoff_point_time = searchspace_stats.cutoff_point_fevals_time(
-                    cutoff_percentile
+                fevals_range, time_range = get_ranges(self.experiment, searchspace_stats)
+                searchspaces[(gpu_name, kernel_name)] = (
+                    searchspace_stats,
+                    strategies_curves,
+                    baseline_executed_strategy,
+                    fevals_range,
+                    time_range,
                 )
-                _, cutoff_point_fevals_start, cutoff_point_time_start = searchspace_stats.cutoff_point_fevals_time(
-                    cutoff_percentile_start
+
+        # compute the curves that will be plotted up front, as these are independent they are computed in parallel
+        if continue_after_comparison or not (compare_baselines or compare_split_times):
+            x_types = set()
+            if any(y_type != "scatter" for y_type in plot_y_value_types):
+                x_types.update(x_type for x_type in plot_x_value_types if x_type != "aggregated")
+            if "aggregated" in plot_x_value_types:
+                x_types.add("time")
+            curves_jobs = list()
+            for (gpu_name, kernel_name), searchspace in searchspaces.items():
+                searchspace_stats, strategies_curves, _, fevals_range, time_range = searchspace
+                dist = searchspace_stats.objective_performances_total_sorted
+                for strategy, curve in zip(self.strategies, strategies_curves):
+                    results_description = self.results_descriptions[gpu_name][kernel_name][strategy["name"]]
+                    for x_type in sorted(x_types):
+                        x_axis_range = fevals_range if x_type == "fevals" else time_range
+                        curves_jobs.append((curve, results_description, (x_axis_range, x_type, dist, confidence_level)))
+            self.compute_curves(curves_jobs, parallel_workers)
+
+        # visualize
+        aggregation_data: list[tuple[Baseline, list[Curve], SearchspaceStatistics, np.ndarray]] = list()
+        for gpu_name in self.experiment["GPUs"]:
+            for kernel_name in self.experiment["kernels"]:
+                print(f" | visualizing optimization of {kernel_name} for {gpu_name}")
+                title = f"{kernel_name} on {gpu_name}"
+                title = title.replace("_", " ")
+                searchspace_stats, strategies_curves, baseline_executed_strategy, fevals_range, time_range = (
+                    searchspaces[(gpu_name, kernel_name)]
                 )
-                fevals_range = np.arange(start=cutoff_point_fevals_start, stop=cutoff_point_fevals)
-                time_range = np.linspace(start=cutoff_point_time_start, stop=cutoff_point_time, num=time_resolution)
-                # baseline_time_interpolated = np.linspace(mean_feval_time, cutoff_point_time, time_resolution)
-                # baseline = get_random_curve(cutoff_point_fevals, sorted_times, time_resolution)
 
                 # compare baselines
                 if compare_baselines is True:
@@ -283,13 +344,14 @@ class Visualize:
                     continue
 
                 # get the random baseline
-                random_baseline = (
-                    RandomSearchCalculatedBaseline(searchspace_stats)
-                    if baseline_executed_strategy is None
-                    else ExecutedStrategyBaseline(
-                        searchspace_stats, strategy=baseline_executed_strategy, confidence_level=confidence_level
+                with span("visualize.baseline", gpu=gpu_name, kernel=kernel_name):
+                    random_baseline = (
+                        RandomSearchCalculatedBaseline(searchspace_stats)
+                        if baseline_executed_strategy is None
+                        else ExecutedStrategyBaseline(
+                            searchspace_stats, strategy=baseline_executed_strategy, confidence_level=confidence_level
+                        )
                     )
-                )
 
                 # set additional baselines for comparison
                 baselines_extra: list[Baseline] = []
@@ -361,7 +423,8 @@ class Visualize:
                     if save_figs:
                         filename = f"{self.plot_filename_prefix}{title}_{x_type}"
                         filename = filename.replace(" ", "_")
-                        fig.savefig(filename, dpi=300)
+                        with span("visualize.savefig", filename=filename):
+                            fig.savefig(filename, dpi=300)
                         print(f"Figure saved to {filename}")
                     else:
                         plt.show()
@@ -389,11 +452,80 @@ class Visualize:
             if save_figs:
                 filename = f"{self.plot_filename_prefix}aggregated"
                 filename = filename.replace(" ", "_")
-                fig.savefig(filename, dpi=300)
+                with span("visualize.savefig", filename=filename):
+                    fig.savefig(filename, dpi=300)
                 print(f"Figure saved to {filename}")
             else:
                 plt.show()
 
+        # write the curves that were memoized while plotting
+        for _, strategies_curves, *_ in searchspaces.values():
+            for curve in strategies_curves:
+                curve.write_memo()
+
+    def compute_curves(
+        self,
+        curves_jobs: list[tuple[Curve, ResultsDescription, tuple[np.ndarray, str, np.ndarray, float]]],
+        parallel_workers: Optional[int] = None,
+    ):
+        """Compute the curves that are not memoized yet in parallel processes, for plotting to use the memoized curves.
+
+        Each job is a curve, the description of its results and the arguments of ``get_curve``. The jobs are
+        independent and computed in worker processes that load the results, returning only the computed curves. The
+        bootstraps of a curve are fitted on its ``bootstrap_n_jobs`` threads in each process, at most the number of
+        CPUs per process. Curves that are not memoized, such as those without a ``bootstrap_seed``, can not be handed
+        back, so they are computed serially when plotting. The persisted curves are written once per curve when all
+        jobs are done.
+
+        Args:
+            curves_jobs: the jobs of the curves to compute.
+            parallel_workers: the number of processes to compute the curves on. Defaults to None, the number of CPUs.
+        """
+        num_unmemoized = sum(1 for curve, _, job in curves_jobs if curve.get_memo_key(*job) is None)
+        if num_unmemoized > 0:
+            warnings.warn(
+                f"{num_unmemoized} curves are not memoized, for example without a bootstrap_seed, "
+                "these are computed serially when plotting"
+            )
+        curves_jobs = list(
+            (curve, results_description, job)
+            for curve, results_description, job in curves_jobs
+            if curve.get_memo_key(*job) is not None and curve.get_memo_key(*job) not in curve._memo
+        )
+        if parallel_workers is None:
+            parallel_workers = os.cpu_count() or 1
+        parallel_workers = min(parallel_workers, len(curves_jobs))
+        with span("visualize.compute_curves", jobs=len(curves_jobs), workers=parallel_workers):
+            if parallel_workers <= 1:
+                for curve, _, (range, x_type, dist, confidence_level) in curves_jobs:
+                    curve.get_curve(range, x_type, dist=dist, confidence_level=confidence_level)
+            else:
+                futures = dict()
+                max_bootstrap_n_jobs = max((os.cpu_count() or 1) // parallel_workers, 1)
+                with ProcessPoolExecutor(max_workers=parallel_workers) as executor:
+                    for curve, results_description, (range, x_type, dist, confidence_level) in curves_jobs:
+                        # results kept in memory can not be loaded by a worker process, so these are computed here
+                        if results_description.visualization_caches_path is None:
+                            curve.get_curve(range, x_type, dist=dist, confidence_level=confidence_level)
+                            continue
+                        job = (range, x_type, dist, confidence_level)
+                        future = executor.submit(
+                            compute_memoized_curves,
+                            results_description,
+                            [job],
+                            curve.bootstrap_seed,
+                            get_validation_level(),
+                            curve.block_rows,
+                            curve.time_curve_method,
+                            curve.time_interval_method,
+                            min(curve.bootstrap_n_jobs, max_bootstrap_n_jobs),
+                        )
+                        futures[future] = curve
+                    for future in as_completed(futures):
+                        futures[future].update_memo(future.result())
+            for curve in dict((id(curve), curve) for curve, *_ in curves_jobs).values():
+                curve.write_memo()
+
     def plot_baselines_comparison(
         self,
         time_range: np.ndarray,
@@ -417,6 +549,8 @@ class Visualize:
             strategies_curves: the strategy curves to draw in the plot. Defaults to list().
             save_fig: whether to save the resulting figure to file. Defaults to False.
         """
+        import matplotlib.pyplot as plt
+
         dist = searchspace_stats.objective_performances_total_sorted
         plt.figure(figsize=(8, 5), dpi=300)
 
@@ -505,6 +639,8 @@ class Visualize:
         Raises:
             ValueError: on unexpected strategies curve instance.
         """
+        import matplotlib.pyplot as plt
+
         # list the baselines to test
         baselines: list[Baseline] = list()
         # baselines.append(
@@ -593,6 +729,8 @@ class Visualize:
             print_skip: list of ``time_keys`` to be skipped in the printed table. Defaults to ["verification_time"].
             save_fig: whether to save the resulting figure to file. Defaults to False.
         """
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots(dpi=200)
         width = 0.5
         strategy_labels = list()
@@ -676,6 +814,7 @@ class Visualize:
         else:
             plt.show()
 
+    @instrumented("visualize.plot_strategies")
     def plot_strategies(
         self,
         x_type: str,
@@ -878,6 +1017,7 @@ class Visualize:
         elif y_type == "baseline":
             ax.set_ylim((min(-normalized_ylim_margin, ylim_min - normalized_ylim_margin), 1 + normalized_ylim_margin))
 
+    @instrumented("visualize.get_strategies_aggregated_performance")
     def get_strategies_aggregated_performance(
         self,
         aggregation_data: list[tuple[Baseline, list[Curve], SearchspaceStatistics, np.ndarray]],
@@ -892,73 +1032,7 @@ class Visualize:
         Returns:
             The aggregated relative performances of each strategy.
         """
-        # for each strategy, collect the relative performance in each search space
-        strategies_performance = [list() for _ in aggregation_data[0][1]]
-        strategies_performance_lower_err = [list() for _ in aggregation_data[0][1]]
-        strategies_performance_upper_err = [list() for _ in aggregation_data[0][1]]
-        strategies_performance_real_stopping_point_fraction = [list() for _ in range(len(aggregation_data[0][1]))]
-        for random_baseline, strategies_curves, searchspace_stats, time_range in aggregation_data:
-            dist = searchspace_stats.objective_performances_total_sorted
-            for strategy_index, strategy_curve in enumerate(strategies_curves):
-                # get the real and fictional performance curves
-                (
-                    real_stopping_point_index,
-                    x_axis_range_real,
-                    curve_real,
-                    curve_lower_err_real,
-                    curve_upper_err_real,
-                    x_axis_range_fictional,
-                    curve_fictional,
-                    curve_lower_err_fictional,
-                    curve_upper_err_fictional,
-                ) = strategy_curve.get_curve_over_time(time_range, dist=dist, confidence_level=confidence_level)
-                # combine the real and fictional parts to get the full curve
-                combine = x_axis_range_fictional.ndim > 0
-                x_axis_range = (
-                    np.concatenate([x_axis_range_real, x_axis_range_fictional]) if combine else x_axis_range_real
-                )
-                assert np.array_equal(time_range, x_axis_range, equal_nan=True), "time_range != x_axis_range"
-                curve = np.concatenate([curve_real, curve_fictional]) if combine else curve_real
-                curve_lower_err = (
-                    np.concatenate([curve_lower_err_real, curve_lower_err_fictional])
-                    if combine
-                    else curve_lower_err_real
-                )
-                curve_upper_err = (
-                    np.concatenate([curve_upper_err_real, curve_upper_err_fictional])
-                    if combine
-                    else curve_upper_err_real
-                )
-                # get the standardised curves and write them to the collector
-                curve, curve_lower_err, curve_upper_err = random_baseline.get_standardised_curves(
-                    time_range, [curve, curve_lower_err, curve_upper_err], x_type="time"
-                )
-                strategies_performance[strategy_index].append(curve)
-                strategies_performance_lower_err[strategy_index].append(curve_lower_err)
-                strategies_performance_upper_err[strategy_index].append(curve_upper_err)
-                strategies_performance_real_stopping_point_fraction[strategy_index].append(
-                    real_stopping_point_index / x_axis_range.shape[0]
-                )
-
-        # for each strategy, get the mean performance per step in time_range
-        strategies_aggregated_performance: list[np.ndarray] = list()
-        strategies_aggregated_lower_err: list[np.ndarray] = list()
-        strategies_aggregated_upper_err: list[np.ndarray] = list()
-        strategies_aggregated_real_stopping_point_fraction: list[float] = list()
-        for index in range(len(strategies_performance)):
-            strategies_aggregated_performance.append(np.mean(np.array(strategies_performance[index]), axis=0))
-            strategies_aggregated_lower_err.append(np.mean(np.array(strategies_performance_lower_err[index]), axis=0))
-            strategies_aggregated_upper_err.append(np.mean(np.array(strategies_performance_upper_err[index]), axis=0))
-            strategies_aggregated_real_stopping_point_fraction.append(
-                np.median(strategies_performance_real_stopping_point_fraction[index])
-            )
-
-        return (
-            strategies_aggregated_performance,
-            strategies_aggregated_lower_err,
-            strategies_aggregated_upper_err,
-            strategies_aggregated_real_stopping_point_fraction,
-        )
+        return aggregate_strategies_performance(*get_strategies_performance(aggregation_data, confidence_level))
 
     def plot_strategies_aggregated(
         self,
@@ -1111,6 +1185,43 @@ def is_ran_as_notebook() -> bool:  # pragma: no cover
         return False  # Probably standard Python interpreter
 
 
+def get_visualize_args_from_cli(args=None) -> Namespace:
+    """Set the Command Line Interface arguments definitions, get and return the argument values.
+
+    Args:
+        args: optional list of arguments for testing without CLI interaction. Defaults to None.
+
+    Raises:
+        ValueError: on invalid argument.
+
+    Returns:
+        The parsed arguments.
+    """
+    CLI = ArgumentParser()
+    CLI.add_argument("experiment", type=str, help="The experiment.json to visualize, see experiments/template.json")
+    CLI.add_argument(
+        "--parallel-workers",
+        type=int,
+        default=None,
+        help="The number of processes to compute the curves on (default: the number of CPUs)",
+    )
+    CLI.add_argument(
+        "--block-rows",
+        type=int,
+        default=None,
+        help="The number of function evaluations to compute the curves over at a time, for results too large in "
+        + "memory, approximating the isotonic curves over time with the values pooled in time bins",
+    )
+    add_instrumentation_arguments(CLI)
+    add_validation_arguments(CLI)
+    args = CLI.parse_args(args)
+    if args.experiment is None or args.experiment == "":
+        raise ValueError(
+            "Invalid '-experiment' option. Run 'visualize_experiments.py -h' to read more about the options."
+        )
+    return args
+
+
 def entry_point():  #  pragma: no cover
     """Entry point function for Visualization."""
     is_notebook = is_ran_as_notebook()
@@ -1120,13 +1231,20 @@ def entry_point():  #  pragma: no cover
 
         os.chdir("../")
         print(os.getcwd())
-        experiment_filepath = "test_random_calculated"
-        # experiment_filepath = "methodology_paper_example"
+        args = get_visualize_args_from_cli(["test_random_calculated"])
+        # args = get_visualize_args_from_cli(["methodology_paper_example"])
         # %matplotlib widget    # IPython magic line that sets matplotlib to widget backend for interactive
     else:
-        experiment_filepath = get_args_from_cli()
-
-    Visualize(experiment_filepath, save_figs=not is_notebook)
+        args = get_visualize_args_from_cli()
+
+    set_validation_level_from_args(args)
+    with recording_from_args(args):
+        Visualize(
+            args.experiment,
+            save_figs=not is_notebook,
+            parallel_workers=args.parallel_workers,
+            block_rows=args.block_rows,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""Long-lived tuning worker processes that keep kernel modules and Kernel Tuner setup resident between runs."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from copy import copy
+from importlib import import_module
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Optional
+
+# state of the worker process, set by the initializer
+_worker_kernel = None
+_worker_kernels: dict[tuple[int, str], object] = dict()
+_worker_output_dir: Optional[tuple[int, Path]] = None
+_kernel_tuner_setup_memoized = False
+_worker_statistics = {"jobs": 0, "read_cache_parsed": 0, "read_cache_reused": 0, "searchspace_built": 0}
+_read_cache_memo: dict[tuple, dict] = dict()
+_searchspace_memo: dict[str, object] = dict()
+_dependencies_memo: dict[str, object] = dict()
+
+
+def copy_searchspace(searchspace):
+    """Copy a Kernel Tuner ``Searchspace`` with its own lists, dictionaries and arrays.
+
+    The configurations themselves are tuples and are shared, so the copy is cheap compared to building the searchspace
+    again, while the caches that a run adds to its searchspace, such as the neighbors, are not seen by other runs.
+    """
+    searchspace_copy = copy(searchspace)
+    for name, value in vars(searchspace).items():
+        if hasattr(value, "copy"):
+            setattr(searchspace_copy, name, value.copy())
+    return searchspace_copy
+
+
+@contextmanager
+def memoized_kernel_tuner_setup():
+    """Replace the setup steps of Kernel Tuner that are repeated in every tuning run by memoized versions in a context.
+
+    Parsing of the cachefile is reused as long as its contents do not change, the searchspace is built once per tunable
+    parameters and restrictions and copied for each run (see ``copy_searchspace``), and the dependencies written to the
+    metadata are only looked up once. The cachefile is only read, which is valid as worker processes only tune in
+    simulation mode. The memoized results are kept for the process, the original functions are restored at the end of
+    the context.
+    """
+    global _kernel_tuner_setup_memoized
+    if _kernel_tuner_setup_memoized:
+        yield
+        return
+
+    import kernel_tuner.file_utils
+    import kernel_tuner.interface
+    import kernel_tuner.util
+
+    original_read_cache = kernel_tuner.util.read_cache
+    original_searchspace = kernel_tuner.interface.Searchspace
+    original_get_dependencies = kernel_tuner.file_utils.get_dependencies
+
+    def read_cache(cache, open_cache=True):
+        # the cachefile is never opened for appending, as tuning is simulated and stores no new entries, so that
+        # workers tuning the same kernel concurrently do not race on rewriting the shared cachefile
+        filestr: str = kernel_tuner.util.correct_open_cache(cache, open_cache=False)
+        key = (str(Path(cache).resolve()), hashlib.sha1(filestr.encode()).hexdigest())
+        cached_data = _read_cache_memo.get(key)
+        if cached_data is None:
+            cached_data = original_read_cache(cache, open_cache=False)
+            _worker_statistics["read_cache_parsed"] += 1
+            _read_cache_memo.clear()
+            _read_cache_memo[key] = cached_data
+        else:
+            _worker_statistics["read_cache_reused"] += 1
+        # the cache mapping is copied as Kernel Tuner adds newly evaluated configurations to it
+        return dict(cached_data, cache=dict(cached_data["cache"]))
+
+    def searchspace(tune_params: dict, restrictions, max_threads: int, **kwargs):
+        key = repr((tune_params, restrictions, max_threads, sorted(kwargs.items())))
+        if key not in _searchspace_memo:
+            _searchspace_memo[key] = original_searchspace(tune_params, restrictions, max_threads, **kwargs)
+            _worker_statistics["searchspace_built"] += 1
+        return copy_searchspace(_searchspace_memo[key])
+
+    def get_dependencies(package="kernel_tuner"):
+        if package not in _dependencies_memo:
+            _dependencies_memo[package] = original_get_dependencies(package)
+        return _dependencies_memo[package]
+
+    kernel_tuner.util.read_cache = read_cache
+    kernel_tuner.interface.Searchspace = searchspace
+    kernel_tuner.file_utils.get_dependencies = get_dependencies
+    _kernel_tuner_setup_memoized = True
+    try:
+        yield
+    finally:
+        kernel_tuner.util.read_cache = original_read_cache
+        kernel_tuner.interface.Searchspace = original_searchspace
+        kernel_tuner.file_utils.get_dependencies = original_get_dependencies
+        _kernel_tuner_setup_memoized = False
+
+
+def get_worker_output_dir() -> Path:
+    """Get the temporary directory of the output files of the current process, removed when the process exits.
+
+    A process forked from a process with a directory gets its own directory, as the finalizer of the parent directory
+    only runs in the parent.
+    """
+    global _worker_output_dir
+    if _worker_output_dir is None or _worker_output_dir[0] != os.getpid():
+        output_dir = Path(tempfile.mkdtemp(prefix="autotuning_methodology_worker_"))
+        Finalize(None, shutil.rmtree, args=(output_dir,), kwargs=dict(ignore_errors=True), exitpriority=0)
+        _worker_output_dir = (os.getpid(), output_dir)
+    return _worker_output_dir[1]
+
+
+def import_isolated_kernel(kernels_path: str, kernel_name: str):
+    """Import a kernel module in a worker process, with output files in a temporary directory of the process.
+
+    Tune with the kernel within ``memoized_kernel_tuner_setup`` to reuse the Kernel Tuner setup between runs. As each
+    process writes its own output files, processes tuning the same kernel at the same time do not overwrite each
+    other's results, and the files are removed when the process exits (see ``get_worker_output_dir``) instead of
+    accumulating next to the kernel.
+
+    Args:
+        kernels_path: the path to the directory with the kernel modules.
+        kernel_name: the name of the kernel module.
+
+    Returns:
+        The imported kernel module.
+    """
+    # the kernels are kept per process, as a forked process inherits the kernel modules with the output files of its
+    # parent
+    key = (os.getpid(), kernel_name)
+    if key not in _worker_kernels:
+        if kernels_path not in sys.path:
+            sys.path.append(kernels_path)
+        kernel = import_module(kernel_name)
+        output_dir = get_worker_output_dir()
+        for attribute in ["file_path_results", "file_path_metadata"]:
+            setattr(kernel, attribute, str(output_dir / Path(getattr(kernel, attribute)).name))
+        _worker_kernels[key] = kernel
+    return _worker_kernels[key]
+
+
+def _initialize_worker(kernels_path: str, kernel_name: str):
+    """Initialize a worker process by importing the kernel module once."""
+    global _worker_kernel
+    _worker_kernel = import_isolated_kernel(kernels_path, kernel_name)
+
+
+def run_strategy_in_worker(
+    kernels_path: str,
+    kernel_name: str,
+    strategy: dict,
+    results_description,
+    searchspace_stats=None,
+    profile_dir: Optional[Path] = None,
+    profile_clock="cpu",
+    repeats: Optional[range] = None,
+) -> list[list[dict]]:
+    """Execute the repeats of a strategy in a worker process, see ``runner.run_strategy``.
+
+    Args:
+        kernels_path: the path to the directory with the kernel modules.
+        kernel_name: the name of the kernel module.
+        strategy: the optimization algorithm to optimize with.
+        results_description: the ``ResultsDescription`` object describing the results.
+        searchspace_stats: the ``SearchspaceStatistics`` object, only used for conversion of imported runs.
+        profile_dir: the directory to write a profile of the strategy to. Defaults to None, not profiling.
+        profile_clock: whether to profile CPU time ("cpu") or wall time ("wall"). Defaults to "cpu".
+        repeats: the range of repeats to execute. Defaults to None, executing all repeats of the strategy.
+
+    Returns:
+        The list of the results of each repeat.
+    """
+    from autotuning_methodology.profiling import Profiler
+    from autotuning_methodology.runner import run_strategy
+
+    kernel = import_isolated_kernel(kernels_path, kernel_name)
+    profiler = Profiler(profile_dir, profile_clock) if profile_dir is not None else None
+    _worker_statistics["jobs"] += 1
+    with memoized_kernel_tuner_setup():
+        return run_strategy(kernel, strategy, results_description, searchspace_stats, profiler, repeats=repeats)
+
+
+def _run_job(run_number: int, kernel_name: str, device_name: str, strategy: dict, tune_options: dict) -> tuple:
+    """Execute a single run of a strategy in the worker process."""
+    from autotuning_methodology.runner import tune
+
+    _worker_statistics["jobs"] += 1
+    with memoized_kernel_tuner_setup():
+        return tune(run_number, _worker_kernel, kernel_name, device_name, strategy, tune_options, None, None)
+
+
+def _get_statistics() -> dict:
+    """Get the statistics of the worker process."""
+    return dict(_worker_statistics, pid=os.getpid())
+
+
+class TuningWorkerPool:
+    """A pool of long-lived worker processes, one per (kernel, device), that each take tuning runs as jobs.
+
+    A worker imports its kernel module and memoizes the Kernel Tuner setup once, so that the setup cost is paid once
+    per searchspace instead of once per run. Jobs are queued per worker and executed in the order submitted.
+    """
+
+    def __init__(self, kernels_path: Path) -> None:
+        """Initialization method for the TuningWorkerPool object.
+
+        Args:
+            kernels_path: the path to the directory with the kernel modules.
+        """
+        self.kernels_path = str(Path(kernels_path).resolve())
+        self.workers: dict[tuple[str, str], ProcessPoolExecutor] = dict()
+
+    def get_worker(self, kernel_name: str, device_name: str) -> ProcessPoolExecutor:
+        """Get the worker of a kernel and device, starting it if it does not exist yet.
+
+        Args:
+            kernel_name: the name of the kernel module.
+            device_name: the name of the device (GPU).
+
+        Returns:
+            The worker as a single-process ``ProcessPoolExecutor``.
+        """
+        key = (kernel_name, device_name)
+        if key not in self.workers:
+            self.workers[key] = ProcessPoolExecutor(
+                max_workers=1, initializer=_initialize_worker, initargs=(self.kernels_path, kernel_name)
+            )
+        return self.workers[key]
+
+    def submit(self, run_number: int, kernel_name: str, device_name: str, strategy: dict, tune_options: dict) -> Future:
+        """Submit a run of a strategy to the worker of the kernel and device.
+
+        Args:
+            run_number: the run number (only relevant when importing).
+            kernel_name: the name of the kernel module.
+            device_name: the device (GPU) to tune on.
+            strategy: the optimization algorithm to optimize with.
+            tune_options: a special options dictionary passed along to the autotuning framework.
+
+        Returns:
+            A ``Future`` of the metadata, the results, and the total runtime in miliseconds, as returned by ``tune``.
+        """
+        worker = self.get_worker(kernel_name, device_name)
+        return worker.submit(_run_job, run_number, kernel_name, device_name, strategy, tune_options)
+
+    def get_statistics(self, kernel_name: str, device_name: str) -> dict:
+        """Get the statistics of the worker of a kernel and device, such as the number of reused cachefile parses.
+
+        Args:
+            kernel_name: the name of the kernel module.
+            device_name: the name of the device (GPU).
+
+        Returns:
+            A dictionary of statistics.
+        """
+        return self.get_worker(kernel_name, device_name).submit(_get_statistics).result()
+
+    def shutdown(self):
+        """Stop all workers after their queued jobs have finished, which removes their output files."""
+        for worker in self.workers.values():
+            worker.shutdown(wait=True)
+        self.workers = dict()
+
+    def __enter__(self):
+        """Use the pool in a context, shutting the workers down at the end."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop all workers at the end of the context."""
+        self.shutdown()
+        return False
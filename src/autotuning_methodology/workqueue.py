@@ -0,0 +1,226 @@
+"""Work queue on a shared filesystem, from which any number of workers on any number of nodes claim tasks."""
+
+from __future__ import annotations  # for correct nested type hints e.g. list[str], tuple[dict, str]
+
+import contextlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+queue_states = ["pending", "claimed", "done", "failed"]
+
+
+class ClaimedTask:
+    """A task claimed by a worker, valid as long as its lease is renewed by heartbeats."""
+
+    def __init__(self, filepath: Path, task: dict) -> None:
+        """Initialization method for the ClaimedTask object.
+
+        Args:
+            filepath: the path to the task file in the claimed folder.
+            task: the contents of the task file.
+        """
+        self.filepath = filepath
+        self.task = task
+
+
+class WorkQueue:
+    """A work queue in a directory, that only requires atomic renames of the filesystem.
+
+    Each task is a JSON file that moves between the folders ``pending``, ``claimed``, ``done`` and ``failed``. A worker
+    claims a task by renaming it from ``pending`` to ``claimed``, which only one worker can succeed at. While working
+    on a task, the worker renews its lease by touching the file. A claimed task of which the lease has expired, for
+    example because its worker was killed, is put back in ``pending`` by any worker, until it has been attempted
+    ``max_attempts`` times, after which it is put in ``failed``.
+    """
+
+    def __init__(self, queue_path: Path, lease_timeout=120.0, heartbeat_interval=10.0, max_attempts=3) -> None:
+        """Initialization method for the WorkQueue object.
+
+        Args:
+            queue_path: the directory of the queue, created if it does not exist. Must be shared by all workers.
+            lease_timeout: the seconds after the last heartbeat after which a claimed task is retried. Defaults to 120.
+            heartbeat_interval: the seconds between heartbeats of a worker. Defaults to 10.
+            max_attempts: the number of times a task is attempted before it fails. Defaults to 3.
+        """
+        assert heartbeat_interval < lease_timeout, "The heartbeat interval must be shorter than the lease timeout"
+        self.queue_path = Path(queue_path)
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        for state in queue_states:
+            (self.queue_path / state).mkdir(parents=True, exist_ok=True)
+
+    def get_filepaths(self, state: str) -> list[Path]:
+        """Get the task files in a state, in the order in which they are claimed."""
+        return sorted((self.queue_path / state).glob("*.json"))
+
+    def get_counts(self) -> dict[str, int]:
+        """Get the number of tasks in each state."""
+        return dict((state, len(self.get_filepaths(state))) for state in queue_states)
+
+    def __write(self, filepath: Path, task: dict):
+        """Write a task file atomically, so that other workers never read a partially written file."""
+        temporary_filepath = self.queue_path / f".{uuid.uuid4().hex}.tmp"
+        temporary_filepath.write_text(json.dumps(task))
+        os.replace(temporary_filepath, filepath)
+
+    def publish(self, tasks: list[dict]) -> list[str]:
+        """Publish tasks in the order in which they should be claimed, and mark the queue as published.
+
+        Args:
+            tasks: the tasks, each a dictionary with a unique "id". Tasks that are pending or claimed are skipped,
+                done or failed tasks with the same id are replaced.
+
+        Returns:
+            The ids of the published tasks.
+        """
+        queued_ids = set(
+            get_task_id(filepath) for state in ["pending", "claimed"] for filepath in self.get_filepaths(state)
+        )
+        task_ids = set(task["id"] for task in tasks)
+        for state in ["done", "failed"]:
+            for filepath in self.get_filepaths(state):
+                if get_task_id(filepath) in task_ids:
+                    filepath.unlink()
+        published = list()
+        for order, task in enumerate(tasks):
+            assert re.fullmatch(r"[\w.\-]+", task["id"]), f"Task id {task['id']} must only contain [A-Za-z0-9_.-]"
+            if task["id"] in queued_ids:
+                continue
+            self.__write(self.queue_path / "pending" / f"{order:06d}__{task['id']}.json", dict(task, attempts=0))
+            published.append(task["id"])
+        self.set_published(True)
+        return published
+
+    def set_published(self, published: bool):
+        """Mark whether all tasks have been published, workers only stop once the queue is published and empty."""
+        marker = self.queue_path / "published"
+        if published:
+            marker.touch()
+        elif marker.exists():
+            marker.unlink()
+
+    def is_finished(self) -> bool:
+        """Whether all tasks have been published and none are pending or claimed."""
+        counts = self.get_counts()
+        return (self.queue_path / "published").exists() and counts["pending"] == 0 and counts["claimed"] == 0
+
+    def claim(self) -> Optional[ClaimedTask]:
+        """Claim the first pending task.
+
+        Returns:
+            The claimed task, None if there is no pending task.
+        """
+        for filepath in self.get_filepaths("pending"):
+            claimed_filepath = self.queue_path / "claimed" / f"{filepath.stem}@{self.worker_id}.json"
+            try:
+                # the lease starts at the claim, as the rename keeps the modification time of the pending file
+                os.utime(filepath)
+                os.rename(filepath, claimed_filepath)
+            except FileNotFoundError:
+                continue  # claimed by another worker in the meantime
+            os.utime(claimed_filepath)
+            return ClaimedTask(claimed_filepath, json.loads(claimed_filepath.read_text()))
+        return None
+
+    @contextlib.contextmanager
+    def heartbeat(self, claimed: ClaimedTask):
+        """Renew the lease of a claimed task in the background while working on it in a context."""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.heartbeat_interval):
+                try:
+                    os.utime(claimed.filepath)
+                except FileNotFoundError:
+                    return  # the lease has expired and the task is retried
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, claimed: ClaimedTask) -> bool:
+        """Mark a claimed task as done.
+
+        Args:
+            claimed: the claimed task.
+
+        Returns:
+            Whether the task was still claimed, False if its lease had expired in the meantime.
+        """
+        try:
+            os.rename(claimed.filepath, self.queue_path / "done" / f"{get_task_name(claimed.filepath)}.json")
+        except FileNotFoundError:
+            return False
+        return True
+
+    def fail(self, claimed: ClaimedTask, error: str) -> bool:
+        """Retry a claimed task that failed, or mark it as failed if it has been attempted ``max_attempts`` times.
+
+        Args:
+            claimed: the claimed task.
+            error: the description of the error.
+
+        Returns:
+            Whether the task was still claimed, False if its lease had expired in the meantime.
+        """
+        return self.__retry(claimed.filepath, error)
+
+    def __retry(self, claimed_filepath: Path, error: str) -> bool:
+        """Put a claimed task back in pending, or in failed if it has been attempted too often."""
+        # move the task out of claimed first, so that only one worker retries it
+        temporary_filepath = self.queue_path / f".{uuid.uuid4().hex}.retry"
+        try:
+            os.rename(claimed_filepath, temporary_filepath)
+        except FileNotFoundError:
+            return False
+        task: dict = json.loads(temporary_filepath.read_text())
+        task["attempts"] += 1
+        task["error"] = error
+        state = "failed" if task["attempts"] >= self.max_attempts else "pending"
+        self.__write(self.queue_path / state / f"{get_task_name(claimed_filepath)}.json", task)
+        temporary_filepath.unlink()
+        return True
+
+    def requeue_expired(self) -> int:
+        """Retry the claimed tasks of which the lease has expired.
+
+        Returns:
+            The number of tasks retried.
+        """
+        expired = 0
+        for filepath in self.get_filepaths("claimed"):
+            try:
+                last_heartbeat = filepath.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if time.time() - last_heartbeat > self.lease_timeout:
+                worker_id = filepath.stem.split("@")[-1]
+                expired += self.__retry(filepath, f"Lease of worker {worker_id} expired")
+        return expired
+
+    def get_failed(self) -> list[dict]:
+        """Get the tasks that have failed, with their last error."""
+        return list(json.loads(filepath.read_text()) for filepath in self.get_filepaths("failed"))
+
+
+def get_task_name(filepath: Path) -> str:
+    """Get the name of a task file, without the worker that claimed it."""
+    return filepath.stem.split("@")[0]
+
+
+def get_task_id(filepath: Path) -> str:
+    """Get the id of the task of a task file."""
+    return get_task_name(filepath).split("__", maxsplit=1)[-1]
@@ -0,0 +1,8 @@
+"""Configuration of the tests."""
+
+from autotuning_methodology.validators import set_validation_level
+
+
+def pytest_configure(config):
+    """Run the tests with all runtime checks, including those skipped by default for performance."""
+    set_validation_level("strict")
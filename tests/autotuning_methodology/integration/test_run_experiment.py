@@ -1,21 +1,41 @@
 """Integration test for running and fetching an experiment from cache."""
 
 import json
+import random
+import sys
 from importlib.resources import files
+from multiprocessing import get_context
 from pathlib import Path
-from shutil import copyfile
+from shutil import copyfile, rmtree
 
 import numpy as np
 import pytest
 from jsonschema import validate
 
+from autotuning_methodology import instrumentation
 from autotuning_methodology.curves import StochasticOptimizationAlgorithm
 from autotuning_methodology.experiments import (
     ResultsDescription,
+    estimate_strategy_cost,
     execute_experiment,
+    execute_experiment_shard,
     get_args_from_cli,
+    get_execute_experiment_kwargs,
+    get_experiment_args_from_cli,
+    get_experiment,
     get_experiment_schema_filepath,
+    get_searchspace_statistics,
+    get_strategies,
+    get_work_unit,
+    load_kernel,
+    merge_experiment,
+    plan_experiment,
+    run_experiment,
+    run_queue_worker,
 )
+from autotuning_methodology.runner import run_strategy
+from autotuning_methodology import workers
+from autotuning_methodology.workers import TuningWorkerPool, memoized_kernel_tuner_setup
 
 # get the path to the package
 package_path = Path(files("autotuning_methodology")).parent.parent
@@ -41,16 +61,25 @@ assert experiment_import_filepath_test.exists()
 import_runs_source_path = mockfiles_path / "import_runs"
 import_runs_path = package_path / Path("cached_data_used/import_runs")
 import_runs_filepaths: list[Path] = list()
+kernel_output_path = (mockfiles_path / "../../../../cached_data_used/last_run").resolve()
 
 
 def _remove_dir(path: Path):
-    """Utility function for removing a directory and the contained files."""
+    """Utility function for removing a directory and the contained files and folders."""
     assert path.exists()
     for sub in path.iterdir():
-        sub.unlink()
+        if sub.is_dir():
+            rmtree(sub)
+        else:
+            sub.unlink()
     path.rmdir()
 
 
+def _get_kernel_files() -> set[Path]:
+    """Utility function for listing the files of the mock kernel and the directory of its output files."""
+    return set(mockfiles_path.iterdir()) | set(kernel_output_path.iterdir() if kernel_output_path.exists() else [])
+
+
 def setup_module():
     """Setup of the test, creates / copies files where necessary."""
     assert mockfiles_path_source.exists()
@@ -107,6 +136,34 @@ def test_CLI_input():
     args = get_args_from_cli(["bogus_filename"])
     assert args == "bogus_filename"
 
+    # profiling options
+    args = get_experiment_args_from_cli(["bogus_filename", "--profile", "--profile-clock", "wall", "--instrument"])
+    assert args.experiment == "bogus_filename"
+    assert get_execute_experiment_kwargs(args) == dict(
+        profiling=True,
+        profile_dir=None,
+        profile_clock="wall",
+        persistent_workers=False,
+        parallel_workers=1,
+        work_queue=None,
+    )
+    assert args.instrument is True and args.instrument_events is None
+    assert args.plan is False and get_experiment_args_from_cli(["bogus_filename", "--plan"]).plan is True
+    args = get_experiment_args_from_cli(["bogus_filename", "--shard", "1/2", "--merge"])
+    assert args.shard == (1, 2) and args.merge is True
+    with pytest.raises(SystemExit):
+        get_experiment_args_from_cli(["bogus_filename", "--shard", "2/2"])
+    with pytest.raises(SystemExit):
+        get_experiment_args_from_cli(["bogus_filename", "--shard", "0/2", "--parallel-workers", "2"])
+    with pytest.raises(SystemExit):
+        get_experiment_args_from_cli(["bogus_filename", "--shard", "0/2", "--work-queue", "queue"])
+    args = get_experiment_args_from_cli(["bogus_filename", "--work-queue", "queue", "--worker"])
+    assert args.work_queue == Path("queue") and args.worker is True
+    with pytest.raises(SystemExit):
+        get_experiment_args_from_cli(["bogus_filename", "--worker"])
+    with pytest.raises(SystemExit):
+        get_experiment_args_from_cli(["bogus_filename", "--work-queue", "queue", "--worker", "--parallel-workers", "2"])
+
 
 def test_bad_experiment():
     """Attempting to run a non-existing experiment file should raise a clear error."""
@@ -126,6 +183,15 @@ def test_run_experiment_bad_kernel_path():
         execute_experiment(experiment_filepath, profiling=False)
 
 
+def test_run_experiment_conflicting_modes(tmp_path: Path):
+    """The parallel workers should not silently ignore the persistent workers or the work queue."""
+    experiment_filepath = str(experiment_filepath_test)
+    with pytest.raises(ValueError, match="can not be combined with persistent_workers"):
+        execute_experiment(experiment_filepath, persistent_workers=True, parallel_workers=2)
+    with pytest.raises(ValueError, match="can not be combined with work_queue"):
+        execute_experiment(experiment_filepath, parallel_workers=2, work_queue=tmp_path)
+
+
 @pytest.fixture(scope="session")
 def test_run_experiment():
     """Run a dummy experiment."""
@@ -133,7 +199,7 @@ def test_run_experiment():
     if cached_visualization_file.exists():
         cached_visualization_file.unlink()
     assert not cached_visualization_file.exists()
-    (experiment, strategies, results_descriptions) = execute_experiment(str(experiment_filepath_test), profiling=False)
+    experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath_test), profiling=False)
     validate_experiment_results(experiment, strategies, results_descriptions)
 
 
@@ -144,14 +210,359 @@ def test_cached_experiment():
     assert normal_cachefile_destination.exists()
     assert cached_visualization_path.exists()
     assert cached_visualization_file.exists()
-    (experiment, strategies, results_descriptions) = execute_experiment(str(experiment_filepath_test), profiling=False)
+    experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath_test), profiling=False)
     validate_experiment_results(experiment, strategies, results_descriptions)
 
 
+@pytest.mark.usefixtures("test_run_experiment")
+def test_cached_experiment_skips_kernel():
+    """A fully cached experiment should not import the kernel nor load the searchspace."""
+    sys.modules.pop(kernel_id, None)
+    recorder = instrumentation.enable()
+    try:
+        experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath_test))
+    finally:
+        instrumentation.disable()
+    assert kernel_id not in sys.modules
+    assert "experiment.load_searchspace" not in recorder.totals
+    assert "experiment.import_kernels" not in recorder.totals
+    validate_experiment_results(experiment, strategies, results_descriptions)
+
+
+def test_persistent_workers():
+    """Runs in a persistent worker should reuse the Kernel Tuner setup."""
+    strategy = dict(name="random_sample", strategy="random_sample", options=dict(max_fevals=30))
+    tune_options = {"verbose": False, "quiet": True, "simulation_mode": True}
+    kernel_files = _get_kernel_files()
+    with TuningWorkerPool(mockfiles_path) as workers:
+        futures = list(workers.submit(rep, kernel_id, "mock_GPU", strategy, tune_options) for rep in range(3))
+        for future in futures:
+            _, results, total_time_ms = future.result()
+            assert len(results) == 30
+            assert total_time_ms > 0
+        statistics = workers.get_statistics(kernel_id, "mock_GPU")
+    assert statistics["jobs"] == 3
+    assert statistics["read_cache_parsed"] == 1
+    assert statistics["read_cache_reused"] == 2
+    assert statistics["searchspace_built"] == 1
+    # the output files of the workers are removed when the workers stop
+    assert _get_kernel_files() == kernel_files
+
+
+def _tune_seeded(strategy: dict, tune_options: dict) -> list[tuple]:
+    """Tune a run in the worker process with seeded random number generators, returning what it evaluated."""
+    random.seed(0)
+    np.random.seed(0)
+    _, results, _ = workers._run_job(0, kernel_id, "mock_GPU", strategy, tune_options)
+    return list((result["configuration"], result["measurements"], result["invalidity"]) for result in results)
+
+
+def test_persistent_workers_consecutive_runs():
+    """Consecutive runs in a worker should be the same as runs in fresh processes, as each gets its own searchspace."""
+    strategy = dict(name="greedy_ils", strategy="greedy_ils", options=dict(max_fevals=40))
+    tune_options = {"verbose": False, "quiet": True, "simulation_mode": True}
+    with TuningWorkerPool(mockfiles_path) as pool:
+        worker = pool.get_worker(kernel_id, "mock_GPU")
+        consecutive_runs = list(worker.submit(_tune_seeded, strategy, tune_options).result() for _ in range(2))
+        assert pool.get_statistics(kernel_id, "mock_GPU")["searchspace_built"] == 1
+    fresh_runs = list()
+    for _ in range(2):
+        with TuningWorkerPool(mockfiles_path) as pool:
+            worker = pool.get_worker(kernel_id, "mock_GPU")
+            fresh_runs.append(worker.submit(_tune_seeded, strategy, tune_options).result())
+    assert len(consecutive_runs[0]) >= 40
+    assert consecutive_runs == fresh_runs
+
+    # the memoized setup is only in place within its context
+    import kernel_tuner.interface
+
+    original_searchspace = kernel_tuner.interface.Searchspace
+    with memoized_kernel_tuner_setup():
+        assert kernel_tuner.interface.Searchspace is not original_searchspace
+    assert kernel_tuner.interface.Searchspace is original_searchspace
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_persistent_workers():
+    """Run a dummy experiment in persistent workers."""
+    cached_visualization_file.unlink()
+    experiment, strategies, results_descriptions = execute_experiment(
+        str(experiment_filepath_test), persistent_workers=True
+    )
+    assert cached_visualization_file.exists()
+    validate_experiment_results(experiment, strategies, results_descriptions)
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_scheduled():
+    """Run a dummy experiment with the strategies on parallel workers, including an imported run."""
+    cached_visualization_file.unlink()
+    kernel_files = _get_kernel_files()
+    experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath_test), parallel_workers=2)
+    assert cached_visualization_file.exists()
+    assert _get_kernel_files() == kernel_files
+    validate_experiment_results(experiment, strategies, results_descriptions)
+    # the repeats are split over the two workers and written at once
+    results_description = results_descriptions["mock_GPU"][kernel_id]["random_sample_10_iter"]
+    assert results_description.get_results().fevals_results.shape[1] == 3
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_sweep():
+    """Run a sweep over the options of a strategy on parallel workers, with the results of each variant cached."""
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = "test_sweep_experiment"
+    experiment["strategies"][0].update(repeats=2, sweep={"options": {"fraction": [0.1, 0.2]}})
+    experiment_filepath = mockfiles_path / "test_sweep.json"
+    experiment_filepath.write_text(json.dumps(experiment))
+    try:
+        experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath), parallel_workers=3)
+        names = ["random_sample_10_iter_0.1", "random_sample_10_iter_0.2"]
+        assert list(strategy["name"] for strategy in strategies) == names
+        assert strategies[1]["options"]["fraction"] == 0.2
+        for name in names:
+            results_description = results_descriptions["mock_GPU"][kernel_id][name]
+            assert results_description.get_results().fevals_results.shape[1] == 2
+    finally:
+        experiment_filepath.unlink()
+        rmtree(package_path / "cached_data_used/visualizations/test_sweep_experiment")
+
+
+def test_estimate_strategy_cost():
+    """The estimated cost should include the cutoff margin and the repeats, with the cutoff in fevals or time."""
+    cutoff = (10, 5.0, 100)
+    strategy = {"repeats": 3}
+    assert estimate_strategy_cost(strategy, "fevals", cutoff) == (33, 16.5)
+    assert estimate_strategy_cost(strategy, "time", cutoff) == (33, 16.5)
+    assert estimate_strategy_cost(dict(strategy, cutoff_margin=20), "fevals", cutoff) == (300, 150.0)
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_plan_experiment():
+    """The plan should report cached strategies and estimate the cost of the uncached ones without running them."""
+    plan = plan_experiment(str(experiment_filepath_test))
+    assert len(plan) == 1
+    assert plan[0]["cached"] is True and plan[0]["evaluations"] == 0
+
+    # an experiment that has not been executed yet
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = "test_plan_experiment"
+    experiment_filepath = mockfiles_path / "test_plan.json"
+    experiment_filepath.write_text(json.dumps(experiment))
+    try:
+        plan = plan_experiment(str(experiment_filepath))
+    finally:
+        experiment_filepath.unlink()
+    assert len(plan) == 1
+    assert plan[0]["cached"] is False and plan[0]["repeats"] == 3
+    assert plan[0]["evaluations"] > 0 and plan[0]["time"] > 0
+    assert not (package_path / "cached_data_used/visualizations/test_plan_experiment").exists()
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_shards():
+    """Run a dummy experiment in two shards and merge their repeats into the results."""
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = "test_shard_experiment"
+    experiment_filepath = mockfiles_path / "test_shard.json"
+    experiment_filepath.write_text(json.dumps(experiment))
+    shard_visualization_path = package_path / "cached_data_used/visualizations/test_shard_experiment"
+    try:
+        units = execute_experiment_shard(str(experiment_filepath), (0, 2))
+        assert len(units) == 1 and units[0]["repeats"] == range(0, 2)
+        with pytest.raises(ValueError, match="mock_GPU, mocktest_kernel_convolution, random_sample_10_iter: 2-3"):
+            merge_experiment(str(experiment_filepath))
+        units = execute_experiment_shard(str(experiment_filepath), (1, 2))
+        assert len(units) == 1 and units[0]["repeats"] == range(2, 3)
+        experiment, strategies, results_descriptions = merge_experiment(str(experiment_filepath))
+    finally:
+        experiment_filepath.unlink()
+    try:
+        validate_experiment_results(experiment, strategies, results_descriptions)
+        results_description = results_descriptions["mock_GPU"][kernel_id]["random_sample_10_iter"]
+        assert results_description.get_results().fevals_results.shape[1] == 3
+        assert list(results_description.get_results_chunks()) == list()
+    finally:
+        rmtree(shard_visualization_path)
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_incremental():
+    """Changing the experiment file should only run the repeats that are not cached for the new configuration."""
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = "test_incremental_experiment"
+    experiment_filepath = mockfiles_path / "test_incremental.json"
+    incremental_visualization_path = package_path / "cached_data_used/visualizations/test_incremental_experiment"
+
+    def execute(repeats: int, **changes) -> tuple[int, np.ndarray]:
+        """Execute the experiment with changes to the strategy, returning the number of runs and the results."""
+        experiment["strategies"][0].update(repeats=repeats, **changes)
+        experiment_filepath.write_text(json.dumps(experiment))
+        recorder = instrumentation.enable()
+        try:
+            _, _, results_descriptions = execute_experiment(str(experiment_filepath))
+        finally:
+            instrumentation.disable()
+        num_runs = recorder.totals.get("runner.kernel_tune", [0])[0]
+        results = results_descriptions["mock_GPU"][kernel_id]["random_sample_10_iter"].get_results()
+        return num_runs, results.fevals_results
+
+    try:
+        num_runs, fevals_results = execute(2)
+        assert num_runs == 2 and fevals_results.shape[1] == 2
+        # only the additional repeats are run, the cached repeats are kept
+        num_runs, appended_fevals_results = execute(4)
+        assert num_runs == 2 and appended_fevals_results.shape[1] == 4
+        np.testing.assert_array_equal(
+            appended_fevals_results[: fevals_results.shape[0], :2], fevals_results[: appended_fevals_results.shape[0]]
+        )
+        # fewer repeats are taken from the cache
+        num_runs, fevals_results = execute(3)
+        assert num_runs == 0 and fevals_results.shape[1] == 3
+        assert execute(3, display_name="Renamed")[0] == 0
+        plan = plan_experiment(str(experiment_filepath))
+        assert plan[0]["action"] == "reuse" and plan[0]["cached"] is True
+        # a change in the behaviour of the strategy runs all repeats again
+        experiment["strategies"][0]["minimum_number_of_evaluations"] = 10
+        experiment_filepath.write_text(json.dumps(experiment))
+        plan = plan_experiment(str(experiment_filepath))
+        assert plan[0]["action"] == "run" and plan[0]["cached"] is False
+        assert execute(3)[0] == 3
+    finally:
+        experiment_filepath.unlink()
+        rmtree(incremental_visualization_path)
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+@pytest.mark.parametrize("mode", ["parallel", "shards"])
+def test_run_experiment_incremental_distributed(mode: str):
+    """Changing the experiment file should only run the repeats that are not cached on parallel workers or shards."""
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = f"test_incremental_{mode}_experiment"
+    experiment_filepath = mockfiles_path / f"test_incremental_{mode}.json"
+    incremental_visualization_path = package_path / "cached_data_used/visualizations" / experiment["folder_id"]
+
+    def execute(repeats: int, **changes) -> np.ndarray:
+        """Execute the experiment with changes to the strategy, returning the performance results."""
+        experiment["strategies"][0].update(repeats=repeats, **changes)
+        experiment_filepath.write_text(json.dumps(experiment))
+        if mode == "parallel":
+            _, _, results_descriptions = execute_experiment(str(experiment_filepath), parallel_workers=2)
+        else:
+            for shard_index in range(2):
+                execute_experiment_shard(str(experiment_filepath), (shard_index, 2))
+            _, _, results_descriptions = merge_experiment(str(experiment_filepath))
+        results_description = results_descriptions["mock_GPU"][kernel_id]["random_sample_10_iter"]
+        provenance = results_description.get_provenance()
+        assert provenance["repeats"] == repeats
+        assert provenance["strategy"]["minimum_number_of_evaluations"] == experiment["strategies"][0].get(
+            "minimum_number_of_evaluations", 20
+        )
+        return results_description.get_results().objective_performance_results
+
+    try:
+        performance_results = execute(2)
+        assert performance_results.shape[1] == 2
+        # only the additional repeats are run, the cached repeats are kept
+        appended_performance_results = execute(4)
+        assert appended_performance_results.shape[1] == 4
+        np.testing.assert_array_equal(
+            appended_performance_results[: performance_results.shape[0], :2],
+            performance_results[: appended_performance_results.shape[0]],
+        )
+        # fewer repeats are taken from the cache
+        truncated_performance_results = execute(3)
+        np.testing.assert_array_equal(truncated_performance_results, appended_performance_results[:, :3])
+        # a change in the behaviour of the strategy runs all repeats again
+        rerun_performance_results = execute(3, minimum_number_of_evaluations=10)
+        assert rerun_performance_results.shape[1] == 3
+        assert not np.array_equal(rerun_performance_results, truncated_performance_results, equal_nan=True)
+        if mode == "shards":
+            assert list(execute_experiment_shard(str(experiment_filepath), (0, 2))) == list()
+    finally:
+        experiment_filepath.unlink()
+        rmtree(incremental_visualization_path)
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_in_memory():
+    """Run an experiment dictionary with the results kept in memory, without changing the import path."""
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = "test_in_memory_experiment"
+    cached_path = package_path / "cached_data_used/visualizations/test_in_memory_experiment"
+    searchspace_stats = get_searchspace_statistics(experiment, mockfiles_path, "mock_GPU", kernel_id)
+    sys.modules.pop(kernel_id, None)
+    sys_path = list(sys.path)
+    experiment_run, strategies, results_descriptions = run_experiment(
+        experiment, searchspaces={("mock_GPU", kernel_id): searchspace_stats}, experiment_folderpath=mockfiles_path
+    )
+    assert sys.path == sys_path and kernel_id not in sys.modules
+    assert not cached_path.exists()
+    assert "options" not in experiment["strategies"][0], "the given experiment must not be modified"
+    validate_experiment_results(experiment_run, strategies, results_descriptions)
+    results_description = results_descriptions["mock_GPU"][kernel_id]["random_sample_10_iter"]
+    assert results_description.get_results().fevals_results.shape[1] == 3
+    assert results_description.get_provenance()["repeats"] == 3
+
+    # the results are cached if desired, with the given kernel
+    kernel = load_kernel(mockfiles_path, kernel_id)
+    try:
+        run_experiment(experiment, kernels={kernel_id: kernel}, experiment_folderpath=mockfiles_path, cache=True)
+        assert (cached_path / kernel_id / "mock_GPU_random_sample_10_iter.npz").exists()
+    finally:
+        if cached_path.exists():
+            rmtree(cached_path)
+
+
+@pytest.mark.usefixtures("test_run_experiment")
+def test_run_experiment_work_queue(tmp_path: Path):
+    """Run a dummy experiment on a work queue, with a worker in another process."""
+    experiment = json.loads(experiment_filepath_test.read_text())
+    experiment["folder_id"] = "test_queue_experiment"
+    experiment_filepath = mockfiles_path / "test_queue.json"
+    experiment_filepath.write_text(json.dumps(experiment))
+    queue_visualization_path = package_path / "cached_data_used/visualizations/test_queue_experiment"
+    worker = get_context("fork").Process(target=run_queue_worker, args=(str(experiment_filepath), tmp_path, False))
+    try:
+        worker.start()
+        experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath), work_queue=tmp_path)
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    finally:
+        experiment_filepath.unlink()
+        if worker.is_alive():
+            worker.kill()
+    try:
+        validate_experiment_results(experiment, strategies, results_descriptions)
+        results_description = results_descriptions["mock_GPU"][kernel_id]["random_sample_10_iter"]
+        assert results_description.get_results().fevals_results.shape[1] == 3
+        done_tasks = list(json.loads(filepath.read_text()) for filepath in (tmp_path / "done").iterdir())
+        assert len(done_tasks) == 3
+        assert all(task["cost"] > 0 for task in done_tasks), "The cost estimate should be published with the tasks"
+    finally:
+        rmtree(queue_visualization_path)
+
+
+def test_get_work_unit_published_cost():
+    """A work unit with a published cost should not load the searchspace, unless it converts imported runs."""
+    experiment = get_experiment(str(experiment_filepath_test))
+    strategy = get_strategies(experiment)[0]
+    args = (experiment, mockfiles_path, "mock_GPU", kernel_id, strategy, range(0, 1), dict(budget=None))
+    searchspaces = dict()
+    unit = get_work_unit(*args, searchspaces, cost=2.5)
+    assert unit["cost"] == 2.5 and unit["searchspace_stats"] is None
+    assert len(searchspaces) == 0
+    unit = get_work_unit(*args, searchspaces)
+    assert unit["cost"] > 0 and unit["searchspace_stats"] is None
+    assert len(searchspaces) == 1
+    unit = get_work_unit(*args[:4], dict(strategy, name="ktt_searcher"), *args[5:], searchspaces, cost=2.5)
+    assert unit["searchspace_stats"] is searchspaces[("mock_GPU", kernel_id)][0]
+
+
 def test_import_run_experiment():
     """Import runs from an experiment."""
     assert import_runs_path.exists()
-    (experiment, strategies, results_descriptions) = execute_experiment(
+    experiment, strategies, results_descriptions = execute_experiment(
         str(experiment_import_filepath_test), profiling=False
     )
     assert cached_visualization_imported_path.exists()
@@ -159,11 +570,45 @@ def test_import_run_experiment():
     validate_experiment_results(experiment, strategies, results_descriptions)
 
 
+def test_import_run_rejected():
+    """Imported runs with too few evaluations should be rejected, as they can not be attempted again."""
+    experiment = json.loads(experiment_import_filepath_test.read_text())
+    searchspace_stats = get_searchspace_statistics(experiment, mockfiles_path, "mock_GPU", kernel_id)
+    strategy = dict(experiment["strategy_defaults"], **experiment["strategies"][0], minimum_number_of_evaluations=601)
+    results_description = ResultsDescription(
+        "test_import_run_rejected",
+        kernel_id,
+        "mock_GPU",
+        strategy["name"],
+        strategy["display_name"],
+        True,
+        experiment["objective_time_keys"],
+        experiment["objective_performance_keys"],
+        True,
+        None,
+    )
+    with pytest.raises(ValueError, match="Imported run 0 has 600 results of the 601 required"):
+        run_strategy(None, strategy, results_description, searchspace_stats)
+
+    # a run with only invalid results is rejected as well, instead of being imported again on each attempt
+    import_run_filepath = next(import_runs_source_path.glob("*r~0.json"))
+    invalid_filepath = import_runs_path / import_run_filepath.name.replace("profile_searcher", "invalid_searcher")
+    invalid_filepath.write_text(
+        import_run_filepath.read_text().replace('"Status": "Ok"', '"Status": "ComputationFailed"')
+    )
+    try:
+        strategy = dict(strategy, strategy="invalid_searcher", repeats=1, minimum_number_of_evaluations=20)
+        with pytest.raises(ValueError, match="Imported run 0 has 600 results of the 20 required or only invalid"):
+            run_strategy(None, strategy, results_description, searchspace_stats)
+    finally:
+        invalid_filepath.unlink()
+
+
 @pytest.mark.usefixtures("test_run_experiment")
 def test_curve_instance():
     """Test a Curve instance."""
     # setup the test
-    (experiment, strategies, results_descriptions) = execute_experiment(str(experiment_filepath_test), profiling=False)
+    experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath_test), profiling=False)
     kernel_name = experiment["kernels"][0]
     gpu_name = experiment["GPUs"][0]
     strategy_name = strategies[0]["name"]
@@ -0,0 +1,108 @@
+"""Integration test for the headless scoring."""
+
+import csv
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from test_run_experiment import (
+    _remove_dir,
+    cached_visualization_file,
+    cached_visualization_path,
+    experiment_filepath_test,
+    mockfiles_path_source,
+    normal_cachefile_destination,
+    normal_cachefiles_path,
+)
+
+from autotuning_methodology.experiments import execute_experiment
+from autotuning_methodology.scoring import get_scoring_args_from_cli, score_experiment, write_scores
+
+
+def setup_module():
+    """Setup of the test, creates / copies files where necessary."""
+    assert mockfiles_path_source.exists()
+    normal_cachefiles_path.mkdir(parents=True, exist_ok=True)
+    normal_cachefile_destination.write_text(mockfiles_path_source.read_text())
+    assert normal_cachefile_destination.exists()
+
+
+def teardown_module():
+    """Teardown of the tests, removes files where necessary."""
+    if normal_cachefile_destination.exists():
+        normal_cachefile_destination.unlink()
+    _remove_dir(normal_cachefiles_path)
+    if cached_visualization_file.exists():
+        cached_visualization_file.unlink()
+    _remove_dir(cached_visualization_path)
+
+
+def test_score_experiment(tmp_path: Path):
+    """Score a dummy experiment from the cache, and write the scores to JSON and CSV."""
+    experiment_filepath = str(experiment_filepath_test)
+    if cached_visualization_file.exists():
+        cached_visualization_file.unlink()
+    with pytest.raises(ValueError, match="not cached"):
+        score_experiment(experiment_filepath)
+    execute_experiment(experiment_filepath, profiling=False)
+
+    searchspaces = dict()
+    scores = score_experiment(experiment_filepath, searchspaces=searchspaces)
+    assert scores["confidence_level"] == 0.95 and len(searchspaces) == 1
+    assert len(scores["strategies"]) == 1
+    strategy_scores = scores["strategies"][0]
+    assert strategy_scores["name"] == "random_sample_10_iter"
+    assert strategy_scores["score_lower"] <= strategy_scores["score"] <= strategy_scores["score_upper"]
+    # with a single searchspace, the aggregate score is the score of the searchspace
+    assert len(strategy_scores["searchspaces"]) == 1
+    searchspace_scores = strategy_scores["searchspaces"][0]
+    assert searchspace_scores["gpu"] == "mock_GPU"
+    assert np.isclose(searchspace_scores["score"], strategy_scores["score"])
+
+    # repeated scoring reuses the loaded searchspaces and gives the same result, as the bootstraps are seeded
+    searchspace_stats = searchspaces[("mock_GPU", "mocktest_kernel_convolution")][0]
+    assert score_experiment(experiment_filepath, searchspaces=searchspaces) == scores
+    assert searchspaces[("mock_GPU", "mocktest_kernel_convolution")][0] is searchspace_stats
+
+    # a strategy is as good as itself
+    scores_self = score_experiment(experiment_filepath, use_strategy_as_baseline="random_sample_10_iter")
+    strategy_scores_self = scores_self["strategies"][0]
+    assert np.isclose(strategy_scores_self["score"], 0.0)
+    assert strategy_scores_self["score_lower"] <= 0.0 <= strategy_scores_self["score_upper"]
+    with pytest.raises(ValueError, match="Could not find"):
+        score_experiment(experiment_filepath, use_strategy_as_baseline="bogus")
+
+    # write the scores
+    json_filepath = tmp_path / "scores.json"
+    csv_filepath = tmp_path / "scores.csv"
+    write_scores(scores, json_filepath)
+    write_scores(scores, csv_filepath)
+    assert json.loads(json_filepath.read_text()) == scores
+    with csv_filepath.open() as file:
+        rows = list(csv.DictReader(file))
+    assert [(row["gpu"], row["kernel"]) for row in rows][0] == ("*", "*")
+    assert len(rows) == 2 and all(row["strategy"] == "random_sample_10_iter" for row in rows)
+    assert np.isclose(float(rows[0]["score"]), strategy_scores["score"])
+
+
+def test_scoring_CLI_input():
+    """Test the scoring CLI inputs."""
+    args = get_scoring_args_from_cli(["bogus_filename", "--output", "scores.json", "scores.csv", "--strategies", "a"])
+    assert args.experiment == "bogus_filename"
+    assert args.output == [Path("scores.json"), Path("scores.csv")]
+    assert args.strategies == ["a"] and args.confidence_level is None and args.block_rows is None
+
+
+def test_scoring_imports():
+    """The scoring should not import the execution of experiments, which imports Kernel Tuner."""
+    code = (
+        "import sys, autotuning_methodology.scoring; "
+        "print(','.join(m for m in ('autotuning_methodology.experiments', 'kernel_tuner') if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -1,7 +1,10 @@
 """Integration test for visualization and quantification."""
 
+import json
 from pathlib import Path
 
+import numpy as np
+import pytest
 from test_run_experiment import (
     _remove_dir,
     cached_visualization_file,
@@ -13,7 +16,11 @@ from test_run_experiment import (
     normal_cachefiles_path,
 )
 
-from autotuning_methodology.visualize_experiments import Visualize
+from autotuning_methodology.curves import StochasticOptimizationAlgorithm
+from autotuning_methodology.experiments import execute_experiment, get_searchspace_statistics
+from autotuning_methodology.instrumentation import recording
+from autotuning_methodology.scoring import get_ranges
+from autotuning_methodology.visualize_experiments import Visualize, get_visualize_args_from_cli
 
 # setup file paths
 experiment_title = f"{kernel_id}_on_mock_GPU"
@@ -63,19 +70,77 @@ def teardown_module():
         plot_path.rmdir()
 
 
-def test_visualize_experiment():
-    """Visualize a dummy experiment."""
+def test_visualize_experiment(tmp_path: Path):
+    """Visualize a dummy experiment, recording the time spent per stage."""
     assert normal_cachefile_destination.exists()
     if cached_visualization_file.exists():
         cached_visualization_file.unlink()
     assert not cached_visualization_file.exists()
     experiment_filepath = str(experiment_filepath_test)
-    Visualize(
-        experiment_filepath,
-        save_figs=True,
-        save_extra_figs=True,
-        continue_after_comparison=True,
-        compare_extra_baselines=True,
-    )
+    events_filepath = tmp_path / "events.jsonl"
+    with recording(True, events_filepath):
+        Visualize(
+            experiment_filepath,
+            save_figs=True,
+            save_extra_figs=True,
+            continue_after_comparison=True,
+            compare_extra_baselines=True,
+        )
     for plot_filepath in plot_filepaths:
         assert plot_filepath.exists(), f"{plot_filepath} does not exist"
+
+    # the stages of the pipeline should have been recorded
+    events = list(json.loads(line) for line in events_filepath.read_text().splitlines())
+    stages = set(event["name"] for event in events)
+    assert {"experiment.load_searchspace", "curves.get_curve_over_time", "visualize.savefig"}.issubset(stages)
+    assert all(event["duration_ms"] >= 0 for event in events)
+
+
+def test_compute_curves_in_parallel():
+    """Curves computed in worker processes should be the same as the curves computed in this process."""
+    experiment, strategies, results_descriptions = execute_experiment(str(experiment_filepath_test), profiling=False)
+    searchspace_stats = get_searchspace_statistics(experiment, experiment_filepath_test.parent, "mock_GPU", kernel_id)
+    fevals_range, time_range = get_ranges(experiment, searchspace_stats)
+    dist = searchspace_stats.objective_performances_total_sorted
+    results_description = results_descriptions["mock_GPU"][kernel_id][strategies[0]["name"]]
+    jobs = [(fevals_range, "fevals", dist, 0.95), (time_range, "time", dist, 0.95)]
+    curve = StochasticOptimizationAlgorithm(results_description)
+    Visualize.compute_curves(None, list((curve, results_description, job) for job in jobs), parallel_workers=2)
+    assert len(curve._memo) == 2
+    for job in jobs:
+        curve_serial = StochasticOptimizationAlgorithm(results_description).get_curve(*job)
+        curve_parallel = curve.get_curve(*job)
+        assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(curve_serial, curve_parallel))
+
+    # the workers compute curves in blocks of rows for curves in blocks of rows, with the same curves over fevals
+    curve_in_blocks = StochasticOptimizationAlgorithm(results_description, block_rows=3)
+    curves_jobs = list((curve_in_blocks, results_description, job) for job in jobs)
+    Visualize.compute_curves(None, curves_jobs, parallel_workers=2)
+    assert len(curve_in_blocks._memo) == 2 and curve_in_blocks._memo.keys().isdisjoint(curve._memo.keys())
+    curve_serial, curve_parallel = curve.get_curve(*jobs[0]), curve_in_blocks.get_curve(*jobs[0])
+    assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(curve_serial, curve_parallel))
+
+    # the bootstraps are fitted on multiple threads in the workers, with the same seeded curves
+    curve_threaded = StochasticOptimizationAlgorithm(results_description)
+    curve_threaded.bootstrap_n_jobs = 2
+    Visualize.compute_curves(None, [(curve_threaded, results_description, jobs[1])], parallel_workers=2)
+    curve_serial, curve_parallel = curve.get_curve(*jobs[1]), curve_threaded.get_curve(*jobs[1])
+    assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(curve_serial, curve_parallel))
+
+    # unseeded curves over time are not memoized, so they are left to be computed serially when plotting
+    curve_unseeded = StochasticOptimizationAlgorithm(results_description)
+    curve_unseeded.bootstrap_seed = None
+    with pytest.warns(UserWarning, match="1 curves are not memoized"):
+        Visualize.compute_curves(None, list((curve_unseeded, results_description, job) for job in jobs), 2)
+    assert len(curve_unseeded._memo) == 1
+
+
+def test_visualize_CLI_input():
+    """Test the visualization CLI inputs."""
+    args = get_visualize_args_from_cli(["bogus_filename", "--instrument-events", "events.jsonl"])
+    assert args.experiment == "bogus_filename"
+    assert args.instrument_events == Path("events.jsonl")
+    assert args.parallel_workers is None
+    assert get_visualize_args_from_cli(["bogus_filename", "--parallel-workers", "4"]).parallel_workers == 4
+    assert args.block_rows is None
+    assert get_visualize_args_from_cli(["bogus_filename", "--block-rows", "1000"]).block_rows == 1000
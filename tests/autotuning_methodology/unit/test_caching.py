@@ -1 +1,62 @@
 """Unit tests for the caching."""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from autotuning_methodology.caching import ResultsDescription
+
+
+def get_in_memory_results_description() -> ResultsDescription:
+    """Get a ``ResultsDescription`` that keeps its results in memory."""
+    return ResultsDescription(
+        "test_caching", "kernel", "device", "strategy", "Strategy", True, ["time"], ["time"], True, None
+    )
+
+
+def test_results_in_memory():
+    """Without a visualization caches path, the results should be kept in memory and not be pickled."""
+    results_description = get_in_memory_results_description()
+    assert not results_description.has_results()
+    with pytest.raises(ValueError, match="in memory"):
+        results_description.get_results()
+    arrays = dict((key, np.full((2, 3), index)) for index, key in enumerate(results_description.numpy_arrays_keys))
+    results_description.set_results(arrays, provenance={"repeats": 3})
+    assert results_description.has_results()
+    assert results_description.get_results().objective_performance_results[0, 0] == 2
+    assert results_description.get_provenance() == {"repeats": 3}
+    with pytest.raises(ValueError, match="overwrite"):
+        results_description.set_results(arrays)
+
+    # the results are not pickled with the description
+    pickled = pickle.loads(pickle.dumps(results_description))
+    assert get_in_memory_results_description().is_same_as(pickled)
+    assert not pickled.has_results()
+    with pytest.raises(ValueError, match="in memory"):
+        pickled.get_results_arrays()
+
+
+def test_results_memory_mapped(tmp_path):
+    """Cached results should be memory-mapped from an uncompressed copy, extracted again when the results change."""
+    results_description = ResultsDescription(
+        "test_caching", "kernel", "device", "strategy", "Strategy", True, ["time"], ["time"], True, tmp_path
+    )
+    arrays = dict((key, np.full((2, 3), index)) for index, key in enumerate(results_description.numpy_arrays_keys))
+    results_description.set_results(arrays)
+    results = results_description.get_results_arrays(mmap=True)
+    assert all(isinstance(array, np.memmap) for array in results.values())
+    assert all(np.array_equal(results[key], array) for key, array in arrays.items())
+    assert np.array_equal(results_description.get_results(mmap=True).fevals_results, arrays["fevals_results"])
+
+    # the extracted results are read-only and follow the cached results
+    with pytest.raises(ValueError):
+        results["fevals_results"][0, 0] = 1
+    arrays["fevals_results"] = np.full((2, 3), -1)
+    results_description.set_results(arrays, overwrite=True)
+    assert np.all(results_description.get_results_arrays(mmap=True)["fevals_results"] == -1)
+
+    # results kept in memory are not memory-mapped
+    results_description = get_in_memory_results_description()
+    results_description.set_results(arrays)
+    assert not isinstance(results_description.get_results_arrays(mmap=True)["fevals_results"], np.memmap)
@@ -0,0 +1,75 @@
+"""Unit tests for the conformal prediction intervals."""
+
+import numpy as np
+import pytest
+from sklearn.isotonic import IsotonicRegression
+
+from autotuning_methodology.conformal import (
+    ConformalIsotonicRegression,
+    get_conformal_ranks,
+    select_order_statistics,
+)
+
+rng = np.random.default_rng(0)
+x = np.round(rng.random(400) * 10, 1)  # with ties
+y = np.round(100 - 5 * x + rng.normal(0, 10, 400))
+x_new = np.linspace(-1, 11, 30)
+
+
+def test_select_order_statistics():
+    """The selected order statistics should be those of the sorted union of the shifted offsets."""
+    shifts = np.round(rng.normal(0, 5, (4, 20)))  # with ties in the union
+    offsets = list(np.sort(np.round(rng.normal(0, 5, size))) for size in (7, 1, 0, 12))
+    ranks = np.array([0, 3, 10, 19])
+    selected = select_order_statistics(shifts, offsets, ranks)
+    assert selected.shape == (4, 20)
+    for column in range(20):
+        union = np.sort(np.concatenate(list(shift + offset for shift, offset in zip(shifts[:, column], offsets))))
+        assert np.array_equal(selected[:, column], union[ranks])
+
+
+def test_get_conformal_ranks():
+    """The ranks should be the finite-sample quantiles, clipped to the calibration scores."""
+    ranks = get_conformal_ranks(99, np.array([0.9, 0.999]), two_sided=True)
+    assert np.array_equal(ranks, [[4, 0], [94, 98]])
+    assert np.array_equal(get_conformal_ranks(99, np.array([0.9]), two_sided=False), [[9], [89]])
+
+
+def test_split_conformal():
+    """The split interval should be the isotonic fit on the training data plus the signed residual quantiles."""
+    regressor = ConformalIsotonicRegression("split", increasing=False, y_min=y.min(), y_max=y.max(), seed=1).fit(x, y)
+    interval = regressor.predict_interval(x_new, 0.9)
+    assert interval.shape == (30, 2) and np.all(interval[:, 0] <= interval[:, 1])
+
+    # redo the split and fit
+    permutation = np.random.default_rng(1).permutation(400)
+    train, calibrate = permutation[:300], permutation[300:]
+    isotonic = IsotonicRegression(increasing=False, y_min=y.min(), y_max=y.max(), out_of_bounds="clip")
+    isotonic.fit(x[train], y[train])
+    residuals = np.sort(y[calibrate] - isotonic.predict(x[calibrate]))
+    assert np.allclose(regressor.predict(x_new), isotonic.predict(x_new))
+    assert np.allclose(interval[:, 0], isotonic.predict(x_new) + residuals[4])
+    assert np.allclose(interval[:, 1], isotonic.predict(x_new) + residuals[95])
+
+
+@pytest.mark.parametrize("method", ["split", "jackknife+"])
+def test_conformal_coverage(method: str):
+    """The intervals of multiple levels should be nested and cover new data at about their confidence level."""
+    regressor = ConformalIsotonicRegression(method, increasing=False, seed=0, n_jobs=2).fit(x, y)
+    x_test = rng.random(2000) * 10
+    y_test = 100 - 5 * x_test + rng.normal(0, 10, 2000)
+    intervals = regressor.predict_interval(x_test, np.array([0.5, 0.9]))
+    assert intervals.shape == (2, 2000, 2)
+    assert np.array_equal(intervals[1], regressor.predict_interval(x_test, 0.9))
+    assert np.all(intervals[1, :, 0] <= intervals[0, :, 0]) and np.all(intervals[0, :, 1] <= intervals[1, :, 1])
+    for confidence_level, interval in zip([0.5, 0.9], intervals):
+        coverage = np.mean((interval[:, 0] <= y_test) & (y_test <= interval[:, 1]))
+        assert abs(coverage - confidence_level) < 0.06, f"{coverage=} for {confidence_level=}"
+
+
+def test_conformal_arguments():
+    """Invalid arguments should raise an error, and fewer data than folds should give a fold per datum."""
+    with pytest.raises(ValueError, match="method must be one of"):
+        ConformalIsotonicRegression("bogus")
+    regressor = ConformalIsotonicRegression("jackknife+", seed=0).fit(np.arange(4.0), np.arange(4.0))
+    assert len(regressor._residuals) == 4 and regressor.predict_interval(x_new, 0.9).shape == (30, 2)
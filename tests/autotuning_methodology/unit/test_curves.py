@@ -3,7 +3,14 @@
 import numpy as np
 import pytest
 
-from autotuning_methodology.curves import Curve, get_indices_in_array, get_indices_in_distribution
+from autotuning_methodology.caching import ResultsDescription
+from autotuning_methodology.curves import (
+    Curve,
+    StochasticOptimizationAlgorithm,
+    get_confidence_interval_ranks,
+    get_indices_in_array,
+    get_indices_in_distribution,
+)
 
 
 def test_get_indices_in_distribution():
@@ -77,3 +84,304 @@ def test_fevals_find_pad_width():
     result_padding = Curve.fevals_find_pad_width(None, array, target_array)
     assert array.shape != target_array.shape
     assert expected_padding == result_padding
+
+
+def get_results_description(visualization_caches_path=None) -> ResultsDescription:
+    """Get the description of the results of a stochastic strategy, kept in memory by default."""
+    return ResultsDescription(
+        "test_curves",
+        "kernel",
+        "device",
+        "strategy",
+        "Strategy",
+        True,
+        ["time"],
+        ["time"],
+        True,
+        visualization_caches_path,
+    )
+
+
+def get_results_arrays(num_fevals=5, num_repeats=4) -> dict[str, np.ndarray]:
+    """Get results arrays where each repeat finds the value of each function evaluation."""
+    fevals = np.repeat(np.arange(1, num_fevals + 1)[:, np.newaxis], num_repeats, axis=1).astype(float)
+    arrays = dict((key, fevals) for key in get_results_description().numpy_arrays_keys)
+    arrays["objective_time_results_per_key"] = fevals[np.newaxis]
+    arrays["objective_performance_results_per_key"] = fevals[np.newaxis]
+    return arrays
+
+
+def get_curve() -> StochasticOptimizationAlgorithm:
+    """Get a curve of a stochastic strategy from results in memory."""
+    results_description = get_results_description()
+    results_description.set_results(get_results_arrays())
+    return StochasticOptimizationAlgorithm(results_description)
+
+
+def test_get_confidence_interval():
+    """The confidence interval should be the values at the ranks of the sorted non-NaN repeats."""
+    curve = get_curve()
+    rng = np.random.default_rng(0)
+    values = rng.random((50, 30))
+    lower, upper = curve.get_confidence_interval(values, 0.95)
+    lower_rank, upper_rank = get_confidence_interval_ranks(30, 0.95)
+    assert 0 < lower_rank < 15 < upper_rank < 29
+    assert np.array_equal(lower, np.sort(values, axis=1)[:, lower_rank])
+    assert np.array_equal(upper, np.sort(values, axis=1)[:, upper_rank])
+
+    # repeats that are NaN are left out, and function evaluations without values have no interval
+    values[:10, 20:] = np.nan
+    values[10] = np.nan
+    lower, upper = curve.get_confidence_interval(values, 0.95)
+    lower_rank, upper_rank = get_confidence_interval_ranks(20, 0.95)
+    assert np.array_equal(lower[:10], np.sort(values[:10, :20], axis=1)[:, lower_rank])
+    assert np.array_equal(upper[:10], np.sort(values[:10, :20], axis=1)[:, upper_rank])
+    assert np.isnan(lower[10]) and np.isnan(upper[10])
+    assert not np.any(np.isnan(lower[11:])) and not np.any(np.isnan(upper[11:]))
+    assert get_confidence_interval_ranks(1, 0.95) == (0, 0)
+
+
+def test_get_confidence_interval_nan_against_original():
+    """Without NaN repeats the confidence interval should be the original one, with NaN repeats those are left out."""
+
+    def get_original_confidence_interval(values: np.ndarray, confidence_level: float):
+        """The original implementation, with the ranks of all repeats and the NaN repeats sorted last."""
+        lower_rank, upper_rank = get_confidence_interval_ranks(values.shape[1], confidence_level)
+        values_sorted = np.sort(values, axis=1)
+        return values_sorted[:, lower_rank], values_sorted[:, upper_rank]
+
+    curve = get_curve()
+    values = np.random.default_rng(1).random((40, 25))
+    values[20:30, 22:] = np.nan  # repeats that stopped early
+    values[30:, 5:] = np.nan  # too few valid repeats to reach the original upper rank
+    lower, upper = curve.get_confidence_interval(values, 0.9)
+    original_lower, original_upper = get_original_confidence_interval(values, 0.9)
+    assert np.array_equal(lower[:20], original_lower[:20]) and np.array_equal(upper[:20], original_upper[:20])
+    for row in range(20, 40):
+        valid_values = values[row][~np.isnan(values[row])][np.newaxis]
+        valid_lower, valid_upper = get_original_confidence_interval(valid_values, 0.9)
+        assert lower[row] == valid_lower[0] and upper[row] == valid_upper[0]
+    # the original interval was shifted towards the higher values, or NaN if the rank fell on a NaN repeat
+    assert np.all(lower[20:30] < original_lower[20:30]) and np.all(upper[20:30] < original_upper[20:30])
+    assert np.all(np.isnan(original_upper[30:])) and not np.any(np.isnan(upper[30:]))
+
+
+def test_memoized_curve(tmp_path):
+    """Curves should be computed once per range, distribution and confidence level, also across persisted curves."""
+    results_description = get_results_description(tmp_path)
+    results_description.set_results(get_results_arrays())
+    curve = StochasticOptimizationAlgorithm(results_description)
+    curve.persist_memo(results_description)
+    fevals_range, dist = np.arange(1, 5), np.arange(1, 6, dtype=float)
+    fevals, curve_values, *_ = curve.get_curve_over_fevals(fevals_range, dist, confidence_level=0.95)
+    curve_values[:] = -1  # the memoized curves can not be altered through the returned curves
+    assert len(curve._memo) == 1
+    assert np.array_equal(curve.get_curve_over_fevals(fevals_range, dist, confidence_level=0.95)[0], fevals)
+    assert np.all(curve.get_curve_over_fevals(fevals_range, dist, confidence_level=0.95)[1] > 0)
+    curve.get_curve_over_fevals(fevals_range, dist, confidence_level=0.9)
+    curve.get_curve_over_fevals(np.arange(1, 4), dist, confidence_level=0.9)
+    assert len(curve._memo) == 3
+
+    # the persisted curves are written at once, and loaded for the same results only
+    assert not results_description.get_curves_cache_filepath().exists()
+    curve.write_memo()
+    assert results_description.get_curves_cache_filepath().exists()
+    curve_again = StochasticOptimizationAlgorithm(results_description)
+    curve_again.persist_memo(results_description)
+    assert curve_again._memo.keys() == curve._memo.keys()
+    results_description.set_results(get_results_arrays(num_repeats=5), overwrite=True)
+    curve_new_results = StochasticOptimizationAlgorithm(results_description)
+    curve_new_results.persist_memo(results_description)
+    assert len(curve_new_results._memo) == 0
+
+
+@pytest.mark.parametrize("fevals_range", [np.arange(1, 6), np.arange(2, 4), np.arange(0, 9), np.arange(3, 5.0)])
+def test_get_curve_over_fevals_values_in_range(fevals_range: np.ndarray):
+    """With regular fevals, the values in range should be a view equal to the values found by matching the fevals."""
+    arrays = get_results_arrays()
+    arrays["objective_performance_best_results"] = np.random.default_rng(0).random((5, 4))
+    results_description = get_results_description()
+    results_description.set_results(arrays)
+    curve = StochasticOptimizationAlgorithm(results_description)
+    assert np.array_equal(curve._fevals_counts, [5, 5, 5, 5])
+    fevals, values = curve._get_curve_over_fevals_values_in_range(fevals_range)
+    assert np.shares_memory(values, curve._y)
+    curve._fevals_counts = None  # force matching the fevals
+    fevals_matched, values_matched = curve._get_curve_over_fevals_values_in_range(fevals_range)
+    assert np.array_equal(fevals, fevals_matched[~np.isnan(fevals_matched)])
+    assert np.array_equal(values, values_matched)
+
+
+def test_get_curve_over_fevals_values_in_range_irregular():
+    """Repeats ending before the end of the range should not be found by index arithmetic."""
+    arrays = get_results_arrays()
+    arrays["fevals_results"] = np.copy(arrays["fevals_results"])
+    arrays["objective_performance_best_results"] = np.copy(arrays["objective_performance_best_results"])
+    arrays["fevals_results"][4:, 1] = np.nan
+    arrays["objective_performance_best_results"][4:, 1] = np.nan
+    results_description = get_results_description()
+    results_description.set_results(arrays)
+    curve = StochasticOptimizationAlgorithm(results_description)
+    assert np.array_equal(curve._fevals_counts, [5, 4, 5, 5])
+    assert curve._get_regular_fevals_rows_in_range(np.arange(1, 5)) == (1, 4)
+    assert curve._get_regular_fevals_rows_in_range(np.arange(1, 6)) is None
+    assert curve._get_regular_fevals_rows_in_range(np.array([1, 3, 4])) is None
+    with pytest.warns(UserWarning, match="1 of the 4 runs ended before"):
+        fevals, values = curve._get_curve_over_fevals_values_in_range(np.arange(1, 6))
+    assert values.shape == (5, 3)
+
+    # fevals that are not 1..n per repeat are not regular
+    arrays["fevals_results"][2, 0] = 2
+    results_description.set_results(arrays, overwrite=True)
+    assert StochasticOptimizationAlgorithm(results_description)._fevals_counts is None
+
+
+@pytest.mark.filterwarnings("ignore:For optimization algorithm")
+def test_curves_in_blocks(tmp_path):
+    """Curves computed over blocks of rows of memory-mapped results should match the curves computed at once."""
+    rng = np.random.default_rng(0)
+    arrays = get_results_arrays(num_fevals=30, num_repeats=8)
+    values = np.minimum.accumulate(rng.integers(1, 50, (30, 8)).astype(float), axis=0)
+    times = np.cumsum(rng.random((30, 8)), axis=0)
+    arrays["fevals_results"] = np.copy(arrays["fevals_results"])
+    for array in (arrays["fevals_results"], values, times):
+        array[25:, 2] = np.nan  # a repeat that ends early
+    arrays.update(objective_time_results=times, objective_performance_best_results=values)
+    results_description = get_results_description(tmp_path)
+    results_description.set_results(arrays)
+    curve = StochasticOptimizationAlgorithm(results_description)
+    curve_in_blocks = StochasticOptimizationAlgorithm(results_description, block_rows=4)
+    assert isinstance(curve_in_blocks._y, np.memmap)
+    assert curve_in_blocks._get_row_blocks(1, 10) == [slice(1, 5), slice(5, 9), slice(9, 10)]
+    dist = np.unique(values[~np.isnan(values)])
+
+    # over fevals, the statistics are per row, so the curves are the same
+    for fevals_range in (np.arange(1, 31), np.arange(3, 12)):
+        expected = curve.get_curve_over_fevals(fevals_range, dist, confidence_level=0.95)
+        result = curve_in_blocks.get_curve_over_fevals(fevals_range, dist, confidence_level=0.95)
+        assert all(np.array_equal(a, b) for a, b in zip(expected, result))
+    with pytest.raises(ValueError, match="consecutive"):
+        curve_in_blocks.get_curve_over_fevals(np.array([1, 3, 4]), dist)
+
+    # over time, the bagging is fitted on the values pooled in time bins, which approximates the curves in memory
+    arrays = get_results_arrays(num_fevals=300, num_repeats=20)
+    values = np.minimum.accumulate(rng.integers(1, 500, (300, 20)).astype(float), axis=0)
+    times = np.cumsum(rng.random((300, 20)), axis=0)
+    arrays["fevals_results"] = np.copy(arrays["fevals_results"])
+    for array in (arrays["fevals_results"], values, times):
+        array[250:, 2] = np.nan
+    arrays.update(objective_time_results=times, objective_performance_best_results=values)
+    results_description.set_results(arrays, overwrite=True)
+    curve = StochasticOptimizationAlgorithm(results_description)
+    curve_in_blocks = StochasticOptimizationAlgorithm(results_description, block_rows=16)
+    dist = np.unique(values[~np.isnan(values)])
+    time_range = np.linspace(np.max(times[0]), np.nanmedian(times[-1]), 50)
+    expected = curve.get_curve_over_time(time_range, dist, confidence_level=0.95)
+    result = curve_in_blocks.get_curve_over_time(time_range, dist, confidence_level=0.95)
+    assert result[0] == expected[0] and np.array_equal(result[1], expected[1])
+    for expected_values, result_values in zip(expected[2:5], result[2:5]):
+        expected_indices = get_indices_in_distribution(expected_values, dist)
+        differences = np.abs(get_indices_in_distribution(result_values, dist) - expected_indices)
+        # apart from the steep start of the curves, the indices differ about as much as with another bootstrap seed
+        assert np.max(differences[1:]) <= 2 and np.mean(differences) < 0.5
+    with pytest.raises(ValueError, match="only be computed in blocks of rows with the 'bagging'"):
+        curve_in_blocks.get_curve_over_time(time_range, dist, confidence_level=0.95, use_bagging=False)
+
+
+def test_get_prediction_interval_separated():
+    """The runs fitted at once should give the same prediction interval as fitting an isotonic curve per run."""
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.random((40, 12)), axis=0)
+    values = np.minimum.accumulate(rng.integers(0, 100, (40, 12)).astype(float), axis=0)
+    times[30:, 4] = np.nan
+    values[:3] = np.nan
+    time_range = np.linspace(1, 20, 25)
+    curve = get_curve()
+    expected = curve._get_prediction_interval_separated(times, values, time_range, 0.95, batched=False)
+    result = curve._get_prediction_interval_separated(times, values, time_range, 0.95)
+    assert result.shape == (25, 3) and np.allclose(result, expected)
+
+
+def test_get_curve_over_time_step(tmp_path):
+    """The step curves should be the median and confidence interval of the best value of each repeat at each time."""
+    rng = np.random.default_rng(0)
+    arrays = get_results_arrays(num_fevals=30, num_repeats=9)
+    values = np.minimum.accumulate(rng.integers(1, 50, (30, 9)).astype(float), axis=0)
+    times = np.cumsum(rng.random((30, 9)), axis=0)
+    values[:2, 1] = np.nan  # a repeat that finds its first value later
+    arrays.update(objective_time_results=times, objective_performance_best_results=values)
+    results_description = get_results_description(tmp_path)
+    results_description.set_results(arrays)
+    curve = StochasticOptimizationAlgorithm(results_description)
+    dist = np.unique(values[~np.isnan(values)])
+    time_range = np.linspace(0.5, np.min(times[-1]), 40)
+    _, _, curve_values, lower_err, upper_err, *_ = curve.get_curve_over_time(time_range, dist, 0.95, method="step")
+
+    # look up the best value of each repeat at each time, before its first value take its first value
+    expected = np.full((40, 9), np.nan)
+    for time_index, time in enumerate(time_range):
+        for repeat in range(9):
+            found = np.flatnonzero((times[:, repeat] <= time) & ~np.isnan(values[:, repeat]))
+            first_row = 2 if repeat == 1 else 0
+            expected[time_index, repeat] = values[found[-1] if found.shape[0] > 0 else first_row, repeat]
+    assert np.count_nonzero(time_range < times[2, 1]) > 0 and np.count_nonzero(time_range < times[0].max()) > 0
+    assert not np.any(np.isnan(expected))
+    indices = get_indices_in_distribution(expected, dist)
+    lower_index, upper_index = curve.get_confidence_interval(indices, 0.95)
+    assert np.array_equal(curve_values, dist[np.round(np.nanmedian(indices, axis=1)).astype(int)])
+    assert np.array_equal(lower_err, dist[lower_index.astype(int)])
+    assert np.array_equal(upper_err, dist[upper_index.astype(int)])
+
+    # the step curves are the same in blocks of rows, also if a repeat finds its first value in a later block
+    expected = curve.get_curve_over_time(time_range, dist, 0.95, method="step")
+    for block_rows in [2, 7]:
+        curve_in_blocks = StochasticOptimizationAlgorithm(results_description, block_rows=block_rows)
+        curve_in_blocks.time_curve_method = "step"
+        result = curve_in_blocks.get_curve_over_time(time_range, dist, 0.95)
+        assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+
+    # the step curves are memoized apart from the isotonic curves
+    curve_in_blocks.block_rows = None
+    memo_key = curve.get_memo_key(time_range, "time", dist, 0.95)
+    assert memo_key != curve_in_blocks.get_memo_key(time_range, "time", dist, 0.95)
+    with pytest.raises(ValueError, match="method must be one of"):
+        curve.get_curve_over_time(time_range, dist, 0.95, method="bogus")
+
+
+def test_get_curve_over_time_conformal(tmp_path):
+    """The conformal intervals should be selectable, memoized apart and share their fit across confidence levels."""
+    rng = np.random.default_rng(0)
+    arrays = get_results_arrays(num_fevals=30, num_repeats=9)
+    values = np.minimum.accumulate(rng.integers(1, 50, (30, 9)).astype(float), axis=0)
+    times = np.cumsum(rng.random((30, 9)), axis=0)
+    arrays.update(objective_time_results=times, objective_performance_best_results=values)
+    results_description = get_results_description(tmp_path)
+    results_description.set_results(arrays)
+    dist = np.unique(values)
+    time_range = np.linspace(0.5, np.min(times[-1]), 40)
+    curve = StochasticOptimizationAlgorithm(results_description)
+    conformal_curves = list()
+    for method in ("inductive_conformal", "jackknife+"):
+        curve.time_interval_method = method
+        _, _, curve_values, lower_err, upper_err, *_ = curve.get_curve_over_time(time_range, dist, 0.95)
+        conformal_curves.append(curve_values)
+        assert np.all(lower_err <= curve_values) and np.all(curve_values <= upper_err)
+        fit = curve._conformal_fit[1]
+        _, _, _, lower_err_narrow, upper_err_narrow, *_ = curve.get_curve_over_time(time_range, dist, 0.5)
+        assert curve._conformal_fit[1] is fit
+        assert np.all(lower_err <= lower_err_narrow) and np.all(upper_err_narrow <= upper_err)
+    # the curve is the isotonic regression of all repeats, the methods only differ in the interval around it
+    assert np.array_equal(conformal_curves[0], conformal_curves[1])
+    assert curve.get_memo_key(time_range, "time", dist, 0.95) != StochasticOptimizationAlgorithm(
+        results_description
+    ).get_memo_key(time_range, "time", dist, 0.95)
+
+    curve.time_interval_method = "bogus"
+    with pytest.raises(ValueError, match="time_interval_method must be one of"):
+        curve.get_curve_over_time(time_range, dist, 0.95)
+    curve_in_blocks = StochasticOptimizationAlgorithm(results_description, block_rows=7)
+    curve_in_blocks.time_interval_method = "jackknife+"
+    with pytest.raises(ValueError, match="with the 'bagging' time_interval_method, is 'jackknife\\+'"):
+        curve_in_blocks.get_curve_over_time(time_range, dist, 0.95)
+    # the step curves do not use the prediction interval, so they can be combined with any interval method
+    StochasticOptimizationAlgorithm.check_time_methods("step", "jackknife+", block_rows=7)
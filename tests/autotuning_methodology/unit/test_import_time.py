@@ -0,0 +1,56 @@
+"""Import time regression tests, to keep the startup of the command line interfaces low."""
+
+import os
+import subprocess
+import sys
+from importlib.resources import files
+from pathlib import Path
+
+import pytest
+
+# dependencies that must only be imported on the code paths that use them
+heavy_dependencies = ["matplotlib", "sklearn", "scipy", "yappi", "progressbar", "jsonschema", "kernel_tuner"]
+
+
+def get_import_times(module: str) -> dict[str, int]:
+    """Import a module in a new interpreter with ``-X importtime`` and get the cumulative time per imported module.
+
+    Args:
+        module: the name of the module to import.
+
+    Returns:
+        A dictionary of the imported modules to their cumulative import time in microseconds.
+    """
+    package_parent = str(Path(files("autotuning_methodology")).parent)
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([package_parent, os.environ.get("PYTHONPATH", "")]))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = dict()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "autotuning_methodology.experiments",
+        "autotuning_methodology.visualize_experiments",
+        "autotuning_methodology.ktt_conversion",
+        "autotuning_methodology.scoring",
+    ],
+)
+def test_no_heavy_imports(module: str):
+    """Importing the modules of the command line interfaces should not import the heavy dependencies."""
+    import_times = get_import_times(module)
+    assert module in import_times
+    imported = set(name.split(".")[0] for name in import_times.keys())
+    assert imported.isdisjoint(heavy_dependencies), f"{module} imports {imported.intersection(heavy_dependencies)}"
@@ -0,0 +1,82 @@
+"""Unit tests for the incremental re-execution."""
+
+import numpy as np
+
+from autotuning_methodology.incremental import (
+    get_budget,
+    get_incremental_work,
+    get_num_evaluations,
+    get_provenance,
+    is_budget_extension,
+)
+
+experiment = {"cutoff_type": "fevals", "cutoff_percentile": 0.9}
+strategy = {"name": "random", "strategy": "random_sample", "display_name": "Random", "repeats": 4}
+
+
+def get_cached(**changes) -> dict:
+    """Get the provenance of the cached results, with a budget of 10 function evaluations."""
+    return get_provenance(experiment, dict(strategy, **changes), {"max_fevals": 10})
+
+
+def never(*_):
+    """Fails if called, for lazily determined values that should not be needed."""
+    raise AssertionError("Should not be called")
+
+
+def test_get_provenance():
+    """The provenance should leave out the keys and options that do not change the results of a repeat."""
+    provenance = get_provenance(experiment, dict(strategy, ignore_cache=True, options={"max_fevals": 5, "popsize": 2}))
+    assert provenance["strategy"] == {"name": "random", "strategy": "random_sample", "options": {"popsize": 2}}
+    assert provenance["cutoff"] == {"cutoff_type": "fevals", "cutoff_percentile": 0.9, "cutoff_margin": 1.1}
+    assert provenance["repeats"] == 4 and provenance["budget"] is None
+    assert get_provenance(experiment, dict(strategy, display_name="Other")) == get_provenance(experiment, strategy)
+
+
+def test_get_incremental_work():
+    """Only the work that differs from the cached configuration should be done."""
+    current = get_provenance(experiment, strategy)
+    assert get_incremental_work(None, current, never, never) == ("reuse", range(0), None)
+    assert get_incremental_work(get_cached(), current, never, never) == ("reuse", range(0), None)
+
+    # a different number of repeats
+    action, repeats, provenance = get_incremental_work(get_cached(repeats=2), current, never, never)
+    assert action == "append" and repeats == range(2, 4) and provenance == get_cached()
+    action, repeats, provenance = get_incremental_work(get_cached(repeats=6), current, never, never)
+    assert action == "truncate" and repeats == range(0) and provenance == get_cached()
+
+    # a different strategy
+    action, repeats, provenance = get_incremental_work(
+        get_cached(options={"popsize": 3}), current, lambda: {"max_fevals": 10}, never
+    )
+    assert action == "run" and repeats == range(4) and provenance == get_cached()
+
+
+def test_get_incremental_work_budget():
+    """A different cutoff should only run again if it results in a different budget that is not a valid extension."""
+    current = get_provenance(dict(experiment, cutoff_percentile=0.95), strategy)
+    assert get_incremental_work(get_cached(), current, lambda: {"max_fevals": 10}, never)[0] == "update"
+    action, repeats, provenance = get_incremental_work(
+        get_cached(), current, lambda: {"max_fevals": 12}, lambda: np.array([10, 8, 9, 10])
+    )
+    assert action == "run" and repeats == range(4) and provenance["budget"] == {"max_fevals": 12}
+    action, _, provenance = get_incremental_work(
+        get_cached(repeats=2), current, lambda: {"max_fevals": 12}, lambda: np.array([8, 9])
+    )
+    assert action == "append" and provenance["budget"] == {"max_fevals": 12}
+
+
+def test_is_budget_extension():
+    """Only a larger budget in function evaluations that none of the cached repeats reached is an extension."""
+    assert is_budget_extension({"max_fevals": 10}, {"max_fevals": 12}, lambda: np.array([9, 7]))
+    assert not is_budget_extension({"max_fevals": 10}, {"max_fevals": 12}, lambda: np.array([9, 10]))
+    assert not is_budget_extension({"max_fevals": 10}, {"max_fevals": 8}, never)
+    assert not is_budget_extension({"time_limit": 1.0}, {"time_limit": 2.0}, never)
+
+
+def test_get_budget():
+    """The budget should be JSON serializable and count the evaluations of each repeat."""
+    assert get_budget("max_fevals", np.int64(10)) == {"max_fevals": 10}
+    assert type(get_budget("time_limit", np.float64(1.5))["time_limit"]) is float
+    fevals_results = np.array([[1, 1], [2, 2], [3, np.nan]])
+    assert get_num_evaluations(fevals_results).tolist() == [3, 2]
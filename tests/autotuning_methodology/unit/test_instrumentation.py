@@ -0,0 +1,46 @@
+"""Unit tests for the instrumentation."""
+
+import json
+from pathlib import Path
+
+from autotuning_methodology import instrumentation
+from autotuning_methodology.instrumentation import instrumented, recording, span
+
+
+@instrumented("unit.double")
+def double(x: int) -> int:
+    """Function to instrument."""
+    return x * 2
+
+
+def test_disabled():
+    """When disabled, spans should do nothing and not be recorded."""
+    assert not instrumentation.is_enabled()
+    with span("unit.disabled", attribute=1) as disabled_span:
+        assert double(2) == 4
+    assert disabled_span is span("unit.other")
+
+
+def test_recording(tmp_path: Path, capsys):
+    """Spans should be aggregated, written as JSON-lines events and summarized."""
+    events_filepath = tmp_path / "events.jsonl"
+    with recording(True, events_filepath):
+        assert instrumentation.is_enabled()
+        with span("unit.outer", kernel="mock_kernel"):
+            for x in range(3):
+                assert double(x) == x * 2
+    assert not instrumentation.is_enabled()
+
+    events = list(json.loads(line) for line in events_filepath.read_text().splitlines())
+    assert list(event["name"] for event in events) == ["unit.double"] * 3 + ["unit.outer"]
+    assert list(event["depth"] for event in events) == [1, 1, 1, 0]
+    assert events[-1]["kernel"] == "mock_kernel"
+    assert events[-1]["duration_ms"] >= sum(event["duration_ms"] for event in events[:-1])
+
+    summary = capsys.readouterr().out
+    assert "Time spent per stage" in summary
+    assert summary.index("unit.outer") < summary.index("unit.double")
+
+    # without events file and not enabled, nothing is recorded
+    with recording(False):
+        assert not instrumentation.is_enabled()
@@ -0,0 +1,91 @@
+"""Unit tests for the bootstrapped isotonic regression."""
+
+import numpy as np
+import pytest
+from sklearn.isotonic import IsotonicRegression
+
+from autotuning_methodology.isotonic import (
+    batched_isotonic_regression,
+    binned_bootstrap_isotonic_regression,
+    bootstrap_isotonic_regression,
+    get_bootstrap_samples,
+)
+
+rng = np.random.default_rng(0)
+x = np.round(rng.random(300) * 10, 1)  # with ties
+y = np.round(100 - 5 * x + rng.normal(0, 10, 300))
+x_new = np.linspace(-1, 11, 50)
+
+
+@pytest.mark.parametrize("increasing", [True, False])
+def test_bootstrap_isotonic_regression(increasing: bool):
+    """Each bootstrap should be fitted as ``IsotonicRegression`` with the samples as weights."""
+    kwargs = dict(n_bootstraps=5, max_samples=0.3, increasing=increasing, y_min=y.min(), y_max=y.max(), seed=1)
+    predictions = bootstrap_isotonic_regression(x, y, x_new, **kwargs)
+    assert predictions.shape == (5, 50)
+
+    # the samples index the data sorted by x
+    samples = get_bootstrap_samples(300, 5, 0.3, seed=1)
+    assert samples.shape == (5, 90) and np.all(np.diff(samples, axis=1) >= 0)
+    order = np.argsort(x, kind="stable")
+    for bootstrap, bootstrap_samples in enumerate(samples):
+        regressor = IsotonicRegression(increasing=increasing, y_min=y.min(), y_max=y.max(), out_of_bounds="clip")
+        regressor.fit(x, y, sample_weight=np.bincount(order[bootstrap_samples], minlength=300))
+        assert np.allclose(predictions[bootstrap], regressor.predict(x_new))
+
+    # the bootstraps are reproducible with a seed, also when fitted on multiple threads
+    assert np.array_equal(predictions, bootstrap_isotonic_regression(x, y, x_new, **kwargs, n_jobs=2))
+    assert not np.array_equal(predictions, bootstrap_isotonic_regression(x, y, x_new, **dict(kwargs, seed=2)))
+
+
+def test_isotonic_regression_interpolates():
+    """Between the fitted x-values the predictions should be interpolated as ``IsotonicRegression``, not stepped."""
+    x_fit, y_fit = np.array([0.0, 1.0, 2.0, 3.0]), np.array([1.0, 3.0, 2.0, 6.0])
+    x_between = np.array([0.25, 0.5, 1.5, 2.5, 2.75])
+    predictions = bootstrap_isotonic_regression(x_fit, y_fit, x_between, n_bootstraps=1, max_samples=100.0, seed=0)
+    regressor = IsotonicRegression(out_of_bounds="clip")
+    regressor.fit(x_fit, y_fit, sample_weight=np.bincount(get_bootstrap_samples(4, 1, 100.0, seed=0)[0], minlength=4))
+    assert np.allclose(predictions[0], regressor.predict(x_between))
+    steps = regressor.predict(x_fit)[np.searchsorted(x_fit, x_between, side="right") - 1]
+    assert not np.allclose(predictions[0], steps)
+    batched_predictions = batched_isotonic_regression(x_fit[:, np.newaxis], y_fit[:, np.newaxis], x_between)
+    assert np.allclose(batched_predictions[0], IsotonicRegression().fit(x_fit, y_fit).predict(x_between))
+
+
+def test_binned_bootstrap_isotonic_regression():
+    """The bootstraps of the data pooled per x-value should be distributed as the bootstraps of the data."""
+    x_bins, data_bins = np.unique(x, return_inverse=True)
+    counts = np.bincount(data_bins)
+    y_means = np.bincount(data_bins, weights=y) / counts
+    y_variances = np.bincount(data_bins, weights=(y - y_means[data_bins]) ** 2) / counts
+    kwargs = dict(n_bootstraps=400, max_samples=0.3, increasing=False, y_min=y.min(), y_max=y.max(), seed=1)
+    predictions = binned_bootstrap_isotonic_regression(x_bins, counts, y_means, y_variances, x_new, **kwargs)
+    assert predictions.shape == (400, 50)
+    expected = bootstrap_isotonic_regression(x, y, x_new, **kwargs)
+    assert np.allclose(np.mean(predictions, axis=0), np.mean(expected, axis=0), atol=1.5)
+    interval = np.percentile(predictions, [2.5, 97.5], axis=0)
+    assert np.allclose(interval, np.percentile(expected, [2.5, 97.5], axis=0), atol=5)
+
+    # the bootstraps are reproducible with a seed, also when fitted on multiple threads, and skip empty bins
+    bins = (x_bins, counts, y_means, y_variances)
+    assert np.array_equal(predictions, binned_bootstrap_isotonic_regression(*bins, x_new, **kwargs, n_jobs=2))
+    empty_bins = tuple(np.insert(array, 3, 0.0) for array in bins)
+    assert np.array_equal(predictions, binned_bootstrap_isotonic_regression(*empty_bins, x_new, **kwargs))
+
+
+@pytest.mark.parametrize("increasing", [True, False])
+def test_batched_isotonic_regression(increasing: bool):
+    """Each run should be fitted as ``IsotonicRegression`` to its data that is not NaN."""
+    runs_x, runs_y = x.reshape(30, 10), y.reshape(30, 10)
+    runs_x[20:, 3] = np.nan  # a run with less data
+    runs_y[::2, 5] = np.nan
+    predictions = batched_isotonic_regression(runs_x, runs_y, x_new, increasing=increasing, y_min=50)
+    assert predictions.shape == (10, 50)
+    for run in range(10):
+        mask = ~np.isnan(runs_x[:, run]) & ~np.isnan(runs_y[:, run])
+        regressor = IsotonicRegression(increasing=increasing, y_min=50, out_of_bounds="clip")
+        regressor.fit(runs_x[mask, run], runs_y[mask, run])
+        assert np.allclose(predictions[run], regressor.predict(x_new))
+    assert np.array_equal(predictions, batched_isotonic_regression(runs_x, runs_y, x_new, increasing, 50, n_jobs=3))
+    with pytest.raises(AssertionError, match="Every run"):
+        batched_isotonic_regression(np.full((3, 2), np.nan), np.ones((3, 2)), x_new)
@@ -0,0 +1,205 @@
+"""Unit tests for the KTT conversion."""
+
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from autotuning_methodology.ktt_conversion import (
+    JSONStreamReader,
+    convert_ktt_to_kerneltuner_cache,
+    get_args_from_cli,
+    get_ktt_columns,
+    get_param_mapping_plan,
+    ktt_param_mapping,
+    read_ktt_output,
+)
+
+param_names = ["BETWEEN_METHOD", "BLOCK_SIZE_X", "TILE_SIZE", "USE_METHOD", "VERTICES"]
+configurations = [[0, 32, 1, 0, 600000], [1, 32, 1, 0, 600000], [0, 64, 2, 1, 600000]]
+
+
+def get_ktt_data(statuses: list[str]) -> dict:
+    """Create a minimal KTT output for the pnpoly kernel."""
+    results = list()
+    for index, (configuration, status) in enumerate(zip(configurations, statuses)):
+        results.append(
+            {
+                "KernelName": "pnpoly",
+                "Status": status,
+                "Configuration": list({"Name": n, "Value": v} for n, v in zip(param_names, configuration)),
+                "ComputationResults": [{"Duration": 1500 * (index + 1)}] if status == "Ok" else [],
+            }
+        )
+    return {"Metadata": {"Device": "NVIDIA GeForce RTX 2080", "TimeUnit": "Microseconds"}, "Results": results}
+
+
+def test_param_mapping_plan():
+    """The compiled plan should give the same result per configuration and per column."""
+    plan = get_param_mapping_plan("pnpoly", param_names)
+    assert plan.param_names == ["between_method", "block_size_x", "tile_size", "use_method"]
+    assert plan.map_configuration(dict(zip(param_names, configurations[2]))) == {
+        "between_method": 0,
+        "block_size_x": 64,
+        "tile_size": 2,
+        "use_method": 1,
+    }
+    columns = get_ktt_columns(get_ktt_data(["Ok"] * 3)["Results"])
+    assert list(plan.get_cache_keys(columns)) == ["0,32,1,0", "1,32,1,0", "0,64,2,1"]
+    assert get_param_mapping_plan("unknown_kernel", param_names) is None
+
+    # each column keeps the type of its values, so that integers are not cast to the floats of other parameters
+    ktt_data = get_ktt_data(["Ok"] * 3)
+    ktt_data["Results"][1]["Configuration"][2]["Value"] = 0.5
+    columns = get_ktt_columns(ktt_data["Results"])
+    assert list(plan.get_cache_keys(columns)) == ["0,32,1,0", "1,32,0.5,0", "0,64,2,1"]
+
+    # constants should be filled in for every configuration
+    columns = dict((name, np.array([1, 2])) for name in ktt_param_mapping["convolution"])
+    plan = get_param_mapping_plan("convolution", list(columns.keys()))
+    assert list(plan.get_cache_keys(columns)) == ["1,1,15,15,1,1,1,1", "2,2,15,15,2,2,2,2"]
+
+
+def test_convert_ktt_to_kerneltuner_cache(tmp_path: Path):
+    """The Kernel Tuner cachefile should be rewritten with the KTT objective values."""
+    ktt_filepath = tmp_path / "ktt.json"
+    ktt_filepath.write_text(json.dumps(get_ktt_data(["Ok", "DeviceLimitsExceeded", "Ok"])))
+    cachefile = tmp_path / "pnpoly" / "RTX_2080.json"
+    cachefile.parent.mkdir()
+    keys = ["0,32,1,0", "1,32,1,0", "0,64,2,1"]
+    kt_param_names = ["between_method", "block_size_x", "tile_size", "use_method"]
+    kt_configs = list(dict(zip(kt_param_names, map(int, key.split(","))), time=0.5, times=[0.5]) for key in keys)
+    lines = ["{\n", '"device_name": "RTX 2080",\n', '"cache": {\n']
+    lines += list(f'"{key}": {json.dumps(kt_config)},\n' for key, kt_config in zip(keys, kt_configs))
+    lines[-1] = lines[-1].replace("},\n", "}\n")
+    lines += ["}\n", "}\n"]
+    cachefile.write_text("".join(lines))
+
+    convert_ktt_to_kerneltuner_cache(ktt_filepath, tmp_path)
+    cache = json.loads(cachefile.read_text())["cache"]
+    assert cache["0,32,1,0"]["time"] == 1.5
+    assert cache["1,32,1,0"]["time"] == "CompilationFailedConfig"
+    assert cache["0,64,2,1"]["time"] == 4.5
+    assert cache["0,64,2,1"]["times"] == [0.5]
+    assert list(tmp_path.glob("pnpoly/*")) == [cachefile]
+
+    # a configuration that is not in the KTT output should leave the cachefile untouched
+    cachefile.write_text("".join(lines).replace("0,64,2,1", "0,64,4,1"))
+    with pytest.raises(KeyError, match="not in KTT output"):
+        convert_ktt_to_kerneltuner_cache(ktt_filepath, tmp_path)
+    assert json.loads(cachefile.read_text())["cache"]["0,32,1,0"]["time"] == 0.5
+    assert list(tmp_path.glob("pnpoly/*")) == [cachefile]
+
+    # as should a configuration without a parameter, or with another value than the KTT configuration
+    cachefile.write_text("".join(lines).replace('"tile_size": 2, ', ""))
+    with pytest.raises(KeyError, match="Parameter tile_size of configuration 0,64,2,1"):
+        convert_ktt_to_kerneltuner_cache(ktt_filepath, tmp_path)
+    cachefile.write_text("".join(lines).replace('"block_size_x": 64', '"block_size_x": 32'))
+    with pytest.raises(KeyError, match="Parameter block_size_x of configuration 0,64,2,1"):
+        convert_ktt_to_kerneltuner_cache(ktt_filepath, tmp_path)
+    assert json.loads(cachefile.read_text())["cache"]["0,32,1,0"]["time"] == 0.5
+
+    # the CLI accepts both a single file and a folder of KTT outputs
+    assert get_args_from_cli([str(ktt_filepath), str(tmp_path)]) == ([ktt_filepath], tmp_path)
+    assert get_args_from_cli([str(tmp_path), str(tmp_path)])[0] == [ktt_filepath]
+
+
+def test_json_stream_reader():
+    """The reader should decode values across reads and copy all but the replaced values to the output."""
+    text = '{"a": 12345, "b": [1.5, "x,y", {"c": null}], "d": {"e": [], "f": true}}\n'
+    fp_out = io.StringIO()
+    reader = JSONStreamReader(io.StringIO(text), fp_out, chunk_size=3)
+    keys = list()
+    for key in reader.iter_members():
+        keys.append(key)
+        if key == "b":
+            items = list()
+            for _ in reader.iter_items():
+                items.append(reader.decode())
+            assert items == [1.5, "x,y", {"c": None}]
+        elif key == "d":
+            reader.replace(lambda value: json.dumps(dict(value, f=False)))
+        else:
+            assert reader.decode() == 12345
+    reader.finish()
+    assert keys == ["a", "b", "d"]
+    assert fp_out.getvalue() == text.replace("true", "false")
+
+    # objects may be left open at the end of the file, as in a Kernel Tuner cachefile that is being written to
+    reader = JSONStreamReader(io.StringIO('{"a": {"b": 1},\n"c": 2,'), chunk_size=4)
+    assert list((key, reader.decode()) for key in reader.iter_members()) == [("a", {"b": 1}), ("c", 2)]
+
+    # invalid JSON should raise a clear error
+    for invalid in ['{"a": 1 "b": 2}', '{"a": [1, 2}', '{"a": {"b": 1}} {}', '{"a": tru}', "[1, 2]"]:
+        reader = JSONStreamReader(io.StringIO(invalid), chunk_size=2)
+        with pytest.raises(ValueError, match="Invalid JSON in the input at character"):
+            for _ in reader.iter_members():
+                reader.decode()
+            reader.finish()
+
+
+def test_read_ktt_output(tmp_path: Path):
+    """Only the parameter values and objective values of the KTT output should be kept."""
+    ktt_data = get_ktt_data(["Ok", "ComputationFailed", "Ok"])
+    ktt_data["Results"][0]["ProfilingData"] = {"Counters": list(range(100))}
+    ktt_filepath = tmp_path / "ktt.json"
+    ktt_filepath.write_text(json.dumps(ktt_data, indent=4))
+    metadata, kernel_name, columns, values = read_ktt_output(ktt_filepath)
+    assert metadata == ktt_data["Metadata"]
+    assert kernel_name == "pnpoly"
+    assert list(columns.keys()) == param_names
+    assert columns["BLOCK_SIZE_X"].tolist() == [32, 32, 64]
+    assert values.tolist() == [1.5, "RuntimeFailedConfig", 4.5]
+
+    # the metadata is needed to convert the results, so it must come first
+    ktt_filepath.write_text(json.dumps({"Results": ktt_data["Results"], "Metadata": ktt_data["Metadata"]}))
+    with pytest.raises(ValueError, match="must have its Metadata before its Results"):
+        read_ktt_output(ktt_filepath)
+    ktt_filepath.write_text(json.dumps({"Metadata": ktt_data["Metadata"], "Results": []}))
+    with pytest.raises(ValueError, match="has no results"):
+        read_ktt_output(ktt_filepath)
+
+
+@pytest.mark.parametrize("layout", ["kerneltuner", "open", "indented"])
+def test_convert_ktt_to_kerneltuner_cache_layouts(tmp_path: Path, layout: str):
+    """Cachefiles as written by Kernel Tuner, still open, or indented should all be converted."""
+    ktt_filepath = tmp_path / "ktt.json"
+    ktt_filepath.write_text(json.dumps(get_ktt_data(["Ok", "Ok", "ComputationFailed"])))
+    cachefile = tmp_path / "pnpoly" / "RTX_2080.json"
+    cachefile.parent.mkdir()
+    keys = ["0,32,1,0", "1,32,1,0", "0,64,2,1"]
+    kt_param_names = ["between_method", "block_size_x", "tile_size", "use_method"]
+    cache = dict((key, dict(zip(kt_param_names, map(int, key.split(","))), time=0.5)) for key in keys)
+    header = {"device_name": "RTX 2080", "tune_params": {"block_size_x": [32, 64]}, "cache": {}}
+    if layout == "indented":
+        text = json.dumps(dict(header, cache=cache), indent=4)
+    else:
+        # as in ``kernel_tuner.util.process_cache`` and ``store_cache``, closed by ``close_cache``
+        text = json.dumps(header, indent="")[:-3]
+        text += "".join("\n" + json.dumps({key: kt_config})[1:-1] + "," for key, kt_config in cache.items())
+        if layout == "kerneltuner":
+            text = text[:-1] + "}\n}"
+    cachefile.write_text(text)
+
+    convert_ktt_to_kerneltuner_cache(ktt_filepath, tmp_path)
+    converted_text = cachefile.read_text()
+    if layout == "open":
+        converted_text = converted_text[:-1] + "}\n}"
+    converted_cache = json.loads(converted_text)["cache"]
+    assert list(config["time"] for config in converted_cache.values()) == [1.5, 3.0, "RuntimeFailedConfig"]
+    assert converted_cache["0,64,2,1"]["block_size_x"] == 64
+    if layout == "indented":
+        # the configurations are written on a single line, the rest is kept
+        assert json.loads(converted_text)["tune_params"] == header["tune_params"]
+    else:
+        # only the objective values should have changed
+        expected_text = text.replace('"time": 0.5', '"time": 1.5', 1).replace('"time": 0.5', '"time": 3.0', 1)
+        assert cachefile.read_text() == expected_text.replace('"time": 0.5', '"time": "RuntimeFailedConfig"', 1)
+
+    # a cachefile without a cache should raise a clear error and be left untouched
+    cachefile.write_text(json.dumps({"device_name": "RTX 2080"}))
+    with pytest.raises(ValueError, match="has no cache"):
+        convert_ktt_to_kerneltuner_cache(ktt_filepath, tmp_path)
+    assert list(tmp_path.glob("pnpoly/*")) == [cachefile]
@@ -0,0 +1,59 @@
+"""Unit tests for the profiling."""
+
+from pathlib import Path
+
+import pytest
+
+from autotuning_methodology.profiling import Profiler
+
+
+def busy_inner(n: int) -> int:
+    """Function to profile that is called from another function."""
+    return sum(i * i for i in range(n))
+
+
+def busy_outer(repeats: int) -> list[int]:
+    """Function to profile that calls another function."""
+    return list(busy_inner(20000) for _ in range(repeats))
+
+
+def test_profiler(tmp_path: Path):
+    """The profile of multiple runs should be aggregated and written per strategy in each format."""
+    profiler = Profiler(tmp_path, clock_type="wall")
+    for _ in range(2):
+        with profiler.profile():
+            busy_outer(3)
+    assert profiler.num_runs == 2
+    filepaths = profiler.write("mock_GPU", "mock_kernel", "random_sample")
+    assert filepaths == [
+        tmp_path / "mock_kernel" / "mock_GPU_random_sample.prof",
+        tmp_path / "mock_kernel" / "mock_GPU_random_sample.callgrind",
+        tmp_path / "mock_kernel" / "mock_GPU_random_sample.folded",
+    ]
+    assert all(filepath.stat().st_size > 0 for filepath in filepaths)
+    assert profiler.num_runs == 0
+
+    # the inner function should only appear in stacks below the outer function
+    folded_lines = filepaths[2].read_text().splitlines()
+    inner_lines = list(line for line in folded_lines if "busy_inner" in line)
+    assert len(inner_lines) > 0
+    assert all("busy_outer" in line.split("busy_inner")[0] for line in inner_lines)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in folded_lines)
+
+    # a new strategy is profiled separately
+    with profiler.profile():
+        busy_inner(10)
+    filepaths = profiler.write("mock_GPU", "mock_kernel", "other")
+    assert "busy_outer" not in filepaths[2].read_text()
+    assert profiler.write("mock_GPU", "mock_kernel", "empty") == []
+
+    # the profiles of parts of the repeats of a strategy are written separately
+    for repeats in [range(0, 2), range(2, 4)]:
+        with profiler.profile():
+            busy_inner(10)
+        profiler.write("mock_GPU", "mock_kernel", "random_sample", repeats)
+    assert (tmp_path / "mock_kernel" / "mock_GPU_random_sample_repeats_0-1.prof").exists()
+    assert (tmp_path / "mock_kernel" / "mock_GPU_random_sample_repeats_2-3.prof").exists()
+
+    with pytest.raises(AssertionError, match="clock_type must be one of"):
+        Profiler(tmp_path, clock_type="gpu")
@@ -0,0 +1,140 @@
+"""Unit tests for the runner."""
+
+from pathlib import Path
+from shutil import copyfile
+
+import numpy as np
+import pytest
+
+from autotuning_methodology import runner
+from autotuning_methodology.runner import (
+    apply_bruteforce_objective,
+    convert_KTT_run,
+    get_import_run_filepath,
+    get_import_runs_index,
+    import_runs_from_KTT,
+    load_json,
+    tune,
+)
+from autotuning_methodology.searchspace_statistics import SearchspaceStatistics
+
+mockfiles_path = Path(__file__).parent.parent / "integration" / "mockfiles"
+kernel_name = "mocktest_kernel_convolution"
+import_run_filepath = get_import_run_filepath(
+    "ktt", "mock_GPU", kernel_name, "profile_searcher", 0, path=mockfiles_path / "import_runs"
+)
+
+
+@pytest.fixture(scope="module")
+def searchspace_stats(tmp_path_factory: pytest.TempPathFactory) -> SearchspaceStatistics:
+    """The statistics of the bruteforced searchspace of the mock kernel."""
+    bruteforced_caches_path = tmp_path_factory.mktemp("cachefiles")
+    (bruteforced_caches_path / kernel_name).mkdir()
+    copyfile(mockfiles_path / "mock_gpu.json", bruteforced_caches_path / kernel_name / "mock_gpu.json")
+    return SearchspaceStatistics(kernel_name, "mock_GPU", True, ["compilation"], ["time"], bruteforced_caches_path)
+
+
+def test_get_import_runs_index(tmp_path: Path):
+    """The index should be parsed from the filenames and updated when the directory changes."""
+    (tmp_path / "t~'ktt'd~'mock_gpu'k~'convolution's~'profile_searcher'r~0.json").touch()
+    (tmp_path / "t~'ktt'd~'mock_gpu'k~'convolution's~'profile_searcher'r~12.json").touch()
+    (tmp_path / "not_an_import_run.json").touch()
+    index = get_import_runs_index(tmp_path)
+    assert list(index.keys()) == [("ktt", "mock_gpu", "convolution", "profile_searcher")]
+    assert sorted(index[("ktt", "mock_gpu", "convolution", "profile_searcher")].keys()) == [0, 12]
+
+    # the filepath lookup is case insensitive, like the filenames
+    filepath = get_import_run_filepath("ktt", "mock_GPU", "convolution", "profile_searcher", 12, path=tmp_path)
+    assert filepath.name.endswith("r~12.json")
+    with pytest.raises(FileNotFoundError, match="No files to import found"):
+        get_import_run_filepath("ktt", "mock_GPU", "convolution", "profile_searcher", 1, path=tmp_path)
+
+    # after adding a file with the same name in a different case, the index should be rebuilt
+    (tmp_path / "t~'ktt'd~'MOCK_GPU'k~'convolution's~'profile_searcher'r~0.json").touch()
+    with pytest.raises(FileExistsError, match="there can be only one"):
+        get_import_run_filepath("ktt", "mock_GPU", "convolution", "profile_searcher", 0, path=tmp_path)
+
+
+def test_convert_KTT_run():
+    """The configurations should be mapped and the times converted to miliseconds."""
+    run_results = load_json(import_run_filepath)["Results"]
+    metadata, results, total_time_ms = convert_KTT_run(import_run_filepath, kernel_name, iterations=1)
+    assert metadata is None and len(results) == len(run_results) == 600
+
+    # the first result is valid, its KTT configuration is mapped to the Kernel Tuner parameters
+    result = results[0]
+    assert result["invalidity"] == "correct"
+    assert result["configuration"] == dict(
+        block_size_x=8,
+        block_size_y=16,
+        tile_size_x=5,
+        tile_size_y=1,
+        use_padding=1,
+        read_only=1,
+        filter_height=15,
+        filter_width=15,
+    )
+    assert np.isclose(result["measurements"][0]["value"], 1.189696)
+    assert np.allclose(result["times"]["runtimes"], [1.189696])
+    times = result["times"]
+    assert np.isclose(sum(times[key] for key in times if key != "runtimes"), (1189.696 + 1226624.764) / 1000)
+    expected_total_time = sum(attempt["TotalDuration"] + attempt["TotalOverhead"] for attempt in run_results) / 1000
+    assert total_time_ms == round(expected_total_time)
+
+    # the failed computations have no objective value
+    failed = list(result for result in results if result["invalidity"] == "runtime")
+    assert len(failed) == 4
+    assert all(result["measurements"][0]["value"] == "" and result["times"]["runtimes"] == [] for result in failed)
+
+    # without the mapping the KTT configuration is kept, and other iterations than measured use the mean
+    _, results, _ = convert_KTT_run(import_run_filepath, kernel_name, iterations=1, use_param_mapping=False)
+    assert results[0]["configuration"]["BLOCK_SIZE_X"] == 8 and len(results[0]["configuration"]) == 9
+    with pytest.warns(UserWarning, match="did not equal the actual number of iterations"):
+        _, results, _ = convert_KTT_run(import_run_filepath, kernel_name, iterations=3)
+    assert np.allclose(results[0]["times"]["runtimes"], [1.189696] * 3)
+
+
+def test_apply_bruteforce_objective(searchspace_stats: SearchspaceStatistics):
+    """The objective values of the valid results should be replaced by the bruteforced values."""
+    _, results, _ = convert_KTT_run(import_run_filepath, kernel_name, iterations=1)
+    apply_bruteforce_objective(results, searchspace_stats)
+    for result in results:
+        value = result["measurements"][0]["value"]
+        if result["invalidity"] == "correct":
+            config_string_key = ",".join(str(x) for x in result["configuration"].values())
+            assert value == searchspace_stats.get_value_in_config(config_string_key, "time")
+        else:
+            assert value == ""
+
+
+def test_import_runs_from_KTT_concurrently(searchspace_stats: SearchspaceStatistics):
+    """Runs converted in multiple processes should be the same as when converted in order in this process."""
+    strategy = dict(strategy="profile_searcher", iterations=1)
+    args = (kernel_name, "mock_GPU", strategy, searchspace_stats, [1, 0])
+    runs = import_runs_from_KTT(*args, max_workers=2, path=mockfiles_path / "import_runs")
+    assert runs == import_runs_from_KTT(*args, max_workers=1, path=mockfiles_path / "import_runs")
+    assert len(runs) == 2 and runs[0] != runs[1]
+    _, expected_results, _ = convert_KTT_run(import_run_filepath, kernel_name, iterations=1)
+    apply_bruteforce_objective(expected_results, searchspace_stats)
+    assert runs[1][1] == expected_results
+
+
+def test_tune_imports_runs_at_once(searchspace_stats: SearchspaceStatistics, monkeypatch: pytest.MonkeyPatch):
+    """Tuning imported runs should import the runs of all repeats of the strategy at once, on the first repeat."""
+    imported_run_numbers = list()
+
+    def import_runs(*args, **kwargs):
+        imported_run_numbers.append(args[4])
+        return import_runs_from_KTT(*args, **kwargs, path=mockfiles_path / "import_runs")
+
+    monkeypatch.setattr(runner, "import_runs_from_KTT", import_runs)
+    strategy = dict(name="ktt_profile_searcher", strategy="profile_searcher", iterations=1, repeats=2)
+    runs = list(
+        tune(run_number, None, kernel_name, "mock_GPU", strategy, dict(), None, searchspace_stats)
+        for run_number in [1, 0]
+    )
+    assert imported_run_numbers == [[0, 1]]
+    assert runs == import_runs_from_KTT(
+        kernel_name, "mock_GPU", strategy, searchspace_stats, [1, 0], max_workers=1, path=mockfiles_path / "import_runs"
+    )
+    assert len(runner._imported_runs) == 0
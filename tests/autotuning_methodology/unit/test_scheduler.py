@@ -0,0 +1,82 @@
+"""Unit tests for the scheduler."""
+
+import os
+import time
+
+import pytest
+
+from autotuning_methodology.scheduler import Task, TaskScheduler
+
+
+def add(*values: int) -> int:
+    """Task function adding its arguments and dependency results."""
+    return sum(values)
+
+
+def sleep_and_get_pid(duration: float) -> tuple[float, float, int]:
+    """Task function returning the start and end time and the process it was executed in."""
+    start = time.perf_counter()
+    time.sleep(duration)
+    return start, time.perf_counter(), os.getpid()
+
+
+def fail():
+    """Task function raising an error."""
+    raise ValueError("Task failed")
+
+
+def test_dependencies():
+    """Tasks should receive the results of their dependencies, local tasks are executed in this process."""
+    scheduler = TaskScheduler(max_workers=2)
+    a = scheduler.add(Task("a", add, (1, 2)))
+    b = scheduler.add(Task("b", add, (10,)))
+    c = scheduler.add(Task("c", add, (100,), dependencies=[a, b], local=True))
+    d = scheduler.add(Task("d", add, (), dependencies=[c]))
+    tasks = scheduler.run()
+    assert list(tasks.keys()) == ["a", "b", "c", "d"]
+    assert (a.result, b.result, c.result, d.result) == (3, 10, 113, 113)
+
+    with pytest.raises(AssertionError, match="is not in the graph"):
+        TaskScheduler(max_workers=1).add(Task("e", add, dependencies=[a]))
+    with pytest.raises(AssertionError, match="already in the graph"):
+        scheduler.add(Task("a", add))
+
+
+def test_concurrency_and_memory():
+    """Independent tasks should run concurrently, unless they do not fit in the memory budget together."""
+    scheduler = TaskScheduler(max_workers=2, memory_budget=None)
+    tasks = list(scheduler.add(Task(f"sleep{i}", sleep_and_get_pid, (0.5,), memory_estimate=100)) for i in range(2))
+    scheduler.run()
+    (start_0, end_0, _), (start_1, end_1, _) = (task.result for task in tasks)
+    assert start_1 < end_0 and start_0 < end_1
+
+    scheduler = TaskScheduler(max_workers=2, memory_budget=150)
+    tasks = list(scheduler.add(Task(f"sleep{i}", sleep_and_get_pid, (0.2,), memory_estimate=100)) for i in range(2))
+    scheduler.run()
+    (start_0, end_0, _), (start_1, end_1, _) = (task.result for task in tasks)
+    assert end_0 <= start_1 or end_1 <= start_0
+
+
+def test_failure():
+    """The exception of a failed task should be raised."""
+    scheduler = TaskScheduler(max_workers=1)
+    failing = scheduler.add(Task("fail", fail))
+    scheduler.add(Task("after", add, (1,), dependencies=[failing]))
+    with pytest.raises(ValueError, match="Task failed"):
+        scheduler.run()
+
+
+def test_priority():
+    """Of the tasks that are ready, those with the highest priority should be started first."""
+    order = list()
+    scheduler = TaskScheduler(max_workers=1)
+    first = scheduler.add(Task("first", add, (5,), local=True, priority=100))
+    scheduler.add(Task("low", order.append, ("low",), local=True, priority=1))
+    scheduler.add(Task("high", order.append, ("high",), local=True, priority=10))
+    dependent = scheduler.add(
+        Task("dependent", order.append, (), dependencies=[first], local=True, priority=lambda result: result)
+    )
+    assert list(task.name for task in scheduler.get_ready_tasks(set())) == ["first", "high", "low"]
+    scheduler.run()
+    assert order == ["high", "low", 5]
+    assert dependent.get_priority() == 5
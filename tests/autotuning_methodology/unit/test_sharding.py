@@ -0,0 +1,33 @@
+"""Unit tests for the sharding."""
+
+from argparse import ArgumentTypeError
+
+import pytest
+
+from autotuning_methodology.sharding import parse_shard, partition, split_repeats
+
+
+def test_parse_shard():
+    """Shards should be of the form 'i/N' with 0 <= i < N."""
+    assert parse_shard("0/4") == (0, 4)
+    assert parse_shard("3/4") == (3, 4)
+    for shard in ["4/4", "-1/4", "0/0", "1", "a/b"]:
+        with pytest.raises(ArgumentTypeError):
+            parse_shard(shard)
+
+
+def test_split_repeats():
+    """The repeats should be split in contiguous chunks covering all repeats."""
+    assert split_repeats(10, 3) == [range(0, 4), range(4, 7), range(7, 10)]
+    assert split_repeats(2, 4) == [range(0, 1), range(1, 2)]
+    assert split_repeats(5, 1) == [range(0, 5)]
+
+
+def test_partition():
+    """The most costly units should be spread over the shards, and every unit should be in exactly one shard."""
+    costs = [1.0, 8.0, 3.0, 4.0, 4.0, 0.0]
+    shards = partition(costs, 3)
+    assert shards == [[1], [2, 3], [0, 4, 5]]
+    assert sorted(index for shard in shards for index in shard) == list(range(len(costs)))
+    assert partition(costs, 3) == shards
+    assert partition([0.0] * 4, 2) == [[0, 2], [1, 3]]
@@ -0,0 +1,45 @@
+"""Unit tests for the parameter sweeps."""
+
+from autotuning_methodology.sweeps import expand_sweep, get_sweep_combinations
+
+options = {"method": ["ei", "poi"], "methodparams.explorationfactor": [0.01, 0.1, 1.0]}
+
+
+def test_get_sweep_combinations():
+    """A cartesian sweep should have every combination, in the order of the grid."""
+    combinations = get_sweep_combinations({"options": options})
+    assert len(combinations) == 6
+    assert combinations[0] == {"method": "ei", "methodparams.explorationfactor": 0.01}
+    assert combinations[1] == {"method": "ei", "methodparams.explorationfactor": 0.1}
+    assert combinations[-1] == {"method": "poi", "methodparams.explorationfactor": 1.0}
+
+
+def test_get_sweep_combinations_random():
+    """A random sweep should be a reproducible sample of the grid, in the order of the grid."""
+    sweep = {"type": "random", "options": options, "samples": 4, "seed": 1}
+    combinations = get_sweep_combinations(sweep)
+    grid = get_sweep_combinations({"options": options})
+    assert len(combinations) == 4 and combinations == get_sweep_combinations(sweep)
+    assert combinations == sorted(combinations, key=grid.index)
+    assert len(get_sweep_combinations(dict(sweep, samples=100))) == 6
+
+    # the grid is not materialized, so large grids can be sampled
+    large_sweep = {"type": "random", "options": dict((str(i), list(range(10))) for i in range(12)), "samples": 3}
+    assert len(get_sweep_combinations(large_sweep)) == 3
+
+
+def test_expand_sweep():
+    """Each variant should have the options of its combination set, including nested options, and a unique name."""
+    strategy = {"name": "bo", "display_name": "BO", "options": {"max_fevals": 220, "methodparams": {"zeta": 1}}}
+    assert expand_sweep(strategy) == [strategy]
+    variants = expand_sweep(dict(strategy, sweep={"options": options}))
+    assert len(variants) == 6
+    assert variants[0]["name"] == "bo_ei_0.01"
+    assert variants[0]["display_name"] == "BO (method=ei, explorationfactor=0.01)"
+    assert variants[0]["options"] == {
+        "max_fevals": 220,
+        "method": "ei",
+        "methodparams": {"zeta": 1, "explorationfactor": 0.01},
+    }
+    assert "sweep" not in variants[0]
+    assert strategy["options"] == {"max_fevals": 220, "methodparams": {"zeta": 1}}
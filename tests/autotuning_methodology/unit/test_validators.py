@@ -0,0 +1,48 @@
+"""Unit tests for the validators."""
+
+from argparse import ArgumentParser
+
+import numpy as np
+import pytest
+
+from autotuning_methodology.curves import get_indices_in_distribution
+from autotuning_methodology.validators import (
+    add_validation_arguments,
+    get_validation_level,
+    set_validation_level_from_args,
+    validates,
+    validation_level,
+)
+
+
+def test_validation_level():
+    """The tests run at the strict validation level, other levels skip the expensive checks."""
+    assert get_validation_level() == "strict"
+    assert validates("default") and validates("strict")
+    draws = np.array([[4, np.NaN, 3], [1, 2, 4.5]])
+    dist = np.array([1, 2, 4, 4, 4.5, 5])
+    with validation_level("default"):
+        assert validates("default") and not validates("strict")
+        get_indices_in_distribution(draws=draws, dist=dist)  # 3 is not in the distribution, but not checked
+    with validation_level("fast"):
+        assert not validates("default")
+    assert get_validation_level() == "strict"
+    with pytest.raises(AssertionError, match="Each value in draws should be in dist"):
+        get_indices_in_distribution(draws=draws, dist=dist)
+    with pytest.raises(ValueError, match="Unknown validation level"):
+        with validation_level("bogus"):
+            pass
+
+
+def test_validation_CLI_input():
+    """The validation level is only set if given on the CLI."""
+    CLI = ArgumentParser()
+    add_validation_arguments(CLI)
+    set_validation_level_from_args(CLI.parse_args([]))
+    assert get_validation_level() == "strict"
+    with validation_level("strict"):
+        set_validation_level_from_args(CLI.parse_args(["--validation", "fast"]))
+        assert get_validation_level() == "fast"
+    assert get_validation_level() == "strict"
+    with pytest.raises(SystemExit):
+        CLI.parse_args(["--validation", "bogus"])
@@ -0,0 +1,58 @@
+"""Unit tests for the work queue."""
+
+import os
+import time
+from pathlib import Path
+
+from autotuning_methodology.workqueue import WorkQueue
+
+
+def test_claim_and_complete(tmp_path: Path):
+    """Tasks should be claimed once each in the published order, and the queue finishes when all are done."""
+    queue = WorkQueue(tmp_path)
+    other_worker = WorkQueue(tmp_path)
+    other_worker.worker_id = "other-worker"
+    assert not queue.is_finished()
+    assert queue.publish([{"id": "b", "value": 1}, {"id": "a", "value": 2}]) == ["b", "a"]
+    assert queue.publish([{"id": "b", "value": 1}]) == list()
+
+    first = queue.claim()
+    second = other_worker.claim()
+    assert first.task["id"] == "b" and second.task["id"] == "a"
+    assert second.filepath.name.endswith("@other-worker.json")
+    assert queue.claim() is None
+    assert not queue.is_finished()
+    assert queue.complete(first) and other_worker.complete(second)
+    assert queue.get_counts() == {"pending": 0, "claimed": 0, "done": 2, "failed": 0}
+    assert queue.is_finished()
+
+    # publishing done tasks again replaces them
+    queue.set_published(False)
+    assert not queue.is_finished()
+    assert queue.publish([{"id": "a", "value": 2}]) == ["a"]
+    assert queue.get_counts() == {"pending": 1, "claimed": 0, "done": 1, "failed": 0}
+
+
+def test_retry(tmp_path: Path):
+    """Failed tasks and tasks with an expired lease should be retried until the maximum number of attempts."""
+    queue = WorkQueue(tmp_path, lease_timeout=1.0, heartbeat_interval=0.1, max_attempts=2)
+    queue.publish([{"id": "task"}])
+    claimed = queue.claim()
+    assert queue.fail(claimed, "error")
+    assert not queue.complete(claimed)
+
+    # a heartbeat keeps the lease alive
+    claimed = queue.claim()
+    assert claimed.task["attempts"] == 1 and claimed.task["error"] == "error"
+    os.utime(claimed.filepath, (time.time() - 10, time.time() - 10))
+    with queue.heartbeat(claimed):
+        time.sleep(0.3)
+    assert queue.requeue_expired() == 0
+
+    # without heartbeats, the lease expires and the task fails after the last attempt
+    os.utime(claimed.filepath, (time.time() - 10, time.time() - 10))
+    assert queue.requeue_expired() == 1
+    assert not queue.fail(claimed, "error")
+    assert queue.get_counts() == {"pending": 0, "claimed": 0, "done": 0, "failed": 1}
+    assert "expired" in queue.get_failed()[0]["error"]
+    assert queue.is_finished()